@@ -0,0 +1,24 @@
+program Cases;
+const Space = ' ';
+var i, n: integer; c: char;
+begin
+  for i := 0 to 12 do
+  begin
+    case i of
+      1: write('one');
+      2, 3: write('two-three');
+      4..6: write('four-six');
+      9: ;
+      10, 12: begin write('ten'); write('/twelve') end
+    else
+      write('other');
+    end;
+    write(Space)
+  end;
+  writeln('');
+  n := 1000;
+  case n of 7: writeln('seven'); 100: writeln('hundred'); 1000: writeln('thousand'); 99999: writeln('big'); end;
+  case n > 5 of true: writeln('yes'); false: writeln('no') end;
+  read(c);
+  case c of 'a': writeln('A'); 'b'..'d': writeln('B-D') end
+end.
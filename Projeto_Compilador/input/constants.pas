@@ -0,0 +1,26 @@
+program Consts;
+const
+  N = 5;
+  Last = N + 2;
+  Half = N / 2;
+  Greeting = 'Ola';
+  Debug = false;
+var
+  a: array[1..Last] of integer;
+  i, s: integer;
+
+function Twice(x: integer): integer;
+const K = 2;
+begin
+  Twice := x * K
+end;
+
+begin
+  for i := 1 to Last do
+    read(a[i]);
+  s := 0;
+  for i := 1 to Last do
+    s := s + a[i];
+  writeln(Greeting, ' ', s, ' ', Half, ' ', Twice(Last - 1));
+  if Debug then writeln('debug')
+end.
@@ -0,0 +1,37 @@
+program LoopSums;
+var
+    m: array[1..16] of integer;
+    n, i, j, soma, linha, traco: integer;
+    nome: string;
+begin
+    n := 4;
+    nome := 'matriz';
+    for i := 1 to n * n do
+        readln(m[i]);
+
+    { Soma de todos os elementos }
+    soma := 0;
+    for i := 1 to n * n do
+        soma := soma + m[i];
+
+    { Soma de cada linha, com a matriz guardada por linhas }
+    for i := 1 to n do
+    begin
+        linha := 0;
+        for j := 1 to n do
+            linha := linha + m[(i - 1) * n + j] * (Length(nome) - 5);
+        writeln('Linha ', i, ': ', linha);
+    end;
+
+    { Traço da matriz }
+    traco := 0;
+    i := 1;
+    while i <= n do
+    begin
+        traco := traco + m[(i - 1) * (n + 1) + 1];
+        i := i + 1;
+    end;
+
+    writeln('Soma: ', soma);
+    writeln('Traco: ', traco);
+end.
@@ -0,0 +1,37 @@
+program Matrix;
+const N = 3; M = 4;
+var a: array[1..N, 1..M] of integer;
+    b: array[1..N] of array[0..M - 1] of integer;
+    cube: array[0..1, 0..1, 0..1] of integer;
+    i, j, k, s: integer;
+
+procedure Local;
+var t: array[1..2, 1..2] of integer;
+    x, y: integer;
+begin
+  for x := 1 to 2 do
+    for y := 1 to 2 do
+      t[x][y] := x * 10 + y;
+  writeln(t[1, 1], ' ', t[1, 2], ' ', t[2, 1], ' ', t[2, 2])
+end;
+
+begin
+  for i := 1 to N do
+    for j := 1 to M do
+      a[i, j] := i * j;
+  for i := 1 to N do
+    for j := 0 to M - 1 do
+      b[i][j] := a[i, j + 1] + 1;
+  s := 0;
+  for i := 1 to N do
+    for j := 1 to M do
+      s := s + a[i][j] * b[i, j - 1];
+  writeln(s, ' ', a[2, 3], ' ', b[3, 0]);
+  for i := 0 to 1 do
+    for j := 0 to 1 do
+      for k := 0 to 1 do
+        cube[i, j, k] := i * 4 + j * 2 + k;
+  readln(a[1, 2]);
+  writeln(cube[1, 0, 1], ' ', cube[1][1][1], ' ', a[1][2]);
+  Local()
+end.
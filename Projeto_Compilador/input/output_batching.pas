@@ -0,0 +1,20 @@
+program OutputBatching;
+const Width = 3; Title = 'Times table';
+var i, j: integer;
+    done: boolean;
+begin
+  Writeln(Title, ' (', Width, ' x ', Width, ')');
+  Write('+'); Write('---'); Write('+'); Writeln('');
+  for i := 1 to Width do
+  begin
+    Write('| ');
+    for j := 1 to Width do
+    begin
+      Write(i * j, ' ')
+    end;
+    Write('|'); Writeln('')
+  end;
+  done := true;
+  Write('Rows: '); Write(Width); Write(', '); Write('done: '); Writeln(True, ' ', done, ' ', 2 * Width + 1);
+  Writeln('Width ' + 'is ', Width, '.')
+end.
@@ -0,0 +1,35 @@
+program ReadArrays;
+const N = 4;
+var a: array[1..N] of integer;
+    r: array[0..2] of real;
+    w: array[1..3] of string;
+    i, cnt, s: integer;
+
+procedure LocalRead(k: integer);
+var b: array[1..3] of integer;
+    j: integer;
+begin
+  for j := k downto 1 do
+    readln(b[j]);
+  writeln(b[1], ' ', b[2], ' ', b[3], ' ', j)
+end;
+
+begin
+  readln(cnt);
+  for i := 1 to cnt do
+  begin
+    readln(a[i])
+  end;
+  s := 0;
+  for i := 1 to cnt do
+    s := s + a[i];
+  writeln(s, ' ', i);
+  for i := 5 to cnt do
+    readln(a[i]);
+  writeln(i);
+  for i := 0 to 2 do read(r[i]);
+  writeln(r[0] + r[1] + r[2]);
+  for i := 1 to 3 do readln(w[i]);
+  writeln(w[3], w[2], w[1]);
+  LocalRead(3)
+end.
@@ -0,0 +1,40 @@
+program Records;
+const N = 3;
+var p: record x, y: integer end;
+    pts: array[1..N] of record x, y: integer; tag: char end;
+    box: record
+      corner: record x, y: integer end;
+      sides: array[0..3] of integer;
+      seen: set of 1..10
+    end;
+    i, total: integer;
+
+procedure Show;
+var q: record a: integer; b: array[1..2] of integer end;
+    k: integer;
+begin
+  q.a := 7;
+  for k := 1 to 2 do
+    q.b[k] := q.a * k;
+  writeln(q.a, ' ', q.b[1], ' ', q.b[2])
+end;
+
+begin
+  p.x := 3; p.y := 4;
+  writeln(p.x * p.x + p.y * p.y);
+  for i := 1 to N do
+  begin
+    readln(pts[i].x);
+    pts[i].y := pts[i].x * 10
+  end;
+  total := 0;
+  for i := 1 to N do
+    total := total + pts[i].x + pts[i].y;
+  writeln(total, ' ', pts[2].y);
+  box.corner.x := 1; box.corner.y := 2;
+  for i := 0 to 3 do box.sides[i] := i * i;
+  box.sides[3] := box.sides[3] + box.corner.y;
+  box.seen := [2, 4, box.corner.y + 5];
+  writeln(box.sides[3], ' ', 7 in box.seen, ' ', 3 in box.seen);
+  Show()
+end.
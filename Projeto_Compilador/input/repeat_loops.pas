@@ -0,0 +1,37 @@
+program Loops;
+var i, n, s: integer; done: boolean; x: real;
+begin
+  n := 5; i := 0; s := 0;
+  repeat
+    i := i + 1;
+    s := s + i
+  until i >= n;
+  writeln('sum ', s);
+  i := 10;
+  while i > 0 do
+    i := i - 3;
+  writeln('i ', i);
+  done := false; i := 0;
+  while not done do
+  begin
+    i := i + 1;
+    done := i = 4
+  end;
+  writeln('i ', i);
+  i := 0;
+  while i <> 7 do i := i + 1;
+  writeln(i);
+  x := 0.5; i := 0;
+  while x < 10 do begin x := x * 2; i := i + 1 end;
+  writeln(i);
+  repeat i := i + 100 until true;
+  writeln(i);
+  i := 0;
+  repeat
+    repeat i := i + 1 until i mod 3 = 0;
+    write(i, ' ')
+  until i > 10;
+  writeln('');
+  while done and (i < 20) do i := i + 1;
+  writeln(i)
+end.
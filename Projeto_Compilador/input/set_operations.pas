@@ -0,0 +1,47 @@
+program SetOperations;
+var s, t, u: set of 1..10;
+    c: set of 'a'..'z';
+    i, n: integer;
+    ok: boolean;
+
+function Count(x: set of 1..10): integer;
+var k, r: integer;
+begin
+  r := 0;
+  for k := 1 to 10 do
+    if k in x then r := r + 1;
+  Count := r
+end;
+
+begin
+  readln(n);
+  s := [1, 3..5, n];
+  t := [2..6];
+  u := s * t;
+  writeln(Count(s), ' ', Count(t), ' ', Count(u));
+  u := s + t; writeln(Count(u));
+  u := s - t; writeln(Count(u));
+  u := t - s; writeln(Count(u));
+  u := s * [1, 2, 9, 10]; writeln(Count(u));
+  u := s + [7]; writeln(Count(u));
+  u := [] ; writeln(Count(u));
+  for i := 0 to 11 do
+    if i in s then write(i, ' ');
+  writeln('');
+  c := ['a'..'e', 'x'];
+  if 'd' in c then writeln('d in c');
+  if not ('z' in c) then writeln('z not in c');
+  ok := n in [1, 2, 7];
+  writeln(ok);
+  writeln(n in [i, 3]);
+  writeln(3 in [1..5], ' ', n in [2..4]);
+  writeln(s = t, ' ', s <> t, ' ', [3, 4] <= s, ' ', s >= [1, 3], ' ', s <= t);
+  writeln(Count([1, n]));
+  u := []; t := [1, 2, 3]; i := 0;
+  while u <= t do
+  begin
+    i := i + 1;
+    u := u + [i]
+  end;
+  writeln(i, ' ', Count(u))
+end.
@@ -0,0 +1,44 @@
+program SizedTypes;
+const N = 10;
+var a: array[1..N] of integer;
+    h: array[0..255] of word;
+    m: array[1..3, 1..4] of shortint;
+    b: byte;
+    w: word;
+    l: longint;
+    x: double;
+    y: single;
+    i, j, k, s: integer;
+
+function Half(v: longint): longint;
+begin
+  Half := v div 2
+end;
+
+begin
+  for i := 1 to N do
+    a[i] := i * i;
+  for i := 2 to N do
+    a[i] := a[i] - a[i - 1];
+  s := 0;
+  for i := 1 to N do
+    s := s + a[i];
+  writeln('sum ', s);
+  for b := 0 to 255 do
+    h[b] := b * 2;
+  writeln('h ', h[255], ' b ', b);
+  for i := 1 to 3 do
+    for j := 1 to 4 do
+      m[i, j] := i * j - 6;
+  writeln('m ', m[3, 4], ' ', m[1, 1]);
+  readln(k);
+  w := k;
+  writeln('w ', w);
+  readln(b);
+  l := Half(100000);
+  x := 1.5;
+  y := x * 2;
+  writeln('b ', b, ' l ', l, ' y ', y);
+  a[k] := 7;
+  writeln('a ', a[k])
+end.
@@ -0,0 +1,16 @@
+program Strings;
+const Sep = ', ';
+var s, name, line: string;
+    i: integer;
+begin
+  readln(name);
+  s := '';
+  for i := 1 to 3 do
+    s := s + name + Sep;
+  writeln(s);
+  line := '(' + name + Sep + 'x' + ')' + '' + name;
+  writeln(line);
+  writeln('Hello ' + 'there, ' + name + '!', ' ', length(name + name));
+  write('[' + s + ']');
+  writeln('a' + 'b')
+end.
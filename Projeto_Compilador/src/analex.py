@@ -1,3 +1,4 @@
+import re
 import ply.lex as lex
 
 tokens = [
@@ -5,6 +6,7 @@ tokens = [
     'ANDTHEN',
     'ARRAY',
     'BEGIN',
+    'CASE',
     'CONST',
     'DIV',
     'DO',
@@ -22,6 +24,9 @@ tokens = [
     'ORELSE',
     'PROCEDURE',
     'PROGRAM',
+    'RECORD',
+    'REPEAT',
+    'SET',
     'THEN',
     'TO',
     'UNTIL',
@@ -61,6 +66,7 @@ tokens = [
     'SEMICOLON',
     'COLON',
     'DOT',
+    'DOTDOT',
     'EQUALS',
     'READ',
     'READLN', 
@@ -98,6 +104,7 @@ t_COMMA = r','
 t_SEMICOLON = r';'
 t_COLON = r':'
 t_DOT = r'\.'
+t_DOTDOT = r'\.\.' # a token of its own, r.f and 1..10 differ only after the first dot
 t_EQUALS = r'='
 
 # list of reserved words defined in the tokens list
@@ -331,6 +338,62 @@ def t_error(t):
     print("Illegal character '%s'" % t.value[0])
     t.lexer.skip(1)
 
+_master_lexer = None # built once per process, compiling the token regexes is slow
+
 def build_lexer():
-    lexer = lex.lex()
-    return lexer
\ No newline at end of file
+    global _master_lexer
+    if _master_lexer is None:
+        _master_lexer = lex.lex()
+    return _master_lexer.clone() # fresh input and line number, shared tables
+CHUNK_SIZE = 1 << 20 # characters read at a time by ChunkedTokenStream
+
+# comments and strings as the rules above match them; a lone opener is a comment that is not closed yet
+COMMENT_OR_STRING = re.compile(r"\'([^\\\n]|(\\.))*?\'|\{[^}]*\}|\(\*([^*]|\*+[^)])*\*+\)|(?P<opener>\{|\(\*)")
+
+# length of the longest prefix of `text` that ends between two tokens and outside comments
+def complete_prefix_length(text):
+    end = text.rfind('\n') + 1 # only comments span lines, so no token crosses a line break
+    for match in COMMENT_OR_STRING.finditer(text, 0, end):
+        if match.group('opener') is not None: # the rest belongs to a comment closed in a later chunk
+            return match.start()
+    return end
+
+class ChunkedTokenStream:
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        """
+        The tokens of a text stream, lexed a chunk at a time.
+
+        Only the current chunk is held in memory, never the whole source. A chunk
+        is cut after its last complete line, or before a comment that is not closed
+        yet. The rest waits for the next chunk. Tokens get their offset in the
+        whole stream (lexpos) and their line number, and no other position data.
+
+        :param stream: Text stream to read (an open .pas file).
+        :param chunk_size: Number of characters read at a time.
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.count = 0 # tokens produced so far
+
+    def __iter__(self):
+        lexer = build_lexer()
+        pending = "" # text read but not lexed yet
+        offset = 0 # position of `pending` in the stream
+        lineno = 1
+        at_end = False
+        while not at_end:
+            chunk = self.stream.read(self.chunk_size)
+            at_end = not chunk
+            pending += chunk
+            length = len(pending) if at_end else complete_prefix_length(pending)
+            if length == 0: # a single line or comment longer than the chunk, read more first
+                continue
+            lexer.input(pending[:length])
+            lexer.lineno = lineno
+            for token in iter(lexer.token, None):
+                token.lexpos += offset
+                self.count += 1
+                yield token
+            lineno = lexer.lineno
+            offset += length
+            pending = pending[length:]
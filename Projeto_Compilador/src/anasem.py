@@ -1,4 +1,19 @@
 from ast_nodes import *
+from set_types import MAX_SET_SIZE, set_type_name, parse_set_type, is_set_type, common_set_type
+from record_types import RECORD_TYPE, RecordLayout, FieldLayout, is_record, array_element
+from sized_types import base_type, declared_range, format_range
+
+class SemanticError(Exception):
+    def __init__(self, node, message):
+        """
+        A problem found by the semantic check, reported as "Line N: message".
+
+        :param node: The node the problem is about; its span gives the exact place in the source.
+        :param message: What is wrong, without the location.
+        """
+        super().__init__(f"{format_line_info(getattr(node, 'lineno', None))}{message}")
+        self.node = node
+        self.message = message
 
 class Symbol:
     def __init__(self,
@@ -13,7 +28,10 @@ class Symbol:
                 is_array=False,                    # true if it is an array
                 array_lower_bound=None,            # lower bound of the array (if it is an array)
                 array_element_count=None,          # number of elements in the array (if it is an array)
-                element_type=None):                # Add element_type parameter
+                element_type=None,                 # Add element_type parameter
+                record_layout=None,                # RecordLayout of a record, or of the elements of an array of records
+                element_layout=None,               # FieldLayout of the elements of an array of arrays
+                value_range=None):                 # (low, high) of a BYTE, WORD, ... variable, or of the elements of an array of them
         self.name = name
         self.sym_type = sym_type
         self.kind = kind
@@ -26,9 +44,12 @@ class Symbol:
         self.array_lower_bound = array_lower_bound
         self.array_element_count = array_element_count
         self.element_type = element_type
+        self.record_layout = record_layout
+        self.element_layout = element_layout
+        self.value_range = value_range
 
     def __str__(self):
-        return f"Symbol(name={self.name}, sym_type={self.sym_type}, kind={self.kind}, address_or_offset={self.address_or_offset}, scope_level={self.scope_level}, params_info={self.params_info}, return_type={self.return_type}, is_var_param={self.is_var_param}, is_array={self.is_array}, array_lower_bound={self.array_lower_bound}, array_element_count={self.array_element_count}, element_type={self.element_type})"
+        return f"Symbol(name={self.name}, sym_type={self.sym_type}, kind={self.kind}, address_or_offset={self.address_or_offset}, scope_level={self.scope_level}, params_info={self.params_info}, return_type={self.return_type}, is_var_param={self.is_var_param}, is_array={self.is_array}, array_lower_bound={self.array_lower_bound}, array_element_count={self.array_element_count}, element_type={self.element_type}, record_layout={self.record_layout}, element_layout={self.element_layout}, value_range={self.value_range})"
 
 class SymbolTable:
     def __init__(self, parent=None, scope_name="global"):
@@ -37,10 +58,12 @@ class SymbolTable:
         self.scope_name = scope_name                     # name of the scope (e.g., 'global', 'function_name', etc.)
         self.current_local_offset = 0                    # current offset for local variables
         self.current_param_offset = -1                   # current offset for parameters (negative to count downwards)
+        self.children = []                               # nested scopes (functions and procedures)
         if parent is None:
             self.scope_level = 0
         else:
             self.scope_level = parent.scope_level + 1
+            parent.children.append(self)
 
     # define a new symbol in the current scope
     def define(self, symbol):
@@ -57,6 +80,10 @@ class SymbolTable:
             return self.parent.resolve(name)
         return None
 
+    # number of symbols defined in this scope and every nested one
+    def symbol_count(self):
+        return len(self.symbols) + sum(child.symbol_count() for child in self.children)
+
     # get the offset for local variables (incrementing the offset)
     def get_local_var_offset(self, count=1):
         offset = self.current_local_offset
@@ -70,23 +97,167 @@ class SymbolTable:
         return offset
 
 # helper function that extracts type information from an AST node
-def extract_type_info_from_ast(type_ast_node, line_info_for_error, context_name="Variable"):
+def extract_type_info_from_ast(type_ast_node, error_node, context_name="Variable", symbol_table=None):
     is_array = isinstance(type_ast_node, ArrayType)
     symbol_type_str = None
     element_type_str = None
 
-    if is_array:
+    if record_layout_of(type_ast_node) is not None and context_name == "Parameter":
+        raise SemanticError(error_node, "Records can't be passed as parameters, pass their fields instead.")
+    if is_array and isinstance(type_ast_node.element_type, ArrayType) and context_name == "Parameter":
+        raise SemanticError(error_node, "Arrays of arrays can't be passed as parameters, pass their elements instead.")
+    if isinstance(type_ast_node, SetType):
+        symbol_type_str = check_set_type(type_ast_node, error_node, symbol_table)
+    elif isinstance(type_ast_node, RecordType):
+        symbol_type_str = RECORD_TYPE
+    elif is_array:
         symbol_type_str = "ARRAY"
-        if not isinstance(type_ast_node.element_type, str):
-            raise Exception(f"{line_info_for_error}{context_name} array element type is not a simple type string.")
-        element_type_str = type_ast_node.element_type
+        if isinstance(type_ast_node.element_type, RecordType):
+            element_type_str = RECORD_TYPE
+        elif isinstance(type_ast_node.element_type, ArrayType): # the rows of ARRAY [a..b, c..d] OF T
+            element_type_str = "ARRAY"
+        elif not isinstance(type_ast_node.element_type, str):
+            raise SemanticError(error_node, f"{context_name} array element type is not a simple type string.")
+        else:
+            element_type_str = base_type(type_ast_node.element_type)
     else:
         if not isinstance(type_ast_node, str):
-            raise Exception(f"{line_info_for_error}{context_name} type ('{type(type_ast_node)}') is not a simple type string or recognized array type.")
-        symbol_type_str = type_ast_node
+            raise SemanticError(error_node, f"{context_name} type ('{type(type_ast_node)}') is not a simple type string or recognized array type.")
+        symbol_type_str = base_type(type_ast_node) # BYTE, WORD, ... are INTEGER, SINGLE and DOUBLE are REAL
     
     return is_array, symbol_type_str, element_type_str
 
+# helper that gives the record type node of a record type or of the elements of an array type, None for other types
+def record_layout_of(type_ast_node):
+    if isinstance(type_ast_node, ArrayType):
+        type_ast_node = type_ast_node.element_type
+    return type_ast_node if isinstance(type_ast_node, RecordType) else None
+
+# helper that checks the fields of a record type (or of the elements of an array type) and returns their RecordLayout, None for other types
+def check_record_type(type_ast_node, symbol_table):
+    record_type_node = record_layout_of(type_ast_node)
+    if record_type_node is None:
+        return None
+    layout = RecordLayout()
+    for field_ast_node in record_type_node.field_list:
+        is_array_field, field_type_str, field_element_type_str = extract_type_info_from_ast(field_ast_node.field_type, field_ast_node, "Field", symbol_table)
+        check_array_bounds(field_ast_node.field_type, field_ast_node, symbol_table)
+        field_record_layout = check_record_type(field_ast_node.field_type, symbol_table)
+        for field_name_original in field_ast_node.id_list:
+            if layout.field(field_name_original): # field names are unique within a record
+                raise SemanticError(field_ast_node, f"Field '{field_name_original}' already declared in this record.")
+            layout.add_field(field_name_original, field_type_str, is_array=is_array_field,
+                             array_element_count=array_length(field_ast_node.field_type, symbol_table),
+                             element_type=field_element_type_str, record_layout=field_record_layout,
+                             element_layout=check_element_layout(field_ast_node.field_type, field_ast_node, symbol_table),
+                             value_range=declared_range(field_ast_node.field_type))
+    return layout
+
+# helper that rejects a constant value outside the range of the BYTE, WORD, ... it is assigned to
+def check_constant_in_range(expression, target_range, target_text, symbol_table):
+    if target_range is None:
+        return
+    value = evaluate_constant_expression(expression, symbol_table)
+    if isinstance(value, int) and not isinstance(value, bool) and not target_range[0] <= value <= target_range[1]:
+        raise SemanticError(expression, f"Constant {value} is out of the range {format_range(target_range)} of '{target_text}'.")
+
+# helper that describes the elements of an array of arrays (the rows of ARRAY [a..b, c..d] OF T), None for other types
+def check_element_layout(type_ast_node, error_node, symbol_table):
+    if not isinstance(type_ast_node, ArrayType) or not isinstance(type_ast_node.element_type, ArrayType):
+        return None
+    row_type = type_ast_node.element_type
+    _, row_type_str, row_element_type_str = extract_type_info_from_ast(row_type, error_node, "Variable", symbol_table)
+    return FieldLayout(None, 0, row_type_str, is_array=True,
+                       array_lower_bound=evaluate_constant_expression(row_type.index_range[0], symbol_table),
+                       array_element_count=array_length(row_type, symbol_table), element_type=row_element_type_str,
+                       record_layout=check_record_type(row_type, symbol_table),
+                       element_layout=check_element_layout(row_type, error_node, symbol_table),
+                       value_range=declared_range(row_type))
+
+# helper that gives the number of elements of an array type (bounds already checked), None for other types
+def array_length(type_ast_node, symbol_table):
+    if not isinstance(type_ast_node, ArrayType):
+        return None
+    low, high = (evaluate_constant_expression(bound, symbol_table) for bound in type_ast_node.index_range)
+    return high - low + 1
+
+# helper that checks the bounds of an array type: constant INTEGER expressions, the lower one not above the upper one
+def check_array_bounds(type_ast_node, error_node, symbol_table):
+    if not isinstance(type_ast_node, ArrayType):
+        return
+    bounds = []
+    for bound in type_ast_node.index_range:
+        semantic_check(bound, symbol_table)
+        value = evaluate_constant_expression(bound, symbol_table)
+        if value is None or isinstance(value, bool) or not isinstance(value, int):
+            raise SemanticError(bound, "Array bounds must be constant INTEGER expressions.")
+        bounds.append(value)
+    if bounds[1] < bounds[0]:
+        raise SemanticError(error_node, f"Array upper bound {bounds[1]} is less than its lower bound {bounds[0]}.")
+    check_array_bounds(type_ast_node.element_type, error_node, symbol_table) # the rows of an array of arrays
+
+# helper that checks a set type: constant ordinal bounds of one type, at most MAX_SET_SIZE elements; returns its type name
+def check_set_type(type_ast_node, error_node, symbol_table):
+    from optimizer.constant_eval import ordinal_value, ordinal_type
+
+    bounds = []
+    for bound in type_ast_node.element_range:
+        semantic_check(bound, symbol_table)
+        value = evaluate_constant_expression(bound, symbol_table)
+        bound_type = ordinal_type(value)
+        if bound_type is None:
+            raise SemanticError(bound, "Set bounds must be constant INTEGER, CHAR or BOOLEAN values.")
+        bounds.append((bound_type, ordinal_value(value)))
+    (low_type, low), (high_type, high) = bounds
+    if low_type != high_type:
+        raise SemanticError(error_node, f"Set bounds must have the same type, got {low_type} and {high_type}.")
+    if high < low:
+        raise SemanticError(error_node, "Set upper bound is less than its lower bound.")
+    if high - low + 1 > MAX_SET_SIZE: # one bit per element in a VM integer
+        raise SemanticError(error_node, f"A set holds at most {MAX_SET_SIZE} elements, this one would hold {high - low + 1}.")
+    return set_type_name(low_type, low, high)
+
+# helper that gives the ordinal type of a set element or IN operand (a one-character string literal is a CHAR), None if it has none
+def element_ordinal_type(expression, symbol_table):
+    from optimizer.constant_eval import ordinal_type
+
+    value = evaluate_constant_expression(expression, symbol_table)
+    if value is not None:
+        return ordinal_type(value)
+    expression_type = get_expression_type(expression, symbol_table)
+    return expression_type if expression_type in ('INTEGER', 'CHAR', 'BOOLEAN') else None
+
+# evaluates an expression of literals and constants declared so far, None if it is not constant
+def evaluate_constant_expression(expression, symbol_table):
+    from optimizer.constant_eval import evaluate_constant # imports the code generator, which imports this module
+
+    return evaluate_constant(expression, lambda name: symbol_table.resolve(name.lower()))
+
+# helper that checks a CASE label against the selector type and returns its ordinal value
+def case_label_value(label, selector_type, symbol_table):
+    from optimizer.constant_eval import ordinal_value, value_type
+
+    semantic_check(label, symbol_table)
+    value = evaluate_constant_expression(label, symbol_table)
+    label_type = None if value is None else value_type(value)
+    if label_type == 'STRING' and len(value) == 1: # a one-character string literal is a CHAR
+        label_type = 'CHAR'
+    if label_type != selector_type:
+        raise SemanticError(label, f"CASE labels must be constant {selector_type} values.")
+    return ordinal_value(value)
+
+# helper to create a symbol for a constant, which holds its value instead of an address
+def create_constant_symbol(name_lower, value, defining_symbol_table):
+    from optimizer.constant_eval import value_type
+
+    return Symbol(
+        name=name_lower,
+        sym_type=value_type(value),
+        kind='constant',
+        address_or_offset=value,
+        scope_level=defining_symbol_table.scope_level
+    )
+
 # helper to create a symbol for a function or procedure
 def create_callable_symbol(name_lower, kind_str, defining_symbol_table, return_type_str=None):
     return Symbol(
@@ -100,7 +271,7 @@ def create_callable_symbol(name_lower, kind_str, defining_symbol_table, return_t
     )
 
 # helper to create a symbol for a variable or parameter
-def create_variable_or_param_symbol(name_lower, symbol_data_type_str, kind_str, target_symbol_table, is_array=False, element_type_str=None, is_var_param=False):
+def create_variable_or_param_symbol(name_lower, symbol_data_type_str, kind_str, target_symbol_table, is_array=False, element_type_str=None, is_var_param=False, record_layout=None, element_layout=None, value_range=None):
     offset = None
     if kind_str == 'variable': # variable symbol
         offset = target_symbol_table.get_local_var_offset()
@@ -117,7 +288,10 @@ def create_variable_or_param_symbol(name_lower, symbol_data_type_str, kind_str,
         scope_level=target_symbol_table.scope_level,
         is_array=is_array,                                                 # true if it is an array
         element_type=element_type_str,                                     # type of the elements in the array (if it is an array)
-        is_var_param=is_var_param if kind_str == 'parameter' else False    # true if it is a VAR-parameter slot (only for parameters)
+        is_var_param=is_var_param if kind_str == 'parameter' else False,   # true if it is a VAR-parameter slot (only for parameters)
+        record_layout=record_layout,                                       # fields of a record (or of the elements of an array of records)
+        element_layout=element_layout,                                     # the rows of an array of arrays
+        value_range=value_range                                            # the values a BYTE, WORD, ... (or an array of them) holds
     )
 
 # perform semantic checks on the AST nodes for the given symbol table
@@ -139,76 +313,93 @@ def semantic_check(node, symbol_table):
         semantic_check(node.compound_statement, symbol_table) # check the compound statement in the block
 
     elif isinstance(node, ProgramHeader): # for program header node
-        prog_header_lineno = getattr(node, 'lineno', None)
-        line_info_header = format_line_info(prog_header_lineno)
         for ident_original in node.id_list: # check each identifier in the program header
             ident_lower = ident_original.lower()
             if symbol_table.resolve(ident_lower): # identifier already exists
-                raise Exception(f"{line_info_header}Identifier '{ident_original}' already declared in program header.")
+                raise SemanticError(node, f"Identifier '{ident_original}' already declared in program header.")
             symbol_table.define(Symbol(name=ident_lower, sym_type='parameter', kind='program_param', address_or_offset=0, scope_level=symbol_table.scope_level)) # define as program parameter
 
+    elif isinstance(node, ConstantDeclaration): # for constant declaration node
+        for const_ast_node in node.constant_list: # check each constant, later ones may use earlier ones
+            const_name_original = const_ast_node.name
+            const_name_lower = const_name_original.lower()
+            if symbol_table.resolve(const_name_lower): # if the name already exists
+                raise SemanticError(const_ast_node, f"Constant '{const_name_original}' already declared.")
+
+            semantic_check(const_ast_node.expression, symbol_table)
+            get_expression_type(const_ast_node.expression, symbol_table) # type check the expression
+            value = evaluate_constant_expression(const_ast_node.expression, symbol_table)
+            if value is None: # refers to variables or functions, or divides by zero
+                raise SemanticError(const_ast_node, f"The value of constant '{const_name_original}' is not a constant expression.")
+            symbol_table.define(create_constant_symbol(const_name_lower, value, symbol_table))
+
     elif isinstance(node, VariableDeclaration): # for variable declaration node
-        var_decl_group_lineno = getattr(node, 'lineno', None)
         for var_ast_node in node.variable_list: # check each variable in the declaration
-            var_decl_specific_lineno = getattr(var_ast_node, 'lineno', var_decl_group_lineno)
-            line_info_decl = format_line_info(var_decl_specific_lineno)
-
-            is_an_array_decl, symbol_type_str, symbol_element_type_str = extract_type_info_from_ast(var_ast_node.var_type, line_info_decl, "Variable")
+            is_an_array_decl, symbol_type_str, symbol_element_type_str = extract_type_info_from_ast(var_ast_node.var_type, var_ast_node, "Variable", symbol_table)
+            check_array_bounds(var_ast_node.var_type, var_ast_node, symbol_table)
+            record_layout = check_record_type(var_ast_node.var_type, symbol_table)
+            element_layout = check_element_layout(var_ast_node.var_type, var_ast_node, symbol_table)
 
             for var_name_original in var_ast_node.id_list: # check each identifier in the variable declaration
                 var_name_lower = var_name_original.lower()
                 if symbol_table.resolve(var_name_lower): # if the variable already exists
-                    raise Exception(f"{line_info_decl}Variable '{var_name_original}' already declared.")
+                    raise SemanticError(var_ast_node, f"Variable '{var_name_original}' already declared.")
                 
-                symbol = create_variable_or_param_symbol(var_name_lower, symbol_type_str, 'variable', symbol_table, is_an_array_decl, symbol_element_type_str)
+                symbol = create_variable_or_param_symbol(var_name_lower, symbol_type_str, 'variable', symbol_table, is_an_array_decl, symbol_element_type_str, record_layout=record_layout, element_layout=element_layout, value_range=declared_range(var_ast_node.var_type))
                 symbol_table.define(symbol)
 
     elif isinstance(node, AssignmentStatement): # for assignment statement node
+        if not isinstance(designator_root(node.variable), Identifier): # e.g. f(x) := 1
+            raise SemanticError(node.variable, "The left side of an assignment must be a variable, an array element or a record field.")
         semantic_check(node.variable, symbol_table) # check the variable on the left-hand side
 
-        var_name_original = node.variable.name
+        var_name_original = designator_text(node.variable)
         var_name_lower = var_name_original.lower()
-        var_symbol = symbol_table.resolve(var_name_lower)
-
-        assign_stmt_lineno = getattr(node, 'lineno', None)
-        var_ident_lineno = getattr(node.variable, 'lineno', assign_stmt_lineno)
-
-        line_info_assign = format_line_info(assign_stmt_lineno)
-        line_info_var_lhs = format_line_info(var_ident_lineno)
+        var_symbol = symbol_table.resolve(designator_root(node.variable).name.lower())
 
         declared_lhs_type = None # initialize the declared type of the LHS variable
-        if var_symbol.kind == 'variable': # if the variable is a regular variable
+        if var_symbol.kind in ('variable', 'parameter') and not isinstance(node.variable, Identifier): # an array element or a record field
+            if var_symbol.kind == 'parameter' and not var_symbol.is_var_param:
+                raise SemanticError(node.variable, f"Cannot assign to a value parameter '{var_symbol.name}'.")
+            declared_lhs_type = get_expression_type(node.variable, symbol_table)
+        elif var_symbol.kind == 'variable': # if the variable is a regular variable
             declared_lhs_type = var_symbol.sym_type
         elif var_symbol.kind == 'parameter': # if the variable is a parameter
             if var_symbol.is_var_param: # if it is a VAR parameter
                 declared_lhs_type = var_symbol.sym_type
             else:
-                raise Exception(f"{line_info_var_lhs}Cannot assign to a value parameter '{var_name_original}'.")
+                raise SemanticError(node.variable, f"Cannot assign to a value parameter '{var_name_original}'.")
         elif var_symbol.kind == 'function' and symbol_table.scope_name == var_name_lower: # if assigning to a function name in its own scope
             declared_lhs_type = var_symbol.return_type
         else: # if the variable is not assignable (e.g., constant, procedure, etc.)
-            raise Exception(
-                f"{line_info_var_lhs}Identifier '{var_name_original}' on LHS is not an assignable variable, "
+            raise SemanticError(node.variable,
+                f"Identifier '{var_name_original}' on LHS is not an assignable variable, "
                 f"VAR parameter, or function return. Kind: '{var_symbol.kind}'."
             )
 
         if declared_lhs_type is None: # if we could not determine the type of the LHS variable
-            raise Exception(f"{line_info_var_lhs}Could not determine type for LHS variable '{var_name_original}'.")
+            raise SemanticError(node.variable, f"Could not determine type for LHS variable '{var_name_original}'.")
 
         lhs_type_for_comparison = declared_lhs_type.upper()
+        if lhs_type_for_comparison == RECORD_TYPE: # no whole-record copies
+            raise SemanticError(node, f"Records are assigned field by field, '{var_name_original}' is a record.")
+        if lhs_type_for_comparison == "ARRAY" and not isinstance(node.variable, Identifier): # no copies of rows or array fields
+            raise SemanticError(node, f"Arrays are assigned element by element, '{var_name_original}' is an array.")
 
         # recursively check the expression on the RHS
         semantic_check(node.expression, symbol_table)
         rhs_type = get_expression_type(node.expression, symbol_table)
         
         compatible = (lhs_type_for_comparison == rhs_type) or \
-                    (lhs_type_for_comparison == "REAL" and rhs_type == "INTEGER") # allow INTEGER to be assigned to REAL
+                    (lhs_type_for_comparison == "REAL" and rhs_type == "INTEGER") or \
+                    common_set_type(lhs_type_for_comparison, rhs_type) == lhs_type_for_comparison # allow INTEGER to be assigned to REAL, set literals to sets
 
         if not compatible: # if the types are not compatible
-            raise Exception(
-                f"{line_info_assign}Type mismatch: Cannot assign expression of type '{rhs_type}' "
+            raise SemanticError(node,
+                f"Type mismatch: Cannot assign expression of type '{rhs_type}' "
                 f"to variable '{var_name_original}' of type '{declared_lhs_type}'."
             )
+        check_constant_in_range(node.expression, designator_info(node.variable, symbol_table).value_range, var_name_original, symbol_table)
 
     elif isinstance(node, CompoundStatement): # for compound statement node
         for stmt in node.statement_list: # check each statement in the compound statement
@@ -227,43 +418,55 @@ def semantic_check(node, symbol_table):
     elif isinstance(node, UnaryOperation): # for unary operation node
         semantic_check(node.operand, symbol_table) # check the operand of the unary operation
 
+    elif isinstance(node, SetLiteral): # for set constructor node
+        for element in node.elements: # check each element, the bounds of ranges too
+            if isinstance(element, SetRange):
+                semantic_check(element.low, symbol_table)
+                semantic_check(element.high, symbol_table)
+            else:
+                semantic_check(element, symbol_table)
+
     elif isinstance(node, ArrayAccess): # for array access node
         semantic_check(node.array, symbol_table) # check the array being accessed
         semantic_check(node.index, symbol_table) # check the index used for accessing the array
 
+    elif isinstance(node, FieldAccess): # for record field access node
+        semantic_check(node.record, symbol_table) # check the record being accessed
+        designator_info(node, symbol_table) # the record has the field
+
     elif isinstance(node, FunctionCall): # for function call node
         func_name_original = node.name
         func_name_lower = func_name_original.lower()
         symbol = symbol_table.resolve(func_name_lower)
-        
-        call_lineno = getattr(node, 'lineno', None)
-        line_info_call = format_line_info(call_lineno)
 
         if not symbol: # if the function or procedure is not found in the symbol table
-            raise Exception(f"{line_info_call}Function or Procedure '{func_name_original}' not declared.")
+            raise SemanticError(node, f"Function or Procedure '{func_name_original}' not declared.")
         if symbol.kind != 'function' and symbol.kind != 'procedure': # if the symbol is not a function or procedure
-            raise Exception(f"{line_info_call}'{func_name_original}' is not a function or procedure.")
+            raise SemanticError(node, f"'{func_name_original}' is not a function or procedure.")
         if len(node.arguments) != len(symbol.params_info): # if the number of arguments does not match the number of parameters
-            raise Exception(f"{line_info_call}Function/Procedure '{func_name_original}' expects {len(symbol.params_info)} arguments, but {len(node.arguments)} were provided.")
-        for arg in node.arguments: # check each argument in the function call
+            raise SemanticError(node, f"Function/Procedure '{func_name_original}' expects {len(symbol.params_info)} arguments, but {len(node.arguments)} were provided.")
+        for arg, param in zip(node.arguments, symbol.params_info): # check each argument in the function call
             semantic_check(arg, symbol_table)
+            if param.is_var_param and isinstance(arg, Identifier) and symbol_table.resolve(arg.name.lower()).kind == 'constant':
+                raise SemanticError(arg, f"Cannot pass constant '{arg.name}' as a VAR argument of '{func_name_original}'.")
 
     elif isinstance(node, FunctionDeclaration): # for function declaration node
         func_name_original = node.name
         func_name_lower = func_name_original.lower()
-        
-        decl_lineno = getattr(node, 'lineno', None)
-        line_info_decl = format_line_info(decl_lineno)
 
         if symbol_table.resolve(func_name_lower): # if the function is already declared
-            raise Exception(f"{line_info_decl}Identifier '{func_name_original}' already declared.")
+            raise SemanticError(node, f"Identifier '{func_name_original}' already declared.")
 
-        func_symbol = create_callable_symbol(func_name_lower, 'function', symbol_table, node.return_type) # create a symbol for the function with its return type
+        if record_layout_of(node.return_type) is not None:
+            raise SemanticError(node, f"Function '{func_name_original}' can't return a record.")
+
+        return_type_str = base_type(node.return_type)
+        func_symbol = create_callable_symbol(func_name_lower, 'function', symbol_table, return_type_str) # create a symbol for the function with its return type
         symbol_table.define(func_symbol) # define the function in the symbol table
 
         local_table = SymbolTable(parent=symbol_table, scope_name=func_name_lower) # create a new local symbol table for the function
 
-        implicit_return_var = create_variable_or_param_symbol(func_name_lower, node.return_type, 'variable',local_table)
+        implicit_return_var = create_variable_or_param_symbol(func_name_lower, return_type_str, 'variable',local_table, value_range=declared_range(node.return_type))
         local_table.define(implicit_return_var)
 
         process_parameters_semantic_check(node.parameter_list, local_table, func_symbol, func_name_original, "function") # process parameters for the function
@@ -274,11 +477,8 @@ def semantic_check(node, symbol_table):
         proc_name_original = node.name
         proc_name_lower = proc_name_original.lower()
 
-        decl_lineno = getattr(node, 'lineno', None)
-        line_info_decl = format_line_info(decl_lineno)
-
         if symbol_table.resolve(proc_name_lower): # if the procedure is already declared
-            raise Exception(f"{line_info_decl}Identifier '{proc_name_original}' already declared.")
+            raise SemanticError(node, f"Identifier '{proc_name_original}' already declared.")
 
         proc_symbol = create_callable_symbol(proc_name_lower, 'procedure', symbol_table) # same as function but without return type
         symbol_table.define(proc_symbol) # define the procedure in the symbol table
@@ -292,6 +492,14 @@ def semantic_check(node, symbol_table):
     elif isinstance(node, IOCall): # for IO call node (input/output operations)
         for arg in node.arguments: # check each argument in the IO call
             semantic_check(arg, symbol_table) # check the argument for type correctness
+            if node.operation in ('read', 'readln') and isinstance(arg, Identifier): # can't read into a constant
+                arg_symbol = symbol_table.resolve(arg.name.lower())
+                if arg_symbol.kind == 'constant':
+                    raise SemanticError(arg, f"Cannot read into constant '{arg.name}'.")
+            if isinstance(arg, (Identifier, ArrayAccess, FieldAccess)) and get_expression_type(arg, symbol_table) == RECORD_TYPE:
+                raise SemanticError(arg, f"Records are read and written field by field, '{designator_text(arg)}' is a record.")
+            if isinstance(arg, (ArrayAccess, FieldAccess)) and get_expression_type(arg, symbol_table) == "ARRAY":
+                raise SemanticError(arg, f"Arrays are read and written element by element, '{designator_text(arg)}' is an array.")
 
     elif isinstance(node, IfStatement): # for if statement node
         semantic_check(node.condition, symbol_table) # check the condition of the if statement
@@ -301,18 +509,55 @@ def semantic_check(node, symbol_table):
 
     elif isinstance(node, WhileStatement): # for while statement node
         semantic_check(node.condition, symbol_table) # check the condition of the while statement
+        condition_type = get_expression_type(node.condition, symbol_table)
+        if condition_type != 'BOOLEAN': # the loop runs while the condition is true
+            raise SemanticError(node.condition, f"WHILE condition must be BOOLEAN, got {condition_type}.")
         semantic_check(node.statement, symbol_table) # check the statement inside the while loop
 
+    elif isinstance(node, RepeatStatement): # for repeat statement node
+        semantic_check(node.statement, symbol_table) # check the statements of the loop body
+        semantic_check(node.condition, symbol_table) # check the condition after UNTIL
+        condition_type = get_expression_type(node.condition, symbol_table)
+        if condition_type != 'BOOLEAN': # the loop stops when the condition is true
+            raise SemanticError(node.condition, f"UNTIL condition must be BOOLEAN, got {condition_type}.")
+
+    elif isinstance(node, CaseStatement): # for case statement node
+        semantic_check(node.selector, symbol_table) # check the selector
+        selector_type = get_expression_type(node.selector, symbol_table)
+        if selector_type not in ('INTEGER', 'CHAR', 'BOOLEAN'): # the selector must be ordinal
+            raise SemanticError(node.selector, f"CASE selector must be INTEGER, CHAR or BOOLEAN, got {selector_type}.")
+        label_ranges = [] # (low, high, label node) of every label
+        for element in node.elements: # check the labels and the statement of each branch
+            for label in element.labels:
+                if isinstance(label, CaseRange):
+                    low = case_label_value(label.low, selector_type, symbol_table)
+                    high = case_label_value(label.high, selector_type, symbol_table)
+                    if high < low:
+                        raise SemanticError(label, "CASE label range is empty, its upper bound is below the lower one.")
+                else:
+                    low = high = case_label_value(label, selector_type, symbol_table)
+                label_ranges.append((low, high, label))
+            semantic_check(element.statement, symbol_table)
+        label_ranges.sort(key=lambda label_range: label_range[0])
+        for (_, previous_high, _), (low, _, label) in zip(label_ranges, label_ranges[1:]): # labels must not overlap
+            if low <= previous_high:
+                raise SemanticError(label, "Duplicate CASE label: its value is already used by another label.")
+        if node.else_statement: # if there is an else part
+            semantic_check(node.else_statement, symbol_table)
+
     elif isinstance(node, ForStatement): # for for statement node
         check_identifier_exists(node.control_variable, symbol_table) # check if the control variable exists
+        if symbol_table.resolve(node.control_variable.name.lower()).kind == 'constant': # the loop assigns it
+            raise SemanticError(node.control_variable, f"Constant '{node.control_variable.name}' cannot be a FOR loop control variable.")
         semantic_check(node.start_expression, symbol_table) # check the start expression of the for loop
         semantic_check(node.end_expression, symbol_table) # check the end expression of the for loop
+        control_range = symbol_table.resolve(node.control_variable.name.lower()).value_range
+        for bound in (node.start_expression, node.end_expression): # the control variable takes both values
+            check_constant_in_range(bound, control_range, node.control_variable.name, symbol_table)
         semantic_check(node.statement, symbol_table) # check the statement inside the for loop
 
     else: # if the node is of an unknown type
-        unknown_node_lineno = getattr(node, 'lineno', None) # get the line number of the unknown node
-        line_info_unknown = format_line_info(unknown_node_lineno) # format line info for the unknown node
-        raise Exception(f"{line_info_unknown}Unknown AST node type for semantic check: {type(node)}")
+        raise SemanticError(node, f"Unknown AST node type for semantic check: {type(node)}")
 
 # check if an identifier exists in the symbol table
 def check_identifier_exists(identifier_node, symbol_table):
@@ -320,47 +565,98 @@ def check_identifier_exists(identifier_node, symbol_table):
     identifier_name_original = identifier_node.name
     identifier_name_lower = identifier_name_original.lower()
     if not symbol_table.resolve(identifier_name_lower): # if the identifier is not found in the symbol table
-        ident_lineno = getattr(identifier_node, 'lineno', None) # get the line number of the identifier node
-        line_info = format_line_info(ident_lineno) # format line info for the identifier
-        raise Exception(f"{line_info}Identifier '{identifier_name_original}' not declared in this scope.")
+        raise SemanticError(identifier_node, f"Identifier '{identifier_name_original}' not declared in this scope.")
+
+# describes what a variable, array element or record field designates: its Symbol, or the FieldLayout of the field or element
+def designator_info(node, symbol_table):
+    if isinstance(node, Identifier):
+        check_identifier_exists(node, symbol_table)
+        return symbol_table.resolve(node.name.lower())
+    if isinstance(node, FieldAccess):
+        record_info = designator_info(node.record, symbol_table)
+        if not is_record(record_info): # only records have fields
+            raise SemanticError(node, f"'{designator_text(node.record)}' is not a record.")
+        field = record_info.record_layout.field(node.field)
+        if field is None:
+            raise SemanticError(node, f"Record '{designator_text(node.record)}' has no field '{node.field}'.")
+        return field
+    if isinstance(node, ArrayAccess):
+        array_info = designator_info(node.array, symbol_table)
+        if not array_info.is_array: # if the accessed variable or field is not an array
+            raise SemanticError(node, f"Identifier '{designator_text(node.array)}' is not an array or not declared.")
+        if not array_info.element_type: # if the array does not have a defined element type
+            raise SemanticError(node, f"Array '{designator_text(node.array)}' does not have a defined element type.")
+        index_type = get_expression_type(node.index, symbol_table)
+        if index_type != "INTEGER": # the index must be an INTEGER
+            raise SemanticError(node, f"Array index for '{designator_text(node.array)}' must be an INTEGER, got {index_type}.")
+        return array_element(array_info)
+    raise SemanticError(node, "Only variables, array elements and record fields can be used here.")
+
+# the source form of a variable, array element or record field for messages (indexes are left out)
+def designator_text(node):
+    if isinstance(node, ArrayAccess):
+        return f"{designator_text(node.array)}[]"
+    if isinstance(node, FieldAccess):
+        return f"{designator_text(node.record)}.{node.field}"
+    return getattr(node, 'name', type(node).__name__)
+
+# the variable at the root of an array element or record field
+def designator_root(node):
+    while isinstance(node, (ArrayAccess, FieldAccess)):
+        node = node.array if isinstance(node, ArrayAccess) else node.record
+    return node
 
 # get the type of an expression node based on the symbol table
 def get_expression_type(node, symbol_table):
-    node_lineno = getattr(node, 'lineno', None)
-    line_info = format_line_info(node_lineno)
-
     if isinstance(node, Identifier): # if the node is an identifier
         symbol = symbol_table.resolve(node.name.lower())
         if not symbol: # if the identifier is not found in the symbol table
-            raise Exception(f"{line_info}Identifier '{node.name}' not declared.")
+            raise SemanticError(node, f"Identifier '{node.name}' not declared.")
         
         if symbol.kind in ['variable', 'parameter', 'constant']: # these can be used as values in expressions
             if symbol.sym_type is None: # if the symbol has no type information
-                raise Exception(f"{line_info}Identifier '{node.name}' has no type information.")
+                raise SemanticError(node, f"Identifier '{node.name}' has no type information.")
             return symbol.sym_type.upper()
         else: # if the symbol is not a variable, parameter, or constant
-            raise Exception(f"{line_info}Identifier '{node.name}' of kind '{symbol.kind}' cannot be used as a value in an expression.")
+            raise SemanticError(node, f"Identifier '{node.name}' of kind '{symbol.kind}' cannot be used as a value in an expression.")
 
     elif isinstance(node, FunctionCall): # if the node is a function call
         func_name_lower = node.name.lower()
         symbol = symbol_table.resolve(func_name_lower)
         if not symbol: # if the function or procedure is not found in the symbol table
-            raise Exception(f"{line_info}Function or Procedure '{node.name}' not declared.")
+            raise SemanticError(node, f"Function or Procedure '{node.name}' not declared.")
         
         if symbol.kind == 'procedure': # if it's a procedure, it cannot be used in an expression
-            raise Exception(f"{line_info}Procedure '{node.name}' does not return a value and cannot be used in an expression.")
+            raise SemanticError(node, f"Procedure '{node.name}' does not return a value and cannot be used in an expression.")
         elif symbol.kind == 'function': # if it's a function, check its return type
             if symbol.return_type is None:
-                raise Exception(f"{line_info}Function '{node.name}' does not have a defined return type.")
+                raise SemanticError(node, f"Function '{node.name}' does not have a defined return type.")
             return symbol.return_type.upper()
         else: # if it's not a function or procedure
-            raise Exception(f"{line_info}'{node.name}' is not a function or procedure.")
+            raise SemanticError(node, f"'{node.name}' is not a function or procedure.")
 
     elif isinstance(node, BinaryOperation): # if the node is a binary operation
         left_type = get_expression_type(node.left, symbol_table)
         right_type = get_expression_type(node.right, symbol_table)
         op = node.operator.upper()
 
+        if op == 'IN': # set membership
+            set_parts = parse_set_type(right_type)
+            if set_parts is None:
+                raise SemanticError(node, f"Operator 'IN' needs a set on its right, got '{right_type}'.")
+            element_type = element_ordinal_type(node.left, symbol_table)
+            if element_type is None or set_parts[0] not in (None, element_type):
+                raise SemanticError(node, f"Cannot test a value of type '{left_type}' for membership in '{right_type}'.")
+            return "BOOLEAN"
+
+        if is_set_type(left_type) or is_set_type(right_type): # union, difference, intersection and comparison of sets
+            set_type = common_set_type(left_type, right_type)
+            if set_type is not None and op in ['+', '-', '*']:
+                return set_type
+            if set_type is not None and op in ['=', '<>', '<=', '>=']: # <= and >= test for subsets
+                return "BOOLEAN"
+            raise SemanticError(node, f"Operator '{node.operator}' cannot be applied to types '{left_type}' and '{right_type}'.")
+
         if op in ['+', '-', '*', '/']: # arithmetic operations
             if op == '/' and (left_type in ["INTEGER", "REAL"]) and (right_type in ["INTEGER", "REAL"]): # division
                 return "REAL"
@@ -371,13 +667,13 @@ def get_expression_type(node, symbol_table):
             elif op == '+' and left_type == "STRING" and right_type == "STRING": # string concatenation
                 return "STRING"
             else: # unsupported operation
-                raise Exception(f"{line_info}Operator '{node.operator}' cannot be applied to types '{left_type}' and '{right_type}'.")
+                raise SemanticError(node, f"Operator '{node.operator}' cannot be applied to types '{left_type}' and '{right_type}'.")
 
         elif op in ['DIV', 'MOD']: # integer division and modulus
             if left_type == "INTEGER" and right_type == "INTEGER": # both operands must be INTEGER
                 return "INTEGER"
             else: # if not both operands are INTEGER
-                raise Exception(f"{line_info}Operator '{node.operator}' requires INTEGER operands, got '{left_type}' and '{right_type}'.")
+                raise SemanticError(node, f"Operator '{node.operator}' requires INTEGER operands, got '{left_type}' and '{right_type}'.")
 
         elif op in ['=', '<>', '<', '<=', '>', '>=']: # comparison operators
             if (left_type in ["INTEGER", "REAL"] and right_type in ["INTEGER", "REAL"]) or \
@@ -385,15 +681,15 @@ def get_expression_type(node, symbol_table):
                 (left_type == "BOOLEAN" and right_type == "BOOLEAN"): # valid comparison types
                 return "BOOLEAN"
             else: # if the types are not compatible for comparison
-                raise Exception(f"{line_info}Cannot compare types '{left_type}' and '{right_type}' with operator '{node.operator}'.")
+                raise SemanticError(node, f"Cannot compare types '{left_type}' and '{right_type}' with operator '{node.operator}'.")
 
         elif op in ['AND', 'OR']: # logical operators
             if left_type == "BOOLEAN" and right_type == "BOOLEAN": # both operands must be BOOLEAN
                 return "BOOLEAN"
             else: # if not both operands are BOOLEAN
-                raise Exception(f"{line_info}Logical operator '{node.operator}' requires BOOLEAN operands, got '{left_type}' and '{right_type}'.")
+                raise SemanticError(node, f"Logical operator '{node.operator}' requires BOOLEAN operands, got '{left_type}' and '{right_type}'.")
         else: # unsupported binary operator
-            raise Exception(f"{line_info}Unsupported binary operator '{node.operator}' for type checking.")
+            raise SemanticError(node, f"Unsupported binary operator '{node.operator}' for type checking.")
 
     elif isinstance(node, UnaryOperation): # if the node is a unary operation
         operand_type = get_expression_type(node.operand, symbol_table)
@@ -403,30 +699,38 @@ def get_expression_type(node, symbol_table):
             if operand_type == "BOOLEAN": # operand must be BOOLEAN
                 return "BOOLEAN"
             else: # if the operand is not BOOLEAN
-                raise Exception(f"{line_info}Unary 'NOT' operator requires a BOOLEAN operand, got {operand_type}.")
+                raise SemanticError(node, f"Unary 'NOT' operator requires a BOOLEAN operand, got {operand_type}.")
         elif op in ['+', '-']: # arithmetic unary operators
             if operand_type == "INTEGER": # unary plus/minus on INTEGER
                 return "INTEGER"
             elif operand_type == "REAL": # unary plus/minus on REAL
                 return "REAL"
             else: # if the operand is not INTEGER or REAL
-                raise Exception(f"{line_info}Unary '{node.operator}' operator requires INTEGER or REAL operand, got {operand_type}.")
+                raise SemanticError(node, f"Unary '{node.operator}' operator requires INTEGER or REAL operand, got {operand_type}.")
         else: # unsupported unary operator
-            raise Exception(f"{line_info}Unknown unary operator '{node.operator}' for type checking.")
-
-    elif isinstance(node, ArrayAccess): # if the node is an array access
-        if not isinstance(node.array, Identifier): # array access must be on an identifier
-            raise Exception(f"{line_info}Array access must be on an identifier.")
-            
-        array_symbol = symbol_table.resolve(node.array.name.lower())
-        if not array_symbol or not array_symbol.is_array: # if the array symbol is not found or not an array
-            raise Exception(f"{line_info}Identifier '{node.array.name}' is not an array or not declared.")
-        if not array_symbol.element_type: # if the array does not have a defined element type
-            raise Exception(f"{line_info}Array '{node.array.name}' does not have a defined element type.")
-        index_type = get_expression_type(node.index, symbol_table)
-        if index_type != "INTEGER": # the index must be an INTEGER
-            raise Exception(f"{line_info}Array index for '{node.array.name}' must be an INTEGER, got {index_type}.")
-        return array_symbol.element_type.upper()
+            raise SemanticError(node, f"Unknown unary operator '{node.operator}' for type checking.")
+
+    elif isinstance(node, (ArrayAccess, FieldAccess)): # if the node is an array element or a record field
+        return designator_info(node, symbol_table).sym_type.upper()
+
+    elif isinstance(node, SetLiteral): # if the node is a set constructor, its elements decide the element type
+        from optimizer.constant_eval import ordinal_type
+
+        element_type = None
+        for element in node.elements:
+            if isinstance(element, SetRange): # ranges need constant bounds
+                bound_types = [ordinal_type(evaluate_constant_expression(bound, symbol_table)) for bound in (element.low, element.high)]
+                if None in bound_types or bound_types[0] != bound_types[1]:
+                    raise SemanticError(element, "Set ranges must have constant INTEGER, CHAR or BOOLEAN bounds of the same type.")
+                this_type = bound_types[0]
+            else:
+                this_type = element_ordinal_type(element, symbol_table)
+                if this_type is None:
+                    raise SemanticError(element, "Set elements must be INTEGER, CHAR or BOOLEAN values.")
+            if element_type not in (None, this_type):
+                raise SemanticError(element, f"Set elements must all have the same type, got {element_type} and {this_type}.")
+            element_type = this_type
+        return set_type_name(element_type)
 
     elif isinstance(node, Literal): # if the node is a generic Literal
         if hasattr(node, 'literal_type') and node.literal_type: # if the node has a literal_type attribute
@@ -438,27 +742,25 @@ def get_expression_type(node, symbol_table):
                 if isinstance(node.value, str): return "STRING" 
                 if isinstance(node.value, float): return "REAL" 
             # If literal_type is not present and value type is not recognized
-            raise Exception(f"{line_info}Literal node has no 'literal_type' or its type cannot be inferred from its value.")
+            raise SemanticError(node, "Literal node has no 'literal_type' or its type cannot be inferred from its value.")
 
     else: # if the node is of an unsupported type
-        raise Exception(f"{line_info}Cannot determine type for expression node: {type(node)}.")
+        raise SemanticError(node, f"Cannot determine type for expression node: {type(node)}.")
 
 # helper function to process parameters for functions and procedures
 def process_parameters_semantic_check(parameter_list_ast, local_table, callable_symbol, callable_name_original, callable_kind_str):
     for param_ast_node in parameter_list_ast: # param_ast_node is a ParameterDeclaration node
-        param_decl_lineno = getattr(param_ast_node, 'lineno', None)
-
         for param_name_original in param_ast_node.id_list: # param_name_original is the original name of the parameter
             param_name_lower = param_name_original.lower()
-            
-            line_info_param = format_line_info(param_decl_lineno)
 
             if local_table.resolve(param_name_lower): # parameter already defined in this scope
-                raise Exception(f"{line_info_param}Parameter '{param_name_original}' redefined in {callable_kind_str} '{callable_name_original}'.")
+                raise SemanticError(param_ast_node, f"Parameter '{param_name_original}' redefined in {callable_kind_str} '{callable_name_original}'.")
 
-            is_array_param, param_symbol_type_str, param_element_type_str = extract_type_info_from_ast(param_ast_node.param_type, line_info_param, "Parameter")
+            is_array_param, param_symbol_type_str, param_element_type_str = extract_type_info_from_ast(param_ast_node.param_type, param_ast_node, "Parameter", local_table)
+            check_array_bounds(param_ast_node.param_type, param_ast_node, local_table)
 
-            param_sym = create_variable_or_param_symbol( param_name_lower, param_symbol_type_str, 'parameter', local_table, is_array_param, param_element_type_str, param_ast_node.is_var)
+            param_sym = create_variable_or_param_symbol( param_name_lower, param_symbol_type_str, 'parameter', local_table, is_array_param, param_element_type_str, param_ast_node.is_var,
+                                                         value_range=declared_range(param_ast_node.param_type))
             local_table.define(param_sym) # define the parameter in the local symbol table
             callable_symbol.params_info.append(param_sym) # append the parameter symbol to the callable's params_info
 
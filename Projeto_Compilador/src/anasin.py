@@ -1,11 +1,89 @@
 import ply.yacc as yacc
 from analex import tokens, precedence
 from ast_nodes import *
+from source_index import token_end
+
+# --- Source spans ---
+# Every node gets the offsets of its first and last character (ASTNode.start/end) from
+# the symbols of the production that builds it; nodes that have no line number yet
+# take the one of their first token. Nonterminals that are not nodes (id lists, type
+# names) carry their span on the parser's symbol, see mark_span.
+
+def symbol_start(p, i):
+    symbol = p.slice[i]
+    value = symbol.value
+    if isinstance(value, ASTNode):
+        return value.start
+    if isinstance(value, list) and value and isinstance(value[0], ASTNode):
+        return value[0].start
+    return getattr(symbol, 'lexpos', None) # a token, or a nonterminal marked by mark_span
+
+def symbol_end(p, i):
+    symbol = p.slice[i]
+    value = symbol.value
+    if isinstance(value, ASTNode):
+        return value.end
+    if isinstance(symbol, yacc.YaccSymbol):
+        if isinstance(value, list) and value and isinstance(value[-1], ASTNode):
+            return value[-1].end
+        return getattr(symbol, 'endlexpos', None)
+    text = p.lexer.lexdata
+    if text: # the parser was given the whole source
+        return token_end(text, symbol)
+    return symbol.lexpos + len(str(symbol.value)) # lexed in chunks, the text of the token is gone
+
+def symbol_line(p, i):
+    value = p.slice[i].value
+    if isinstance(value, ASTNode):
+        return value.lineno
+    if isinstance(value, list) and value and isinstance(value[0], ASTNode):
+        return value[0].lineno
+    return getattr(p.slice[i], 'lineno', None)
+
+def located(p, node, first=1, last=None):
+    """Gives `node` the span of the symbols first..last of the production (all of them by default)."""
+    last = len(p) - 1 if last is None else last
+    node.start = symbol_start(p, first)
+    node.end = symbol_end(p, last)
+    while node.end is None and last > first: # ends with an empty statement, end with the symbol before it
+        last -= 1
+        node.end = symbol_end(p, last)
+    if node.lineno is None:
+        node.lineno = symbol_line(p, first)
+    return node
+
+# located() for the nodes built most often, which need no search for their ends
+def binary_operation(p):
+    left, right = p[1], p[3]
+    node = BinaryOperation(left=left, operator=p[2], right=right, lineno=left.lineno)
+    node.start = left.start
+    node.end = right.end
+    return node
+
+def identifier(token):
+    node = Identifier(name=token.value, lineno=token.lineno)
+    node.start = token.lexpos
+    node.end = token.lexpos + len(token.value)
+    return node
+
+def literal(p, value):
+    token = p.slice[1]
+    node = Literal(value, lineno=token.lineno)
+    node.start = token.lexpos
+    node.end = symbol_end(p, 1)
+    return node
+
+# the same for a nonterminal whose value is not a node, in the attributes PLY uses when tracking positions
+def mark_span(p):
+    result = p.slice[0]
+    result.lexpos = symbol_start(p, 1)
+    result.endlexpos = symbol_end(p, len(p) - 1)
+    result.lineno = symbol_line(p, 1)
 
 # rule for the entire program structure
 def p_program(p):
     '''program : header block DOT'''
-    p[0] = Program(header=p[1], block=p[2])
+    p[0] = located(p, Program(header=p[1], block=p[2]))
 
 # rule for the program header
 def p_header(p):
@@ -13,10 +91,10 @@ def p_header(p):
               | PROGRAM ID SEMICOLON'''
     if len(p) == 7:
         # header : PROGRAM ID LPAREN id_list RPAREN SEMICOLON
-        p[0] = ProgramHeader(name=p[2], id_list=p[4])
+        p[0] = located(p, ProgramHeader(name=p[2], id_list=p[4]))
     else:
         # | PROGRAM ID SEMICOLON
-        p[0] = ProgramHeader(name=p[2], id_list=[])
+        p[0] = located(p, ProgramHeader(name=p[2], id_list=[]))
 
 # rule for id_list
 def p_id_list(p):
@@ -26,6 +104,7 @@ def p_id_list(p):
         p[0] = p[1] + [p[3]]
     else:
         p[0] = [p[1]]
+    mark_span(p)
 
 # rule for empty production
 def p_empty(p):
@@ -35,16 +114,18 @@ def p_empty(p):
 # rule for a block
 def p_block(p):
     '''block : declarations compound_statement'''
-    p[0] = Block(declarations=p[1], compound_statement=p[2])
+    p[0] = located(p, Block(declarations=p[1], compound_statement=p[2]), 1 if p[1] else 2)
 
 # rule for declarations
 def p_declarations(p):
     '''declarations : declarations variable_declaration
+                    | declarations constant_declaration
                     | declarations function_declaration
                     | declarations procedure_declaration
                     | empty'''
     if len(p) == 3:
        # declarations : declarations variable_declaration
+       #              | declarations constant_declaration
        #              | declarations function_declaration
        #              | declarations procedure_declaration
         p[0] = p[1] + [p[2]]
@@ -56,24 +137,39 @@ def p_declarations(p):
 def p_variable_declaration(p):
     '''variable_declaration : VAR variable_list SEMICOLON'''
     variables = p[2] # p[2] is the list of Variable AST nodes
-    p[0] = VariableDeclaration(variable_list=variables)
+    p[0] = located(p, VariableDeclaration(variable_list=variables))
+
+# rule for constant declaration
+def p_constant_declaration(p):
+    '''constant_declaration : CONST constant_list'''
+    p[0] = located(p, ConstantDeclaration(constant_list=p[2]))
+
+# rule for a list of constants
+def p_constant_list(p):
+    '''constant_list : constant_list constant
+                     | constant'''
+    if len(p) == 3:
+        # constant_list : constant_list constant
+        p[0] = p[1] + [p[2]]
+    else:
+        # | constant
+        p[0] = [p[1]]
+
+# rule for each constant
+def p_constant(p):
+    '''constant : ID EQUALS expression SEMICOLON'''
+    p[0] = located(p, Constant(name=p[1], expression=p[3]))
 
 # rule for function/procedure declaration
 def p_function_declaration(p):
     '''function_declaration : FUNCTION ID parameter_list COLON type SEMICOLON block SEMICOLON'''
-    params_ast = []
-    if p[3]: # p[3] is the list of ('param', 'value'/'ref', id_list, type_node)
-        for param_data in p[3]:
-            params_ast.append(Parameter(id_list=param_data[2], param_type=param_data[3], is_var=(param_data[1] == 'ref')))
-    p[0] = FunctionDeclaration(name=p[2], parameter_list=params_ast, return_type=p[5], block=p[7])
+    params_ast = p[3] # list of Parameter nodes
+    p[0] = located(p, FunctionDeclaration(name=p[2], parameter_list=params_ast, return_type=p[5], block=p[7]))
 
 def p_procedure_declaration(p):
     '''procedure_declaration : PROCEDURE ID parameter_list SEMICOLON block SEMICOLON''' # Added SEMICOLON at the end
-    params_ast = []
-    if p[3]: # p[3] is the list of ('param', 'value'/'ref', id_list, type_node)
-        for param_data in p[3]:
-            params_ast.append(Parameter(id_list=param_data[2], param_type=param_data[3], is_var=(param_data[1] == 'ref')))
-    p[0] = ProcedureDeclaration(name=p[2], parameter_list=params_ast, block=p[5]) # equal to FunctionDeclaration but without return_type
+    params_ast = p[3] # list of Parameter nodes
+    p[0] = located(p, ProcedureDeclaration(name=p[2], parameter_list=params_ast, block=p[5])) # equal to FunctionDeclaration but without return_type
 
 # rule for a list of variables
 def p_variable_list(p):
@@ -89,7 +185,7 @@ def p_variable_list(p):
 # rule for each variable
 def p_variable(p):
     '''variable : id_list COLON type'''
-    p[0] = Variable(id_list=p[1], var_type=p[3])
+    p[0] = located(p, Variable(id_list=p[1], var_type=p[3]))
 
 # rule for type
 def p_type(p):
@@ -105,15 +201,32 @@ def p_type(p):
             | SINGLE
             | DOUBLE
             | STRING
-            | ARRAY LBRACKET NUMBER DOT DOT NUMBER RBRACKET OF type'''
+            | ARRAY LBRACKET index_range_list RBRACKET OF type
+            | SET OF expression DOTDOT expression
+            | RECORD field_list END
+            | RECORD field_list SEMICOLON END'''
     if len(p) == 2: # for simple types like INTEGER, REAL, BOOLEAN, etc.
         p[0] = p[1]
-    elif len(p) == 10: # for ARRAY type, for example: ARRAY [3..5] OF INTEGER
-        lower_bound_literal = Literal(p[3]) # assuming p[3] is a number literal for lower bound
-        upper_bound_literal = Literal(p[6]) # assuming p[6] is a number literal for upper bound
-
-        element_type_val = p[9]
-        p[0] = ArrayType(index_range=(lower_bound_literal, upper_bound_literal), element_type=element_type_val)
+        mark_span(p)
+    elif p.slice[1].type == 'ARRAY': # for ARRAY type, for example: ARRAY [3..5] OF INTEGER or ARRAY [1..MAX] OF INTEGER
+        element_type_val = p[6]
+        for index_range in reversed(p[3]): # ARRAY [1..2, 1..3] OF T is ARRAY [1..2] OF ARRAY [1..3] OF T
+            element_type_val = located(p, ArrayType(index_range=index_range, element_type=element_type_val))
+        p[0] = element_type_val
+    elif p.slice[1].type == 'SET': # for SET type, for example: SET OF 1..10 or SET OF 'a'..'z'
+        p[0] = located(p, SetType(element_range=(p[3], p[5])))
+    else: # for RECORD type, for example: RECORD x, y: INTEGER; name: STRING END
+        p[0] = located(p, RecordType(field_list=p[2]))
+
+# rule for the index ranges of an array type, a (lower, upper) pair of constant expressions each,
+# checked and evaluated by the semantic check
+def p_index_range_list(p):
+    '''index_range_list : index_range_list COMMA expression DOTDOT expression
+                        | expression DOTDOT expression'''
+    if len(p) == 6:
+        p[0] = p[1] + [(p[3], p[5])]
+    else:
+        p[0] = [(p[1], p[3])]
 
 # rule for a field_list
 def p_field_list(p):
@@ -129,7 +242,7 @@ def p_field_list(p):
 # rule for a single field
 def p_field(p):
     '''field : id_list COLON type'''
-    p[0] = ('field', p[1], p[3])
+    p[0] = located(p, Field(id_list=p[1], field_type=p[3]))
 
 # rule for a parameter_list
 def p_parameter_list(p):
@@ -159,15 +272,15 @@ def p_parameter_section(p):
                          | VAR id_list COLON type'''
     if len(p) == 4:
         # parameter_section : id_list COLON type
-        p[0] = ('param', 'value', p[1], p[3])
+        p[0] = located(p, Parameter(id_list=p[1], param_type=p[3], is_var=False))
     else:
         # | VAR id_list COLON type
-        p[0] = ('param', 'ref', p[2], p[4])
+        p[0] = located(p, Parameter(id_list=p[2], param_type=p[4], is_var=True))
 
 # rule for a compound_statement
 def p_compound_statement(p):
     '''compound_statement : BEGIN statement_list END'''
-    p[0] = CompoundStatement(statement_list=p[2])
+    p[0] = located(p, CompoundStatement(statement_list=p[2]))
 
 # rule for statement list
 def p_statement_list(p):
@@ -188,15 +301,16 @@ def p_statement(p):
                  | io_statement
                  | if_statement        
                  | while_statement  
+                 | repeat_statement
                  | for_statement       
+                 | case_statement
                  | empty'''
     p[0] = p[1]
 
-# rule for assignment statement
+# rule for assignment statement, the semantic check makes sure the target is a variable, element or field
 def p_assignment_statement(p):
-    '''assignment_statement : ID ASSIGN expression'''
-    variable_node = Identifier(name=p[1], lineno=p.lineno(1))
-    p[0] = AssignmentStatement(variable=variable_node, expression=p[3], lineno=p.lineno(2)) # Pass lineno
+    '''assignment_statement : factor ASSIGN expression'''
+    p[0] = located(p, AssignmentStatement(variable=p[1], expression=p[3], lineno=p.lineno(2))) # Pass lineno
 
 # rule for expressions
 def p_expression(p):
@@ -213,7 +327,7 @@ def p_expression(p):
          p[0] = p[1]
     else:
         # expression : expression operator additive_expression, where operator can be EQUALS, NE, LT, GT, LE, GE, IN
-        p[0] = BinaryOperation(left=p[1], operator=p[2], right=p[3])
+        p[0] = binary_operation(p)
 
 # rule for additive expressions
 def p_additive_expression(p):
@@ -227,7 +341,7 @@ def p_additive_expression(p):
          p[0] = p[1]
     else:
         # additive_expression : additive_expression operator multiplicative_expression, where operator can be PLUS, MINUS, OR, ORELSE
-        p[0] = BinaryOperation(left=p[1], operator=p[2], right=p[3])
+        p[0] = binary_operation(p)
 
 # rule for multiplicative expressions
 def p_multiplicative_expression(p):
@@ -243,7 +357,7 @@ def p_multiplicative_expression(p):
         p[0] = p[1]
     else:
         # multiplicative_expression : multiplicative_expression operator factor, where operator can be TIMES, DIVIDE, DIV, MOD, AND, ANDTHEN
-        p[0] = BinaryOperation(left=p[1], operator=p[2], right=p[3])
+        p[0] = binary_operation(p)
 
 # rule for a factor
 def p_factor(p):
@@ -253,36 +367,80 @@ def p_factor(p):
               | TRUE
               | FALSE
               | LPAREN expression RPAREN
-              | factor LBRACKET expression RBRACKET
+              | factor LBRACKET index_list RBRACKET
+              | factor DOT ID
               | ID LPAREN expression_list RPAREN
               | MINUS factor %prec UMINUS
               | NOT factor
+              | LBRACKET set_element_list RBRACKET
+              | LBRACKET RBRACKET
               '''
     if len(p) == 2:
         # factor : NUMBER | STRING | ID
-        if len(p) == 2:
-            if p.slice[1].type == 'NUMBER': # for NUMBER token
-                p[0] = Literal(p[1])
-            elif p.slice[1].type == 'STRING': # for STRING token
-                p[0] = Literal(p[1])
-            elif p.slice[1].type == 'TRUE': # for TRUE token
-                p[0] = Literal(True)
-            elif p.slice[1].type == 'FALSE': # for FALSE token
-                p[0] = Literal(False)
-            elif p.slice[1].type == 'ID': # for ID token
-                p[0] = Identifier(name=p[1], lineno=p.lineno(1))
+        token = p.slice[1]
+        if token.type == 'ID': # for ID token
+            p[0] = identifier(token)
+        elif token.type == 'NUMBER': # for NUMBER token
+            p[0] = literal(p, p[1])
+        elif token.type == 'STRING': # for STRING token
+            p[0] = literal(p, p[1])
+        elif token.type == 'TRUE': # for TRUE token
+            p[0] = literal(p, True)
+        elif token.type == 'FALSE': # for FALSE token
+            p[0] = literal(p, False)
+    elif p.slice[1].type == 'LBRACKET':
+        # | LBRACKET set_element_list RBRACKET
+        # | LBRACKET RBRACKET
+        p[0] = located(p, SetLiteral(elements=p[2] if len(p) == 4 else []))
     elif p.slice[1].type == 'LPAREN':
         # | LPAREN expression RPAREN
         p[0] = p[2]
     elif p.slice[2].type == 'LBRACKET':
-        # | factor LBRACKET expression RBRACKET
-        p[0] = ArrayAccess(array=p[1], index=p[3])
+        # | factor LBRACKET index_list RBRACKET
+        array_node = p[1]
+        for index in p[3]: # a[i, j] is a[i][j]
+            array_node = located(p, ArrayAccess(array=array_node, index=index))
+        p[0] = array_node
+    elif p.slice[2].type == 'DOT':
+        # | factor DOT ID
+        p[0] = located(p, FieldAccess(record=p[1], field=p[3]))
     elif len(p) == 5 and p.slice[1].type == 'ID' and p.slice[2].type == 'LPAREN':
         # | ID LPAREN expression_list RPAREN
-         p[0] = FunctionCall(name=p[1], arguments=p[3], lineno=p.lineno(1))
+         p[0] = located(p, FunctionCall(name=p[1], arguments=p[3], lineno=p.lineno(1)))
     elif len(p) == 3:
         # | MINUS factor %prec UMINUS
-        p[0] = UnaryOperation(operator=p[1], operand=p[2])
+        p[0] = located(p, UnaryOperation(operator=p[1], operand=p[2]))
+
+# rule for the elements of a set constructor
+def p_set_element_list(p):
+    '''set_element_list : set_element_list COMMA set_element
+                        | set_element'''
+    if len(p) == 4:
+        # set_element_list : set_element_list COMMA set_element
+        p[0] = p[1] + [p[3]]
+    else:
+        # | set_element
+        p[0] = [p[1]]
+
+# rule for each element of a set constructor
+def p_set_element(p):
+    '''set_element : expression
+                   | expression DOTDOT expression'''
+    if len(p) == 2:
+        # set_element : expression
+        p[0] = p[1]
+    else:
+        # | expression DOTDOT expression
+        p[0] = located(p, SetRange(low=p[1], high=p[3]))
+
+# rule for the indexes of an array element
+def p_index_list(p):
+    '''index_list : index_list COMMA expression
+                  | expression'''
+    if len(p) == 4:
+        p[0] = p[1] + [p[3]]
+    else:
+        p[0] = [p[1]]
 
 # rule for expression list
 def p_expression_list(p):
@@ -302,7 +460,7 @@ def p_io_statement(p):
                     | WRITELN LPAREN expression_list RPAREN
                     | READ LPAREN expression_list RPAREN
                     | READLN LPAREN expression_list RPAREN'''
-    p[0] = IOCall(operation=p[1].lower(), arguments=p[3])
+    p[0] = located(p, IOCall(operation=p[1].lower(), arguments=p[3]))
 
 # rule for IF statement
 def p_if_statement(p):
@@ -310,31 +468,98 @@ def p_if_statement(p):
                     | IF expression THEN statement'''
     if len(p) == 7:
         # if_statement : IF expression THEN statement ELSE statement
-        p[0] = IfStatement(condition=p[2], then_statement=p[4], else_statement=p[6])
+        p[0] = located(p, IfStatement(condition=p[2], then_statement=p[4], else_statement=p[6]))
     else:
         # | IF expression THEN statement
-        p[0] = IfStatement(condition=p[2], then_statement=p[4], else_statement=None)
+        p[0] = located(p, IfStatement(condition=p[2], then_statement=p[4], else_statement=None))
 
 # rule for WHILE statement
 def p_while_statement(p):
     '''while_statement : WHILE expression DO statement'''
-    p[0] = WhileStatement(condition=p[2], statement=p[4])
+    p[0] = located(p, WhileStatement(condition=p[2], statement=p[4]))
+
+# rule for REPEAT statement, its statements are the body of the loop like those of BEGIN ... END
+def p_repeat_statement(p):
+    '''repeat_statement : REPEAT statement_list UNTIL expression'''
+    body = located(p, CompoundStatement(statement_list=p[2]), 1, 3) # REPEAT ... UNTIL
+    p[0] = located(p, RepeatStatement(statement=body, condition=p[4]))
 
 # rule for FOR statement
 def p_for_statement(p):
     '''for_statement : FOR ID ASSIGN expression TO expression DO statement
                      | FOR ID ASSIGN expression DOWNTO expression DO statement'''
-    control_var_name = p[2]
     start_expr = p[4]
     end_expr = p[6]
     loop_statement = p[8]
     is_downto = (p[5].lower() == 'downto') # | FOR ID ASSIGN expression DOWNTO expression DO statement if 'DOWNTO' is used
 
-    p[0] = ForStatement(control_variable=Identifier(name=control_var_name),
-                        start_expression=start_expr,
-                        end_expression=end_expr,
-                        statement=loop_statement,
-                        downto=is_downto)
+    p[0] = located(p, ForStatement(control_variable=identifier(p.slice[2]),
+                                   start_expression=start_expr,
+                                   end_expression=end_expr,
+                                   statement=loop_statement,
+                                   downto=is_downto))
+
+# rule for CASE statement
+def p_case_statement(p):
+    '''case_statement : CASE expression OF case_element_list case_else END'''
+    p[0] = located(p, CaseStatement(selector=p[2], elements=p[4], else_statement=p[5]))
+
+# rule for the list of CASE branches
+def p_case_element_list(p):
+    '''case_element_list : case_element_list SEMICOLON case_element
+                         | case_element'''
+    if len(p) == 4:
+        # case_element_list : case_element_list SEMICOLON case_element
+        p[0] = p[1] + [p[3]]
+    else:
+        # | case_element
+        p[0] = [p[1]]
+
+# rule for each CASE branch
+def p_case_element(p):
+    '''case_element : case_label_list COLON statement'''
+    p[0] = located(p, CaseElement(labels=p[1], statement=p[3]), 1, 3 if p[3] is not None else 2)
+
+# rule for the labels of a CASE branch
+def p_case_label_list(p):
+    '''case_label_list : case_label_list COMMA case_label
+                       | case_label'''
+    if len(p) == 4:
+        # case_label_list : case_label_list COMMA case_label
+        p[0] = p[1] + [p[3]]
+    else:
+        # | case_label
+        p[0] = [p[1]]
+
+# rule for a CASE label, a constant or a range of constants
+def p_case_label(p):
+    '''case_label : expression
+                  | expression DOTDOT expression'''
+    if len(p) == 2:
+        # case_label : expression
+        p[0] = p[1]
+    else:
+        # | expression DOTDOT expression
+        p[0] = located(p, CaseRange(low=p[1], high=p[3]))
+
+# rule for the optional ELSE part of a CASE statement (a ';' may end the last branch)
+def p_case_else(p):
+    '''case_else : ELSE statement_list
+                 | SEMICOLON ELSE statement_list
+                 | SEMICOLON
+                 | empty'''
+    if len(p) >= 3:
+        # case_else : ELSE statement_list
+        #           | SEMICOLON ELSE statement_list
+        else_keyword = len(p) - 2
+        else_part = located(p, CompoundStatement(statement_list=p[len(p) - 1]), else_keyword)
+        if else_part.end is None: # the last statement is empty
+            else_part.end = symbol_end(p, else_keyword)
+        p[0] = else_part
+    else:
+        # | SEMICOLON
+        # | empty
+        p[0] = None
 
 def p_error(p):
     if p:
@@ -342,16 +567,47 @@ def p_error(p):
     else:
         print("Syntax error at EOF")
 
+_parser = None # loading the LALR tables is slow, keep one parser per process
+
 def build_parser():
-    return yacc.yacc()
+    global _parser
+    if _parser is None:
+        _parser = yacc.yacc()
+    return _parser
+
+# runs the lexer over the whole source and returns the list of tokens
+def tokenize(input_text):
+    from analex import build_lexer
+
+    lexer = build_lexer()
+    lexer.input(input_text)
+    return list(iter(lexer.token, None))
 
-def parse_program(input_text):
+# tokens of input_text[start:end], from `start` on line `lineno`, and the first token the lexer finds after them (None at the end)
+def tokenize_range(input_text, start, end, lineno):
+    from analex import build_lexer
+
+    lexer = build_lexer()
+    lexer.input(input_text)
+    lexer.lexpos = start
+    lexer.lineno = lineno
+    token_list = []
+    for token in iter(lexer.token, None):
+        if token.lexpos >= end:
+            return token_list, token
+        token_list.append(token)
+    return token_list, None
+
+def parse_program(input_text, token_list=None):
     from analex import build_lexer
 
     lexer = build_lexer()
     parser = build_parser()
 
     try:
+        if token_list is not None: # tokens already produced by tokenize()
+            pending_tokens = iter(token_list)
+            return parser.parse(input_text, lexer=lexer, tokenfunc=lambda: next(pending_tokens, None))
         ast = parser.parse(input_text, lexer=lexer)
         return ast
     except Exception as e:
@@ -0,0 +1,506 @@
+"""
+Binary AST files: a parsed Program stored so later stages can skip lexing and parsing.
+
+A file holds an interned table of the strings in the tree, a table of node
+shapes and then the tree in preorder. A shape is an ast_nodes class with the
+names of its fields, in the order of the node's attributes, and what each
+field holds in every node of that shape: a constant (None, True or False,
+not written again), a string, a non-negative integer, a source position or
+any value. A node is written as the one-byte tag of its shape followed by its
+fields: strings as a varint index in the table, integers as a varint and
+other values with a tag of their own. A list or tuple is a tag and a varint
+count followed by its items. Loading rebuilds the same classes with the same
+attributes in the same order, so generating code from a loaded tree gives the
+code of the original one.
+
+Source positions come first in a node, before its children, so the starts
+follow each other in source order: start is written as the difference from
+the previous start, end as its distance from start. A table of line starts
+gives lineno from start, and only nodes whose lineno is another line (an
+assignment's is the line of its :=) write it, as the difference from the
+previous one written. dumps() builds that table from the tree itself, from
+the first start seen on every line. Most spans are not written at all: a
+leaf whose text starts at its start ends at start plus the length of that
+text, and a node spanning from its first child to its last takes the span of
+those children.
+
+Loading turns every shape of a file into a small reader function, generated
+once per shape table, that reads the node's fields with no further lookups
+and sets its attributes in shape order, so nodes keep the compact attribute
+dicts Python gives instances of one class. Decoding reads the data one byte
+at a time, so load() streams a file in chunks instead of reading it whole.
+
+    python ast_format.py save program.pas [-o program.past]
+    python ast_format.py show program.past
+"""
+import argparse
+import itertools
+import keyword
+import math
+import os
+import sys
+from bisect import bisect_right
+from functools import partial
+
+import ast_nodes
+from binary_format import BinaryWriter, FormatError, DOUBLE
+
+MAGIC = b"PAST"
+VERSION = 3
+READ_CHUNK = 64 * 1024 # bytes read at a time by load()
+
+# tags of the values in the tree; node shapes take the tags from TAG_SHAPE on
+TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_NEGATIVE, TAG_FLOAT, TAG_STR, TAG_LIST, TAG_TUPLE, TAG_NODE = range(10)
+TAG_SHAPE = 10
+INLINE_SHAPES = 256 - TAG_SHAPE # more shapes are written as TAG_NODE and a varint
+
+# field kinds of source positions, only found in the shape table. Written: a start, an end
+# as a length from the start or (without a start) as an offset from the previous start, and a
+# line number as a difference from the previous one written. Not written: a line number taken
+# from the start, an end taken from the start and the length of the node's text, and a whole
+# span taken from the node's first and last children.
+(KIND_START, KIND_LENGTH, KIND_OFFSET, KIND_LINE, KIND_LINE_OF_START, KIND_TEXT_END,
+ KIND_START_OF_FIRST, KIND_END_OF_LAST, KIND_LINE_OF_FIRST) = range(0x80, 0x89)
+POSITION_FIELDS = ('start', 'end', 'lineno') # read first, in this order
+
+VALUE_KINDS = (TAG_STR, TAG_INT, TAG_NODE) # kinds of the fields written in every node
+CONSTANTS = {TAG_NONE: None, TAG_TRUE: True, TAG_FALSE: False} # kinds of the fields never written
+
+def written_order(fields):
+    """The (field, kind) pairs of a shape in the order their values are written: positions first."""
+    positions = [(field, kind) for field, kind in fields if kind >= KIND_START]
+    positions.sort(key=lambda item: POSITION_FIELDS.index(item[0]))
+    return positions + [(field, kind) for field, kind in fields if kind < KIND_START]
+
+def line_starts_of(tree):
+    """
+    Offsets of the first node start seen on every line of the tree's source, from line 1 to its
+    last line; a line without any takes the offset of the next one, so that bisect gives each
+    start the line it was seen on.
+    """
+    first_start = {}
+    pending = [tree]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, ast_nodes.ASTNode):
+            fields = value.__dict__
+            start, lineno = fields.get('start'), fields.get('lineno')
+            if type(start) is int and type(lineno) is int and lineno > 0 and start < first_start.get(lineno, start + 1):
+                first_start[lineno] = start
+            pending.extend(fields.values())
+        elif isinstance(value, (list, tuple)):
+            pending.extend(value)
+    starts = [0] * (max(first_start, default=0) + 1) # starts[0] is line 0, before the first line
+    following = None
+    for line in range(len(starts) - 1, 0, -1):
+        start = first_start.get(line, following)
+        if following is not None and start > following: # keep the table sorted, nodes out of order only cost bytes
+            start = following
+        starts[line] = following = start
+    return starts
+
+def is_position(value):
+    return type(value) is int and value >= 0
+
+def has_span(node):
+    if not isinstance(node, ast_nodes.ASTNode):
+        return False
+    fields = node.__dict__
+    return is_position(fields.get('start')) and is_position(fields.get('end')) and is_position(fields.get('lineno'))
+
+class TreeEncoder:
+    def __init__(self, line_starts):
+        """
+        Writes a tree into a body while collecting the string and shape tables it refers to.
+
+        :param line_starts: Offset of the start of every line (see line_starts_of()), lines begin at 1.
+        """
+        self.body = BinaryWriter()
+        self.strings = {} # string -> index
+        self.shapes = {}  # (class, ((field name, field kind), ...)) -> (index, written order)
+        self.line_starts = line_starts
+        self.start = 0 # the last start written
+        self.line = 0  # the last line number written
+
+    def string_id(self, text):
+        return self.strings.setdefault(text, len(self.strings))
+
+    def encode(self, value):
+        body = self.body
+        buffer = body.buffer
+        if isinstance(value, ast_nodes.ASTNode):
+            fields = value.__dict__
+            shape = (type(value), self.field_kinds(fields))
+            known = self.shapes.get(shape)
+            if known is None:
+                known = self.shapes[shape] = (len(self.shapes), written_order(shape[1]))
+            shape_id, order = known
+            if shape_id < INLINE_SHAPES:
+                buffer.append(TAG_SHAPE + shape_id)
+            else:
+                buffer.append(TAG_NODE)
+                body.varint(shape_id)
+            for field, kind in order:
+                child = fields[field]
+                if kind == TAG_NODE:
+                    self.encode(child)
+                elif kind == TAG_STR:
+                    body.varint(self.string_id(child))
+                elif kind == TAG_INT:
+                    body.varint(child)
+                elif kind == KIND_START:
+                    body.signed(child - self.start)
+                    self.start = child
+                elif kind == KIND_LENGTH:
+                    body.varint(child - self.start)
+                elif kind == KIND_OFFSET:
+                    body.signed(child - self.start)
+                elif kind == KIND_LINE:
+                    body.signed(child - self.line)
+                    self.line = child
+                # the other position kinds are not written
+        elif isinstance(value, str):
+            buffer.append(TAG_STR)
+            body.varint(self.string_id(value))
+        elif value is None:
+            buffer.append(TAG_NONE)
+        elif value is True or value is False:
+            buffer.append(TAG_TRUE if value else TAG_FALSE)
+        elif isinstance(value, int):
+            buffer.append(TAG_INT if value >= 0 else TAG_NEGATIVE)
+            body.varint(abs(value))
+        elif isinstance(value, (list, tuple)):
+            buffer.append(TAG_LIST if isinstance(value, list) else TAG_TUPLE)
+            body.varint(len(value))
+            for item in value:
+                self.encode(item)
+        elif isinstance(value, float):
+            buffer.append(TAG_FLOAT)
+            buffer += DOUBLE.pack(value)
+        else:
+            raise TypeError(f"Can't store a value of type {type(value).__name__} in an AST file")
+
+    def field_kinds(self, fields):
+        """The ((field, kind), ...) of a node's shape, the kinds of its positions chosen to write as little as possible."""
+        kinds = {}
+        text = first = last = None # the first field with a value of its own, the first and last node fields
+        for field, child in fields.items():
+            if field in POSITION_FIELDS and type(child) is int and child >= 0:
+                kinds[field] = None # a position, its kind is chosen below
+                continue
+            kind = kinds[field] = value_kind(child)
+            if kind in VALUE_KINDS:
+                if text is None:
+                    text = (child,)
+                if kind == TAG_NODE:
+                    last = child
+                    if first is None:
+                        first = (child,)
+        start = fields['start'] if 'start' in kinds and kinds['start'] is None else None
+        end = fields['end'] if 'end' in kinds and kinds['end'] is None else None
+        lineno = fields['lineno'] if 'lineno' in kinds and kinds['lineno'] is None else None
+        if start is None:
+            if end is not None:
+                kinds['end'] = KIND_OFFSET
+            if lineno is not None:
+                kinds['lineno'] = KIND_LINE
+            return tuple(kinds.items())
+        kinds['start'] = KIND_START
+        if end is not None and lineno is not None and first is not None and has_span(first[0]) and has_span(last) \
+                and first[0].start == start and first[0].lineno == lineno and last.end == end:
+            kinds.update(start=KIND_START_OF_FIRST, end=KIND_END_OF_LAST, lineno=KIND_LINE_OF_FIRST)
+            return tuple(kinds.items())
+        if lineno is not None:
+            kinds['lineno'] = KIND_LINE_OF_START if bisect_right(self.line_starts, start) - 1 == lineno else KIND_LINE
+        if end is not None:
+            kinds['end'] = KIND_LENGTH if end >= start else KIND_OFFSET
+            if kinds.get('lineno') == KIND_LINE_OF_START and text is not None and type(text[0]) in (str, int, float) \
+                    and end == start + len(str(text[0])):
+                kinds['end'] = KIND_TEXT_END
+        return tuple(kinds.items())
+
+# what a field holds, stored in the node's shape: TAG_NONE, TAG_TRUE or TAG_FALSE for those
+# constants, TAG_STR for a string, TAG_INT for an integer >= 0 and TAG_NODE for any other value
+# (TreeEncoder.field_kinds() gives source positions kinds of their own)
+def value_kind(value):
+    if value is None:
+        return TAG_NONE
+    if value is True:
+        return TAG_TRUE
+    if value is False:
+        return TAG_FALSE
+    value_type = type(value)
+    if value_type is str:
+        return TAG_STR
+    if value_type is int and value >= 0:
+        return TAG_INT
+    return TAG_NODE
+
+def dumps(tree):
+    """The binary form of `tree` (a Program, or any ast_nodes subtree)."""
+    line_starts = line_starts_of(tree)
+    encoder = TreeEncoder(line_starts)
+    encoder.encode(tree)
+    out = BinaryWriter()
+    out.bytes(MAGIC)
+    out.varint(VERSION)
+    out.varint(len(line_starts) - 1)
+    previous = 0
+    for start in line_starts[1:]:
+        out.varint(start - previous)
+        previous = start
+    out.varint(len(encoder.strings))
+    for text in encoder.strings:
+        out.string(text)
+    out.varint(len(encoder.shapes))
+    for node_class, fields in encoder.shapes:
+        out.string(node_class.__name__)
+        out.varint(len(fields))
+        for field, kind in fields:
+            out.string(field)
+            out.bytes(bytes([kind]))
+    out.bytes(encoder.body.getvalue())
+    return out.getvalue()
+
+def save(path, tree):
+    with open(path, 'wb') as f:
+        f.write(dumps(tree))
+
+def loads(data):
+    """The tree stored in `data` (bytes); raises FormatError if it is not a valid AST file."""
+    return decode(iter(data))
+
+def load(source):
+    """The tree stored in the file at `source` (a path or a binary file), read in chunks."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return load(f)
+    return decode(itertools.chain.from_iterable(iter(partial(source.read, READ_CHUNK), b"")))
+
+# code of a function reading one node of a shape: a straight line of reads, then the attributes
+# set in their original order (decode() only lets plain identifiers through as field names)
+def reader_source(index, fields):
+    lines = []
+    expressions = {} # field -> expression of its value
+    node_start = None # the variable holding the node's start, once read
+    nodes = []       # variables of the fields holding any value, node fields only
+    values = []      # and of all fields read with a value of their own
+
+    def read_varint(variable):
+        lines.append(f"{variable} = next_byte()")
+        lines.append(f"if {variable} >= 0x80: {variable} = long_varint({variable})")
+
+    def need_start(field):
+        if node_start is None:
+            raise FormatError(f"The field {field} of shape {index} needs a start")
+
+    for position, (field, kind) in enumerate(written_order(fields)):
+        variable = f"f{position}"
+        if kind == TAG_NODE:
+            lines.append(f"{variable} = value()")
+            nodes.append(variable)
+            values.append(variable)
+        elif kind == TAG_STR:
+            read_varint(variable)
+            lines.append(f"{variable} = strings[{variable}]")
+            values.append(variable)
+        elif kind == TAG_INT:
+            read_varint(variable)
+            values.append(variable)
+        elif kind == KIND_START:
+            read_varint(variable)
+            lines.append(f"start += ({variable} >> 1) ^ -({variable} & 1)")
+            lines.append(f"{variable} = start")
+            node_start = variable
+        elif kind == KIND_LENGTH:
+            need_start(field)
+            read_varint(variable)
+            lines.append(f"{variable} += {node_start}")
+        elif kind == KIND_OFFSET:
+            read_varint(variable)
+            lines.append(f"{variable} = start + (({variable} >> 1) ^ -({variable} & 1))")
+        elif kind == KIND_LINE:
+            read_varint(variable)
+            lines.append(f"line += ({variable} >> 1) ^ -({variable} & 1)")
+            lines.append(f"{variable} = line")
+        elif kind == KIND_LINE_OF_START:
+            need_start(field)
+            lines.append(f"if not line_start <= {node_start} < next_line_start: # starts mostly go forward within a line")
+            lines.append(f"    span_line = bisect_right(line_starts, {node_start}) - 1")
+            lines.append(f"    line_start, next_line_start = line_starts[span_line], line_starts[span_line + 1]")
+            lines.append(f"{variable} = span_line")
+        elif kind in (KIND_TEXT_END, KIND_START_OF_FIRST, KIND_END_OF_LAST, KIND_LINE_OF_FIRST):
+            continue # taken from fields read later
+        else:
+            expressions[field] = repr(CONSTANTS[kind])
+            continue
+        expressions[field] = variable
+    for field, kind in fields:
+        if kind == KIND_TEXT_END:
+            need_start(field)
+            if not values:
+                raise FormatError(f"The field {field} of shape {index} needs a text")
+            expressions[field] = f"{node_start} + len(str({values[0]}))"
+        elif kind in (KIND_START_OF_FIRST, KIND_END_OF_LAST, KIND_LINE_OF_FIRST):
+            if not nodes:
+                raise FormatError(f"The field {field} of shape {index} needs a node")
+            expressions[field] = {KIND_START_OF_FIRST: f"{nodes[0]}.start", KIND_END_OF_LAST: f"{nodes[-1]}.end",
+                                  KIND_LINE_OF_FIRST: f"{nodes[0]}.lineno"}[kind]
+    lines.append(f"node = new_node(class_{index})")
+    for field, _ in fields: # set in the order of the original attributes, so nodes share their keys like parsed ones
+        lines.append(f"node.{field} = {expressions[field]}")
+    lines.append("return node")
+    return (f"    class_{index} = classes[{index}]\n"
+            f"    def read_{index}():\n"
+            f"        nonlocal start, line, span_line, line_start, next_line_start\n"
+            + "".join(f"        {line}\n" for line in lines))
+
+_readers = {} # shape table -> function making the readers of its shapes, compiling them is slow
+
+def shape_readers(shapes):
+    """
+    The function that makes the readers of `shapes`, ((class name, ((field, kind), ...)), ...):
+    make(value, next_byte, long_varint, strings, line_starts, classes) returns one function per
+    shape, reading a node of that shape (its tag already read) and returning it.
+    """
+    make = _readers.get(shapes)
+    if make is None:
+        source = ("def make(value, next_byte, long_varint, strings, line_starts, classes):\n"
+                  "    start = line = 0 # the last start and line number read\n"
+                  "    span_line = line_start = next_line_start = 0 # the line of the last start read, and where it and the next one begin\n"
+                  + "".join(reader_source(index, fields) for index, (_, fields) in enumerate(shapes))
+                  + f"    return [{', '.join(f'read_{index}' for index in range(len(shapes)))}]\n")
+        namespace = {"new_node": object.__new__, "bisect_right": bisect_right}
+        exec(compile(source, "<ast_format readers>", "exec"), namespace)
+        if len(_readers) >= 64:
+            _readers.clear()
+        make = _readers[shapes] = namespace["make"]
+    return make
+
+def decode(stream):
+    """The tree read from `stream`, an iterator over the bytes of an AST file."""
+    next_byte = stream.__next__
+
+    def varint():
+        byte = next_byte()
+        if byte < 0x80:
+            return byte
+        return long_varint(byte)
+
+    # the rest of a varint whose first byte is `byte`
+    def long_varint(byte):
+        result = byte & 0x7F
+        shift = 7
+        while True:
+            byte = next_byte()
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def chunk(count):
+        data = bytes(itertools.islice(stream, count))
+        if len(data) != count:
+            raise StopIteration
+        return data
+
+    def string():
+        return chunk(varint()).decode('utf-8')
+
+    def value():
+        tag = next_byte()
+        if tag >= TAG_SHAPE:
+            return readers[tag - TAG_SHAPE]()
+        if tag == TAG_STR:
+            return strings[varint()]
+        if tag == TAG_NONE:
+            return None
+        if tag == TAG_LIST:
+            return [value() for _ in range(varint())]
+        if tag == TAG_INT:
+            return varint()
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_FALSE:
+            return False
+        if tag == TAG_TUPLE:
+            return tuple([value() for _ in range(varint())])
+        if tag == TAG_NEGATIVE:
+            return -varint()
+        if tag == TAG_FLOAT:
+            return DOUBLE.unpack(chunk(DOUBLE.size))[0]
+        if tag == TAG_NODE:
+            return readers[varint()]()
+        raise FormatError(f"Unknown tag {tag} in the AST file")
+
+    try:
+        if chunk(len(MAGIC)) != MAGIC:
+            raise FormatError("Not an AST file")
+        version = varint()
+        if version != VERSION:
+            raise FormatError(f"AST file version {version}, expected {VERSION}")
+        line_starts = [0]
+        for _ in range(varint()):
+            line_starts.append(line_starts[-1] + varint())
+        line_starts.append(math.inf) # past the last line, so that every line has a next one
+        strings = [string() for _ in range(varint())]
+        shapes = []
+        classes = []
+        for _ in range(varint()):
+            class_name = string()
+            node_class = getattr(ast_nodes, class_name, None)
+            if not (isinstance(node_class, type) and issubclass(node_class, ast_nodes.ASTNode)):
+                raise FormatError(f"Unknown node type {class_name} in the AST file")
+            fields = []
+            for _ in range(varint()):
+                field = string()
+                if not field.isidentifier() or keyword.iskeyword(field) or field.startswith('__'):
+                    raise FormatError(f"Invalid field name {field!r} in the AST file")
+                kind = next_byte()
+                if not (kind in CONSTANTS or kind in VALUE_KINDS or KIND_START <= kind <= KIND_LINE_OF_FIRST):
+                    raise FormatError(f"Unknown kind {kind} of the field {class_name}.{field}")
+                fields.append((field, kind))
+            shapes.append((class_name, tuple(fields)))
+            classes.append(node_class)
+        readers = shape_readers(tuple(shapes))(value, next_byte, long_varint, strings, line_starts, classes)
+        return value()
+    except StopIteration:
+        raise FormatError("Truncated AST file") from None
+    except IndexError:
+        raise FormatError("Corrupt AST file (a string or node type out of range)") from None
+    except UnicodeDecodeError:
+        raise FormatError("Corrupt AST file (a string is not UTF-8)") from None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Writes or inspects binary AST files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    save_command = commands.add_parser("save", help="parse a Pascal file and store its AST")
+    save_command.add_argument("source", help="Pascal file")
+    save_command.add_argument("-o", "--output", help="AST file (default: the source path with .past)")
+    show = commands.add_parser("show", help="print the AST stored in a file")
+    show.add_argument("tree", help="AST file")
+    args = parser.parse_args(argv)
+
+    if args.command == "save":
+        from anasin import parse_program
+        with open(args.source, 'r') as f:
+            source_text = f.read()
+        tree = parse_program(source_text)
+        if tree is None:
+            print(f"{args.source} does not parse, no AST written", file=sys.stderr)
+            return 1
+        output = args.output or os.path.splitext(args.source)[0] + ".past"
+        save(output, tree)
+        print(f"{len(source_text.encode('utf-8'))} source bytes -> {os.path.getsize(output)} bytes in {output}")
+        return 0
+
+    try:
+        tree = load(args.tree)
+    except (OSError, FormatError) as e:
+        print(f"Can't read {args.tree}: {e}", file=sys.stderr)
+        return 1
+    print(tree)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
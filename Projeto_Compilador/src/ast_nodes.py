@@ -1,4 +1,10 @@
 class ASTNode:
+    # source span set by the parser: offset of the node's first character and the offset just
+    # after its last one (None for nodes built elsewhere). Columns, and the line of any offset,
+    # are only computed when a message needs them, from a LineIndex of the source (source_index.py).
+    start = None
+    end = None
+
     def __init__(self, lineno=None):
         self.lineno = lineno
 
@@ -87,16 +93,63 @@ class Variable(ASTNode):
     def __repr__(self):
         return f"Variable(ids={self.id_list}, type={self.var_type})"
 
+class ConstantDeclaration(ASTNode):
+    def __init__(self, constant_list, lineno=None):
+        """Represents a constant declaration section (CONST name = value; ...)."""
+        super().__init__(lineno)
+        self.constant_list = constant_list
+
+    def __repr__(self):
+        return f"ConstantDeclaration(constants={self.constant_list})"
+
+class Constant(ASTNode):
+    def __init__(self, name, expression, lineno=None):
+        """Represents a constant and the expression giving its value, evaluated at compile time."""
+        super().__init__(lineno)
+        self.name = name
+        self.expression = expression
+
+    def __repr__(self):
+        return f"Constant(name={self.name}, expr={self.expression})"
+
 class ArrayType(ASTNode):
     def __init__(self, index_range, element_type, lineno=None):
         """Represents an array type."""
         super().__init__(lineno)
-        self.index_range = index_range  # tuple (start, end)
+        self.index_range = index_range  # tuple (start, end) of constant expressions
         self.element_type = element_type
 
     def __repr__(self):
         return f"ArrayType(range={self.index_range}, element_type={self.element_type})"
 
+class SetType(ASTNode):
+    def __init__(self, element_range, lineno=None):
+        """Represents a set type (SET OF low..high), packed into one integer with a bit per element."""
+        super().__init__(lineno)
+        self.element_range = element_range  # tuple (low, high) of constant ordinal expressions
+
+    def __repr__(self):
+        return f"SetType(range={self.element_range})"
+
+class RecordType(ASTNode):
+    def __init__(self, field_list, lineno=None):
+        """Represents a record type (RECORD fields END), its fields stored one after the other."""
+        super().__init__(lineno)
+        self.field_list = field_list  # list of Field nodes
+
+    def __repr__(self):
+        return f"RecordType(fields={self.field_list})"
+
+class Field(ASTNode):
+    def __init__(self, id_list, field_type, lineno=None):
+        """Represents fields of a record with their type."""
+        super().__init__(lineno)
+        self.id_list = id_list
+        self.field_type = field_type
+
+    def __repr__(self):
+        return f"Field(ids={self.id_list}, type={self.field_type})"
+
 class Parameter(ASTNode):
     def __init__(self, id_list, param_type, is_var=False, lineno=None):
         """Represents a parameter in a function/procedure."""
@@ -148,6 +201,16 @@ class WhileStatement(ASTNode):
     def __repr__(self):
         return f"WhileStatement(condition={self.condition}, statement={self.statement})"
 
+class RepeatStatement(ASTNode):
+    def __init__(self, statement, condition, lineno=None):
+        """Represents a repeat loop (REPEAT statements UNTIL condition), its body a CompoundStatement run at least once."""
+        super().__init__(lineno)
+        self.statement = statement
+        self.condition = condition
+
+    def __repr__(self):
+        return f"RepeatStatement(statement={self.statement}, until={self.condition})"
+
 class ForStatement(ASTNode):
     def __init__(self, control_variable, start_expression, end_expression, statement, downto=False, lineno=None):
         """Represents a for loop."""
@@ -161,6 +224,43 @@ class ForStatement(ASTNode):
     def __repr__(self):
         return f"ForStatement(var={self.control_variable}, start={self.start_expression}, end={self.end_expression}, downto={self.downto}, statement={self.statement})"
 
+class CaseStatement(ASTNode):
+    def __init__(self, selector, elements, else_statement=None, lineno=None):
+        """
+        Represents a CASE statement.
+
+        :param selector: The ordinal expression (INTEGER, CHAR or BOOLEAN) whose value picks the branch.
+        :param elements: The CaseElement branches, in source order.
+        :param else_statement: Statement run when no label matches (a CompoundStatement), or None.
+        """
+        super().__init__(lineno)
+        self.selector = selector
+        self.elements = elements
+        self.else_statement = else_statement
+
+    def __repr__(self):
+        return f"CaseStatement(selector={self.selector}, elements={self.elements}, else={self.else_statement})"
+
+class CaseElement(ASTNode):
+    def __init__(self, labels, statement, lineno=None):
+        """Represents one branch of a CASE statement: constant labels (expressions or CaseRange nodes) and its statement."""
+        super().__init__(lineno)
+        self.labels = labels
+        self.statement = statement
+
+    def __repr__(self):
+        return f"CaseElement(labels={self.labels}, statement={self.statement})"
+
+class CaseRange(ASTNode):
+    def __init__(self, low, high, lineno=None):
+        """Represents a CASE label range (low..high), both bounds constant expressions."""
+        super().__init__(lineno)
+        self.low = low
+        self.high = high
+
+    def __repr__(self):
+        return f"CaseRange({self.low}..{self.high})"
+
 class FunctionCall(ASTNode):
     def __init__(self, name, arguments=None, lineno=None):
         """Represents a function/procedure call."""
@@ -212,6 +312,25 @@ class Literal(ASTNode):
     def __repr__(self):
         return f"Literal(value={self.value}, type={self.literal_type})"
 
+class SetLiteral(ASTNode):
+    def __init__(self, elements, lineno=None):
+        """Represents a set constructor ([a, b..c]), its elements expressions or SetRange nodes."""
+        super().__init__(lineno)
+        self.elements = elements
+
+    def __repr__(self):
+        return f"SetLiteral(elements={self.elements})"
+
+class SetRange(ASTNode):
+    def __init__(self, low, high, lineno=None):
+        """Represents the elements low..high of a set constructor, both bounds constant expressions."""
+        super().__init__(lineno)
+        self.low = low
+        self.high = high
+
+    def __repr__(self):
+        return f"SetRange({self.low}..{self.high})"
+
 class Identifier(ASTNode):
     def __init__(self, name, lineno=None):
         """Represents an identifier/variable reference."""
@@ -229,3 +348,24 @@ class ArrayAccess(ASTNode):
 
     def __repr__(self):
         return f"ArrayAccess(array={self.array}, index={self.index})"
+
+class FieldAccess(ASTNode):
+    def __init__(self, record, field, lineno=None):
+        """Represents the access to a field of a record (record.field)."""
+        super().__init__(lineno)
+        self.record = record  # Identifier, ArrayAccess or FieldAccess node giving the record
+        self.field = field    # name of the field
+
+    def __repr__(self):
+        return f"FieldAccess(record={self.record}, field={self.field})"
+
+
+def iter_child_nodes(node):
+    """Yields the direct AST children of a node (attributes, lists and tuples of nodes)."""
+    for value in node.__dict__.values():
+        if isinstance(value, ASTNode):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                if isinstance(item, ASTNode):
+                    yield item
@@ -0,0 +1,56 @@
+"""
+Loading binary AST files (ast_format.py) against lexing and parsing the source again.
+
+For synthetic programs of growing size, measures tokenize + parse_program, the
+encoding and the decoding of the tree, and checks that the VM code generated
+from the loaded tree is identical to the code generated from the parsed one.
+Run from the src directory:
+
+    python -m benchmarks.ast_reload [--sizes 200 1000 5000] [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import sys
+
+from anasin import parse_program, tokenize
+from anasem import semantic_check, SymbolTable
+from optimizer.dead_code import eliminate_dead_code
+from vm_assembly.generator import generate
+from ast_format import dumps, loads
+from compile_profile import count_ast_nodes
+from .program_generator import ProgramShape, generate_program
+from .token_replay import best_time
+
+def vm_code(tree):
+    with contextlib.redirect_stdout(io.StringIO()):
+        semantic_check(tree, SymbolTable())
+        return generate(eliminate_dead_code(tree))
+
+def measure(statements, repeat):
+    source = generate_program(ProgramShape(statements=statements, expression_length=8, functions=8))
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_time, tree = best_time(lambda: parse_program(source, tokenize(source)), repeat)
+    nodes = count_ast_nodes(tree)
+    save_time, data = best_time(lambda: dumps(tree), repeat)
+    load_time, loaded = best_time(lambda: loads(data), repeat)
+    if vm_code(loaded) != vm_code(tree): # the original tree is only checked after it was saved
+        raise AssertionError(f"The loaded AST generates other code for {statements} statements")
+    return {"statements": statements, "nodes": nodes, "source_bytes": len(source.encode('utf-8')), "ast_bytes": len(data),
+            "parse": parse_time, "save": save_time, "load": load_time}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares parsing with loading a binary AST file.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000, 5000, 20000], help="statements per program")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best one counts (default 3)")
+    args = parser.parse_args(argv)
+
+    print(f"{'stmts':>7} {'nodes':>8} {'source':>10} {'.past':>10} {'lex+parse ms':>13} {'save ms':>8} {'load ms':>8} {'speed-up':>9}")
+    for statements in args.sizes:
+        r = measure(statements, args.repeat)
+        print(f"{r['statements']:>7} {r['nodes']:>8} {r['source_bytes']:>10} {r['ast_bytes']:>10} "
+              f"{r['parse'] * 1000:>13.1f} {r['save'] * 1000:>8.1f} {r['load'] * 1000:>8.1f} {r['parse'] / r['load']:>8.1f}x")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
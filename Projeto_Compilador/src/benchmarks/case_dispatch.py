@@ -0,0 +1,148 @@
+"""
+Dispatch cost of CASE statements against the equivalent IF ... ELSE IF chain.
+
+For dense (1..k) and sparse label sets of growing size, compiles a program that
+reads a number and dispatches on it with CASE, the same program written as an IF
+chain, and one without any dispatch. The generated code is run for every label
+value and for a miss on each side by a small interpreter of the instructions these
+programs use; the instructions executed beyond the program without dispatch are
+the cost of one dispatch. Run from the src directory:
+
+    python -m benchmarks.case_dispatch [--sizes 4 16 64 256]
+"""
+import argparse
+import contextlib
+import io
+import sys
+
+from anasin import parse_program
+from anasem import semantic_check, SymbolTable
+from optimizer.dead_code import eliminate_dead_code
+from vm_assembly.generator import generate
+
+def dense_labels(count):
+    return list(range(1, count + 1))
+
+def sparse_labels(count):
+    return [i * i + 3 * i for i in range(1, count + 1)] # gaps grow with the labels
+
+def case_program(labels):
+    branches = ";\n".join(f"    {label}: r := {index + 1}" for index, label in enumerate(labels))
+    return f"program Dispatch;\nvar x, r: integer;\nbegin\n  readln(x);\n  case x of\n{branches}\n  else r := 0\n  end\nend.\n"
+
+def if_chain_program(labels):
+    chain = "\n    else ".join(f"if x = {label} then r := {index + 1}" for index, label in enumerate(labels))
+    return f"program Dispatch;\nvar x, r: integer;\nbegin\n  readln(x);\n  {chain}\n    else r := 0\nend.\n"
+
+def empty_program():
+    return "program Dispatch;\nvar x, r: integer;\nbegin\n  readln(x);\n  r := 0\nend.\n"
+
+def compile_program(source):
+    with contextlib.redirect_stdout(io.StringIO()):
+        tree = parse_program(source)
+        semantic_check(tree, SymbolTable())
+        return generate(eliminate_dead_code(tree))
+
+def instruction_count(lines):
+    return sum(1 for line in lines if not line.endswith(":") and not line.strip().startswith("//"))
+
+# --- A small interpreter for the instructions of the programs above ---
+
+def run(lines, inputs, limit=1000000):
+    """Runs VM code, returns (final globals, instructions executed)."""
+    program = []
+    labels = {}
+    for line in lines:
+        text = line.split("//")[0].strip()
+        if not text:
+            continue
+        if text.endswith(":"):
+            labels[text[:-1]] = len(program)
+            continue
+        opcode, _, operand = text.partition(" ")
+        program.append((opcode, operand))
+
+    stack = []
+    pending_inputs = list(inputs)
+    fp = 0
+    pc = 0
+    executed = 0
+    comparisons = {"EQUAL": lambda a, b: a == b, "INF": lambda a, b: a < b, "INFEQ": lambda a, b: a <= b,
+                   "SUP": lambda a, b: a > b, "SUPEQ": lambda a, b: a >= b}
+    while True:
+        opcode, operand = program[pc]
+        pc += 1
+        executed += 1
+        if executed > limit:
+            raise RuntimeError("The program does not stop")
+        if opcode == "PUSHI":
+            stack.append(int(operand))
+        elif opcode == "PUSHN":
+            stack.extend([0] * int(operand))
+        elif opcode == "PUSHG":
+            stack.append(stack[int(operand)])
+        elif opcode == "STOREG":
+            stack[int(operand)] = stack.pop()
+        elif opcode == "PUSHL":
+            stack.append(stack[fp + int(operand)])
+        elif opcode == "STOREL":
+            stack[fp + int(operand)] = stack.pop()
+        elif opcode in comparisons:
+            right = stack.pop()
+            stack.append(int(comparisons[opcode](stack.pop(), right)))
+        elif opcode == "NOT":
+            stack.append(int(not stack.pop()))
+        elif opcode == "JZ":
+            if stack.pop() == 0:
+                pc = labels[operand]
+        elif opcode == "JUMP":
+            pc = labels[operand]
+        elif opcode == "READ":
+            stack.append(pending_inputs.pop(0))
+        elif opcode == "ATOI":
+            stack.append(int(stack.pop()))
+        elif opcode == "START":
+            fp = len(stack)
+        elif opcode == "STOP":
+            return stack, executed
+        else:
+            raise ValueError(f"The benchmark interpreter does not know {opcode}")
+
+def dispatch_costs(lines, values, expected, overhead):
+    costs = []
+    for value in values:
+        stack, executed = run(lines, [str(value)])
+        if stack[1] != expected[value]: # r is the second global
+            raise AssertionError(f"Dispatch on {value} gave {stack[1]}, expected {expected[value]}")
+        costs.append(executed - overhead)
+    return costs
+
+def measure(labels):
+    values = [labels[0] - 1] + labels + [labels[-1] + 1] # every label and a miss on each side
+    expected = {value: 0 for value in values}
+    expected.update({label: index + 1 for index, label in enumerate(labels)})
+    _, overhead = run(compile_program(empty_program()), ["0"])
+    results = {}
+    for name, source in (("case", case_program(labels)), ("if", if_chain_program(labels))):
+        lines = compile_program(source)
+        costs = dispatch_costs(lines, values, expected, overhead)
+        results[name] = {"mean": sum(costs) / len(costs), "worst": max(costs), "size": instruction_count(lines)}
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares CASE dispatch with the equivalent IF chain.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 16, 64, 256], help="labels per CASE")
+    args = parser.parse_args(argv)
+
+    print(f"{'labels':>7} {'set':>7} {'CASE mean':>10} {'worst':>6} {'IF mean':>9} {'worst':>6} {'speed-up':>9} "
+          f"{'CASE size':>10} {'IF size':>8}")
+    for count in args.sizes:
+        for set_name, labels in (("dense", dense_labels(count)), ("sparse", sparse_labels(count))):
+            r = measure(labels)
+            case, chain = r["case"], r["if"]
+            print(f"{count:>7} {set_name:>7} {case['mean']:>10.1f} {case['worst']:>6} {chain['mean']:>9.1f} {chain['worst']:>6} "
+                  f"{chain['mean'] / case['mean']:>8.1f}x {case['size']:>10} {chain['size']:>8}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
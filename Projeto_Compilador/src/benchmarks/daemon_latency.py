@@ -0,0 +1,92 @@
+"""
+Latency of one compile: cold command line against the warm compile server.
+
+Measures, for the same program:
+  cold CLI      python main.py -q - < program   (new interpreter, PLY import, table loading)
+  warm client   python compile_client.py -      (new interpreter, standard library only)
+  warm request  one request on an open connection (no process start at all)
+
+Run from the src directory:
+
+    python -m benchmarks.daemon_latency [program.pas] [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from compile_client import CompileClient
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROGRAM = os.path.join(SRC_DIR, "..", "input", "example7.pas")
+
+def time_command(command, source, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, input=source, capture_output=True, text=True, cwd=SRC_DIR)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} failed: {result.stderr.strip()}")
+    return timings
+
+def wait_for_server(socket_path, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            client = CompileClient(socket_path)
+        except OSError:
+            time.sleep(0.05)
+            continue
+        client.request({"command": "ping"})
+        return client
+    raise TimeoutError(f"The compile server did not start within {timeout} seconds.")
+
+def format_row(label, timings):
+    return (f"  {label:<14} median {statistics.median(timings) * 1000:9.2f} ms"
+            f"   min {min(timings) * 1000:9.2f} ms   max {max(timings) * 1000:9.2f} ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares cold CLI compiles with compiles through the warm server.")
+    parser.add_argument("program", nargs="?", default=DEFAULT_PROGRAM, help="Pascal file to compile")
+    parser.add_argument("--runs", type=int, default=20, help="compiles per configuration (default 20)")
+    args = parser.parse_args(argv)
+
+    with open(args.program) as f:
+        source = f.read()
+    socket_path = os.path.join(tempfile.mkdtemp(), "bench.sock")
+
+    cold = time_command([sys.executable, "main.py", "-q", "-"], source, args.runs)
+
+    server = subprocess.Popen([sys.executable, "compile_server.py", "--socket", socket_path],
+                              cwd=SRC_DIR, stderr=subprocess.DEVNULL)
+    try:
+        client = wait_for_server(socket_path)
+        warm_client = time_command([sys.executable, "compile_client.py", "--socket", socket_path, "-"], source, args.runs)
+        warm_request = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            reply = client.compile_source(source, args.program)
+            warm_request.append(time.perf_counter() - start)
+            if reply["status"] != "ok":
+                raise RuntimeError(f"Server compile failed: {reply['diagnostics']}")
+        client.request({"command": "shutdown"})
+        client.close()
+        server.wait(timeout=10)
+    finally:
+        if server.poll() is None:
+            server.kill()
+
+    print(f"Compile latency of {os.path.basename(args.program)} ({args.runs} runs)")
+    print(format_row("cold CLI", cold))
+    print(format_row("warm client", warm_client))
+    print(format_row("warm request", warm_request))
+    print(f"  speed-up       {statistics.median(cold) / statistics.median(warm_client):.1f}x with the client, "
+          f"{statistics.median(cold) / statistics.median(warm_request):.1f}x per request")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Generates synthetic Pascal programs of a chosen shape for the benchmark suite.
+
+The programs only use constructs the compiler accepts (arrays are filled with
+READLN, function results are assigned to the function name) and pass the
+semantic check, so every phase of the pipeline runs over them.
+"""
+import random
+
+SIMPLE_VARIABLES = 6 # v0..v5
+
+class ProgramShape:
+    def __init__(self, statements=50, depth=2, expression_length=4, functions=3, array_size=10, seed=0):
+        """
+        Size parameters of a generated program.
+
+        :param statements: Number of statements in the main program (nested ones included).
+        :param depth: Maximum nesting of IF/WHILE/FOR statements.
+        :param expression_length: Number of operands in every generated expression.
+        :param functions: Number of functions declared (and called from expressions).
+        :param array_size: Number of elements of the global array.
+        :param seed: Seed of the random choices, the same shape always gives the same program.
+        """
+        self.statements = statements
+        self.depth = depth
+        self.expression_length = expression_length
+        self.functions = functions
+        self.array_size = array_size
+        self.seed = seed
+
+    def replace(self, **changes):
+        values = dict(self.__dict__)
+        values.update(changes)
+        return ProgramShape(**values)
+
+    def __repr__(self):
+        return (f"ProgramShape(statements={self.statements}, depth={self.depth}, expression_length={self.expression_length}, "
+                f"functions={self.functions}, array_size={self.array_size})")
+
+def generate_program(shape):
+    """Returns the Pascal source of a program with the given ProgramShape."""
+    return ProgramGenerator(shape).program()
+
+class ProgramGenerator:
+    def __init__(self, shape):
+        self.shape = shape
+        self.rng = random.Random(shape.seed)
+        self.lines = []
+
+    def program(self):
+        shape = self.shape
+        self.emit(0, "program Synthetic;")
+        self.emit(0, "var")
+        self.emit(1, ", ".join(f"v{k}" for k in range(SIMPLE_VARIABLES)) + ": integer;")
+        self.emit(1, ", ".join(f"i{k}" for k in range(shape.depth + 1)) + ": integer;")
+        self.emit(1, f"a: array[1..{shape.array_size}] of integer;")
+        for k in range(shape.functions):
+            self.function(k)
+        self.emit(0, "begin")
+        self.emit(1, f"for i0 := 1 to {shape.array_size} do")
+        self.emit(2, "readln(a[i0]);")
+        self.statements(shape.statements, 0, 1, ["v0", "i0"])
+        self.emit(1, "writeln(v0)")
+        self.emit(0, "end.")
+        return "\n".join(self.lines) + "\n"
+
+    def function(self, k):
+        self.emit(0, "")
+        self.emit(0, f"function f{k}(x: integer): integer;")
+        self.emit(0, "var")
+        self.emit(1, "t: integer;")
+        self.emit(0, "begin")
+        callable_functions = k # a function only calls the ones declared before it
+        self.emit(1, f"t := {self.expression(['x', 't'], callable_functions)};")
+        self.emit(1, f"if t > {self.rng.randint(0, 100)} then")
+        self.emit(2, f"t := t - {self.expression(['x'], callable_functions)};")
+        self.emit(1, f"f{k} := t")
+        self.emit(0, "end;")
+
+    # emits statements consuming `budget` statements in total, nested ones included
+    def statements(self, budget, depth, indent, scalars):
+        generated = 0
+        while budget > 0:
+            nest = depth < self.shape.depth and budget > 1 and (generated == 0 or self.rng.random() < 0.3)
+            if nest: # the first statement of every level nests, so the requested depth is always reached
+                body = self.rng.randint(1, min(budget - 1, 6))
+                self.structured(body, depth, indent, scalars)
+                budget -= body + 1
+            else:
+                self.simple(indent, scalars)
+                budget -= 1
+            generated += 1
+
+    def structured(self, body, depth, indent, scalars):
+        kind = self.rng.choice(["if", "while", "for"])
+        if kind == "if":
+            self.emit(indent, f"if {self.condition(scalars)} then")
+        elif kind == "while":
+            self.emit(indent, f"while {self.condition(scalars)} do")
+        else:
+            control = f"i{depth + 1}"
+            self.emit(indent, f"for {control} := 1 to {self.rng.randint(2, 20)} do")
+            scalars = scalars + [control]
+        self.emit(indent, "begin")
+        self.statements(body, depth + 1, indent + 1, scalars)
+        self.emit(indent, "end;")
+
+    def simple(self, indent, scalars):
+        choice = self.rng.random()
+        if choice < 0.15:
+            self.emit(indent, f"writeln('v = ', {self.expression(scalars)});")
+        else:
+            target = f"v{self.rng.randrange(SIMPLE_VARIABLES)}"
+            self.emit(indent, f"{target} := {self.expression(scalars)};")
+
+    def condition(self, scalars):
+        operator = self.rng.choice(["<", ">", "<=", ">=", "<>", "="])
+        # starts with a variable so dead code elimination can't fold it and drop the body
+        return f"{self.rng.choice(scalars)} + {self.expression(scalars)} {operator} {self.rng.randint(0, 1000)}"
+
+    def expression(self, scalars, callable_functions=None):
+        if callable_functions is None:
+            callable_functions = self.shape.functions
+        parts = [self.operand(scalars, callable_functions)]
+        for _ in range(self.shape.expression_length - 1):
+            parts.append(self.rng.choice(["+", "-", "*"]))
+            parts.append(self.operand(scalars, callable_functions))
+        return " ".join(parts)
+
+    def operand(self, scalars, callable_functions):
+        choice = self.rng.random()
+        if choice < 0.3:
+            return str(self.rng.randint(1, 99))
+        if choice < 0.4:
+            return f"a[{self.rng.randint(1, self.shape.array_size)}]"
+        if choice < 0.45: # index kept in bounds for non-negative values
+            return f"a[{self.rng.choice(scalars)} mod {self.shape.array_size} + 1]"
+        if choice < 0.55 and callable_functions:
+            return f"f{self.rng.randrange(callable_functions)}({self.rng.choice(scalars)})"
+        if choice < 0.8:
+            return self.rng.choice(scalars)
+        return f"v{self.rng.randrange(SIMPLE_VARIABLES)}"
+
+    def emit(self, indent, text):
+        self.lines.append("    " * indent + text)
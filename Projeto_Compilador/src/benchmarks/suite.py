@@ -0,0 +1,256 @@
+"""
+Compiler benchmark suite.
+
+Compiles synthetic programs (see program_generator) while sweeping one shape
+parameter at a time, times every compiler phase and compares the results with
+a stored baseline. Run from the src directory:
+
+    python -m benchmarks.suite                   # run and compare with baseline.json
+    python -m benchmarks.suite --update-baseline # store the current timings as the baseline
+
+The baseline holds wall times from the machine that wrote it. Every run of a
+case is also timed against a fixed pure Python workload (calibrate()) run just
+before and just after it, and cases are compared by these relative times, so a
+busy or different machine does not show up as regressions. The cases take
+turns run by run, and the ones still found slower are measured again: only a
+slowdown every measurement shows is reported. Refresh the baseline with
+--update-baseline after a change that is meant to change the timings or the
+instruction counts, and check first that the old and the new code, run one
+after the other on the same machine, really differ as expected.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import sys
+import time
+
+from anasin import parse_program, tokenize
+from anasem import semantic_check, SymbolTable
+from optimizer.dead_code import eliminate_dead_code
+from vm_assembly.generator import generate_cfg, optimize_cfg
+from compile_profile import CompileProfile, PHASES, count_ast_nodes
+from .program_generator import ProgramShape, generate_program
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+DEFAULT_SHAPE = ProgramShape(statements=100, depth=3, expression_length=4, functions=4, array_size=10)
+SWEEPS = { # shape parameter -> values, the other parameters keep their default
+    "statements": [50, 100, 200, 400, 800],
+    "depth": [1, 2, 4, 8],
+    "expression_length": [2, 8, 32, 64],
+    "functions": [1, 4, 16, 64],
+    "array_size": [10, 100, 1000],
+}
+QUICK_SWEEPS = {name: values[:3] for name, values in SWEEPS.items()}
+
+def compile_and_profile(source, name):
+    """Runs every phase of the compiler over `source` without printing or writing files."""
+    profile = CompileProfile(name, trace_memory=False) # tracemalloc would distort the timings
+    with contextlib.redirect_stdout(io.StringIO()): # the phases report progress and warnings on stdout
+        with profile.phase("lex"):
+            token_list = tokenize(source)
+        with profile.phase("parse"):
+            ast = parse_program(source, token_list)
+        if ast is None:
+            raise ValueError(f"Synthetic program {name} does not parse")
+        with profile.phase("sem"):
+            semantic_check(ast, SymbolTable())
+        with profile.phase("optimize"):
+            ast = eliminate_dead_code(ast)
+        with profile.phase("codegen"):
+            cfg = generate_cfg(ast)
+        with profile.phase("optimize"):
+            optimize_cfg(cfg)
+        with profile.phase("write"):
+            "\n".join(cfg.to_lines())
+    profile.count("tokens", len(token_list))
+    profile.count("ast_nodes", count_ast_nodes(ast))
+    profile.count("instructions", cfg.instruction_count())
+    return profile.finish()
+
+# seconds a fixed workload of dict, list and string operations takes, a measure of the machine's current speed
+def calibrate():
+    start = time.perf_counter()
+    table = {}
+    for i in range(20000):
+        table[f"n{i % 997}"] = table.get(f"n{i % 997}", 0) + i
+    sorted(table.items(), key=lambda item: item[1])
+    return time.perf_counter() - start
+
+# best wall time of each phase of every case over `repeat` runs (the minimum is the least noisy
+# estimate), and best time relative to the calibrations taken around the same run. The cases take
+# turns, so a moment the machine is busy slows down one run of several cases, not every run of one.
+def measure(cases, repeat):
+    sources = {case: generate_program(shape) for case, shape in cases}
+    results = {case: {"phases": {}, "relative": {}, "counts": {}, "lines": source.count("\n"), "calibration": math.inf}
+               for case, source in sources.items()}
+    for _ in range(repeat):
+        for case, source in sources.items():
+            result = results[case]
+            gc.collect()
+            gc.disable() # a collection in the middle of a phase is the main source of noise
+            try:
+                before = calibrate()
+                profile = compile_and_profile(source, case)
+                around = (before + calibrate()) / 2 # the speed of the machine while this run ran
+            finally:
+                gc.enable()
+            result["calibration"] = min(result["calibration"], around)
+            result["counts"] = profile.counts
+            for name, stats in profile.phases.items():
+                result["phases"][name] = min(result["phases"].get(name, math.inf), stats.wall)
+                result["relative"][name] = min(result["relative"].get(name, math.inf), stats.wall / around)
+    for result in results.values():
+        for times in (result["phases"], result["relative"]):
+            times["total"] = sum(times[name] for name in PHASES if name in times)
+    return results
+
+# (case name, shape) of every value of every sweep
+def sweep_cases(sweeps):
+    for parameter, values in sweeps.items():
+        for value in values:
+            yield f"{parameter}={value}", DEFAULT_SHAPE.replace(**{parameter: value})
+
+def run_sweeps(sweeps, repeat):
+    results = measure(list(sweep_cases(sweeps)), repeat)
+    for case, result in results.items():
+        print(f"  {case:<24} {result['phases']['total'] * 1000:10.2f} ms", file=sys.stderr)
+    return results
+
+# the best of two measurements of the same case, as if all their runs had been one measurement
+def merge_measurements(first, second):
+    merged = dict(first, calibration=min(first["calibration"], second["calibration"]))
+    for key in ("phases", "relative"):
+        times = {name: min(time, second[key].get(name, time)) for name, time in first[key].items()}
+        times["total"] = sum(times[name] for name in PHASES if name in times)
+        merged[key] = times
+    return merged
+
+# slope of log(time) against log(size): ~1 is linear, ~2 quadratic
+def scaling_exponent(sizes, times):
+    points = [(math.log(size), math.log(time)) for size, time in zip(sizes, times) if size > 0 and time > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+def format_scaling(results, sweeps):
+    columns = PHASES + ["total"]
+    lines = []
+    for parameter, values in sweeps.items():
+        lines.append(f"\n{parameter} (ms)")
+        lines.append(f"  {'value':>8} " + " ".join(f"{name:>9}" for name in columns) + f" {'instrs':>8}")
+        for value in values:
+            result = results[f"{parameter}={value}"]
+            phase_times = " ".join(f"{result['phases'].get(name, 0) * 1000:9.2f}" for name in columns)
+            lines.append(f"  {value:>8} {phase_times} {result['counts'].get('instructions', 0):>8}")
+        exponents = []
+        for name in columns:
+            exponent = scaling_exponent(values, [results[f"{parameter}={value}"]["phases"].get(name, 0) for value in values])
+            exponents.append(f"{exponent:9.2f}" if exponent is not None else f"{'-':>9}")
+        lines.append(f"  {'exponent':>8} " + " ".join(exponents))
+    return lines
+
+def compare_with_baseline(results, baseline, threshold, floor):
+    """
+    Returns the regressions: (case, phase, baseline seconds, current seconds).
+
+    Both times are the relative times of the case at the current calibration, so
+    the baseline time is what the baseline code would take on the machine as it
+    is now. Baselines written without relative times are scaled by the ratio of
+    the two calibrations instead, and ones without calibrations not at all.
+    """
+    regressions = []
+    for case, result in results.items():
+        expected = baseline.get(case)
+        if expected is None:
+            continue
+        if "relative" in expected:
+            now = result["calibration"]
+            previous_times = {name: time * now for name, time in expected["relative"].items()}
+            current_times = {name: time * now for name, time in result["relative"].items()}
+        else:
+            scale = 1.0
+            if expected.get("calibration"): # baselines written before calibrate() have none
+                scale = result["calibration"] / expected["calibration"]
+            previous_times = {name: time * scale for name, time in expected["phases"].items()}
+            current_times = result["phases"]
+        for name, current in current_times.items():
+            previous = previous_times.get(name)
+            if previous is None:
+                continue
+            if current > previous * (1 + threshold) and current - previous > floor: # ignore noise on tiny phases
+                regressions.append((case, name, previous, current))
+    return regressions
+
+def confirm_regressions(results, baseline, sweeps, args):
+    """
+    Measures the cases with regressions again, up to args.retries times, and returns the
+    regressions left: a real slowdown shows up in every measurement, noise rarely twice.
+    """
+    shapes = dict(sweep_cases(sweeps))
+    regressions = compare_with_baseline(results, baseline, args.threshold, args.floor)
+    for _ in range(args.retries):
+        flagged = sorted({case for case, *_ in regressions})
+        if not flagged:
+            break
+        print(f"Measuring {len(flagged)} slower case(s) again...", file=sys.stderr)
+        again = measure([(case, shapes[case]) for case in flagged], args.repeat)
+        for case in flagged:
+            results[case] = merge_measurements(results[case], again[case])
+        regressions = compare_with_baseline(results, baseline, args.threshold, args.floor)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Pascal compiler over synthetic programs.")
+    parser.add_argument("--quick", action="store_true", help="only the first values of every sweep")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case, the best one counts (default 5)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown per phase (default 0.25 = 25%%)")
+    parser.add_argument("--floor", type=float, default=0.005, help="ignore slowdowns smaller than this many seconds (default 0.005)")
+    parser.add_argument("--retries", type=int, default=2, help="times a slower case is measured again before it counts (default 2)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    sweeps = QUICK_SWEEPS if args.quick else SWEEPS
+    print("Running benchmarks...", file=sys.stderr)
+    results = run_sweeps(sweeps, args.repeat)
+    for line in format_scaling(results, sweeps):
+        print(line)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, run with --update-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = confirm_regressions(results, baseline, sweeps, args)
+    if not regressions:
+        print(f"\nNo phase slower than the baseline by more than {args.threshold:.0%}.")
+        return 0
+    print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+    for case, name, previous, current in regressions:
+        print(f"  {case:<24} {name:<9} {previous * 1000:9.2f} ms -> {current * 1000:9.2f} ms ({current / previous - 1:+.0%})")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Replaying binary token files (token_cache.py) against lexing the source again.
+
+For synthetic programs of growing size, measures anasin.tokenize, the decoding
+of the stored tokens and the parse that follows either of them, and checks that
+both token streams are identical. Run from the src directory:
+
+    python -m benchmarks.token_replay [--sizes 200 1000 5000] [--repeat 3]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import math
+import sys
+import time
+
+from anasin import parse_program, tokenize
+from token_cache import encode_tokens, decode_tokens
+from .program_generator import ProgramShape, generate_program
+
+def best_time(function, repeat):
+    best = math.inf
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = function()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best, result
+
+def token_key(token):
+    return (token.type, type(token.value), token.value, token.lineno, token.lexpos)
+
+def measure(statements, repeat):
+    source = generate_program(ProgramShape(statements=statements, expression_length=8, functions=8))
+    lex_time, token_list = best_time(lambda: tokenize(source), repeat)
+    data = encode_tokens(source, token_list)
+    replay_time, replayed = best_time(lambda: decode_tokens(data, source), repeat)
+    if list(map(token_key, replayed)) != list(map(token_key, token_list)):
+        raise AssertionError(f"Replayed tokens differ from the lexer's for {statements} statements")
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_time, _ = best_time(lambda: parse_program(source, token_list), repeat)
+    return {"statements": statements, "source_bytes": len(source.encode('utf-8')), "token_bytes": len(data),
+            "tokens": len(token_list), "lex": lex_time, "replay": replay_time, "parse": parse_time}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compares lexing with replaying a binary token file.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000, 5000, 20000], help="statements per program")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best one counts (default 3)")
+    args = parser.parse_args(argv)
+
+    print(f"{'stmts':>7} {'tokens':>8} {'source':>10} {'.ptok':>10} {'lex ms':>9} {'replay ms':>10} {'speed-up':>9} "
+          f"{'lex+parse':>10} {'replay+parse':>13}")
+    for statements in args.sizes:
+        r = measure(statements, args.repeat)
+        print(f"{r['statements']:>7} {r['tokens']:>8} {r['source_bytes']:>10} {r['token_bytes']:>10} "
+              f"{r['lex'] * 1000:>9.1f} {r['replay'] * 1000:>10.1f} {r['lex'] / r['replay']:>8.1f}x "
+              f"{(r['lex'] + r['parse']) * 1000:>10.1f} {(r['replay'] + r['parse']) * 1000:>13.1f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
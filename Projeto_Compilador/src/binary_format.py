@@ -0,0 +1,121 @@
+"""
+Building blocks of the compiler's binary files (token_cache.py, ast_format.py).
+
+Integers are LEB128 varints (zigzag encoded when they may be negative), strings
+are a varint byte length followed by UTF-8, and literal values carry a one-byte
+tag so that 1, 1.0, True and '1' stay distinct.
+"""
+import struct
+
+DOUBLE = struct.Struct('<d')
+
+# tags of literal values
+TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_FLOAT, TAG_STR = range(6)
+
+class FormatError(Exception):
+    """Raised when binary data is truncated, corrupt or of another version."""
+
+class BinaryWriter:
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def varint(self, value):
+        if value < 0:
+            raise ValueError(f"varint can't hold the negative value {value}, use signed()")
+        buffer = self.buffer
+        while value >= 0x80:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    def signed(self, value):
+        self.varint(value * 2 if value >= 0 else -value * 2 - 1) # zigzag: small magnitudes stay short
+
+    def bytes(self, data):
+        self.buffer += data
+
+    def string(self, text):
+        encoded = text.encode('utf-8')
+        self.varint(len(encoded))
+        self.buffer += encoded
+
+    def value(self, value):
+        if value is None:
+            self.buffer.append(TAG_NONE)
+        elif value is True or value is False:
+            self.buffer.append(TAG_TRUE if value else TAG_FALSE)
+        elif isinstance(value, int):
+            self.buffer.append(TAG_INT)
+            self.signed(value)
+        elif isinstance(value, float):
+            self.buffer.append(TAG_FLOAT)
+            self.buffer += DOUBLE.pack(value)
+        elif isinstance(value, str):
+            self.buffer.append(TAG_STR)
+            self.string(value)
+        else:
+            raise TypeError(f"Can't encode a value of type {type(value).__name__}")
+
+    def getvalue(self):
+        return bytes(self.buffer)
+
+class BinaryReader:
+    def __init__(self, data, position=0):
+        """Reads what a BinaryWriter wrote, from `position` in `data` (bytes or a memoryview)."""
+        self.data = data
+        self.position = position
+
+    def varint(self):
+        data = self.data
+        position = self.position
+        try:
+            byte = data[position]
+            if byte < 0x80: # one byte, by far the most common case
+                self.position = position + 1
+                return byte
+            result = byte & 0x7F
+            shift = 7
+            while True:
+                position += 1
+                byte = data[position]
+                result |= (byte & 0x7F) << shift
+                if byte < 0x80:
+                    self.position = position + 1
+                    return result
+                shift += 7
+        except IndexError:
+            raise FormatError("Truncated data (in a varint)") from None
+
+    def signed(self):
+        value = self.varint()
+        return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+    def bytes(self, count):
+        end = self.position + count
+        if end > len(self.data):
+            raise FormatError("Truncated data")
+        chunk = bytes(self.data[self.position:end])
+        self.position = end
+        return chunk
+
+    def string(self):
+        return self.bytes(self.varint()).decode('utf-8')
+
+    def value(self):
+        tag = self.bytes(1)[0]
+        if tag == TAG_NONE:
+            return None
+        if tag == TAG_FALSE:
+            return False
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_INT:
+            return self.signed()
+        if tag == TAG_FLOAT:
+            return DOUBLE.unpack(self.bytes(DOUBLE.size))[0]
+        if tag == TAG_STR:
+            return self.string()
+        raise FormatError(f"Unknown value tag {tag}")
+
+    def at_end(self):
+        return self.position >= len(self.data)
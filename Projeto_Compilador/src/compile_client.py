@@ -0,0 +1,82 @@
+"""
+Thin client of the compile server (compile_server.py).
+
+Only imports the standard library, so a call costs a Python start-up and a
+socket round trip instead of loading PLY and the parser tables.
+
+    python compile_client.py program.pas            # VM code on stdout
+    python compile_client.py program.pas -o out.vm
+    python compile_client.py - < program.pas
+
+Protocol: one JSON object per line in each direction. Requests are
+{"source": text, "name": label} or {"path": absolute path}, or
+{"command": "ping" | "shutdown"}. Replies carry "status" ("ok" or the
+failed phase), "code" (the VM code text), "diagnostics" and "profile".
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"pascal-compiler-{os.getuid()}.sock")
+
+class CompileClient:
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=60.0):
+        """A connection to a running compile server, reusable for many requests."""
+        self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.connection.settimeout(timeout)
+        self.connection.connect(socket_path)
+        self.replies = self.connection.makefile('r', encoding='utf-8')
+
+    def request(self, message):
+        self.connection.sendall((json.dumps(message) + "\n").encode('utf-8'))
+        line = self.replies.readline()
+        if not line:
+            raise ConnectionError("The compile server closed the connection.")
+        return json.loads(line)
+
+    def compile_source(self, source, name="<stdin>"):
+        return self.request({"source": source, "name": name})
+
+    def compile_path(self, path):
+        return self.request({"path": os.path.abspath(path)})
+
+    def close(self):
+        self.replies.close()
+        self.connection.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compiles a Pascal file through a running compile server.")
+    parser.add_argument("path", help="Pascal file ('-' reads stdin)")
+    parser.add_argument("-o", "--output", help="write the VM code here instead of stdout")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"server socket (default {DEFAULT_SOCKET})")
+    args = parser.parse_args(argv)
+
+    try:
+        client = CompileClient(args.socket)
+    except OSError as e:
+        print(f"Can't reach the compile server at {args.socket}: {e}", file=sys.stderr)
+        return 2
+    try:
+        if args.path == "-":
+            reply = client.compile_source(sys.stdin.read())
+        else:
+            reply = client.compile_path(args.path)
+    finally:
+        client.close()
+
+    for diagnostic in reply.get("diagnostics", []):
+        print(diagnostic, file=sys.stderr)
+    if reply["status"] != "ok":
+        return 1
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(reply["code"])
+    else:
+        sys.stdout.write(reply["code"])
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
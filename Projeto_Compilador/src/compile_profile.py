@@ -0,0 +1,155 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import ast_nodes
+
+PHASES = ["lex", "parse", "sem", "codegen", "optimize", "write"] # in pipeline order
+
+class PhaseStats:
+    def __init__(self, name):
+        """Wall time, CPU time and peak traced memory of one compiler phase."""
+        self.name = name
+        self.wall = 0.0          # seconds
+        self.cpu = 0.0           # seconds of process CPU time
+        self.peak_memory = 0     # bytes allocated above the phase start, at the peak (0 when not tracing)
+
+    def to_dict(self):
+        return {"wall": self.wall, "cpu": self.cpu, "peak_memory": self.peak_memory}
+
+class CompileProfile:
+    def __init__(self, source_name, trace_memory=True):
+        """
+        Measurements for the compilation of one source file.
+
+        :param source_name: Path of the compiled file.
+        :param trace_memory: Measure peak memory with tracemalloc (slows the compiler down).
+        """
+        self.source_name = source_name
+        self.trace_memory = trace_memory
+        self.status = "ok"
+        self.phases = {}   # phase name -> PhaseStats
+        self.counts = {}   # tokens, ast_nodes, symbols, instructions...
+        self.started_tracing = False
+
+    @contextmanager
+    def phase(self, name):
+        """Times the enclosed code; a phase entered twice adds up."""
+        stats = self.phases.setdefault(name, PhaseStats(name))
+        memory_at_start = 0
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+            memory_at_start = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield stats
+        finally:
+            stats.wall += time.perf_counter() - wall_start
+            stats.cpu += time.process_time() - cpu_start
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - memory_at_start
+                stats.peak_memory = max(stats.peak_memory, peak)
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def finish(self, status="ok"):
+        self.status = status
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        return self
+
+    def total_wall(self):
+        return sum(stats.wall for stats in self.phases.values())
+
+    def to_dict(self):
+        return {"file": self.source_name,
+                "status": self.status,
+                "phases": {name: stats.to_dict() for name, stats in ordered_phases(self.phases)},
+                "counts": dict(self.counts)}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def format_lines(self):
+        return format_phase_table(self.phases, self.counts)
+
+class BatchProfile:
+    def __init__(self):
+        """Sums the profiles of every file compiled in one run."""
+        self.profiles = []
+
+    def add(self, profile):
+        if profile is not None:
+            self.profiles.append(profile)
+
+    def phases(self):
+        totals = {}
+        for profile in self.profiles:
+            for name, stats in profile.phases.items():
+                total = totals.setdefault(name, PhaseStats(name))
+                total.wall += stats.wall
+                total.cpu += stats.cpu
+                total.peak_memory = max(total.peak_memory, stats.peak_memory) # peaks don't add up
+        return totals
+
+    def counts(self):
+        totals = {}
+        for profile in self.profiles:
+            for name, value in profile.counts.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def to_dict(self):
+        statuses = [profile.status for profile in self.profiles]
+        return {"batch": len(self.profiles),
+                "failed": sum(status != "ok" for status in statuses),
+                "phases": {name: stats.to_dict() for name, stats in ordered_phases(self.phases())},
+                "counts": self.counts()}
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def format_lines(self):
+        return format_phase_table(self.phases(), self.counts())
+
+    def write_json_lines(self, path):
+        """One JSON object per compiled file, followed by the batch totals."""
+        with open(path, 'w') as f:
+            for profile in self.profiles:
+                f.write(profile.to_json() + "\n")
+            f.write(self.to_json() + "\n")
+
+# --- Helpers ---
+
+def ordered_phases(phases):
+    known = [(name, phases[name]) for name in PHASES if name in phases]
+    others = [(name, stats) for name, stats in phases.items() if name not in PHASES]
+    return known + others
+
+def format_phase_table(phases, counts):
+    lines = [f"  {'phase':<10} {'wall ms':>10} {'cpu ms':>10} {'peak KiB':>10}"]
+    for name, stats in ordered_phases(phases):
+        lines.append(f"  {name:<10} {stats.wall * 1000:10.3f} {stats.cpu * 1000:10.3f} {stats.peak_memory / 1024:10.1f}")
+    total_wall = sum(stats.wall for stats in phases.values())
+    total_cpu = sum(stats.cpu for stats in phases.values())
+    lines.append(f"  {'total':<10} {total_wall * 1000:10.3f} {total_cpu * 1000:10.3f}")
+    if counts:
+        lines.append("  " + ", ".join(f"{name}={value}" for name, value in counts.items()))
+    return lines
+
+def count_ast_nodes(node):
+    """Number of nodes in the tree rooted at `node`."""
+    total = 0
+    pending = [node]
+    while pending:
+        current = pending.pop()
+        total += 1
+        pending.extend(ast_nodes.iter_child_nodes(current))
+    return total
@@ -0,0 +1,116 @@
+"""
+Long-running compile server.
+
+Keeps the lexer and the parser (with its LALR tables) loaded and compiles
+requests received over a Unix domain socket, see compile_client.py for the
+protocol. Every connection gets a thread, but compiles run one at a time:
+the code generator keeps its state in module globals. The VM code of every
+routine is kept between requests and reused while the routine is unchanged.
+
+    python compile_server.py [--socket PATH]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import socketserver
+import sys
+import threading
+
+from analex import build_lexer
+from anasin import build_parser
+from compile_client import DEFAULT_SOCKET
+from compile_profile import CompileProfile
+import main as compiler
+from vm_assembly.fragment_cache import FragmentCache
+
+class CompileRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile: # one JSON request per line, until the client disconnects
+            if not line.strip():
+                continue
+            try:
+                reply = handle_request(json.loads(line), self.server)
+            except Exception as e: # a bad request must not take the server down
+                reply = {"status": "internal_error", "code": "", "diagnostics": [f"{type(e).__name__}: {e}"]}
+            self.wfile.write((json.dumps(reply) + "\n").encode('utf-8'))
+            self.wfile.flush()
+            if self.server.stopping: # serve_forever returns once this handler is done
+                threading.Thread(target=self.server.shutdown).start()
+                break
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True # idle client connections don't keep the server alive
+
+    def __init__(self, socket_path):
+        self.stopping = False
+        self.compiled = 0
+        self.compile_lock = threading.Lock()
+        self.fragment_cache = FragmentCache()
+        super().__init__(socket_path, CompileRequestHandler)
+
+def handle_request(request, server):
+    command = request.get("command")
+    if command == "ping":
+        return {"status": "ok", "compiled": server.compiled, "pid": os.getpid()}
+    if command == "shutdown":
+        server.stopping = True
+        return {"status": "ok"}
+    if command is not None:
+        return {"status": "bad_request", "code": "", "diagnostics": [f"Unknown command '{command}'."]}
+
+    if "source" in request:
+        name = request.get("name", "<source>")
+        source_code = request["source"]
+    elif "path" in request:
+        name = request["path"]
+        try:
+            with open(name, 'r') as f:
+                source_code = f.read()
+        except OSError as e:
+            return {"status": "read_error", "code": "", "diagnostics": [f"Error reading file {name}: {e}"]}
+    else:
+        return {"status": "bad_request", "code": "", "diagnostics": ["A request needs 'source', 'path' or 'command'."]}
+    with server.compile_lock:
+        server.compiled += 1
+        return compile_request(name, source_code, request.get("trace_memory", False), server.fragment_cache)
+
+def compile_request(name, source_code, trace_memory=False, fragment_cache=None):
+    """Compiles source text in this process and builds the reply."""
+    diagnostics = []
+    profile = CompileProfile(name, trace_memory=trace_memory)
+    printed = io.StringIO() # the lexer, parser and generator report some problems with print
+    try:
+        with contextlib.redirect_stdout(printed):
+            status, vm_code_output = compiler.compile_source(name, source_code, profile, compiler.CompileLog(compiler.QUIET, errors=diagnostics),
+                                                                    fragment_cache)
+    finally:
+        profile.finish()
+    diagnostics = [line for line in printed.getvalue().splitlines() if line.strip()] + diagnostics
+    code = "\n".join(vm_code_output) + "\n" if vm_code_output is not None else ""
+    return {"status": status, "code": code, "diagnostics": diagnostics, "profile": profile.to_dict()}
+
+def serve(socket_path=DEFAULT_SOCKET):
+    if os.path.exists(socket_path): # left behind by a server that did not shut down cleanly
+        os.unlink(socket_path)
+    build_lexer() # load everything before the first request
+    build_parser()
+    with CompileServer(socket_path) as server:
+        print(f"Compile server listening on {socket_path} (pid {os.getpid()})", file=sys.stderr)
+        try:
+            server.serve_forever(poll_interval=0.2)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serves compile requests over a Unix domain socket.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help=f"socket path (default {DEFAULT_SOCKET})")
+    args = parser.parse_args(argv)
+    return serve(args.socket)
+
+if __name__ == '__main__':
+    sys.exit(main())
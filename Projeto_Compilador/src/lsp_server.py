@@ -0,0 +1,728 @@
+"""
+Language server for the Pascal compiler, speaking LSP over stdin/stdout.
+
+Gives an editor the compiler's parse and semantic errors as diagnostics, plus
+go-to-definition and hover for identifiers. Documents are synchronised whole
+on every change. An edit that stays inside one routine, or inside the
+statements of the main program, only has that part lexed, indexed and parsed
+again, see Document.update_part; any other edit reads the whole text again.
+The semantic check runs routine by routine (statement by statement in the
+main program), and a part is only checked again when its text or a
+declaration it can see changed, see RoutineChecker.
+
+    python lsp_server.py [--log FILE]
+"""
+import argparse
+import bisect
+import contextlib
+import hashlib
+import io
+import json
+import re
+import sys
+
+from ply.lex import LexToken
+
+from anasin import parse_program, tokenize, tokenize_range
+from anasem import semantic_check, SymbolTable, register_builtin_functions
+from ast_nodes import Block, CompoundStatement, ConstantDeclaration, FunctionDeclaration, ProcedureDeclaration, VariableDeclaration, iter_child_nodes
+from source_index import SourceIndex, token_end
+
+SEVERITY_ERROR = 1
+SYNC_FULL = 1
+METHOD_NOT_FOUND = -32601
+INVALID_REQUEST = -32600
+
+LINE_PREFIX = re.compile(r'^Line (\d+): (.*)$', re.S)
+SYNTAX_ERROR = re.compile(r"^Syntax error at token \w+ \('.*'\) at line (\d+)$")
+ILLEGAL_CHARACTER = re.compile(r"^Illegal character '(.)'$")
+
+COMPARED_BLOCK = 4096 # characters compared at a time when looking for the edited part of a text
+
+class Diagnostic:
+    def __init__(self, line, message, source="pascal", column=None, end=None):
+        """
+        One problem found in a document.
+
+        :param line: Line of the problem, counted from 0.
+        :param message: Text shown in the editor.
+        :param source: Which phase found it, 'syntax' or 'semantic'.
+        :param column: Column where the problem starts, None to mark the whole line.
+        :param end: (line, column) just after the problem, given with `column`.
+        """
+        self.line = line
+        self.message = message
+        self.source = source
+        self.column = column
+        self.end = end
+
+    def shifted(self, lines):
+        end = (self.end[0] + lines, self.end[1]) if self.end is not None else None
+        return Diagnostic(self.line + lines, self.message, self.source, self.column, end)
+
+    def to_lsp(self, index):
+        if self.column is not None:
+            return {"range": {"start": {"line": self.line, "character": self.column},
+                              "end": {"line": self.end[0], "character": self.end[1]}},
+                    "severity": SEVERITY_ERROR, "source": self.source, "message": self.message}
+        line = max(0, min(self.line, len(index.lines.line_starts) - 1))
+        start = index.lines.line_starts[line]
+        end = index.text.find('\n', start)
+        end = len(index.text) if end < 0 else end
+        length = len(index.text[start:end].rstrip())
+        indent = length - len(index.text[start:end].strip())
+        return {"range": {"start": {"line": line, "character": max(indent, 0)},
+                          "end": {"line": line, "character": length}},
+                "severity": SEVERITY_ERROR, "source": self.source, "message": self.message}
+
+# the semantic check reports "Line N: message" (N counted from 1), or just the message;
+# a SemanticError also has the node, whose span gives the exact range through `lines`
+def semantic_diagnostic(error, fallback_line, lines=None):
+    node = getattr(error, 'node', None)
+    if lines is not None and node is not None and node.start is not None and node.end is not None:
+        line, column = lines.position(node.start)
+        return Diagnostic(line, error.message, "semantic", column, lines.position(node.end))
+    match = LINE_PREFIX.match(str(error))
+    if match:
+        return Diagnostic(int(match.group(1)) - 1, match.group(2), "semantic")
+    return Diagnostic(fallback_line, str(error), "semantic")
+
+# diagnostics from what the lexer and the parser printed
+def syntax_diagnostics(printed, text, index):
+    diagnostics = []
+    for line in printed.splitlines():
+        line = line.strip()
+        syntax = SYNTAX_ERROR.match(line)
+        illegal = ILLEGAL_CHARACTER.match(line)
+        if syntax:
+            diagnostics.append(Diagnostic(int(syntax.group(1)) - 1, line, "syntax"))
+        elif line == "Syntax error at EOF":
+            diagnostics.append(Diagnostic(index.lines.line_of(len(text)), "Unexpected end of file.", "syntax"))
+        elif illegal: # the lexer does not say where, point at the first occurrence
+            offset = text.find(illegal.group(1))
+            diagnostics.append(Diagnostic(index.lines.line_of(max(offset, 0)), line, "syntax"))
+        elif line.startswith("Parse error:"):
+            diagnostics.append(Diagnostic(0, line, "syntax"))
+    return diagnostics
+
+class RoutineChecker:
+    def __init__(self):
+        """
+        Semantic check of one document, split in units that are cached separately.
+
+        The units are the routines declared in the main program and each
+        statement of the main program (global constants and variables are cheap
+        and checked every time). A routine's diagnostics are reused while its
+        source text and everything declared before it are unchanged, a
+        statement's while its node was not parsed again (see Document) and the
+        declarations are unchanged, moved to the unit's current first line.
+        """
+        self.cache = {}  # unit key -> diagnostics with lines relative to the unit start ((node, diagnostics) for a statement)
+        self.checked = 0 # units checked by the last check()
+        self.reused = 0  # units answered from the cache by the last check()
+
+    def check(self, ast, index, statement_starts=None, relocate=None):
+        """
+        Diagnostics of a parsed document.
+
+        :param statement_starts: Where each statement of the main program starts now, when the
+                                 positions in their nodes may be out of date (the nodes' by default).
+        :param relocate: Called with a node and where it starts now before the node is checked,
+                         to bring its positions up to date.
+        """
+        diagnostics = []
+        used = {}
+        self.checked = self.reused = 0
+        table = SymbolTable()
+        visible = hashlib.sha1() # everything declared so far, in order
+        header_line = index.lines.line_of(index.main.start)
+
+        try:
+            semantic_check(ast.header, table) # also registers the builtins
+        except Exception as e:
+            diagnostics.append(semantic_diagnostic(e, header_line, index.lines))
+        visible.update(repr(ast.header).encode())
+
+        routines = iter(index.routines)
+        for declaration in ast.block.declarations:
+            if isinstance(declaration, (ConstantDeclaration, VariableDeclaration)): # cheap, always checked
+                try:
+                    semantic_check(declaration, table)
+                except Exception as e:
+                    diagnostics.append(semantic_diagnostic(e, header_line, index.lines))
+                visible.update(repr(declaration).encode())
+                continue
+            scope = next(routines, None)
+            if scope is None: # the index and the parser disagree, check without the cache
+                diagnostics.extend(self.check_unit(declaration, table, header_line, index.lines))
+                continue
+            start_line = index.lines.line_of(scope.start)
+            key = self.unit_key(visible, index.text[scope.start:scope.end])
+            diagnostics.extend(self.check_cached(key, used, declaration, table, start_line, index.lines, relocate, scope.start))
+            visible.update(signature_of(declaration).encode())
+
+        declarations = visible.hexdigest()
+        statements = ast.block.compound_statement.statement_list
+        if statement_starts is None:
+            statement_starts = [statement.start if statement is not None else None for statement in statements]
+        for position, statement in enumerate(statements):
+            if statement is None: # empty statement
+                continue
+            key = (declarations, id(statement))
+            entry = self.cache.get(key)
+            if entry is None or entry[0] is not statement:
+                if relocate is not None:
+                    relocate(statement, statement_starts[position])
+                start_line = index.lines.line_of(statement.start)
+                found = self.check_unit(statement, table, start_line, index.lines)
+                entry = (statement, [diagnostic.shifted(-start_line) for diagnostic in found]) # the node keeps its id in use
+                self.checked += 1
+            else:
+                self.reused += 1
+            used[key] = entry
+            if entry[1]: # like the check of the whole statement list, stop at the first problem
+                start_line = index.lines.line_of(statement_starts[position])
+                diagnostics.extend(diagnostic.shifted(start_line) for diagnostic in entry[1])
+                for later in statements[position + 1:]: # still good for when the problem is fixed
+                    later_key = (declarations, id(later))
+                    if later_key in self.cache:
+                        used[later_key] = self.cache[later_key]
+                break
+
+        self.cache = used # units that disappeared from the document are dropped
+        return diagnostics
+
+    @staticmethod
+    def unit_key(visible, unit_text):
+        key = visible.copy()
+        key.update(b"\0" + unit_text.encode())
+        return key.hexdigest()
+
+    def check_cached(self, key, used, node, table, start_line, lines, relocate=None, start=None):
+        relative = self.cache.get(key)
+        if relative is None:
+            if relocate is not None:
+                relocate(node, start)
+            diagnostics = self.check_unit(node, table, start_line, lines)
+            relative = [diagnostic.shifted(-start_line) for diagnostic in diagnostics]
+            self.checked += 1
+        else:
+            if isinstance(node, (FunctionDeclaration, ProcedureDeclaration)):
+                define_signature(node, table) # later units still need to see the routine
+            self.reused += 1
+        used[key] = relative
+        return [diagnostic.shifted(start_line) for diagnostic in relative]
+
+    @staticmethod
+    def check_unit(node, table, start_line, lines):
+        try:
+            semantic_check(node, table)
+        except Exception as e: # the check stops at the first problem of the unit
+            return [semantic_diagnostic(e, start_line, lines)]
+        return []
+
+# the part of a routine that other units can see
+def signature_of(node):
+    return f"{type(node).__name__}({node.name}, {node.parameter_list}, {getattr(node, 'return_type', None)})"
+
+def define_signature(node, table):
+    """Declares a routine in `table` as semantic_check would, without checking its block again."""
+    empty_block = Block(declarations=[], compound_statement=CompoundStatement(statement_list=[]))
+    if isinstance(node, FunctionDeclaration):
+        stub = FunctionDeclaration(node.name, node.parameter_list, node.return_type, empty_block, node.lineno)
+    else:
+        stub = ProcedureDeclaration(node.name, node.parameter_list, empty_block, node.lineno)
+    try:
+        semantic_check(stub, table)
+    except Exception: # the problem is already among the cached diagnostics
+        pass
+
+class Part:
+    def __init__(self, kind, first, last, start, end, opens=False, closes=False):
+        """
+        The part of a document an edit falls in, parsed again on its own by Document.update_part.
+
+        :param kind: 'routine' or 'statements'.
+        :param first: Number of the routine among those of the main program, or of the first statement of the main program in the part.
+        :param last: Just after the last routine or statement of the part.
+        :param start: Offset where the part starts.
+        :param end: Offset just after the part.
+        :param opens: True if the part starts with the BEGIN of the main statements.
+        :param closes: True if the part runs to the end of the text (the END and the final '.').
+        """
+        self.kind = kind
+        self.first = first
+        self.last = last
+        self.start = start
+        self.end = end
+        self.opens = opens
+        self.closes = closes
+
+class Document:
+    def __init__(self, uri, text, version=None):
+        """
+        An open editor buffer and what was found in it.
+
+        After an edit inside one routine or among the statements of the main program,
+        only that part is lexed, indexed and parsed again and put in place of the old
+        one in the tokens, the index and the AST. The nodes after it are not moved
+        then: each routine and main statement is brought to its new place when it has
+        to be checked again (relocate), from where it is now (the index's scopes for
+        the routines, statement_starts for the statements).
+        """
+        self.uri = uri
+        self.version = version
+        self.checker = RoutineChecker()
+        self.ast = None
+        self.update(text, version)
+
+    def update(self, text, version=None):
+        self.version = version
+        if self.ast is None or not self.update_part(text):
+            self.update_whole(text)
+
+    def update_whole(self, text):
+        self.text = text
+        printed = io.StringIO() # the lexer, the parser and anasem report problems with print
+        with contextlib.redirect_stdout(printed):
+            token_list = tokenize(text)
+            self.index = SourceIndex(text, token_list)
+            ast = parse_program(text, token_list)
+        self.diagnostics = syntax_diagnostics(printed.getvalue(), text, self.index)
+        self.ast = ast if not self.diagnostics else None # edits are only followed part by part from a good parse
+        self.broken = None # Part that does not parse since the last edits, its nodes are the last good ones
+        if self.ast is None:
+            return
+        statements = self.ast.block.compound_statement.statement_list
+        self.statement_starts, self.statement_ends = statement_spans(statements, self.ast.block.compound_statement.start)
+        if None in self.statement_starts or None in self.statement_ends: # a node without its span, follow no edit part by part
+            self.statement_starts = None
+        self.located = {}
+        for node in self.routine_declarations() + statements:
+            self.mark_located(node)
+        self.check()
+
+    def update_part(self, text):
+        """Follows an edit by reading again only the part of the text it falls in, False if it can't."""
+        old = self.text
+        start = common_prefix_length(old, text)
+        end = len(old) - common_suffix_length(old, text, min(len(old), len(text)) - start)
+        part = self.part_around(start, end)
+        if part is None:
+            return False
+
+        delta = len(text) - len(old)
+        new_end = part.end + delta
+        added_lines = text.count('\n', part.start, new_end) - old.count('\n', part.start, part.end)
+        printed = io.StringIO()
+        with contextlib.redirect_stdout(printed):
+            token_list, next_token = tokenize_range(text, part.start, new_end, self.index.lines.line_of(part.start) + 1)
+            begin_depth = 1 if part.kind == 'statements' and not part.opens else 0
+            if not self.index.splice(text, part.start, part.end, token_list, next_token, begin_depth):
+                return False
+            parsed = parse_program(text, self.wrapped(part, token_list, new_end))
+        printed = printed.getvalue()
+        if outside_part(printed):
+            return False
+        new_nodes = self.parsed_nodes(part, parsed)
+        if new_nodes is None and not printed:
+            return False # the part holds something else now (a routine became statements, ...)
+
+        self.text = text
+        for declaration in self.ast.block.declarations: # global declarations after the part move along now
+            if isinstance(declaration, (ConstantDeclaration, VariableDeclaration)) and declaration.start >= part.end:
+                shift_positions(declaration, delta, added_lines)
+        if part.kind == 'statements':
+            self.statement_starts[part.last:] = [start + delta for start in self.statement_starts[part.last:]]
+            self.statement_ends[part.last:] = [end + delta for end in self.statement_ends[part.last:]]
+        else:
+            self.statement_starts = [start + delta for start in self.statement_starts]
+            self.statement_ends = [end + delta for end in self.statement_ends]
+
+        self.diagnostics = syntax_diagnostics(printed, text, self.index)
+        if self.diagnostics: # keep the last good nodes of the part until it parses again
+            part.end = new_end
+            self.broken = part
+            return True
+
+        self.broken = None
+        if part.kind == 'routine':
+            positions = [position for position, declaration in enumerate(self.ast.block.declarations)
+                         if isinstance(declaration, (FunctionDeclaration, ProcedureDeclaration))]
+            self.located.pop(id(self.ast.block.declarations[positions[part.first]]), None)
+            self.ast.block.declarations[positions[part.first]] = new_nodes[0]
+        else:
+            statements = self.ast.block.compound_statement.statement_list
+            for statement in statements[part.first:part.last]:
+                self.located.pop(id(statement), None)
+            statements[part.first:part.last] = new_nodes
+            previous_end = self.statement_ends[part.first - 1] if part.first > 0 else part.start
+            starts, ends = statement_spans(new_nodes, previous_end)
+            self.statement_starts[part.first:part.last] = starts
+            self.statement_ends[part.first:part.last] = ends
+        for node in new_nodes:
+            self.mark_located(node)
+        self.check()
+        return True
+
+    def part_around(self, start, end):
+        """The Part holding the text between two offsets, None if it is not in a single routine or among the main statements."""
+        if self.broken is not None:
+            if self.broken.start <= start and end <= self.broken.end:
+                return self.broken
+            return None # the broken part must be read again with the rest
+
+        routines = self.index.routines
+        if self.statement_starts is None or len(routines) != len(self.routine_declarations()):
+            return None
+        for number, scope in enumerate(routines):
+            if scope.start <= start and end <= scope.end:
+                return Part('routine', number, number + 1, scope.start, scope.end)
+
+        body_start = self.index.main.body_start
+        if body_start is None or start < body_start:
+            return None
+        statements = self.ast.block.compound_statement.statement_list
+        first = bisect.bisect_right(self.statement_starts, start) - 1
+        while first >= 0 and statements[first] is None:
+            first -= 1
+        last = bisect.bisect_left(self.statement_ends, end)
+        while last < len(statements) and statements[last] is None:
+            last += 1
+        opens, closes = first < 0, last == len(statements)
+        return Part('statements', max(first, 0), last if closes else last + 1,
+                    body_start if opens else self.statement_starts[first],
+                    len(self.text) if closes else self.statement_ends[last], opens, closes)
+
+    def wrapped(self, part, token_list, end):
+        """The tokens of a part inside those of a program made of it alone."""
+        name = self.index.main.name or "part"
+        head = [wrapper_token('PROGRAM', "program", part.start), wrapper_token('ID', name, part.start),
+                wrapper_token('SEMICOLON', ";", part.start)]
+        tail = [wrapper_token('END', "end", end), wrapper_token('DOT', ".", end)]
+        if part.kind == 'routine':
+            return head + token_list + [wrapper_token('BEGIN', "begin", end)] + tail
+        if not part.opens:
+            head.append(wrapper_token('BEGIN', "begin", part.start))
+        return head + token_list + ([] if part.closes else tail)
+
+    @staticmethod
+    def parsed_nodes(part, program):
+        """The routine or the statements a part parsed into, None if it is not what the part held."""
+        if program is None:
+            return None
+        declarations = program.block.declarations
+        if part.kind == 'routine':
+            if len(declarations) != 1 or not isinstance(declarations[0], (FunctionDeclaration, ProcedureDeclaration)):
+                return None
+            return declarations
+        statements = program.block.compound_statement.statement_list
+        if declarations or any(statement is not None and (statement.start is None or statement.end is None) for statement in statements):
+            return None
+        return statements
+
+    def routine_declarations(self):
+        return [declaration for declaration in self.ast.block.declarations
+                if isinstance(declaration, (FunctionDeclaration, ProcedureDeclaration))]
+
+    def mark_located(self, node):
+        if node is not None:
+            self.located[id(node)] = (node, self.index.lines.line_of(node.start))
+
+    def relocate(self, node, start):
+        """Moves the positions in a routine or main statement parsed before the edits in front of it."""
+        node_line = self.located[id(node)][1]
+        line = self.index.lines.line_of(start)
+        if start != node.start or line != node_line:
+            shift_positions(node, start - node.start, line - node_line)
+            self.located[id(node)] = (node, line)
+
+    def check(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.diagnostics = self.checker.check(self.ast, self.index, self.statement_starts, self.relocate)
+
+    def identifier_at(self, line, character):
+        token = self.index.token_at(self.index.lines.offset(line, character))
+        if token is None or token.type != 'ID':
+            return None
+        return token
+
+    def definition(self, line, character):
+        token = self.identifier_at(line, character)
+        if token is None:
+            return None
+        declaration = self.index.resolve(token.value, token.lexpos)
+        if declaration is None:
+            return None
+        return {"uri": self.uri, "range": self.range(declaration.offset, declaration.end)}
+
+    def hover(self, line, character):
+        token = self.identifier_at(line, character)
+        if token is None:
+            return None
+        declaration = self.index.resolve(token.value, token.lexpos)
+        if declaration is not None:
+            text = hover_text(declaration)
+        else:
+            text = builtin_hover_text(token.value)
+            if text is None:
+                return None
+        return {"contents": {"kind": "markdown", "value": text},
+                "range": self.range(token.lexpos, token_end(self.text, token))}
+
+    def range(self, start, end):
+        start_line, start_column = self.index.lines.position(start)
+        end_line, end_column = self.index.lines.position(end)
+        return {"start": {"line": start_line, "character": start_column},
+                "end": {"line": end_line, "character": end_column}}
+
+# where each statement starts and ends, an empty one (None) taking the end of the statement before it
+def statement_spans(statements, previous_end):
+    starts, ends = [], []
+    for statement in statements:
+        if statement is not None:
+            previous_end = statement.end
+        starts.append(statement.start if statement is not None else previous_end)
+        ends.append(previous_end)
+    return starts, ends
+
+def shift_positions(node, characters, lines):
+    """Moves a node and the nodes in it by a number of characters and of lines."""
+    pending = [node]
+    seen = set()
+    while pending:
+        node = pending.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if node.start is not None:
+            node.start += characters
+        if node.end is not None:
+            node.end += characters
+        if node.lineno is not None:
+            node.lineno += lines
+        pending.extend(iter_child_nodes(node))
+
+# true if the parse of a part stopped at the end of the text or in the tokens around the part
+def outside_part(printed):
+    for line in printed.splitlines():
+        line = line.strip()
+        syntax = SYNTAX_ERROR.match(line)
+        if line == "Syntax error at EOF" or line.startswith("Parse error:") or (syntax and syntax.group(1) == '0'):
+            return True
+    return False
+
+# token of the program a part is parsed in (Document.wrapped), line 0 tells its syntax errors apart
+def wrapper_token(token_type, value, lexpos):
+    token = LexToken()
+    token.type = token_type
+    token.value = value
+    token.lineno = 0
+    token.lexpos = lexpos
+    return token
+
+def common_prefix_length(text, other):
+    limit = min(len(text), len(other))
+    length = 0
+    while length + COMPARED_BLOCK <= limit and text[length:length + COMPARED_BLOCK] == other[length:length + COMPARED_BLOCK]:
+        length += COMPARED_BLOCK
+    while length < limit and text[length] == other[length]:
+        length += 1
+    return length
+
+def common_suffix_length(text, other, limit):
+    """Length of the longest common end of two texts, at most `limit`."""
+    length = 0
+    while length + COMPARED_BLOCK <= limit and \
+            text[len(text) - length - COMPARED_BLOCK:len(text) - length] == other[len(other) - length - COMPARED_BLOCK:len(other) - length]:
+        length += COMPARED_BLOCK
+    while length < limit and text[len(text) - length - 1] == other[len(other) - length - 1]:
+        length += 1
+    return length
+
+def hover_text(declaration):
+    code = f"```pascal\n{declaration.detail or declaration.name}\n```"
+    scope = declaration.scope
+    if declaration.kind == 'program':
+        return code
+    if scope.parent is None:
+        where = "global " + declaration.kind
+    elif declaration.kind == 'parameter':
+        where = f"parameter of {scope.kind} {scope.name}"
+    else:
+        where = f"local {declaration.kind} of {scope.kind} {scope.name}"
+    return f"{code}\n{where}"
+
+_builtin_table = None
+
+def builtin_hover_text(name):
+    global _builtin_table
+    if _builtin_table is None:
+        _builtin_table = SymbolTable()
+        register_builtin_functions(_builtin_table)
+    symbol = _builtin_table.resolve(name.lower())
+    if symbol is None:
+        return None
+    parameters = ", ".join(parameter.sym_type.lower() for parameter in symbol.params_info)
+    return f"```pascal\nfunction {symbol.name}({parameters}): {symbol.return_type.lower()}\n```\npredefined function"
+
+class LanguageServer:
+    def __init__(self, input_stream, output_stream, log_stream=None):
+        """
+        JSON-RPC over a pair of binary streams with LSP Content-Length framing.
+
+        :param input_stream: Where requests come from (stdin's buffer).
+        :param output_stream: Where replies and notifications go (stdout's buffer).
+        :param log_stream: Text stream for a trace of the analyses, or None.
+        """
+        self.input = input_stream
+        self.output = output_stream
+        self.log_stream = log_stream
+        self.documents = {}
+        self.shutdown_requested = False
+        self.handlers = {
+            "initialize": self.initialize,
+            "initialized": lambda params: None,
+            "shutdown": self.shutdown,
+            "textDocument/didOpen": self.did_open,
+            "textDocument/didChange": self.did_change,
+            "textDocument/didClose": self.did_close,
+            "textDocument/definition": self.definition,
+            "textDocument/hover": self.hover,
+        }
+
+    def log(self, message):
+        if self.log_stream is not None:
+            print(message, file=self.log_stream, flush=True)
+
+    def read_message(self):
+        length = None
+        while True:
+            header = self.input.readline()
+            if not header:
+                return None # the client closed the connection
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.decode('ascii').partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        if length is None:
+            return {}
+        return json.loads(self.input.read(length).decode('utf-8'))
+
+    def send(self, message):
+        body = json.dumps(message).encode('utf-8')
+        self.output.write(f"Content-Length: {len(body)}\r\n\r\n".encode('ascii') + body)
+        self.output.flush()
+
+    def notify(self, method, params):
+        self.send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def serve(self):
+        """Handles messages until 'exit' or the end of the input, returns the process exit code."""
+        while True:
+            message = self.read_message()
+            if message is None:
+                return 1
+            method = message.get("method")
+            if method == "exit":
+                return 0 if self.shutdown_requested else 1
+            self.dispatch(message)
+
+    def dispatch(self, message):
+        method = message.get("method")
+        handler = self.handlers.get(method)
+        is_request = "id" in message
+        if handler is None:
+            if is_request:
+                self.send({"jsonrpc": "2.0", "id": message["id"],
+                           "error": {"code": METHOD_NOT_FOUND, "message": f"Unsupported method {method}."}})
+            return # unknown notifications ($/cancelRequest, ...) are ignored
+        try:
+            result = handler(message.get("params") or {})
+        except Exception as e: # a bad message must not stop the server
+            self.log(f"{method} failed: {type(e).__name__}: {e}")
+            if is_request:
+                self.send({"jsonrpc": "2.0", "id": message["id"], "error": {"code": INVALID_REQUEST, "message": str(e)}})
+            return
+        if is_request:
+            self.send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+    # --- Lifecycle ---
+
+    def initialize(self, params):
+        return {"capabilities": {"textDocumentSync": {"openClose": True, "change": SYNC_FULL},
+                                 "definitionProvider": True,
+                                 "hoverProvider": True},
+                "serverInfo": {"name": "pascal-ewvm"}}
+
+    def shutdown(self, params):
+        self.shutdown_requested = True
+        return None
+
+    # --- Documents ---
+
+    def did_open(self, params):
+        item = params["textDocument"]
+        self.documents[item["uri"]] = Document(item["uri"], item["text"], item.get("version"))
+        self.publish(self.documents[item["uri"]])
+
+    def did_change(self, params):
+        uri = params["textDocument"]["uri"]
+        changes = params.get("contentChanges") or []
+        if not changes:
+            return
+        text = changes[-1]["text"] # full synchronisation, the last change holds the whole text
+        document = self.documents.get(uri)
+        if document is None:
+            document = self.documents[uri] = Document(uri, text, params["textDocument"].get("version"))
+        else:
+            document.update(text, params["textDocument"].get("version"))
+        self.publish(document)
+
+    def did_close(self, params):
+        uri = params["textDocument"]["uri"]
+        self.documents.pop(uri, None)
+        self.notify("textDocument/publishDiagnostics", {"uri": uri, "diagnostics": []})
+
+    def publish(self, document):
+        checker = document.checker
+        self.log(f"{document.uri}: {len(document.diagnostics)} diagnostic(s), "
+                 f"{checker.checked} unit(s) checked, {checker.reused} reused")
+        params = {"uri": document.uri, "diagnostics": [d.to_lsp(document.index) for d in document.diagnostics]}
+        if document.version is not None:
+            params["version"] = document.version
+        self.notify("textDocument/publishDiagnostics", params)
+
+    # --- Queries ---
+
+    def document_position(self, params):
+        document = self.documents.get(params["textDocument"]["uri"])
+        position = params["position"]
+        return document, position["line"], position["character"]
+
+    def definition(self, params):
+        document, line, character = self.document_position(params)
+        return document.definition(line, character) if document is not None else None
+
+    def hover(self, params):
+        document, line, character = self.document_position(params)
+        return document.hover(line, character) if document is not None else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pascal language server (LSP over stdin/stdout).")
+    parser.add_argument("--log", help="append a trace of the analyses to this file")
+    args = parser.parse_args(argv)
+
+    log_stream = open(args.log, 'a') if args.log else None
+    protocol_output = sys.stdout.buffer
+    sys.stdout = sys.stderr # a stray print must not corrupt the protocol stream
+    try:
+        return LanguageServer(sys.stdin.buffer, protocol_output, log_stream).serve()
+    finally:
+        if log_stream is not None:
+            log_stream.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
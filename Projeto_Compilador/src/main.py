@@ -1,12 +1,32 @@
+import argparse
+import contextlib
+import glob
+import multiprocessing
 import os
 import sys 
-from anasin import parse_program
+from analex import ChunkedTokenStream
+from anasin import parse_program, tokenize
 from anasem import semantic_check, SymbolTable
-from vm_assembly.generator import generate, reset_and_initialize_generator_state 
+from source_index import LineIndex
+from optimizer.dead_code import eliminate_dead_code
+from vm_assembly.generator import generate_cfg, optimize_cfg, reset_and_initialize_generator_state 
+import vm_assembly.generator as vm_generator
+from vm_assembly.passes import format_frame_sizes
+from vm_assembly.fragment_cache import FragmentCache
+from compile_profile import CompileProfile, BatchProfile, count_ast_nodes
+from token_cache import TokenCache
+from binary_format import FormatError
+import ast_format
 
 # Get the directory where main.py is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "output") # Path relative to this script file
+PROFILE_LOG = os.path.join(OUTPUT_DIR, "compile_profile.jsonl") # JSON lines written after every interactive run
+STDIN_PATH = "-" # command line path that means stdin (source) and stdout (VM code)
+STREAM_THRESHOLD = 16 * 1024 * 1024 # bytes; bigger sources are lexed in chunks instead of read into one string
+AST_EXTENSION = ".past" # binary AST files (ast_format.py), compiled without lexing and parsing
+
+QUIET, NORMAL, VERBOSE = 0, 1, 2 # CompileLog verbosity levels
 
 
 def read_input():
@@ -35,68 +55,404 @@ def get_output_filepath(input_filepath):
     output_filename = f"{file_name_without_ext}.vm"
     return os.path.join(OUTPUT_DIR, output_filename)
 
-def compile_pascal_file(file_path):
-    """Compiles a single Pascal file."""
-    print(f"\n--- Compiling: {file_path} ---")
+class CompileLog:
+    def __init__(self, verbosity=VERBOSE, stream=None, errors=None):
+        """
+        Where compile_pascal_file reports progress.
+
+        :param verbosity: QUIET (errors only), NORMAL (one line per file) or VERBOSE (every phase and the VM code).
+        :param stream: Stream for progress messages (stdout by default); errors always go to stderr.
+        :param errors: If a list is given, errors are collected there instead of printed.
+        """
+        self.verbosity = verbosity
+        self.stream = stream
+        self.errors = errors
+
+    def info(self, message):
+        if self.verbosity >= NORMAL:
+            print(message, file=self.stream or sys.stdout)
+
+    def detail(self, message):
+        if self.verbosity >= VERBOSE:
+            print(message, file=self.stream or sys.stdout)
+
+    def error(self, message):
+        if self.errors is not None:
+            self.errors.append(message)
+        else:
+            print(message, file=sys.stderr)
+
+def compile_pascal_file(file_path, output_path=None, log=None, trace_memory=True, show_profile=True, fragment_cache=None,
+                        token_cache=None, range_checks=False):
+    """
+    Compiles a single Pascal file and returns its CompileProfile (status "ok" on success).
+    STDIN_PATH reads the source from stdin and writes the VM code to stdout.
+    With a FragmentCache, the code of routines that did not change is reused;
+    with a TokenCache, the tokens of a source lexed before are replayed;
+    with range_checks, array indexes and values stored into BYTE, WORD, ... are checked at run time.
+    A .past file holds a saved AST, which is loaded instead of parsed.
+    """
+    log = log or CompileLog()
+    to_stdout = file_path == STDIN_PATH
+    if to_stdout: # stdout carries the VM code, progress goes to stderr
+        log = CompileLog(log.verbosity, sys.stderr)
+    elif output_path is None:
+        output_path = get_output_filepath(file_path)
+    log.detail(f"\n--- Compiling: {file_path} ---")
+    profile = CompileProfile(file_path, trace_memory=trace_memory)
+    if not to_stdout and file_path.lower().endswith(AST_EXTENSION):
+        return finish_compile(file_path, output_path, log, profile, show_profile,
+                              lambda: compile_saved_ast(file_path, profile, log, fragment_cache, range_checks))
+    if not to_stdout and file_size(file_path) > STREAM_THRESHOLD:
+        return compile_large_file(file_path, output_path, log, profile, show_profile, fragment_cache, range_checks)
     try:
-        with open(file_path, 'r') as f:
-            source_code = f.read() # Renamed to avoid conflict with vm_generator.code
+        if to_stdout:
+            source_code = sys.stdin.read()
+        else:
+            with open(file_path, 'r') as f:
+                source_code = f.read() # Renamed to avoid conflict with vm_generator.code
     except Exception as e:
-        print(f"Error reading file {file_path}: {e}")
-        return
+        log.error(f"Error reading file {file_path}: {e}")
+        return profile.finish("read_error")
 
     if not source_code.strip():
-        print(f"No code to compile in {file_path}.")
-        return
+        log.error(f"No code to compile in {file_path}.")
+        return profile.finish("empty")
+
+    return finish_compile(file_path, output_path, log, profile, show_profile,
+                          lambda: compile_source(file_path, source_code, profile, log, fragment_cache, token_cache,
+                                                 range_checks))
+
+# runs `compile_phases` (returning a status and the VM code lines), writes the code and reports
+def finish_compile(file_path, output_path, log, profile, show_profile, compile_phases):
+    try:
+        # messages printed by the lexer, parser and generator follow the progress stream
+        with contextlib.redirect_stdout(log.stream or sys.stdout):
+            status, vm_code_output = compile_phases()
+            if status == "ok":
+                with profile.phase("write"):
+                    status = write_vm_code(file_path, vm_code_output, output_path, log)
+    finally:
+        profile.finish()
+    profile.status = status
+    if status == "ok":
+        log.info(f"{file_path} -> {output_path or 'stdout'}")
+    if show_profile:
+        log.info("Compile profile:")
+        for profile_line in profile.format_lines():
+            log.info(profile_line)
+    return profile
+
+def file_size(file_path):
+    try:
+        return os.path.getsize(file_path)
+    except OSError: # reported when the file is opened
+        return 0
 
+# a source over STREAM_THRESHOLD: the lexer reads it in chunks while the parser asks for tokens
+def compile_large_file(file_path, output_path, log, profile, show_profile, fragment_cache, range_checks=False):
+    try:
+        source_file = open(file_path, 'r')
+    except Exception as e:
+        log.error(f"Error reading file {file_path}: {e}")
+        return profile.finish("read_error")
+    with source_file:
+        return finish_compile(file_path, output_path, log, profile, show_profile,
+                              lambda: compile_stream(file_path, source_file, profile, log, fragment_cache, range_checks))
+
+# runs every phase but the final write under the profiler
+# returns ("ok", VM code lines) or (the phase that failed, None)
+def compile_source(file_path, source_code, profile, log, fragment_cache=None, token_cache=None, range_checks=False):
     # Reset the generator state before processing each file
     reset_and_initialize_generator_state()
 
-    print("Parsing program...")
-    ast = parse_program(source_code)
+    log.detail("Parsing program...")
+    with profile.phase("lex"):
+        if token_cache is not None:
+            token_list = token_cache.tokenize(source_code)
+        else:
+            token_list = tokenize(source_code)
+    profile.count("tokens", len(token_list))
+    with profile.phase("parse"):
+        ast = parse_program(source_code, token_list)
+    return check_and_generate(file_path, ast, profile, log, fragment_cache, source_code, range_checks)
+
+# like compile_source, for a text stream that is never held in memory whole
+# (lexing happens while parsing and is timed as part of the parse phase)
+def compile_stream(file_path, source_stream, profile, log, fragment_cache=None, range_checks=False):
+    reset_and_initialize_generator_state()
+
+    log.detail("Parsing program (source lexed in chunks)...")
+    token_stream = ChunkedTokenStream(source_stream)
+    with profile.phase("parse"):
+        ast = parse_program(None, token_stream)
+    profile.count("tokens", token_stream.count)
+    if token_stream.count == 0:
+        log.error(f"No code to compile in {file_path}.")
+        return "empty", None
+    return check_and_generate(file_path, ast, profile, log, fragment_cache, range_checks=range_checks)
+
+# like compile_source, for an AST saved by ast_format.py (loading it is timed as the parse phase)
+def compile_saved_ast(file_path, profile, log, fragment_cache=None, range_checks=False):
+    reset_and_initialize_generator_state()
+
+    log.detail("Loading saved AST...")
+    try:
+        with profile.phase("parse"):
+            ast = ast_format.load(file_path)
+    except (OSError, FormatError) as e:
+        log.error(f"Error reading AST file {file_path}: {e}")
+        return "read_error", None
+    return check_and_generate(file_path, ast, profile, log, fragment_cache, range_checks=range_checks)
+
+# semantic check, optimization and code generation of a parsed program
+def check_and_generate(file_path, ast, profile, log, fragment_cache, source_text=None, range_checks=False):
     if not ast:
-        print("Parsing failed.")
-        return
+        log.error(f"Parsing failed: {file_path}")
+        return "parse_error", None
+    profile.count("ast_nodes", count_ast_nodes(ast))
 
-    print("AST generated successfully.")
-    print("Performing semantic analysis...")
+    log.detail("AST generated successfully.")
+    log.detail("Performing semantic analysis...")
 
     try:
         # Note: semantic_check might also need its own state management if it uses globals
         # For now, assuming semantic_check is stateless or manages its own state per call.
         global_scope_for_semantic_check = SymbolTable() # Create a fresh scope for semantic analysis
-        semantic_check(ast, global_scope_for_semantic_check)
-        print("Semantic check passed.")
+        with profile.phase("sem"):
+            semantic_check(ast, global_scope_for_semantic_check)
+        profile.count("symbols", global_scope_for_semantic_check.symbol_count())
+        log.detail("Semantic check passed.")
     except Exception as e:
-        print(f"Semantic error in {file_path}: {e}")
-        return
+        log.error(f"Semantic error in {file_path}: {semantic_error_text(e, source_text)}")
+        return "semantic_error", None
 
-    print("Generating VM code...")
-    try:
-        vm_code_output = generate(ast) # Renamed to avoid potential confusion
+    log.detail("Eliminating dead code...")
+    with profile.phase("optimize"):
+        ast = eliminate_dead_code(ast)
 
-        output_vm_filepath = get_output_filepath(file_path)
-        print(f"\n--- Generated VM Code for {os.path.basename(file_path)} ---")
-        for instruction in vm_code_output:
-            print(instruction)
+    log.detail("Generating VM code...")
+    try:
+        with profile.phase("codegen"):
+            cfg = generate_cfg(ast, fragment_cache, range_checks)
+        profile.count("instructions_generated", cfg.instruction_count())
+        profile.count("write_instructions_saved", vm_generator.last_write_instructions_saved)
+        log.detail(f"Output: {vm_generator.last_write_instructions_saved} instructions saved by joining constant output.")
+        if range_checks:
+            checks_emitted, checks_eliminated = vm_generator.last_range_checks
+            profile.count("range_checks", checks_emitted)
+            profile.count("range_checks_eliminated", checks_eliminated)
+            log.detail(f"Range checks: {checks_emitted} emitted, {checks_eliminated} proved redundant.")
+        if fragment_cache is not None:
+            profile.count("routines_reused", fragment_cache.hits)
+            profile.count("routines_generated", fragment_cache.misses)
+            log.detail(f"Routines: {fragment_cache.hits} reused, {fragment_cache.misses} generated.")
+        with profile.phase("optimize"):
+            optimize_cfg(cfg)
+        profile.count("instructions", cfg.instruction_count())
+        if vm_generator.last_pass_manager:
+            log.detail("Optimization passes:")
+            for timing_line in vm_generator.last_pass_manager.format_timings():
+                log.detail(timing_line)
+            log.detail("Stack frames:")
+            for frame_line in format_frame_sizes(vm_generator.last_frames):
+                log.detail(frame_line)
 
-        with open(output_vm_filepath, 'w') as f:
-            for instruction in vm_code_output:
-                f.write(instruction + "\n")
-        print(f"\nVM code saved to {output_vm_filepath}")
+        with profile.phase("write"):
+            vm_code_output = cfg.to_lines() # Renamed to avoid potential confusion
     except Exception as e:
-        print(f"Code generation error in {file_path}: {e}")
+        log.error(f"Code generation error in {file_path}: {e}")
+        return "codegen_error", None
+    return "ok", vm_code_output
+
+# the message of a semantic error, with the column of the node it is about when the source is at hand
+# (the source is only indexed by line here, when there is an error to report)
+def semantic_error_text(error, source_text):
+    node = getattr(error, 'node', None)
+    if source_text is None or node is None or node.start is None:
+        return str(error)
+    line, column = LineIndex(source_text).position(node.start)
+    return f"Line {line + 1}, column {column + 1}: {error.message}"
+
+# writes the VM code to output_path, or to stdout when it is None
+def write_vm_code(file_path, vm_code_output, output_path, log):
+    log.detail(f"\n--- Generated VM Code for {os.path.basename(file_path)} ---")
+    for instruction in vm_code_output:
+        log.detail(instruction)
+    try:
+        if output_path is None:
+            sys.__stdout__.write("\n".join(vm_code_output) + "\n")
+            sys.__stdout__.flush()
+        else:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            with open(output_path, 'w') as f:
+                for instruction in vm_code_output:
+                    f.write(instruction + "\n")
+    except OSError as e:
+        log.error(f"Error writing VM code for {file_path}: {e}")
+        return "write_error"
+    if output_path is not None:
+        log.detail(f"\nVM code saved to {output_path}")
+    return "ok"
+
+# --- Command line ---
+
+def collect_inputs(paths, recursive, output_dir, log):
+    """
+    Expands files, folders and glob patterns into (source path, output path) pairs.
+    Returns the pairs and the number of paths that could not be used.
+    """
+    jobs = []
+    invalid = 0
+    for path in paths:
+        if path == STDIN_PATH:
+            jobs.append((STDIN_PATH, None))
+            continue
+        if glob.has_magic(path):
+            matches = sorted(glob.glob(path, recursive=True))
+            if not matches:
+                log.error(f"No files match '{path}'.")
+                invalid += 1
+            for match in matches:
+                if os.path.isdir(match):
+                    jobs.extend(folder_inputs(match, recursive, output_dir))
+                elif is_compilable(match):
+                    jobs.append((match, output_path_in(output_dir, os.path.basename(match))))
+            continue
+        if os.path.isdir(path):
+            found = folder_inputs(path, recursive, output_dir)
+            if not found:
+                log.error(f"No .pas files found in folder: {path}")
+            jobs.extend(found)
+        elif os.path.isfile(path):
+            if is_compilable(path):
+                jobs.append((path, output_path_in(output_dir, os.path.basename(path))))
+            else:
+                log.error(f"Input file '{path}' is not a .pas or {AST_EXTENSION} file.")
+                invalid += 1
+        else:
+            log.error(f"The path '{path}' is not a valid file or folder.")
+            invalid += 1
+    return jobs, invalid
+
+def is_compilable(path):
+    return path.lower().endswith((".pas", AST_EXTENSION))
+
+# .pas files of a folder; with `recursive` the subfolder structure is kept under output_dir
+def folder_inputs(folder, recursive, output_dir):
+    jobs = []
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for item in sorted(files):
+            if item.lower().endswith(".pas"):
+                relative = os.path.relpath(os.path.join(root, item), folder)
+                jobs.append((os.path.join(root, item), output_path_in(output_dir, relative)))
+        if not recursive:
+            break
+    return jobs
+
+def output_path_in(output_dir, relative_source_path):
+    file_name_without_ext, _ = os.path.splitext(relative_source_path)
+    return os.path.join(output_dir, f"{file_name_without_ext}.vm")
+
+# worker of --jobs: the parser tables are loaded once per worker process
+def compile_job(job):
+    file_path, output_path, verbosity, trace_memory, show_profile, token_cache, range_checks = job
+    return compile_pascal_file(file_path, output_path, CompileLog(verbosity), trace_memory, show_profile, token_cache=token_cache,
+                               range_checks=range_checks)
+
+def build_argument_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Compiles Standard Pascal programs to EWVM code. Without arguments, asks for a path interactively.",
+        epilog="Exit status: 0 if everything compiled, 1 if a file failed to compile, 2 for invalid arguments or paths.")
+    parser.add_argument("paths", nargs="+",
+                        help=f"Pascal files, saved ASTs ({AST_EXTENSION}), folders or glob patterns ('-' reads stdin and writes to stdout)")
+    parser.add_argument("-o", "--output-dir", default=OUTPUT_DIR, help="folder for the .vm files (default: ../output)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="also compile the subfolders of the given folders")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="compile N files in parallel (default 1)")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-q", "--quiet", action="store_true", help="only report errors")
+    verbosity.add_argument("-v", "--verbose", action="store_true", help="report every phase and print the VM code")
+    parser.add_argument("--profile", action="store_true", help="print time and memory per compiler phase")
+    parser.add_argument("--profile-json", metavar="PATH", help="write the profile as JSON lines to PATH")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="reuse the VM code of unchanged routines from the cache file PATH and update it (compiles in one process)")
+    parser.add_argument("--token-cache", metavar="DIR",
+                        help="replay the tokens of sources lexed before from binary token files in DIR, and store new ones there")
+    parser.add_argument("--range-checks", action="store_true",
+                        help="check array indexes and values stored into BYTE, WORD, SHORTINT and LONGINT variables at run time")
+    return parser
+
+def run_command_line(argv):
+    args = build_argument_parser().parse_args(argv)
+    verbosity = QUIET if args.quiet else VERBOSE if args.verbose else NORMAL
+    log = CompileLog(verbosity)
+    if args.jobs < 1:
+        log.error("--jobs must be at least 1.")
+        return 2
+
+    jobs, invalid = collect_inputs(args.paths, args.recursive, args.output_dir, log)
+    if not jobs:
+        log.error("Nothing to compile.")
+        return 2
+
+    trace_memory = args.profile or args.profile_json is not None
+    batch = BatchProfile()
+    token_cache = TokenCache(args.token_cache) if args.token_cache else None
+    work = [(file_path, output_path, verbosity, trace_memory, args.profile, token_cache, args.range_checks)
+            for file_path, output_path in jobs]
+    if args.cache: # the fragments are shared between files, so they are compiled here one by one
+        fragment_cache = FragmentCache.load(args.cache)
+        for file_path, output_path, verbosity, trace_memory, show_profile, token_cache, range_checks in work:
+            batch.add(compile_pascal_file(file_path, output_path, CompileLog(verbosity), trace_memory, show_profile,
+                                          fragment_cache, token_cache, range_checks))
+        work = []
+        try:
+            fragment_cache.save(args.cache)
+        except OSError as e:
+            log.error(f"Error writing the routine cache {args.cache}: {e}")
+    parallel = [job for job in work if job[0] != STDIN_PATH]
+    if args.jobs > 1 and len(parallel) > 1:
+        with multiprocessing.Pool(min(args.jobs, len(parallel))) as pool:
+            for profile in pool.map(compile_job, parallel):
+                batch.add(profile)
+        work = [job for job in work if job[0] == STDIN_PATH]
+    for job in work: # in this process, the lexer and parser stay loaded between files
+        batch.add(compile_job(job))
+
+    failed = [profile for profile in batch.profiles if profile.status != "ok"]
+    if args.profile and len(batch.profiles) > 1:
+        log.info(f"\n--- Batch profile ({len(batch.profiles)} files) ---")
+        for profile_line in batch.format_lines():
+            log.info(profile_line)
+    if args.profile_json:
+        batch.write_json_lines(args.profile_json)
+    if len(batch.profiles) > 1 or failed:
+        summary = f"{len(batch.profiles) - len(failed)} of {len(batch.profiles)} file(s) compiled"
+        if failed:
+            log.error(summary + ", failed: " + ", ".join(profile.source_name for profile in failed))
+        else:
+            log.info(summary)
+    if failed:
+        return 1
+    return 2 if invalid else 0
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        return run_command_line(argv)
 
-def main():
     user_path = read_input()
 
     if not user_path:
         print("No input path provided. Exiting.")
-        return
+        return 2
 
     if not ensure_output_directory():
-        return # Stop if output directory cannot be created
+        return 2 # Stop if output directory cannot be created
 
+    batch = BatchProfile()
     if os.path.isdir(user_path):
         print(f"Processing folder: {user_path}")
         pas_files_found = False
@@ -104,16 +460,25 @@ def main():
             if item.lower().endswith(".pas"):
                 pas_files_found = True
                 full_file_path = os.path.join(user_path, item)
-                compile_pascal_file(full_file_path)
+                batch.add(compile_pascal_file(full_file_path))
         if not pas_files_found:
             print(f"No .pas files found in folder: {user_path}")
     elif os.path.isfile(user_path):
         if user_path.lower().endswith(".pas"):
-            compile_pascal_file(user_path)
+            batch.add(compile_pascal_file(user_path))
         else:
             print(f"Input file '{user_path}' is not a .pas file. Please provide a .pas file or a folder.")
     else:
         print(f"The path '{user_path}' is not a valid file or folder. Please check the path and try again.")
 
+    if len(batch.profiles) > 1:
+        print(f"\n--- Batch profile ({len(batch.profiles)} files) ---")
+        for profile_line in batch.format_lines():
+            print(profile_line)
+    if batch.profiles:
+        batch.write_json_lines(PROFILE_LOG)
+        print(f"Profile written to {PROFILE_LOG}")
+    return 1 if any(profile.status != "ok" for profile in batch.profiles) else 0
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
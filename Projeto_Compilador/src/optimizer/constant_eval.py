@@ -0,0 +1,117 @@
+import ast_nodes
+from vm_assembly import builtin_library
+
+# evaluates an expression made only of literals (and, given `resolve`, declared constants) at compile time
+# returns the python value (int, float, str or bool) or None if the expression is not constant
+# `resolve` maps an identifier's name to its Symbol, CONST symbols hold their value in address_or_offset
+def evaluate_constant(node, resolve=None):
+    if isinstance(node, ast_nodes.Literal):
+        return node.value
+
+    if isinstance(node, ast_nodes.Identifier):
+        if resolve is None:
+            return None
+        symbol = resolve(node.name)
+        if symbol is None or symbol.kind != 'constant':
+            return None
+        return symbol.address_or_offset
+
+    if isinstance(node, ast_nodes.UnaryOperation):
+        operand = evaluate_constant(node.operand, resolve)
+        if operand is None:
+            return None
+        op = node.operator.upper()
+        if op == 'NOT' and isinstance(operand, bool):
+            return not operand
+        if op == '-' and is_number(operand):
+            return -operand
+        if op == '+' and is_number(operand):
+            return operand
+        return None
+
+    if isinstance(node, ast_nodes.BinaryOperation):
+        left = evaluate_constant(node.left, resolve)
+        if left is None:
+            return None
+        right = evaluate_constant(node.right, resolve)
+        if right is None:
+            return None
+        return fold_binary_operation(node.operator.upper(), left, right)
+
+    if isinstance(node, ast_nodes.FunctionCall): # builtin names can't be redeclared, so the name is enough
+        builtin = builtin_library.lookup(node.name)
+        if builtin is None or not builtin.pure:
+            return None
+        args = [evaluate_constant(arg, resolve) for arg in node.arguments]
+        if any(arg is None for arg in args):
+            return None
+        return builtin.evaluate(*args)
+
+    return None
+
+# true for INTEGER and REAL values (booleans are not numbers in Pascal)
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+# applies a binary operator to two constant values, mirroring the VM semantics
+def fold_binary_operation(op, left, right):
+    if op in ['+', '-', '*'] and is_number(left) and is_number(right):
+        if op == '+': return left + right
+        if op == '-': return left - right
+        return left * right
+    if op == '+' and isinstance(left, str) and isinstance(right, str): # string concatenation
+        return left + right
+    if op == '/' and is_number(left) and is_number(right):
+        if right == 0: # leave the runtime error to the VM
+            return None
+        return left / right
+    if op in ['DIV', 'MOD'] and isinstance(left, int) and isinstance(right, int) and not isinstance(left, bool) and not isinstance(right, bool):
+        if right == 0:
+            return None
+        quotient = abs(left) // abs(right) # VM integer division truncates towards zero
+        if (left < 0) != (right < 0):
+            quotient = -quotient
+        return quotient if op == 'DIV' else left - right * quotient
+    if op in ['=', '<>', '<', '<=', '>', '>=']:
+        comparable = (is_number(left) and is_number(right)) or type(left) == type(right)
+        if not comparable:
+            return None
+        if op == '=': return left == right
+        if op == '<>': return left != right
+        if op == '<': return left < right
+        if op == '<=': return left <= right
+        if op == '>': return left > right
+        return left >= right
+    if op in ['AND', 'OR'] and isinstance(left, bool) and isinstance(right, bool):
+        return (left and right) if op == 'AND' else (left or right)
+    return None
+
+# Pascal type of a constant value
+def value_type(value):
+    if isinstance(value, bool):
+        return 'BOOLEAN'
+    if isinstance(value, int):
+        return 'INTEGER'
+    if isinstance(value, float):
+        return 'REAL'
+    return 'STRING'
+
+# the ordinal number of an INTEGER, BOOLEAN or CHAR (one-character string) constant, None for other values
+def ordinal_value(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and len(value) == 1:
+        return ord(value)
+    return None
+
+# the Pascal ordinal type of a constant value (a one-character string is a CHAR), None for other values
+def ordinal_type(value):
+    if isinstance(value, bool):
+        return 'BOOLEAN'
+    if isinstance(value, int):
+        return 'INTEGER'
+    if isinstance(value, str) and len(value) == 1:
+        return 'CHAR'
+    return None
@@ -0,0 +1,154 @@
+import ast_nodes
+from .constant_eval import evaluate_constant
+
+ROUTINE_TYPES = (ast_nodes.FunctionDeclaration, ast_nodes.ProcedureDeclaration)
+
+def eliminate_dead_code(program):
+    """
+    Removes code that can never run: branches with constant conditions or CASE selectors, loops whose
+    condition is constant false (a REPEAT ... UNTIL TRUE runs its body once), statements after a
+    loop that never terminates and
+    routines that are never called from the main program.
+    """
+    prune_block(program.block)
+    remove_uncalled_routines(program)
+    return program
+
+# --- Unreachable statements ---
+
+def prune_block(block):
+    for decl in block.declarations:
+        if isinstance(decl, ROUTINE_TYPES) and decl.block:
+            prune_block(decl.block)
+    if block.compound_statement:
+        block.compound_statement = prune_statement(block.compound_statement)
+
+# returns the statement that replaces `stmt` (None when it can be dropped)
+def prune_statement(stmt):
+    if isinstance(stmt, ast_nodes.CompoundStatement):
+        stmt.statement_list = prune_statement_list(stmt.statement_list)
+        return stmt
+
+    if isinstance(stmt, ast_nodes.IfStatement):
+        condition = evaluate_constant(stmt.condition)
+        if condition is True: # IF TRUE THEN a ELSE b -> a
+            return prune_statement(stmt.then_statement)
+        if condition is False: # IF FALSE THEN a ELSE b -> b
+            return prune_statement(stmt.else_statement)
+        stmt.then_statement = prune_statement(stmt.then_statement)
+        stmt.else_statement = prune_statement(stmt.else_statement)
+        return stmt
+
+    if isinstance(stmt, ast_nodes.WhileStatement):
+        if evaluate_constant(stmt.condition) is False: # body never runs
+            return None
+        stmt.statement = prune_statement(stmt.statement)
+        return stmt
+
+    if isinstance(stmt, ast_nodes.RepeatStatement):
+        stmt.statement = prune_statement(stmt.statement)
+        if evaluate_constant(stmt.condition) is True: # body runs once
+            return stmt.statement
+        return stmt
+
+    if isinstance(stmt, ast_nodes.ForStatement):
+        stmt.statement = prune_statement(stmt.statement)
+        return stmt
+
+    if isinstance(stmt, ast_nodes.CaseStatement):
+        selector = evaluate_constant(stmt.selector)
+        if selector is not None:
+            branch = constant_case_branch(stmt, selector)
+            if branch is not False: # CASE 2 OF 1: a; 2: b END -> b
+                return prune_statement(branch)
+        for element in stmt.elements:
+            element.statement = prune_statement(element.statement)
+        stmt.else_statement = prune_statement(stmt.else_statement)
+        return stmt
+
+    return stmt
+
+# the statement a CASE runs for a constant selector, False when some label is not a literal expression
+def constant_case_branch(stmt, selector):
+    for element in stmt.elements:
+        for label in element.labels:
+            if isinstance(label, ast_nodes.CaseRange):
+                low, high = evaluate_constant(label.low), evaluate_constant(label.high)
+            else:
+                low = high = evaluate_constant(label)
+            if low is None or high is None:
+                return False
+            if low <= selector <= high and type(low) == type(selector):
+                return element.statement
+    return stmt.else_statement
+
+def prune_statement_list(statement_list):
+    pruned = []
+    for stmt in statement_list:
+        stmt = prune_statement(stmt)
+        if stmt is None: # empty statement or removed branch
+            continue
+        pruned.append(stmt)
+        if is_endless_loop(stmt): # there is no BREAK/EXIT, nothing after it can run
+            break
+    return pruned
+
+def is_endless_loop(stmt):
+    if isinstance(stmt, ast_nodes.RepeatStatement):
+        return evaluate_constant(stmt.condition) is False
+    return isinstance(stmt, ast_nodes.WhileStatement) and evaluate_constant(stmt.condition) is True
+
+# --- Uncalled routines ---
+
+def remove_uncalled_routines(program):
+    call_graph = {}
+    main_callees = set()
+    build_call_graph(program.block, {}, call_graph, main_callees)
+
+    reachable = set()
+    pending = list(main_callees)
+    while pending: # depth-first walk over the call graph starting at the main program
+        routine = pending.pop()
+        if routine in reachable:
+            continue
+        reachable.add(routine)
+        pending.extend(call_graph.get(routine, ()))
+
+    remove_routines_not_in(program.block, reachable)
+
+# fills call_graph (routine -> set of routines it calls) for every routine declared in the block
+# and adds the routines called by the block's own statements to `callees`
+def build_call_graph(block, enclosing_scope, call_graph, callees):
+    scope = dict(enclosing_scope)
+    for decl in block.declarations: # nested routines shadow outer ones with the same name
+        if isinstance(decl, ROUTINE_TYPES):
+            scope[decl.name.lower()] = decl
+
+    for decl in block.declarations:
+        if isinstance(decl, ROUTINE_TYPES):
+            routine_callees = call_graph.setdefault(decl, set())
+            if decl.block:
+                build_call_graph(decl.block, scope, call_graph, routine_callees)
+
+    if block.compound_statement:
+        collect_routine_references(block.compound_statement, scope, callees)
+
+# collects every routine referenced by name inside a statement or expression
+def collect_routine_references(node, scope, references):
+    if isinstance(node, (ast_nodes.FunctionCall, ast_nodes.Identifier)): # bare identifiers may be parameterless calls
+        routine = scope.get(node.name.lower())
+        if routine is not None:
+            references.add(routine)
+    for child in ast_nodes.iter_child_nodes(node):
+        collect_routine_references(child, scope, references)
+
+def remove_routines_not_in(block, reachable):
+    kept_declarations = []
+    for decl in block.declarations:
+        if isinstance(decl, ROUTINE_TYPES):
+            if decl not in reachable:
+                continue
+            if decl.block:
+                remove_routines_not_in(decl.block, reachable)
+        kept_declarations.append(decl)
+    block.declarations = kept_declarations
@@ -0,0 +1,183 @@
+import ast_nodes
+from vm_assembly import builtin_library
+from .constant_eval import evaluate_constant
+
+class LoopEffects:
+    def __init__(self):
+        self.modified_symbols = set()      # scalars and arrays written inside the loop
+        self.memory_clobbered = False      # true if globals and VAR params may change behind our back (calls, writes through VAR params)
+        self.var_params_clobbered = False  # true if a global is written, a VAR param may point to it
+
+def find_loop_invariants(loop_node, scope):
+    """
+    Finds the expressions of a WHILE/REPEAT/FOR loop that do not depend on the loop.
+
+    Returns (invariant_expressions, indexed_arrays): the maximal pure, non-trapping
+    expressions whose value is the same in every iteration, and the array symbols
+    indexed inside the loop (their base address never changes).
+    """
+    effects = LoopEffects()
+    collect_loop_effects(loop_node, scope, effects)
+
+    invariants = []
+    indexed_arrays = []
+    if isinstance(loop_node, (ast_nodes.WhileStatement, ast_nodes.RepeatStatement)):
+        collect_invariants(loop_node.condition, scope, effects, invariants, indexed_arrays)
+    collect_invariants(loop_node.statement, scope, effects, invariants, indexed_arrays)
+    return invariants, indexed_arrays
+
+# --- Side effects of the loop ---
+
+def collect_loop_effects(node, scope, effects):
+    if node is None:
+        return
+
+    if isinstance(node, ast_nodes.AssignmentStatement):
+        mark_written(node.variable, scope, effects)
+    elif isinstance(node, ast_nodes.ForStatement):
+        mark_written(node.control_variable, scope, effects)
+    elif isinstance(node, ast_nodes.IOCall) and node.operation.lower() in ["read", "readln"]:
+        for arg in node.arguments:
+            mark_written(arg, scope, effects)
+    elif isinstance(node, ast_nodes.FunctionCall):
+        func_sym = resolve(scope, node.name)
+        if not is_builtin(func_sym): # user routines may change globals and their VAR arguments
+            effects.memory_clobbered = True
+            if func_sym:
+                for arg, param in zip(node.arguments, func_sym.params_info):
+                    if param.is_var_param:
+                        mark_written(arg, scope, effects)
+
+    for child in ast_nodes.iter_child_nodes(node):
+        collect_loop_effects(child, scope, effects)
+
+def mark_written(target, scope, effects):
+    while isinstance(target, (ast_nodes.ArrayAccess, ast_nodes.FieldAccess)): # writing an element or field writes the variable
+        target = target.array if isinstance(target, ast_nodes.ArrayAccess) else target.record
+    if not isinstance(target, ast_nodes.Identifier):
+        return
+    sym = resolve(scope, target.name)
+    if sym is None:
+        return
+    effects.modified_symbols.add(sym)
+    if sym.is_var_param: # VAR params may alias globals (and each other)
+        effects.memory_clobbered = True
+    elif sym.scope_level == 0:
+        effects.var_params_clobbered = True
+
+# --- Invariant expressions ---
+
+def collect_invariants(node, scope, effects, invariants, indexed_arrays):
+    if node is None:
+        return
+
+    if isinstance(node, ast_nodes.AssignmentStatement): # the LHS is not a value
+        collect_target_invariants(node.variable, scope, effects, invariants, indexed_arrays)
+        collect_invariants(node.expression, scope, effects, invariants, indexed_arrays)
+        return
+
+    if isinstance(node, ast_nodes.IOCall) and node.operation.lower() in ["read", "readln"]: # arguments are targets
+        for arg in node.arguments:
+            collect_target_invariants(arg, scope, effects, invariants, indexed_arrays)
+        return
+
+    if is_hoistable(node, scope, effects):
+        invariants.append(node)
+        return
+
+    if isinstance(node, ast_nodes.ArrayAccess):
+        note_indexed_array(node, scope, indexed_arrays)
+        collect_invariants(node.index, scope, effects, invariants, indexed_arrays)
+        return
+
+    if isinstance(node, ast_nodes.ForStatement): # the control variable is a target
+        collect_invariants(node.start_expression, scope, effects, invariants, indexed_arrays)
+        collect_invariants(node.end_expression, scope, effects, invariants, indexed_arrays)
+        collect_invariants(node.statement, scope, effects, invariants, indexed_arrays)
+        return
+
+    if isinstance(node, ast_nodes.FunctionCall):
+        func_sym = resolve(scope, node.name)
+        for i, arg in enumerate(node.arguments):
+            is_var_arg = func_sym is not None and i < len(func_sym.params_info) and func_sym.params_info[i].is_var_param
+            if not is_var_arg: # VAR arguments are passed by address
+                collect_invariants(arg, scope, effects, invariants, indexed_arrays)
+        return
+
+    for child in ast_nodes.iter_child_nodes(node):
+        collect_invariants(child, scope, effects, invariants, indexed_arrays)
+
+# the indexes of an element or field written to are values, the element or field itself is not
+def collect_target_invariants(target, scope, effects, invariants, indexed_arrays):
+    if isinstance(target, ast_nodes.ArrayAccess):
+        note_indexed_array(target, scope, indexed_arrays)
+        collect_target_invariants(target.array, scope, effects, invariants, indexed_arrays)
+        collect_invariants(target.index, scope, effects, invariants, indexed_arrays)
+    elif isinstance(target, ast_nodes.FieldAccess):
+        collect_target_invariants(target.record, scope, effects, invariants, indexed_arrays)
+
+# worth hoisting: an invariant operation (leaves are already a single instruction)
+def is_hoistable(node, scope, effects):
+    if not isinstance(node, (ast_nodes.BinaryOperation, ast_nodes.UnaryOperation, ast_nodes.FunctionCall)):
+        return False
+    if evaluate_constant(node, lambda name: resolve(scope, name)) is not None: # constants are cheaper inline
+        return False
+    return is_invariant(node, scope, effects)
+
+# true if the expression has the same value in every iteration and evaluating it early cannot fail
+def is_invariant(node, scope, effects):
+    if isinstance(node, ast_nodes.Literal):
+        return True
+
+    if isinstance(node, ast_nodes.Identifier):
+        sym = resolve(scope, node.name)
+        if sym is not None and sym.kind == 'constant':
+            return True
+        if sym is None or sym.kind not in ['variable', 'parameter'] or sym.is_array:
+            return False
+        if sym in effects.modified_symbols:
+            return False
+        if effects.memory_clobbered and (sym.scope_level == 0 or sym.is_var_param):
+            return False
+        if effects.var_params_clobbered and sym.is_var_param:
+            return False
+        return True
+
+    if isinstance(node, ast_nodes.UnaryOperation):
+        return is_invariant(node.operand, scope, effects)
+
+    if isinstance(node, ast_nodes.BinaryOperation):
+        if node.operator.upper() in ['/', 'DIV', 'MOD']: # only hoist divisions that cannot divide by zero
+            divisor = evaluate_constant(node.right, lambda name: resolve(scope, name))
+            if divisor is None or isinstance(divisor, bool) or divisor == 0:
+                return False
+        return is_invariant(node.left, scope, effects) and is_invariant(node.right, scope, effects)
+
+    if isinstance(node, ast_nodes.FunctionCall):
+        func_sym = resolve(scope, node.name)
+        builtin = builtin_library.lookup(func_sym.name) if is_builtin(func_sym) else None
+        if builtin is None or not builtin.pure:
+            return False
+        return all(is_invariant(arg, scope, effects) for arg in node.arguments)
+
+    return False # array elements may be out of bounds, everything else is not a pure value
+
+def note_indexed_array(access_node, scope, indexed_arrays):
+    if not isinstance(access_node.array, ast_nodes.Identifier):
+        return
+    sym = resolve(scope, access_node.array.name)
+    if sym is None or sym.record_layout is not None or sym.element_layout is not None: # addressed from a folded offset instead
+        return
+    if sym.kind == 'variable' and sym.is_array and sym not in indexed_arrays:
+        indexed_arrays.append(sym)
+
+# --- Helpers ---
+
+def resolve(scope, name):
+    sym = scope.resolve(name)
+    if sym is None:
+        sym = scope.resolve(name.lower())
+    return sym
+
+def is_builtin(sym):
+    return sym is not None and isinstance(sym.address_or_offset, str) and sym.address_or_offset.startswith("BUILTIN_")
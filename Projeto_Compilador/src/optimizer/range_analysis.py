@@ -0,0 +1,81 @@
+import ast_nodes
+from .constant_eval import evaluate_constant
+from .loop_invariants import LoopEffects, collect_loop_effects, resolve
+
+# --- Ranges of values known at compile time ---
+#
+# A range is a (low, high) pair of integers, None when nothing is known. Only two things give
+# one: constants, and FOR control variables while the body of their loop runs (between the
+# start and end values, when the body cannot change the variable). Declared ranges of BYTE,
+# WORD, ... variables are not trusted: a VAR parameter of another type can store anything
+# into them, so the checks of the values read from them could not be dropped safely.
+
+def expression_range(node, scope, known_ranges):
+    """
+    The values an INTEGER expression can take, None if they are not known.
+
+    :param known_ranges: Symbol -> range of the FOR control variables whose loops are being generated.
+    """
+    value = evaluate_constant(node, lambda name: resolve(scope, name))
+    if isinstance(value, int) and not isinstance(value, bool):
+        return (value, value)
+
+    if isinstance(node, ast_nodes.Identifier):
+        return known_ranges.get(resolve(scope, node.name))
+
+    if isinstance(node, ast_nodes.UnaryOperation):
+        operand = expression_range(node.operand, scope, known_ranges)
+        if operand is None:
+            return None
+        if node.operator == '-':
+            return (-operand[1], -operand[0])
+        return operand if node.operator == '+' else None
+
+    if isinstance(node, ast_nodes.BinaryOperation):
+        op = node.operator.upper()
+        left = expression_range(node.left, scope, known_ranges)
+        right = expression_range(node.right, scope, known_ranges)
+        if left is None or right is None:
+            return None
+        if op == '+':
+            return (left[0] + right[0], left[1] + right[1])
+        if op == '-':
+            return (left[0] - right[1], left[1] - right[0])
+        if op == '*':
+            products = [a * b for a in left for b in right]
+            return (min(products), max(products))
+        if op == 'MOD' and left[0] >= 0 and right[0] > 0: # 0 <= x MOD y < y, and never above x
+            return (0, min(left[1], right[1] - 1))
+        return None
+
+    return None # array elements, function results, variables: anything goes
+
+def within(value_range, bounds):
+    """True if every value of `value_range` is within `bounds`."""
+    return value_range is not None and bounds[0] <= value_range[0] and value_range[1] <= bounds[1]
+
+def intersect(value_range, bounds):
+    """The values of `value_range` that pass a check against `bounds` (`bounds` when nothing was known)."""
+    if value_range is None:
+        return bounds
+    low, high = max(value_range[0], bounds[0]), min(value_range[1], bounds[1])
+    return (low, high) if low <= high else None
+
+def control_variable_range(for_node, scope, start_range, end_range):
+    """
+    The values the control variable of a FOR loop takes while its body runs, None if not known.
+
+    The loop only runs the body with the variable between the start and end values, so it is
+    within start..end (end..start for DOWNTO) unless the body assigns it, reads into it, passes
+    it as a VAR argument, or calls a routine that may change it (a global one).
+    """
+    if start_range is None or end_range is None:
+        return None
+    sym = resolve(scope, for_node.control_variable.name)
+    effects = LoopEffects()
+    collect_loop_effects(for_node.statement, scope, effects)
+    if sym in effects.modified_symbols or (effects.memory_clobbered and sym.scope_level == 0):
+        return None
+    if for_node.downto:
+        return (end_range[0], start_range[1])
+    return (start_range[0], end_range[1])
@@ -6,9 +6,9 @@ _tabversion = '3.10'
 
 _lr_method = 'LALR'
 
-_lr_signature = 'rightTHENELSEleftORORELSEleftANDANDTHENnonassocEQUALSNELTGTLEGEINleftPLUSMINUSleftTIMESDIVIDEDIVMODrightUMINUSNOTAND ANDTHEN ARRAY ASSIGN BEGIN BOOLEAN BYTE CHAR COLON COMMA CONST DIV DIVIDE DO DOT DOUBLE DOWNTO ELSE END EQUALS FALSE FOR FUNCTION GE GT ID IF IN INTEGER LABEL LBRACKET LE LONGINT LPAREN LT MINUS MOD NE NOT NUMBER OF OR ORELSE PLUS PROCEDURE PROGRAM RBRACKET READ READLN REAL RPAREN SEMICOLON SHORTINT SINGLE STRING THEN TIMES TO TRUE UMINUS UNTIL VAR WHILE WITH WORD WRITE WRITELNprogram : header block DOTheader : PROGRAM ID LPAREN id_list RPAREN SEMICOLON\n| PROGRAM ID SEMICOLONid_list : id_list COMMA ID\n| IDempty :block : declarations compound_statementdeclarations : declarations variable_declaration\n| declarations function_declaration\n| declarations procedure_declaration\n| emptyvariable_declaration : VAR variable_list SEMICOLONfunction_declaration : FUNCTION ID parameter_list COLON type SEMICOLON block SEMICOLONprocedure_declaration : PROCEDURE ID parameter_list SEMICOLON block SEMICOLONvariable_list : variable_list SEMICOLON variable\n| variablevariable : id_list COLON typetype : ID\n| INTEGER\n| REAL\n| BOOLEAN\n| CHAR\n| BYTE\n| WORD\n| LONGINT\n| SHORTINT\n| SINGLE\n| DOUBLE\n| STRING\n| ARRAY LBRACKET NUMBER DOT DOT NUMBER RBRACKET OF typefield_list : field_list SEMICOLON field\n| fieldfield : id_list COLON typeparameter_list : LPAREN parameter_section_list RPAREN\n| emptyparameter_section_list : parameter_section_list SEMICOLON parameter_section\n| parameter_sectionparameter_section : id_list COLON type\n| VAR id_list COLON typecompound_statement : BEGIN statement_list ENDstatement_list : statement_list SEMICOLON statement\n| statementstatement : assignment_statement\n| expression\n| compound_statement\n| io_statement\n| if_statement        \n| while_statement  \n| for_statement       \n| emptyassignment_statement : ID ASSIGN expressionexpression : additive_expression\n| expression EQUALS additive_expression\n| expression NE additive_expression\n| expression LT additive_expression\n| expression GT additive_expression\n| expression LE additive_expression\n| expression GE additive_expression\n| expression IN additive_expressionadditive_expression : multiplicative_expression\n| additive_expression PLUS multiplicative_expression\n| additive_expression MINUS multiplicative_expression\n| additive_expression OR multiplicative_expression\n| additive_expression ORELSE multiplicative_expressionmultiplicative_expression : factor \n| multiplicative_expression TIMES factor\n| multiplicative_expression DIVIDE factor\n| multiplicative_expression DIV factor\n| multiplicative_expression MOD factor\n| multiplicative_expression AND factor\n| multiplicative_expression ANDTHEN factorfactor : NUMBER\n| STRING\n| ID\n| TRUE\n| FALSE\n| LPAREN expression RPAREN\n| factor LBRACKET expression RBRACKET\n| ID LPAREN expression_list RPAREN\n| MINUS factor %prec UMINUS\n| NOT factor\nexpression_list : expression_list COMMA expression\n| expression\n| emptyio_statement : WRITE LPAREN expression_list RPAREN\n| WRITELN LPAREN expression_list RPAREN\n| READ LPAREN expression_list RPAREN\n| READLN LPAREN expression_list RPARENif_statement : IF expression THEN statement ELSE statement\n| IF expression THEN statementwhile_statement : WHILE expression DO statementfor_statement : FOR ID ASSIGN expression TO expression DO statement\n| FOR ID ASSIGN expression DOWNTO expression DO statement'
+_lr_signature = 'rightTHENELSEleftORORELSEleftANDANDTHENnonassocEQUALSNELTGTLEGEINleftPLUSMINUSleftTIMESDIVIDEDIVMODrightUMINUSNOTAND ANDTHEN ARRAY ASSIGN BEGIN BOOLEAN BYTE CASE CHAR COLON COMMA CONST DIV DIVIDE DO DOT DOTDOT DOUBLE DOWNTO ELSE END EQUALS FALSE FOR FUNCTION GE GT ID IF IN INTEGER LABEL LBRACKET LE LONGINT LPAREN LT MINUS MOD NE NOT NUMBER OF OR ORELSE PLUS PROCEDURE PROGRAM RBRACKET READ READLN REAL RECORD REPEAT RPAREN SEMICOLON SET SHORTINT SINGLE STRING THEN TIMES TO TRUE UMINUS UNTIL VAR WHILE WITH WORD WRITE WRITELNprogram : header block DOTheader : PROGRAM ID LPAREN id_list RPAREN SEMICOLON\n              | PROGRAM ID SEMICOLONid_list : id_list COMMA ID\n               | IDempty :block : declarations compound_statementdeclarations : declarations variable_declaration\n                    | declarations constant_declaration\n                    | declarations function_declaration\n                    | declarations procedure_declaration\n                    | emptyvariable_declaration : VAR variable_list SEMICOLONconstant_declaration : CONST constant_listconstant_list : constant_list constant\n                     | constantconstant : ID EQUALS expression SEMICOLONfunction_declaration : FUNCTION ID parameter_list COLON type SEMICOLON block SEMICOLONprocedure_declaration : PROCEDURE ID parameter_list SEMICOLON block SEMICOLONvariable_list : variable_list SEMICOLON variable\n                     | variablevariable : id_list COLON typetype : ID\n            | INTEGER\n            | REAL\n            | BOOLEAN\n            | CHAR\n            | BYTE\n            | WORD\n            | LONGINT\n            | SHORTINT\n            | SINGLE\n            | DOUBLE\n            | STRING\n            | ARRAY LBRACKET index_range_list RBRACKET OF type\n            | SET OF expression DOTDOT expression\n            | RECORD field_list END\n            | RECORD field_list SEMICOLON ENDindex_range_list : index_range_list COMMA expression DOTDOT expression\n                        | expression DOTDOT expressionfield_list : field_list SEMICOLON field\n                  | fieldfield : id_list COLON typeparameter_list : LPAREN parameter_section_list RPAREN\n                      | emptyparameter_section_list : parameter_section_list SEMICOLON parameter_section\n                              | parameter_sectionparameter_section : id_list COLON type\n                         | VAR id_list COLON typecompound_statement : BEGIN statement_list ENDstatement_list : statement_list SEMICOLON statement\n                      | statementstatement : assignment_statement\n                 | expression\n                 | compound_statement\n                 | io_statement\n                 | if_statement        \n                 | while_statement  \n                 | repeat_statement\n                 | for_statement       \n                 | case_statement\n                 | emptyassignment_statement : factor ASSIGN expressionexpression : additive_expression\n                  | expression EQUALS additive_expression\n                  | expression NE additive_expression\n                  | expression LT additive_expression\n                  | expression GT additive_expression\n                  | expression LE additive_expression\n                  | expression GE additive_expression\n                  | expression IN additive_expressionadditive_expression : multiplicative_expression\n                           | additive_expression PLUS multiplicative_expression\n                           | additive_expression MINUS multiplicative_expression\n                           | additive_expression OR multiplicative_expression\n                           | additive_expression ORELSE multiplicative_expressionmultiplicative_expression : factor \n                                 | multiplicative_expression TIMES factor\n                                 | multiplicative_expression DIVIDE factor\n                                 | multiplicative_expression DIV factor\n                                 | multiplicative_expression MOD factor\n                                 | multiplicative_expression AND factor\n                                 | multiplicative_expression ANDTHEN factorfactor : NUMBER\n              | STRING\n              | ID\n              | TRUE\n              | FALSE\n              | LPAREN expression RPAREN\n              | factor LBRACKET index_list RBRACKET\n              | factor DOT ID\n              | ID LPAREN expression_list RPAREN\n              | MINUS factor %prec UMINUS\n              | NOT factor\n              | LBRACKET set_element_list RBRACKET\n              | LBRACKET RBRACKET\n              set_element_list : set_element_list COMMA set_element\n                        | set_elementset_element : expression\n                   | expression DOTDOT expressionindex_list : index_list COMMA expression\n                  | expressionexpression_list : expression_list COMMA expression\n                       | expression\n                       | emptyio_statement : WRITE LPAREN expression_list RPAREN\n                    | WRITELN LPAREN expression_list RPAREN\n                    | READ LPAREN expression_list RPAREN\n                    | READLN LPAREN expression_list RPARENif_statement : IF expression THEN statement ELSE statement\n                    | IF expression THEN statementwhile_statement : WHILE expression DO statementrepeat_statement : REPEAT statement_list UNTIL expressionfor_statement : FOR ID ASSIGN expression TO expression DO statement\n                     | FOR ID ASSIGN expression DOWNTO expression DO statementcase_statement : CASE expression OF case_element_list case_else ENDcase_element_list : case_element_list SEMICOLON case_element\n                         | case_elementcase_element : case_label_list COLON statementcase_label_list : case_label_list COMMA case_label\n                       | case_labelcase_label : expression\n                  | expression DOTDOT expressioncase_else : ELSE statement_list\n                 | SEMICOLON ELSE statement_list\n                 | SEMICOLON\n                 | empty'
     
-_lr_action_items = {'PROGRAM':([0,],[3,]),'$end':([1,8,],[0,-1,]),'BEGIN':([2,5,6,10,11,12,13,18,55,87,116,117,147,148,167,171,175,182,183,185,],[-6,13,-11,-8,-9,-10,13,-3,13,-12,13,13,-6,-2,13,-6,-14,13,13,-13,]),'VAR':([2,5,6,10,11,12,18,87,91,147,148,162,171,175,185,],[-6,14,-11,-8,-9,-10,-3,-12,146,-6,-2,146,-6,-14,-13,]),'FUNCTION':([2,5,6,10,11,12,18,87,147,148,171,175,185,],[-6,15,-11,-8,-9,-10,-3,-12,-6,-2,-6,-14,-13,]),'PROCEDURE':([2,5,6,10,11,12,18,87,147,148,171,175,185,],[-6,16,-11,-8,-9,-10,-3,-12,-6,-2,-6,-14,-13,]),'ID':([3,13,14,15,16,17,32,36,37,38,40,46,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,72,73,74,78,79,80,81,82,83,85,87,88,89,91,116,117,118,142,146,150,162,163,167,168,169,174,182,183,190,],[7,29,50,51,52,50,71,71,71,77,71,71,29,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,71,50,128,141,50,29,29,71,128,50,71,50,128,29,71,71,128,29,29,128,]),'DOT':([4,9,54,170,179,],[8,-7,-40,179,184,]),'LPAREN':([7,13,29,31,32,33,34,35,36,37,40,46,51,52,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,71,72,73,74,78,79,80,81,82,83,85,116,117,118,150,167,168,169,182,183,],[17,32,64,69,32,72,73,74,32,32,32,32,91,91,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,64,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,32,]),'SEMICOLON':([7,9,13,19,20,21,22,23,24,25,26,27,28,29,30,39,41,42,43,44,45,47,48,52,54,55,71,84,86,92,93,94,95,96,97,98,99,100,101,102,103,107,108,109,110,112,116,117,119,120,121,122,123,124,126,127,128,129,130,131,132,133,134,135,136,137,138,139,143,144,149,151,152,153,154,155,156,158,160,161,165,167,172,173,176,180,181,182,183,186,187,191,],[18,-7,-6,55,-42,-43,-44,-45,-46,-47,-48,-49,-50,-74,-52,-60,-65,-72,-73,-75,-76,87,-16,-6,-40,-6,-74,-80,-81,-35,147,148,-41,-53,-54,-55,-56,-57,-58,-59,-51,-61,-62,-63,-64,-77,-6,-6,-66,-67,-68,-69,-70,-71,-15,-17,-18,-19,-20,-21,-22,-23,-24,-25,-26,-27,-28,-29,162,-37,-79,-85,-86,-87,-88,-90,-91,-78,171,-34,175,-6,-36,-38,-89,185,-39,-6,-6,-92,-93,-30,]),'WRITE':([13,55,116,117,167,182,183,],[31,31,31,31,31,31,31,]),'WRITELN':([13,55,116,117,167,182,183,],[33,33,33,33,33,33,33,]),'READ':([13,55,116,117,167,182,183,],[34,34,34,34,34,34,34,]),'READLN':([13,55,116,117,167,182,183,],[35,35,35,35,35,35,35,]),'IF':([13,55,116,117,167,182,183,],[36,36,36,36,36,36,36,]),'WHILE':([13,55,116,117,167,182,183,],[37,37,37,37,37,37,37,]),'FOR':([13,55,116,117,167,182,183,],[38,38,38,38,38,38,38,]),'END':([13,19,20,21,22,23,24,25,26,27,28,29,30,39,41,42,43,44,45,54,55,71,84,86,95,96,97,98,99,100,101,102,103,107,108,109,110,112,116,117,119,120,121,122,123,124,149,151,152,153,154,155,156,158,167,176,182,183,186,187,],[-6,54,-42,-43,-44,-45,-46,-47,-48,-49,-50,-74,-52,-60,-65,-72,-73,-75,-76,-40,-6,-74,-80,-81,-41,-53,-54,-55,-56,-57,-58,-59,-51,-61,-62,-63,-64,-77,-6,-6,-66,-67,-68,-69,-70,-71,-79,-85,-86,-87,-88,-90,-91,-78,-6,-89,-6,-6,-92,-93,]),'NUMBER':([13,32,36,37,40,46,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,72,73,74,78,79,80,81,82,83,85,116,117,118,150,159,167,168,169,182,183,184,],[42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,170,42,42,42,42,42,188,]),'STRING':([13,32,36,37,40,46,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,72,73,74,78,79,80,81,82,83,85,88,116,117,118,142,150,163,167,168,169,174,182,183,190,],[43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,139,43,43,43,139,43,139,43,43,43,139,43,43,139,]),'TRUE':([13,32,36,37,40,46,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,72,73,74,78,79,80,81,82,83,85,116,117,118,150,167,168,169,182,183,],[44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,]),'FALSE':([13,32,36,37,40,46,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,72,73,74,78,79,80,81,82,83,85,116,117,118,150,167,168,169,182,183,],[45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,]),'MINUS':([13,29,30,32,36,37,39,40,41,42,43,44,45,46,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,71,72,73,74,78,79,80,81,82,83,84,85,86,96,97,98,99,100,101,102,107,108,109,110,112,116,117,118,119,120,121,122,123,124,149,150,158,167,168,169,182,183,],[40,-74,66,40,40,40,-60,40,-65,-72,-73,-75,-76,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,-74,40,40,40,40,40,40,40,40,40,-80,40,-81,66,66,66,66,66,66,66,-61,-62,-63,-64,-77,40,40,40,-66,-67,-68,-69,-70,-71,-79,40,-78,40,40,40,40,40,]),'NOT':([13,32,36,37,40,46,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,72,73,74,78,79,80,81,82,83,85,116,117,118,150,167,168,169,182,183,],[46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,]),'ELSE':([21,22,23,24,25,26,27,28,29,30,39,41,42,43,44,45,54,71,84,86,96,97,98,99,100,101,102,103,107,108,109,110,112,116,117,119,120,121,122,123,124,149,151,152,153,154,155,156,158,167,176,182,183,186,187,],[-43,-44,-45,-46,-47,-48,-49,-50,-74,-52,-60,-65,-72,-73,-75,-76,-40,-74,-80,-81,-53,-54,-55,-56,-57,-58,-59,-51,-61,-62,-63,-64,-77,-6,-6,-66,-67,-68,-69,-70,-71,-79,-85,-86,-87,-88,167,-91,-78,-6,-89,-6,-6,-92,-93,]),'EQUALS':([22,29,30,39,41,42,43,44,45,70,71,75,76,84,86,96,97,98,99,100,101,102,103,105,107,108,109,110,112,119,120,121,122,123,124,125,149,157,158,166,177,178,],[56,-74,-52,-60,-65,-72,-73,-75,-76,56,-74,56,56,-80,-81,-53,-54,-55,-56,-57,-58,-59,56,56,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,56,-79,56,-78,56,56,56,]),'NE':([22,29,30,39,41,42,43,44,45,70,71,75,76,84,86,96,97,98,99,100,101,102,103,105,107,108,109,110,112,119,120,121,122,123,124,125,149,157,158,166,177,178,],[57,-74,-52,-60,-65,-72,-73,-75,-76,57,-74,57,57,-80,-81,-53,-54,-55,-56,-57,-58,-59,57,57,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,57,-79,57,-78,57,57,57,]),'LT':([22,29,30,39,41,42,43,44,45,70,71,75,76,84,86,96,97,98,99,100,101,102,103,105,107,108,109,110,112,119,120,121,122,123,124,125,149,157,158,166,177,178,],[58,-74,-52,-60,-65,-72,-73,-75,-76,58,-74,58,58,-80,-81,-53,-54,-55,-56,-57,-58,-59,58,58,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,58,-79,58,-78,58,58,58,]),'GT':([22,29,30,39,41,42,43,44,45,70,71,75,76,84,86,96,97,98,99,100,101,102,103,105,107,108,109,110,112,119,120,121,122,123,124,125,149,157,158,166,177,178,],[59,-74,-52,-60,-65,-72,-73,-75,-76,59,-74,59,59,-80,-81,-53,-54,-55,-56,-57,-58,-59,59,59,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,59,-79,59,-78,59,59,59,]),'LE':([22,29,30,39,41,42,43,44,45,70,71,75,76,84,86,96,97,98,99,100,101,102,103,105,107,108,109,110,112,119,120,121,122,123,124,125,149,157,158,166,177,178,],[60,-74,-52,-60,-65,-72,-73,-75,-76,60,-74,60,60,-80,-81,-53,-54,-55,-56,-57,-58,-59,60,60,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,60,-79,60,-78,60,60,60,]),'GE':([22,29,30,39,41,42,43,44,45,70,71,75,76,84,86,96,97,98,99,100,101,102,103,105,107,108,109,110,112,119,120,121,122,123,124,125,149,157,158,166,177,178,],[61,-74,-52,-60,-65,-72,-73,-75,-76,61,-74,61,61,-80,-81,-53,-54,-55,-56,-57,-58,-59,61,61,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,61,-79,61,-78,61,61,61,]),'IN':([22,29,30,39,41,42,43,44,45,70,71,75,76,84,86,96,97,98,99,100,101,102,103,105,107,108,109,110,112,119,120,121,122,123,124,125,149,157,158,166,177,178,],[62,-74,-52,-60,-65,-72,-73,-75,-76,62,-74,62,62,-80,-81,-53,-54,-55,-56,-57,-58,-59,62,62,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,62,-79,62,-78,62,62,62,]),'ASSIGN':([29,77,],[63,118,]),'LBRACKET':([29,41,42,43,44,45,71,84,86,112,119,120,121,122,123,124,140,149,158,],[-74,85,-72,-73,-75,-76,-74,-80,-81,-77,85,85,85,85,85,85,159,-79,-78,]),'TIMES':([29,39,41,42,43,44,45,71,84,86,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-74,78,-65,-72,-73,-75,-76,-74,-80,-81,78,78,78,78,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'DIVIDE':([29,39,41,42,43,44,45,71,84,86,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-74,79,-65,-72,-73,-75,-76,-74,-80,-81,79,79,79,79,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'DIV':([29,39,41,42,43,44,45,71,84,86,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-74,80,-65,-72,-73,-75,-76,-74,-80,-81,80,80,80,80,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'MOD':([29,39,41,42,43,44,45,71,84,86,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-74,81,-65,-72,-73,-75,-76,-74,-80,-81,81,81,81,81,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'AND':([29,39,41,42,43,44,45,71,84,86,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-74,82,-65,-72,-73,-75,-76,-74,-80,-81,82,82,82,82,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'ANDTHEN':([29,39,41,42,43,44,45,71,84,86,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-74,83,-65,-72,-73,-75,-76,-74,-80,-81,83,83,83,83,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'PLUS':([29,30,39,41,42,43,44,45,71,84,86,96,97,98,99,100,101,102,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-74,65,-60,-65,-72,-73,-75,-76,-74,-80,-81,65,65,65,65,65,65,65,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'OR':([29,30,39,41,42,43,44,45,71,84,86,96,97,98,99,100,101,102,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-74,67,-60,-65,-72,-73,-75,-76,-74,-80,-81,67,67,67,67,67,67,67,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'ORELSE':([29,30,39,41,42,43,44,45,71,84,86,96,97,98,99,100,101,102,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-74,68,-60,-65,-72,-73,-75,-76,-74,-80,-81,68,68,68,68,68,68,68,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'RPAREN':([30,39,41,42,43,44,45,50,53,64,69,70,71,72,73,74,84,86,96,97,98,99,100,101,102,104,105,106,107,108,109,110,111,112,113,114,115,119,120,121,122,123,124,128,129,130,131,132,133,134,135,136,137,138,139,141,143,144,149,158,166,172,173,181,191,],[-52,-60,-65,-72,-73,-75,-76,-5,94,-6,-6,112,-74,-6,-6,-6,-80,-81,-53,-54,-55,-56,-57,-58,-59,149,-83,-84,-61,-62,-63,-64,151,-77,152,153,154,-66,-67,-68,-69,-70,-71,-18,-19,-20,-21,-22,-23,-24,-25,-26,-27,-28,-29,-4,161,-37,-79,-78,-82,-36,-38,-39,-30,]),'THEN':([30,39,41,42,43,44,45,71,75,84,86,96,97,98,99,100,101,102,107,108,109,110,112,119,120,121,122,123,124,149,158,],[-52,-60,-65,-72,-73,-75,-76,-74,116,-80,-81,-53,-54,-55,-56,-57,-58,-59,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,-79,-78,]),'DO':([30,39,41,42,43,44,45,71,76,84,86,96,97,98,99,100,101,102,107,108,109,110,112,119,120,121,122,123,124,149,158,177,178,],[-52,-60,-65,-72,-73,-75,-76,-74,117,-80,-81,-53,-54,-55,-56,-57,-58,-59,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,-79,-78,182,183,]),'COMMA':([30,39,41,42,43,44,45,49,50,53,64,69,71,72,73,74,84,86,96,97,98,99,100,101,102,104,105,106,107,108,109,110,111,112,113,114,115,119,120,121,122,123,124,141,145,149,158,164,166,],[-52,-60,-65,-72,-73,-75,-76,89,-5,89,-6,-6,-74,-6,-6,-6,-80,-81,-53,-54,-55,-56,-57,-58,-59,150,-83,-84,-61,-62,-63,-64,150,-77,150,150,150,-66,-67,-68,-69,-70,-71,-4,89,-79,-78,89,-82,]),'RBRACKET':([30,39,41,42,43,44,45,71,84,86,96,97,98,99,100,101,102,107,108,109,110,112,119,120,121,122,123,124,125,149,158,188,],[-52,-60,-65,-72,-73,-75,-76,-74,-80,-81,-53,-54,-55,-56,-57,-58,-59,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,158,-79,-78,189,]),'TO':([30,39,41,42,43,44,45,71,84,86,96,97,98,99,100,101,102,107,108,109,110,112,119,120,121,122,123,124,149,157,158,],[-52,-60,-65,-72,-73,-75,-76,-74,-80,-81,-53,-54,-55,-56,-57,-58,-59,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,-79,168,-78,]),'DOWNTO':([30,39,41,42,43,44,45,71,84,86,96,97,98,99,100,101,102,107,108,109,110,112,119,120,121,122,123,124,149,157,158,],[-52,-60,-65,-72,-73,-75,-76,-74,-80,-81,-53,-54,-55,-56,-57,-58,-59,-61,-62,-63,-64,-77,-66,-67,-68,-69,-70,-71,-79,169,-78,]),'COLON':([49,50,51,90,92,141,145,161,164,],[88,-5,-6,142,-35,-4,163,-34,174,]),'INTEGER':([88,142,163,174,190,],[129,129,129,129,129,]),'REAL':([88,142,163,174,190,],[130,130,130,130,130,]),'BOOLEAN':([88,142,163,174,190,],[131,131,131,131,131,]),'CHAR':([88,142,163,174,190,],[132,132,132,132,132,]),'BYTE':([88,142,163,174,190,],[133,133,133,133,133,]),'WORD':([88,142,163,174,190,],[134,134,134,134,134,]),'LONGINT':([88,142,163,174,190,],[135,135,135,135,135,]),'SHORTINT':([88,142,163,174,190,],[136,136,136,136,136,]),'SINGLE':([88,142,163,174,190,],[137,137,137,137,137,]),'DOUBLE':([88,142,163,174,190,],[138,138,138,138,138,]),'ARRAY':([88,142,163,174,190,],[140,140,140,140,140,]),'OF':([189,],[190,]),}
+_lr_action_items = {'PROGRAM':([0,],[3,]),'$end':([1,8,],[0,-1,]),'BEGIN':([2,5,6,10,11,12,13,14,20,42,58,59,65,104,107,137,138,176,177,202,211,217,219,227,231,238,251,252,258,],[-6,14,-12,-8,-9,-10,-11,14,-3,14,-14,-16,14,-13,-15,14,14,-6,-2,-17,14,14,14,-6,-19,14,14,14,-18,]),'VAR':([2,5,6,10,11,12,13,20,58,59,104,107,110,176,177,202,205,227,231,258,],[-6,15,-12,-8,-9,-10,-11,-3,-14,-16,-13,-15,175,-6,-2,-17,175,-6,-19,-18,]),'CONST':([2,5,6,10,11,12,13,20,58,59,104,107,176,177,202,227,231,258,],[-6,16,-12,-8,-9,-10,-11,-3,-14,-16,-13,-15,-6,-2,-17,-6,-19,-18,]),'FUNCTION':([2,5,6,10,11,12,13,20,58,59,104,107,176,177,202,227,231,258,],[-6,17,-12,-8,-9,-10,-11,-3,-14,-16,-13,-15,-6,-2,-17,-6,-19,-18,]),'PROCEDURE':([2,5,6,10,11,12,13,20,58,59,104,107,176,177,202,227,231,258,],[-6,18,-12,-8,-9,-10,-11,-3,-14,-16,-13,-15,-6,-2,-17,-6,-19,-18,]),'ID':([3,14,15,16,17,18,19,36,40,41,42,43,45,50,51,52,58,59,65,66,67,68,69,70,71,72,73,74,75,76,77,78,79,80,83,84,85,90,98,99,100,101,102,103,104,105,106,107,108,110,137,138,139,140,142,144,145,168,171,175,179,181,197,198,202,205,206,211,212,213,214,216,217,219,220,225,226,230,238,243,244,245,251,252,254,262,],[7,44,57,60,61,62,57,44,44,44,44,89,44,44,44,44,60,-16,44,44,44,44,44,44,44,44,44,44,125,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,57,154,169,-15,44,57,44,44,44,44,44,44,44,57,154,57,44,44,44,44,-17,57,154,44,44,44,44,44,44,44,44,57,154,154,44,44,44,44,44,44,154,44,]),'DOT':([4,9,33,44,46,47,48,49,64,82,93,96,97,125,133,143,146,147,148,149,150,151,178,189,],[8,-7,75,-86,-84,-85,-87,-88,-50,75,-96,-93,-94,-91,-89,-95,75,75,75,75,75,75,-90,-92,]),'LPAREN':([7,14,35,36,37,38,39,40,41,42,44,45,50,51,52,61,62,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,83,84,85,90,98,99,100,101,102,103,108,137,138,139,140,142,144,145,179,181,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[19,36,80,36,83,84,85,36,36,36,90,36,36,36,36,110,110,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,]),'SEMICOLON':([7,9,14,21,22,23,24,25,26,27,28,29,30,31,32,33,34,42,44,46,47,48,49,53,54,55,62,64,65,82,88,93,96,97,111,112,113,114,115,116,117,118,119,120,121,122,125,126,127,128,129,133,137,138,143,146,147,148,149,150,151,152,153,154,155,156,157,158,159,160,161,162,163,164,165,170,172,173,178,180,182,183,184,185,186,187,189,191,192,199,200,203,204,208,211,217,219,224,228,229,232,236,237,238,239,240,246,247,248,249,250,251,252,253,257,259,260,261,],[20,-7,-6,65,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-77,-64,-6,-86,-84,-85,-87,-88,-72,104,-21,-6,-50,-6,-77,65,-96,-93,-94,-45,176,177,-51,-65,-66,-67,-68,-69,-70,-71,-63,-91,-73,-74,-75,-76,-89,-6,-6,-95,-78,-79,-80,-81,-82,-83,-20,-22,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,202,205,-47,-90,-106,-107,-108,-109,-111,-112,-113,-92,216,-118,225,-42,227,-44,231,-6,-6,-6,-37,-46,-48,-110,-116,-117,-6,65,-119,-38,-41,-43,258,-49,-6,-6,65,-36,-114,-115,-35,]),'WRITE':([14,42,65,137,138,211,217,219,238,251,252,],[35,35,35,35,35,35,35,35,35,35,35,]),'WRITELN':([14,42,65,137,138,211,217,219,238,251,252,],[37,37,37,37,37,37,37,37,37,37,37,]),'READ':([14,42,65,137,138,211,217,219,238,251,252,],[38,38,38,38,38,38,38,38,38,38,38,]),'READLN':([14,42,65,137,138,211,217,219,238,251,252,],[39,39,39,39,39,39,39,39,39,39,39,]),'IF':([14,42,65,137,138,211,217,219,238,251,252,],[40,40,40,40,40,40,40,40,40,40,40,]),'WHILE':([14,42,65,137,138,211,217,219,238,251,252,],[41,41,41,41,41,41,41,41,41,41,41,]),'REPEAT':([14,42,65,137,138,211,217,219,238,251,252,],[42,42,42,42,42,42,42,42,42,42,42,]),'FOR':([14,42,65,137,138,211,217,219,238,251,252,],[43,43,43,43,43,43,43,43,43,43,43,]),'CASE':([14,42,65,137,138,211,217,219,238,251,252,],[45,45,45,45,45,45,45,45,45,45,45,]),'END':([14,21,22,23,24,25,26,27,28,29,30,31,32,33,34,44,46,47,48,49,53,64,65,82,93,96,97,114,115,116,117,118,119,120,121,122,125,126,127,128,129,133,137,138,143,146,147,148,149,150,151,154,155,156,157,158,159,160,161,162,163,164,165,178,180,182,183,184,185,186,187,189,191,192,199,200,211,215,216,217,218,219,224,225,232,236,237,238,239,240,246,247,248,251,252,253,257,259,260,261,],[-6,64,-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-77,-64,-86,-84,-85,-87,-88,-72,-50,-6,-77,-96,-93,-94,-51,-65,-66,-67,-68,-69,-70,-71,-63,-91,-73,-74,-75,-76,-89,-6,-6,-95,-78,-79,-80,-81,-82,-83,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-90,-106,-107,-108,-109,-111,-112,-113,-92,-6,-118,224,-42,-6,236,-126,-6,-127,-6,-37,246,-110,-116,-117,-6,-124,-119,-38,-41,-43,-6,-6,-125,-36,-114,-115,-35,]),'NUMBER':([14,36,40,41,42,45,50,51,52,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,83,84,85,90,98,99,100,101,102,103,108,137,138,139,140,142,144,145,179,181,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,46,]),'STRING':([14,36,40,41,42,45,50,51,52,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,83,84,85,90,98,99,100,101,102,103,105,108,137,138,139,140,142,144,145,171,179,181,197,198,206,211,212,213,214,216,217,219,220,226,230,238,243,244,245,251,252,254,262,],[47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,165,47,47,47,47,47,47,47,47,165,47,47,47,47,165,47,47,47,47,47,47,47,47,165,165,47,47,47,47,47,47,165,47,]),'TRUE':([14,36,40,41,42,45,50,51,52,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,83,84,85,90,98,99,100,101,102,103,108,137,138,139,140,142,144,145,179,181,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,]),'FALSE':([14,36,40,41,42,45,50,51,52,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,83,84,85,90,98,99,100,101,102,103,108,137,138,139,140,142,144,145,179,181,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,]),'MINUS':([14,33,34,36,40,41,42,44,45,46,47,48,49,50,51,52,53,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,82,83,84,85,90,93,96,97,98,99,100,101,102,103,108,115,116,117,118,119,120,121,125,126,127,128,129,133,137,138,139,140,142,143,144,145,146,147,148,149,150,151,178,179,181,189,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[51,-77,77,51,51,51,51,-86,51,-84,-85,-87,-88,51,51,51,-72,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,-77,51,51,51,51,-96,-93,-94,51,51,51,51,51,51,51,77,77,77,77,77,77,77,-91,-73,-74,-75,-76,-89,51,51,51,51,51,-95,51,51,-78,-79,-80,-81,-82,-83,-90,51,51,-92,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,]),'NOT':([14,36,40,41,42,45,50,51,52,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,83,84,85,90,98,99,100,101,102,103,108,137,138,139,140,142,144,145,179,181,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,52,]),'LBRACKET':([14,33,36,40,41,42,44,45,46,47,48,49,50,51,52,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,82,83,84,85,90,93,96,97,98,99,100,101,102,103,108,125,133,137,138,139,140,142,143,144,145,146,147,148,149,150,151,166,178,179,181,189,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[50,74,50,50,50,50,-86,50,-84,-85,-87,-88,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,74,50,50,50,50,-96,-93,-94,50,50,50,50,50,50,50,-91,-89,50,50,50,50,50,-95,50,50,74,74,74,74,74,74,197,-90,50,50,-92,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,]),'UNTIL':([22,23,24,25,26,27,28,29,30,31,32,33,34,42,44,46,47,48,49,53,64,65,82,88,93,96,97,114,115,116,117,118,119,120,121,122,125,126,127,128,129,133,137,138,143,146,147,148,149,150,151,178,180,182,183,184,185,186,187,189,211,232,236,251,252,259,260,],[-52,-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-77,-64,-6,-86,-84,-85,-87,-88,-72,-50,-6,-77,139,-96,-93,-94,-51,-65,-66,-67,-68,-69,-70,-71,-63,-91,-73,-74,-75,-76,-89,-6,-6,-95,-78,-79,-80,-81,-82,-83,-90,-106,-107,-108,-109,-111,-112,-113,-92,-6,-110,-116,-6,-6,-114,-115,]),'ELSE':([23,24,25,26,27,28,29,30,31,32,33,34,44,46,47,48,49,53,64,82,93,96,97,115,116,117,118,119,120,121,122,125,126,127,128,129,133,137,138,143,146,147,148,149,150,151,178,180,182,183,184,185,186,187,189,191,192,211,216,219,232,236,237,240,251,252,259,260,],[-53,-54,-55,-56,-57,-58,-59,-60,-61,-62,-77,-64,-86,-84,-85,-87,-88,-72,-50,-77,-96,-93,-94,-65,-66,-67,-68,-69,-70,-71,-63,-91,-73,-74,-75,-76,-89,-6,-6,-95,-78,-79,-80,-81,-82,-83,-90,-106,-107,-108,-109,211,-112,-113,-92,217,-118,-6,238,-6,-110,-116,-117,-119,-6,-6,-114,-115,]),'EQUALS':([24,33,34,44,46,47,48,49,53,60,81,82,86,87,91,93,95,96,97,115,116,117,118,119,120,121,122,124,125,126,127,128,129,131,133,143,146,147,148,149,150,151,170,178,187,188,189,190,196,209,210,222,223,233,234,235,255,256,257,263,],[66,-77,-64,-86,-84,-85,-87,-88,-72,108,66,-77,66,66,66,-96,66,-93,-94,-65,-66,-67,-68,-69,-70,-71,66,66,-91,-73,-74,-75,-76,66,-89,-95,-78,-79,-80,-81,-82,-83,66,-90,66,66,-92,66,66,66,66,66,66,66,66,66,66,66,66,66,]),'NE':([24,33,34,44,46,47,48,49,53,81,82,86,87,91,93,95,96,97,115,116,117,118,119,120,121,122,124,125,126,127,128,129,131,133,143,146,147,148,149,150,151,170,178,187,188,189,190,196,209,210,222,223,233,234,235,255,256,257,263,],[67,-77,-64,-86,-84,-85,-87,-88,-72,67,-77,67,67,67,-96,67,-93,-94,-65,-66,-67,-68,-69,-70,-71,67,67,-91,-73,-74,-75,-76,67,-89,-95,-78,-79,-80,-81,-82,-83,67,-90,67,67,-92,67,67,67,67,67,67,67,67,67,67,67,67,67,]),'LT':([24,33,34,44,46,47,48,49,53,81,82,86,87,91,93,95,96,97,115,116,117,118,119,120,121,122,124,125,126,127,128,129,131,133,143,146,147,148,149,150,151,170,178,187,188,189,190,196,209,210,222,223,233,234,235,255,256,257,263,],[68,-77,-64,-86,-84,-85,-87,-88,-72,68,-77,68,68,68,-96,68,-93,-94,-65,-66,-67,-68,-69,-70,-71,68,68,-91,-73,-74,-75,-76,68,-89,-95,-78,-79,-80,-81,-82,-83,68,-90,68,68,-92,68,68,68,68,68,68,68,68,68,68,68,68,68,]),'GT':([24,33,34,44,46,47,48,49,53,81,82,86,87,91,93,95,96,97,115,116,117,118,119,120,121,122,124,125,126,127,128,129,131,133,143,146,147,148,149,150,151,170,178,187,188,189,190,196,209,210,222,223,233,234,235,255,256,257,263,],[69,-77,-64,-86,-84,-85,-87,-88,-72,69,-77,69,69,69,-96,69,-93,-94,-65,-66,-67,-68,-69,-70,-71,69,69,-91,-73,-74,-75,-76,69,-89,-95,-78,-79,-80,-81,-82,-83,69,-90,69,69,-92,69,69,69,69,69,69,69,69,69,69,69,69,69,]),'LE':([24,33,34,44,46,47,48,49,53,81,82,86,87,91,93,95,96,97,115,116,117,118,119,120,121,122,124,125,126,127,128,129,131,133,143,146,147,148,149,150,151,170,178,187,188,189,190,196,209,210,222,223,233,234,235,255,256,257,263,],[70,-77,-64,-86,-84,-85,-87,-88,-72,70,-77,70,70,70,-96,70,-93,-94,-65,-66,-67,-68,-69,-70,-71,70,70,-91,-73,-74,-75,-76,70,-89,-95,-78,-79,-80,-81,-82,-83,70,-90,70,70,-92,70,70,70,70,70,70,70,70,70,70,70,70,70,]),'GE':([24,33,34,44,46,47,48,49,53,81,82,86,87,91,93,95,96,97,115,116,117,118,119,120,121,122,124,125,126,127,128,129,131,133,143,146,147,148,149,150,151,170,178,187,188,189,190,196,209,210,222,223,233,234,235,255,256,257,263,],[71,-77,-64,-86,-84,-85,-87,-88,-72,71,-77,71,71,71,-96,71,-93,-94,-65,-66,-67,-68,-69,-70,-71,71,71,-91,-73,-74,-75,-76,71,-89,-95,-78,-79,-80,-81,-82,-83,71,-90,71,71,-92,71,71,71,71,71,71,71,71,71,71,71,71,71,]),'IN':([24,33,34,44,46,47,48,49,53,81,82,86,87,91,93,95,96,97,115,116,117,118,119,120,121,122,124,125,126,127,128,129,131,133,143,146,147,148,149,150,151,170,178,187,188,189,190,196,209,210,222,223,233,234,235,255,256,257,263,],[72,-77,-64,-86,-84,-85,-87,-88,-72,72,-77,72,72,72,-96,72,-93,-94,-65,-66,-67,-68,-69,-70,-71,72,72,-91,-73,-74,-75,-76,72,-89,-95,-78,-79,-80,-81,-82,-83,72,-90,72,72,-92,72,72,72,72,72,72,72,72,72,72,72,72,72,]),'ASSIGN':([33,44,46,47,48,49,89,93,96,97,125,133,143,178,189,],[73,-86,-84,-85,-87,-88,140,-96,-93,-94,-91,-89,-95,-90,-92,]),'TIMES':([33,44,46,47,48,49,53,82,93,96,97,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-77,-86,-84,-85,-87,-88,98,-77,-96,-93,-94,-91,98,98,98,98,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'DIVIDE':([33,44,46,47,48,49,53,82,93,96,97,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-77,-86,-84,-85,-87,-88,99,-77,-96,-93,-94,-91,99,99,99,99,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'DIV':([33,44,46,47,48,49,53,82,93,96,97,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-77,-86,-84,-85,-87,-88,100,-77,-96,-93,-94,-91,100,100,100,100,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'MOD':([33,44,46,47,48,49,53,82,93,96,97,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-77,-86,-84,-85,-87,-88,101,-77,-96,-93,-94,-91,101,101,101,101,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'AND':([33,44,46,47,48,49,53,82,93,96,97,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-77,-86,-84,-85,-87,-88,102,-77,-96,-93,-94,-91,102,102,102,102,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'ANDTHEN':([33,44,46,47,48,49,53,82,93,96,97,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-77,-86,-84,-85,-87,-88,103,-77,-96,-93,-94,-91,103,103,103,103,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'PLUS':([33,34,44,46,47,48,49,53,82,93,96,97,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-77,76,-86,-84,-85,-87,-88,-72,-77,-96,-93,-94,76,76,76,76,76,76,76,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'OR':([33,34,44,46,47,48,49,53,82,93,96,97,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-77,78,-86,-84,-85,-87,-88,-72,-77,-96,-93,-94,78,78,78,78,78,78,78,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'ORELSE':([33,34,44,46,47,48,49,53,82,93,96,97,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-77,79,-86,-84,-85,-87,-88,-72,-77,-96,-93,-94,79,79,79,79,79,79,79,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'RPAREN':([34,44,46,47,48,49,53,57,63,80,81,82,83,84,85,90,93,96,97,115,116,117,118,119,120,121,125,126,127,128,129,130,131,132,133,134,135,136,141,143,146,147,148,149,150,151,154,155,156,157,158,159,160,161,162,163,164,165,169,172,173,178,189,210,224,228,229,246,250,257,261,],[-64,-86,-84,-85,-87,-88,-72,-5,113,-6,133,-77,-6,-6,-6,-6,-96,-93,-94,-65,-66,-67,-68,-69,-70,-71,-91,-73,-74,-75,-76,180,-104,-105,-89,182,183,184,189,-95,-78,-79,-80,-81,-82,-83,-23,-24,-25,-26,-27,-28,-29,-30,-31,-32,-33,-34,-4,204,-47,-90,-92,-103,-37,-46,-48,-38,-49,-36,-35,]),'THEN':([34,44,46,47,48,49,53,82,86,93,96,97,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,],[-64,-86,-84,-85,-87,-88,-72,-77,137,-96,-93,-94,-65,-66,-67,-68,-69,-70,-71,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,]),'DO':([34,44,46,47,48,49,53,82,87,93,96,97,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,233,234,],[-64,-86,-84,-85,-87,-88,-72,-77,138,-96,-93,-94,-65,-66,-67,-68,-69,-70,-71,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,251,252,]),'OF':([34,44,46,47,48,49,53,82,91,93,96,97,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,167,178,189,242,],[-64,-86,-84,-85,-87,-88,-72,-77,142,-96,-93,-94,-65,-66,-67,-68,-69,-70,-71,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,198,-90,-92,254,]),'DOTDOT':([34,44,46,47,48,49,53,82,93,95,96,97,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,190,222,223,255,],[-64,-86,-84,-85,-87,-88,-72,-77,-96,145,-93,-94,-65,-66,-67,-68,-69,-70,-71,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,214,244,245,262,]),'RBRACKET':([34,44,46,47,48,49,50,53,82,92,93,94,95,96,97,115,116,117,118,119,120,121,123,124,125,126,127,128,129,133,143,146,147,148,149,150,151,178,189,195,196,209,221,256,263,],[-64,-86,-84,-85,-87,-88,93,-72,-77,143,-96,-98,-99,-93,-94,-65,-66,-67,-68,-69,-70,-71,178,-102,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-90,-92,-97,-100,-101,242,-40,-39,]),'COMMA':([34,44,46,47,48,49,53,56,57,63,80,82,83,84,85,90,92,93,94,95,96,97,115,116,117,118,119,120,121,123,124,125,126,127,128,129,130,131,132,133,134,135,136,141,143,146,147,148,149,150,151,169,174,178,189,190,193,194,195,196,201,207,209,210,221,235,241,256,263,],[-64,-86,-84,-85,-87,-88,-72,106,-5,106,-6,-77,-6,-6,-6,-6,144,-96,-98,-99,-93,-94,-65,-66,-67,-68,-69,-70,-71,179,-102,-91,-73,-74,-75,-76,181,-104,-105,-89,181,181,181,181,-95,-78,-79,-80,-81,-82,-83,-4,106,-90,-92,-122,220,-121,-97,-100,106,106,-101,-103,243,-123,-120,-40,-39,]),'TO':([34,44,46,47,48,49,53,82,93,96,97,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,178,188,189,],[-64,-86,-84,-85,-87,-88,-72,-77,-96,-93,-94,-65,-66,-67,-68,-69,-70,-71,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-90,212,-92,]),'DOWNTO':([34,44,46,47,48,49,53,82,93,96,97,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,178,188,189,],[-64,-86,-84,-85,-87,-88,-72,-77,-96,-93,-94,-65,-66,-67,-68,-69,-70,-71,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-90,213,-92,]),'COLON':([34,44,46,47,48,49,53,56,57,61,82,93,96,97,109,111,115,116,117,118,119,120,121,125,126,127,128,129,133,143,146,147,148,149,150,151,169,174,178,189,190,193,194,201,204,207,235,241,],[-64,-86,-84,-85,-87,-88,-72,105,-5,-6,-77,-96,-93,-94,171,-45,-65,-66,-67,-68,-69,-70,-71,-91,-73,-74,-75,-76,-89,-95,-78,-79,-80,-81,-82,-83,-4,206,-90,-92,-122,219,-121,226,-44,230,-123,-120,]),'INTEGER':([105,171,206,226,230,254,],[155,155,155,155,155,155,]),'REAL':([105,171,206,226,230,254,],[156,156,156,156,156,156,]),'BOOLEAN':([105,171,206,226,230,254,],[157,157,157,157,157,157,]),'CHAR':([105,171,206,226,230,254,],[158,158,158,158,158,158,]),'BYTE':([105,171,206,226,230,254,],[159,159,159,159,159,159,]),'WORD':([105,171,206,226,230,254,],[160,160,160,160,160,160,]),'LONGINT':([105,171,206,226,230,254,],[161,161,161,161,161,161,]),'SHORTINT':([105,171,206,226,230,254,],[162,162,162,162,162,162,]),'SINGLE':([105,171,206,226,230,254,],[163,163,163,163,163,163,]),'DOUBLE':([105,171,206,226,230,254,],[164,164,164,164,164,164,]),'ARRAY':([105,171,206,226,230,254,],[166,166,166,166,166,166,]),'SET':([105,171,206,226,230,254,],[167,167,167,167,167,167,]),'RECORD':([105,171,206,226,230,254,],[168,168,168,168,168,168,]),}
 
 _lr_action = {}
 for _k, _v in _lr_action_items.items():
@@ -17,7 +17,7 @@ for _k, _v in _lr_action_items.items():
       _lr_action[_x][_k] = _y
 del _lr_action_items
 
-_lr_goto_items = {'program':([0,],[1,]),'header':([0,],[2,]),'block':([2,147,171,],[4,165,180,]),'declarations':([2,147,171,],[5,5,5,]),'empty':([2,13,51,52,55,64,69,72,73,74,116,117,147,167,171,182,183,],[6,28,92,92,28,106,106,106,106,106,28,28,6,28,6,28,28,]),'compound_statement':([5,13,55,116,117,167,182,183,],[9,23,23,23,23,23,23,23,]),'variable_declaration':([5,],[10,]),'function_declaration':([5,],[11,]),'procedure_declaration':([5,],[12,]),'statement_list':([13,],[19,]),'statement':([13,55,116,117,167,182,183,],[20,95,155,156,176,186,187,]),'assignment_statement':([13,55,116,117,167,182,183,],[21,21,21,21,21,21,21,]),'expression':([13,32,36,37,55,63,64,69,72,73,74,85,116,117,118,150,167,168,169,182,183,],[22,70,75,76,22,103,105,105,105,105,105,125,22,22,157,166,22,177,178,22,22,]),'io_statement':([13,55,116,117,167,182,183,],[24,24,24,24,24,24,24,]),'if_statement':([13,55,116,117,167,182,183,],[25,25,25,25,25,25,25,]),'while_statement':([13,55,116,117,167,182,183,],[26,26,26,26,26,26,26,]),'for_statement':([13,55,116,117,167,182,183,],[27,27,27,27,27,27,27,]),'additive_expression':([13,32,36,37,55,56,57,58,59,60,61,62,63,64,69,72,73,74,85,116,117,118,150,167,168,169,182,183,],[30,30,30,30,30,96,97,98,99,100,101,102,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,30,]),'multiplicative_expression':([13,32,36,37,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,72,73,74,85,116,117,118,150,167,168,169,182,183,],[39,39,39,39,39,39,39,39,39,39,39,39,39,39,107,108,109,110,39,39,39,39,39,39,39,39,39,39,39,39,39,39,]),'factor':([13,32,36,37,40,46,55,56,57,58,59,60,61,62,63,64,65,66,67,68,69,72,73,74,78,79,80,81,82,83,85,116,117,118,150,167,168,169,182,183,],[41,41,41,41,84,86,41,41,41,41,41,41,41,41,41,41,41,41,41,41,41,41,41,41,119,120,121,122,123,124,41,41,41,41,41,41,41,41,41,41,]),'variable_list':([14,],[47,]),'variable':([14,87,],[48,126,]),'id_list':([14,17,87,91,146,162,],[49,53,49,145,164,145,]),'parameter_list':([51,52,],[90,93,]),'expression_list':([64,69,72,73,74,],[104,111,113,114,115,]),'type':([88,142,163,174,190,],[127,160,173,181,191,]),'parameter_section_list':([91,],[143,]),'parameter_section':([91,162,],[144,172,]),}
+_lr_goto_items = {'program':([0,],[1,]),'header':([0,],[2,]),'block':([2,176,227,],[4,208,249,]),'declarations':([2,176,227,],[5,5,5,]),'empty':([2,14,42,61,62,65,80,83,84,85,90,137,138,176,191,211,217,219,227,238,251,252,],[6,32,32,111,111,32,132,132,132,132,132,32,32,6,218,32,32,32,6,32,32,32,]),'compound_statement':([5,14,42,65,137,138,211,217,219,238,251,252,],[9,25,25,25,25,25,25,25,25,25,25,25,]),'variable_declaration':([5,],[10,]),'constant_declaration':([5,],[11,]),'function_declaration':([5,],[12,]),'procedure_declaration':([5,],[13,]),'statement_list':([14,42,217,238,],[21,88,239,253,]),'statement':([14,42,65,137,138,211,217,219,238,251,252,],[22,22,114,185,186,232,22,240,22,259,260,]),'assignment_statement':([14,42,65,137,138,211,217,219,238,251,252,],[23,23,23,23,23,23,23,23,23,23,23,]),'expression':([14,36,40,41,42,45,50,65,73,74,80,83,84,85,90,108,137,138,139,140,142,144,145,179,181,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[24,81,86,87,24,91,95,24,122,124,131,131,131,131,131,170,24,24,187,188,190,95,196,209,210,222,223,24,233,234,235,190,24,24,190,24,255,256,257,24,24,263,]),'io_statement':([14,42,65,137,138,211,217,219,238,251,252,],[26,26,26,26,26,26,26,26,26,26,26,]),'if_statement':([14,42,65,137,138,211,217,219,238,251,252,],[27,27,27,27,27,27,27,27,27,27,27,]),'while_statement':([14,42,65,137,138,211,217,219,238,251,252,],[28,28,28,28,28,28,28,28,28,28,28,]),'repeat_statement':([14,42,65,137,138,211,217,219,238,251,252,],[29,29,29,29,29,29,29,29,29,29,29,]),'for_statement':([14,42,65,137,138,211,217,219,238,251,252,],[30,30,30,30,30,30,30,30,30,30,30,]),'case_statement':([14,42,65,137,138,211,217,219,238,251,252,],[31,31,31,31,31,31,31,31,31,31,31,]),'factor':([14,36,40,41,42,45,50,51,52,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,83,84,85,90,98,99,100,101,102,103,108,137,138,139,140,142,144,145,179,181,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[33,82,82,82,33,82,82,96,97,33,82,82,82,82,82,82,82,82,82,82,82,82,82,82,82,82,82,82,146,147,148,149,150,151,82,33,33,82,82,82,82,82,82,82,82,82,33,82,82,82,82,33,33,82,33,82,82,82,33,33,82,]),'additive_expression':([14,36,40,41,42,45,50,65,66,67,68,69,70,71,72,73,74,80,83,84,85,90,108,137,138,139,140,142,144,145,179,181,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[34,34,34,34,34,34,34,34,115,116,117,118,119,120,121,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,]),'multiplicative_expression':([14,36,40,41,42,45,50,65,66,67,68,69,70,71,72,73,74,76,77,78,79,80,83,84,85,90,108,137,138,139,140,142,144,145,179,181,197,198,211,212,213,214,216,217,219,220,238,243,244,245,251,252,262,],[53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,126,127,128,129,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,53,]),'variable_list':([15,],[54,]),'variable':([15,104,],[55,152,]),'id_list':([15,19,104,110,168,175,205,225,],[56,63,56,174,201,207,174,201,]),'constant_list':([16,],[58,]),'constant':([16,58,],[59,107,]),'set_element_list':([50,],[92,]),'set_element':([50,144,],[94,195,]),'parameter_list':([61,62,],[109,112,]),'index_list':([74,],[123,]),'expression_list':([80,83,84,85,90,],[130,134,135,136,141,]),'type':([105,171,206,226,230,254,],[153,203,229,248,250,261,]),'parameter_section_list':([110,],[172,]),'parameter_section':([110,205,],[173,228,]),'case_element_list':([142,],[191,]),'case_element':([142,216,],[192,237,]),'case_label_list':([142,216,],[193,193,]),'case_label':([142,216,220,],[194,194,241,]),'field_list':([168,],[199,]),'field':([168,225,],[200,247,]),'case_else':([191,],[215,]),'index_range_list':([197,],[221,]),}
 
 _lr_goto = {}
 for _k, _v in _lr_goto_items.items():
@@ -27,97 +27,131 @@ for _k, _v in _lr_goto_items.items():
 del _lr_goto_items
 _lr_productions = [
   ("S' -> program","S'",1,None,None,None),
-  ('program -> header block DOT','program',3,'p_program','anasin.py',7),
-  ('header -> PROGRAM ID LPAREN id_list RPAREN SEMICOLON','header',6,'p_header','anasin.py',12),
-  ('header -> PROGRAM ID SEMICOLON','header',3,'p_header','anasin.py',13),
-  ('id_list -> id_list COMMA ID','id_list',3,'p_id_list','anasin.py',23),
-  ('id_list -> ID','id_list',1,'p_id_list','anasin.py',24),
-  ('empty -> <empty>','empty',0,'p_empty','anasin.py',32),
-  ('block -> declarations compound_statement','block',2,'p_block','anasin.py',37),
-  ('declarations -> declarations variable_declaration','declarations',2,'p_declarations','anasin.py',42),
-  ('declarations -> declarations function_declaration','declarations',2,'p_declarations','anasin.py',43),
-  ('declarations -> declarations procedure_declaration','declarations',2,'p_declarations','anasin.py',44),
-  ('declarations -> empty','declarations',1,'p_declarations','anasin.py',45),
-  ('variable_declaration -> VAR variable_list SEMICOLON','variable_declaration',3,'p_variable_declaration','anasin.py',57),
-  ('function_declaration -> FUNCTION ID parameter_list COLON type SEMICOLON block SEMICOLON','function_declaration',8,'p_function_declaration','anasin.py',63),
-  ('procedure_declaration -> PROCEDURE ID parameter_list SEMICOLON block SEMICOLON','procedure_declaration',6,'p_procedure_declaration','anasin.py',71),
-  ('variable_list -> variable_list SEMICOLON variable','variable_list',3,'p_variable_list','anasin.py',80),
-  ('variable_list -> variable','variable_list',1,'p_variable_list','anasin.py',81),
-  ('variable -> id_list COLON type','variable',3,'p_variable','anasin.py',91),
-  ('type -> ID','type',1,'p_type','anasin.py',96),
-  ('type -> INTEGER','type',1,'p_type','anasin.py',97),
-  ('type -> REAL','type',1,'p_type','anasin.py',98),
-  ('type -> BOOLEAN','type',1,'p_type','anasin.py',99),
-  ('type -> CHAR','type',1,'p_type','anasin.py',100),
-  ('type -> BYTE','type',1,'p_type','anasin.py',101),
-  ('type -> WORD','type',1,'p_type','anasin.py',102),
-  ('type -> LONGINT','type',1,'p_type','anasin.py',103),
-  ('type -> SHORTINT','type',1,'p_type','anasin.py',104),
-  ('type -> SINGLE','type',1,'p_type','anasin.py',105),
-  ('type -> DOUBLE','type',1,'p_type','anasin.py',106),
-  ('type -> STRING','type',1,'p_type','anasin.py',107),
-  ('type -> ARRAY LBRACKET NUMBER DOT DOT NUMBER RBRACKET OF type','type',9,'p_type','anasin.py',108),
-  ('field_list -> field_list SEMICOLON field','field_list',3,'p_field_list','anasin.py',120),
-  ('field_list -> field','field_list',1,'p_field_list','anasin.py',121),
-  ('field -> id_list COLON type','field',3,'p_field','anasin.py',131),
-  ('parameter_list -> LPAREN parameter_section_list RPAREN','parameter_list',3,'p_parameter_list','anasin.py',136),
-  ('parameter_list -> empty','parameter_list',1,'p_parameter_list','anasin.py',137),
-  ('parameter_section_list -> parameter_section_list SEMICOLON parameter_section','parameter_section_list',3,'p_parameter_section_list','anasin.py',147),
-  ('parameter_section_list -> parameter_section','parameter_section_list',1,'p_parameter_section_list','anasin.py',148),
-  ('parameter_section -> id_list COLON type','parameter_section',3,'p_parameter_section','anasin.py',158),
-  ('parameter_section -> VAR id_list COLON type','parameter_section',4,'p_parameter_section','anasin.py',159),
-  ('compound_statement -> BEGIN statement_list END','compound_statement',3,'p_compound_statement','anasin.py',169),
-  ('statement_list -> statement_list SEMICOLON statement','statement_list',3,'p_statement_list','anasin.py',174),
-  ('statement_list -> statement','statement_list',1,'p_statement_list','anasin.py',175),
-  ('statement -> assignment_statement','statement',1,'p_statement','anasin.py',185),
-  ('statement -> expression','statement',1,'p_statement','anasin.py',186),
-  ('statement -> compound_statement','statement',1,'p_statement','anasin.py',187),
-  ('statement -> io_statement','statement',1,'p_statement','anasin.py',188),
-  ('statement -> if_statement','statement',1,'p_statement','anasin.py',189),
-  ('statement -> while_statement','statement',1,'p_statement','anasin.py',190),
-  ('statement -> for_statement','statement',1,'p_statement','anasin.py',191),
-  ('statement -> empty','statement',1,'p_statement','anasin.py',192),
-  ('assignment_statement -> ID ASSIGN expression','assignment_statement',3,'p_assignment_statement','anasin.py',197),
-  ('expression -> additive_expression','expression',1,'p_expression','anasin.py',203),
-  ('expression -> expression EQUALS additive_expression','expression',3,'p_expression','anasin.py',204),
-  ('expression -> expression NE additive_expression','expression',3,'p_expression','anasin.py',205),
-  ('expression -> expression LT additive_expression','expression',3,'p_expression','anasin.py',206),
-  ('expression -> expression GT additive_expression','expression',3,'p_expression','anasin.py',207),
-  ('expression -> expression LE additive_expression','expression',3,'p_expression','anasin.py',208),
-  ('expression -> expression GE additive_expression','expression',3,'p_expression','anasin.py',209),
-  ('expression -> expression IN additive_expression','expression',3,'p_expression','anasin.py',210),
-  ('additive_expression -> multiplicative_expression','additive_expression',1,'p_additive_expression','anasin.py',220),
-  ('additive_expression -> additive_expression PLUS multiplicative_expression','additive_expression',3,'p_additive_expression','anasin.py',221),
-  ('additive_expression -> additive_expression MINUS multiplicative_expression','additive_expression',3,'p_additive_expression','anasin.py',222),
-  ('additive_expression -> additive_expression OR multiplicative_expression','additive_expression',3,'p_additive_expression','anasin.py',223),
-  ('additive_expression -> additive_expression ORELSE multiplicative_expression','additive_expression',3,'p_additive_expression','anasin.py',224),
-  ('multiplicative_expression -> factor','multiplicative_expression',1,'p_multiplicative_expression','anasin.py',234),
-  ('multiplicative_expression -> multiplicative_expression TIMES factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',235),
-  ('multiplicative_expression -> multiplicative_expression DIVIDE factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',236),
-  ('multiplicative_expression -> multiplicative_expression DIV factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',237),
-  ('multiplicative_expression -> multiplicative_expression MOD factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',238),
-  ('multiplicative_expression -> multiplicative_expression AND factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',239),
-  ('multiplicative_expression -> multiplicative_expression ANDTHEN factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',240),
-  ('factor -> NUMBER','factor',1,'p_factor','anasin.py',250),
-  ('factor -> STRING','factor',1,'p_factor','anasin.py',251),
-  ('factor -> ID','factor',1,'p_factor','anasin.py',252),
-  ('factor -> TRUE','factor',1,'p_factor','anasin.py',253),
-  ('factor -> FALSE','factor',1,'p_factor','anasin.py',254),
-  ('factor -> LPAREN expression RPAREN','factor',3,'p_factor','anasin.py',255),
-  ('factor -> factor LBRACKET expression RBRACKET','factor',4,'p_factor','anasin.py',256),
-  ('factor -> ID LPAREN expression_list RPAREN','factor',4,'p_factor','anasin.py',257),
-  ('factor -> MINUS factor','factor',2,'p_factor','anasin.py',258),
-  ('factor -> NOT factor','factor',2,'p_factor','anasin.py',259),
-  ('expression_list -> expression_list COMMA expression','expression_list',3,'p_expression_list','anasin.py',289),
-  ('expression_list -> expression','expression_list',1,'p_expression_list','anasin.py',290),
-  ('expression_list -> empty','expression_list',1,'p_expression_list','anasin.py',291),
-  ('io_statement -> WRITE LPAREN expression_list RPAREN','io_statement',4,'p_io_statement','anasin.py',301),
-  ('io_statement -> WRITELN LPAREN expression_list RPAREN','io_statement',4,'p_io_statement','anasin.py',302),
-  ('io_statement -> READ LPAREN expression_list RPAREN','io_statement',4,'p_io_statement','anasin.py',303),
-  ('io_statement -> READLN LPAREN expression_list RPAREN','io_statement',4,'p_io_statement','anasin.py',304),
-  ('if_statement -> IF expression THEN statement ELSE statement','if_statement',6,'p_if_statement','anasin.py',309),
-  ('if_statement -> IF expression THEN statement','if_statement',4,'p_if_statement','anasin.py',310),
-  ('while_statement -> WHILE expression DO statement','while_statement',4,'p_while_statement','anasin.py',320),
-  ('for_statement -> FOR ID ASSIGN expression TO expression DO statement','for_statement',8,'p_for_statement','anasin.py',325),
-  ('for_statement -> FOR ID ASSIGN expression DOWNTO expression DO statement','for_statement',8,'p_for_statement','anasin.py',326),
+  ('program -> header block DOT','program',3,'p_program','anasin.py',81),
+  ('header -> PROGRAM ID LPAREN id_list RPAREN SEMICOLON','header',6,'p_header','anasin.py',86),
+  ('header -> PROGRAM ID SEMICOLON','header',3,'p_header','anasin.py',87),
+  ('id_list -> id_list COMMA ID','id_list',3,'p_id_list','anasin.py',97),
+  ('id_list -> ID','id_list',1,'p_id_list','anasin.py',98),
+  ('empty -> <empty>','empty',0,'p_empty','anasin.py',107),
+  ('block -> declarations compound_statement','block',2,'p_block','anasin.py',112),
+  ('declarations -> declarations variable_declaration','declarations',2,'p_declarations','anasin.py',117),
+  ('declarations -> declarations constant_declaration','declarations',2,'p_declarations','anasin.py',118),
+  ('declarations -> declarations function_declaration','declarations',2,'p_declarations','anasin.py',119),
+  ('declarations -> declarations procedure_declaration','declarations',2,'p_declarations','anasin.py',120),
+  ('declarations -> empty','declarations',1,'p_declarations','anasin.py',121),
+  ('variable_declaration -> VAR variable_list SEMICOLON','variable_declaration',3,'p_variable_declaration','anasin.py',134),
+  ('constant_declaration -> CONST constant_list','constant_declaration',2,'p_constant_declaration','anasin.py',140),
+  ('constant_list -> constant_list constant','constant_list',2,'p_constant_list','anasin.py',145),
+  ('constant_list -> constant','constant_list',1,'p_constant_list','anasin.py',146),
+  ('constant -> ID EQUALS expression SEMICOLON','constant',4,'p_constant','anasin.py',156),
+  ('function_declaration -> FUNCTION ID parameter_list COLON type SEMICOLON block SEMICOLON','function_declaration',8,'p_function_declaration','anasin.py',161),
+  ('procedure_declaration -> PROCEDURE ID parameter_list SEMICOLON block SEMICOLON','procedure_declaration',6,'p_procedure_declaration','anasin.py',166),
+  ('variable_list -> variable_list SEMICOLON variable','variable_list',3,'p_variable_list','anasin.py',172),
+  ('variable_list -> variable','variable_list',1,'p_variable_list','anasin.py',173),
+  ('variable -> id_list COLON type','variable',3,'p_variable','anasin.py',183),
+  ('type -> ID','type',1,'p_type','anasin.py',188),
+  ('type -> INTEGER','type',1,'p_type','anasin.py',189),
+  ('type -> REAL','type',1,'p_type','anasin.py',190),
+  ('type -> BOOLEAN','type',1,'p_type','anasin.py',191),
+  ('type -> CHAR','type',1,'p_type','anasin.py',192),
+  ('type -> BYTE','type',1,'p_type','anasin.py',193),
+  ('type -> WORD','type',1,'p_type','anasin.py',194),
+  ('type -> LONGINT','type',1,'p_type','anasin.py',195),
+  ('type -> SHORTINT','type',1,'p_type','anasin.py',196),
+  ('type -> SINGLE','type',1,'p_type','anasin.py',197),
+  ('type -> DOUBLE','type',1,'p_type','anasin.py',198),
+  ('type -> STRING','type',1,'p_type','anasin.py',199),
+  ('type -> ARRAY LBRACKET index_range_list RBRACKET OF type','type',6,'p_type','anasin.py',200),
+  ('type -> SET OF expression DOTDOT expression','type',5,'p_type','anasin.py',201),
+  ('type -> RECORD field_list END','type',3,'p_type','anasin.py',202),
+  ('type -> RECORD field_list SEMICOLON END','type',4,'p_type','anasin.py',203),
+  ('index_range_list -> index_range_list COMMA expression DOTDOT expression','index_range_list',5,'p_index_range_list','anasin.py',220),
+  ('index_range_list -> expression DOTDOT expression','index_range_list',3,'p_index_range_list','anasin.py',221),
+  ('field_list -> field_list SEMICOLON field','field_list',3,'p_field_list','anasin.py',229),
+  ('field_list -> field','field_list',1,'p_field_list','anasin.py',230),
+  ('field -> id_list COLON type','field',3,'p_field','anasin.py',240),
+  ('parameter_list -> LPAREN parameter_section_list RPAREN','parameter_list',3,'p_parameter_list','anasin.py',245),
+  ('parameter_list -> empty','parameter_list',1,'p_parameter_list','anasin.py',246),
+  ('parameter_section_list -> parameter_section_list SEMICOLON parameter_section','parameter_section_list',3,'p_parameter_section_list','anasin.py',256),
+  ('parameter_section_list -> parameter_section','parameter_section_list',1,'p_parameter_section_list','anasin.py',257),
+  ('parameter_section -> id_list COLON type','parameter_section',3,'p_parameter_section','anasin.py',267),
+  ('parameter_section -> VAR id_list COLON type','parameter_section',4,'p_parameter_section','anasin.py',268),
+  ('compound_statement -> BEGIN statement_list END','compound_statement',3,'p_compound_statement','anasin.py',278),
+  ('statement_list -> statement_list SEMICOLON statement','statement_list',3,'p_statement_list','anasin.py',283),
+  ('statement_list -> statement','statement_list',1,'p_statement_list','anasin.py',284),
+  ('statement -> assignment_statement','statement',1,'p_statement','anasin.py',294),
+  ('statement -> expression','statement',1,'p_statement','anasin.py',295),
+  ('statement -> compound_statement','statement',1,'p_statement','anasin.py',296),
+  ('statement -> io_statement','statement',1,'p_statement','anasin.py',297),
+  ('statement -> if_statement','statement',1,'p_statement','anasin.py',298),
+  ('statement -> while_statement','statement',1,'p_statement','anasin.py',299),
+  ('statement -> repeat_statement','statement',1,'p_statement','anasin.py',300),
+  ('statement -> for_statement','statement',1,'p_statement','anasin.py',301),
+  ('statement -> case_statement','statement',1,'p_statement','anasin.py',302),
+  ('statement -> empty','statement',1,'p_statement','anasin.py',303),
+  ('assignment_statement -> factor ASSIGN expression','assignment_statement',3,'p_assignment_statement','anasin.py',308),
+  ('expression -> additive_expression','expression',1,'p_expression','anasin.py',313),
+  ('expression -> expression EQUALS additive_expression','expression',3,'p_expression','anasin.py',314),
+  ('expression -> expression NE additive_expression','expression',3,'p_expression','anasin.py',315),
+  ('expression -> expression LT additive_expression','expression',3,'p_expression','anasin.py',316),
+  ('expression -> expression GT additive_expression','expression',3,'p_expression','anasin.py',317),
+  ('expression -> expression LE additive_expression','expression',3,'p_expression','anasin.py',318),
+  ('expression -> expression GE additive_expression','expression',3,'p_expression','anasin.py',319),
+  ('expression -> expression IN additive_expression','expression',3,'p_expression','anasin.py',320),
+  ('additive_expression -> multiplicative_expression','additive_expression',1,'p_additive_expression','anasin.py',330),
+  ('additive_expression -> additive_expression PLUS multiplicative_expression','additive_expression',3,'p_additive_expression','anasin.py',331),
+  ('additive_expression -> additive_expression MINUS multiplicative_expression','additive_expression',3,'p_additive_expression','anasin.py',332),
+  ('additive_expression -> additive_expression OR multiplicative_expression','additive_expression',3,'p_additive_expression','anasin.py',333),
+  ('additive_expression -> additive_expression ORELSE multiplicative_expression','additive_expression',3,'p_additive_expression','anasin.py',334),
+  ('multiplicative_expression -> factor','multiplicative_expression',1,'p_multiplicative_expression','anasin.py',344),
+  ('multiplicative_expression -> multiplicative_expression TIMES factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',345),
+  ('multiplicative_expression -> multiplicative_expression DIVIDE factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',346),
+  ('multiplicative_expression -> multiplicative_expression DIV factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',347),
+  ('multiplicative_expression -> multiplicative_expression MOD factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',348),
+  ('multiplicative_expression -> multiplicative_expression AND factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',349),
+  ('multiplicative_expression -> multiplicative_expression ANDTHEN factor','multiplicative_expression',3,'p_multiplicative_expression','anasin.py',350),
+  ('factor -> NUMBER','factor',1,'p_factor','anasin.py',360),
+  ('factor -> STRING','factor',1,'p_factor','anasin.py',361),
+  ('factor -> ID','factor',1,'p_factor','anasin.py',362),
+  ('factor -> TRUE','factor',1,'p_factor','anasin.py',363),
+  ('factor -> FALSE','factor',1,'p_factor','anasin.py',364),
+  ('factor -> LPAREN expression RPAREN','factor',3,'p_factor','anasin.py',365),
+  ('factor -> factor LBRACKET index_list RBRACKET','factor',4,'p_factor','anasin.py',366),
+  ('factor -> factor DOT ID','factor',3,'p_factor','anasin.py',367),
+  ('factor -> ID LPAREN expression_list RPAREN','factor',4,'p_factor','anasin.py',368),
+  ('factor -> MINUS factor','factor',2,'p_factor','anasin.py',369),
+  ('factor -> NOT factor','factor',2,'p_factor','anasin.py',370),
+  ('factor -> LBRACKET set_element_list RBRACKET','factor',3,'p_factor','anasin.py',371),
+  ('factor -> LBRACKET RBRACKET','factor',2,'p_factor','anasin.py',372),
+  ('set_element_list -> set_element_list COMMA set_element','set_element_list',3,'p_set_element_list','anasin.py',412),
+  ('set_element_list -> set_element','set_element_list',1,'p_set_element_list','anasin.py',413),
+  ('set_element -> expression','set_element',1,'p_set_element','anasin.py',423),
+  ('set_element -> expression DOTDOT expression','set_element',3,'p_set_element','anasin.py',424),
+  ('index_list -> index_list COMMA expression','index_list',3,'p_index_list','anasin.py',434),
+  ('index_list -> expression','index_list',1,'p_index_list','anasin.py',435),
+  ('expression_list -> expression_list COMMA expression','expression_list',3,'p_expression_list','anasin.py',443),
+  ('expression_list -> expression','expression_list',1,'p_expression_list','anasin.py',444),
+  ('expression_list -> empty','expression_list',1,'p_expression_list','anasin.py',445),
+  ('io_statement -> WRITE LPAREN expression_list RPAREN','io_statement',4,'p_io_statement','anasin.py',455),
+  ('io_statement -> WRITELN LPAREN expression_list RPAREN','io_statement',4,'p_io_statement','anasin.py',456),
+  ('io_statement -> READ LPAREN expression_list RPAREN','io_statement',4,'p_io_statement','anasin.py',457),
+  ('io_statement -> READLN LPAREN expression_list RPAREN','io_statement',4,'p_io_statement','anasin.py',458),
+  ('if_statement -> IF expression THEN statement ELSE statement','if_statement',6,'p_if_statement','anasin.py',463),
+  ('if_statement -> IF expression THEN statement','if_statement',4,'p_if_statement','anasin.py',464),
+  ('while_statement -> WHILE expression DO statement','while_statement',4,'p_while_statement','anasin.py',474),
+  ('repeat_statement -> REPEAT statement_list UNTIL expression','repeat_statement',4,'p_repeat_statement','anasin.py',479),
+  ('for_statement -> FOR ID ASSIGN expression TO expression DO statement','for_statement',8,'p_for_statement','anasin.py',485),
+  ('for_statement -> FOR ID ASSIGN expression DOWNTO expression DO statement','for_statement',8,'p_for_statement','anasin.py',486),
+  ('case_statement -> CASE expression OF case_element_list case_else END','case_statement',6,'p_case_statement','anasin.py',500),
+  ('case_element_list -> case_element_list SEMICOLON case_element','case_element_list',3,'p_case_element_list','anasin.py',505),
+  ('case_element_list -> case_element','case_element_list',1,'p_case_element_list','anasin.py',506),
+  ('case_element -> case_label_list COLON statement','case_element',3,'p_case_element','anasin.py',516),
+  ('case_label_list -> case_label_list COMMA case_label','case_label_list',3,'p_case_label_list','anasin.py',521),
+  ('case_label_list -> case_label','case_label_list',1,'p_case_label_list','anasin.py',522),
+  ('case_label -> expression','case_label',1,'p_case_label','anasin.py',532),
+  ('case_label -> expression DOTDOT expression','case_label',3,'p_case_label','anasin.py',533),
+  ('case_else -> ELSE statement_list','case_else',2,'p_case_else','anasin.py',543),
+  ('case_else -> SEMICOLON ELSE statement_list','case_else',3,'p_case_else','anasin.py',544),
+  ('case_else -> SEMICOLON','case_else',1,'p_case_else','anasin.py',545),
+  ('case_else -> empty','case_else',1,'p_case_else','anasin.py',546),
 ]
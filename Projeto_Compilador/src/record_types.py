@@ -0,0 +1,90 @@
+"""
+RECORD types and arrays of arrays, shared by the semantic check and the code generator.
+
+A record takes consecutive slots of the frame it is declared in, its fields in
+declaration order: a scalar field takes one slot, an array field one slot per
+element and a record field the slots of its own fields. Every field is then at
+an offset from the start of the record known at compile time, and an element
+of an array of records at (index - low) * record size from the start of the
+array. Arrays of arrays (ARRAY [a..b, c..d] OF T is one) are stored row after
+row the same way, an element of the outer array being a whole row.
+Variables, fields and array elements are described by the same attributes as
+a Symbol (sym_type, is_array, array_lower_bound, array_element_count,
+element_type, record_layout, element_layout and value_range); for an array,
+record_layout is the layout of its elements when they are records,
+element_layout the description of its elements when they are arrays and
+value_range the range of its elements when they are of a sized integer type.
+"""
+
+RECORD_TYPE = "RECORD"
+
+class FieldLayout:
+    def __init__(self, name, offset, sym_type, is_array=False, array_lower_bound=None,
+                 array_element_count=None, element_type=None, record_layout=None, element_layout=None,
+                 value_range=None):
+        """
+        A field of a record, or an element of an array.
+
+        :param name: The field name in lower case (None for an array element).
+        :param offset: Slots between the start of the record and the field.
+        :param sym_type: The type name, RECORD_TYPE for a record.
+        :param record_layout: The RecordLayout of a record field, or of the elements of an array field.
+        :param element_layout: The FieldLayout of the elements of an array field whose elements are arrays.
+        :param value_range: The (low, high) values of a BYTE, WORD, ... field, or of the elements of an array field.
+        """
+        self.name = name
+        self.offset = offset
+        self.sym_type = sym_type
+        self.is_array = is_array
+        self.array_lower_bound = array_lower_bound
+        self.array_element_count = array_element_count
+        self.element_type = element_type
+        self.record_layout = record_layout
+        self.element_layout = element_layout
+        self.value_range = value_range
+
+    def __repr__(self):
+        return (f"FieldLayout(name={self.name}, offset={self.offset}, sym_type={self.sym_type}, "
+                f"array_lower_bound={self.array_lower_bound}, array_element_count={self.array_element_count}, "
+                f"record_layout={self.record_layout}, element_layout={self.element_layout}, "
+                f"value_range={self.value_range})")
+
+class RecordLayout:
+    def __init__(self):
+        """The fields of a record type at their offsets, added in declaration order."""
+        self.fields = {} # lower-case name -> FieldLayout
+        self.size = 0    # slots taken by the whole record
+
+    def add_field(self, name, sym_type, **type_info):
+        """Places a field after the ones added so far and returns its FieldLayout."""
+        field = FieldLayout(name.lower(), self.size, sym_type, **type_info)
+        self.fields[field.name] = field
+        self.size += storage_size(field)
+        return field
+
+    def field(self, name):
+        return self.fields.get(name.lower())
+
+    def __repr__(self):
+        return f"RecordLayout(fields={list(self.fields.values())}, size={self.size})"
+
+def is_record(info):
+    return info.record_layout is not None and not info.is_array
+
+def element_size(info):
+    """Slots taken by each element of an array."""
+    if info.element_layout is not None:
+        return storage_size(info.element_layout)
+    return info.record_layout.size if info.record_layout is not None else 1
+
+def storage_size(info):
+    """Slots taken by a variable, field or element."""
+    if info.is_array:
+        return info.array_element_count * element_size(info)
+    return element_size(info)
+
+def array_element(info):
+    """The description of an element of an array, at offset 0 from the element."""
+    if info.element_layout is not None:
+        return info.element_layout
+    return FieldLayout(None, 0, info.element_type, record_layout=info.record_layout, value_range=info.value_range)
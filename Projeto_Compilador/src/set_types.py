@@ -0,0 +1,75 @@
+"""
+SET types, shared by the semantic check and the code generator.
+
+A set is packed into one VM integer: element v of a SET OF low..high is bit
+v - low, so a set holds at most MAX_SET_SIZE elements and its value is never
+negative. Types are named "SET OF <element type> <low>..<high>" with the
+ordinal numbers of the bounds; "SET OF <element type>" is the type of a set
+literal, which takes the range of the set it is used with, and "SET" the type
+of the empty set [].
+"""
+import re
+
+MAX_SET_SIZE = 31 # bits 0..30 of a 32-bit integer
+SET_TYPE_PATTERN = re.compile(r"SET(?: OF (\w+)(?: (-?\d+)\.\.(-?\d+))?)?$")
+
+def set_type_name(element_type=None, low=None, high=None):
+    if element_type is None:
+        return "SET"
+    if low is None:
+        return f"SET OF {element_type}"
+    return f"SET OF {element_type} {low}..{high}"
+
+def parse_set_type(type_name):
+    """(element type, low, high) of a set type name (None for the parts it leaves out), None if it is not a set type."""
+    match = SET_TYPE_PATTERN.match(type_name or "")
+    if match is None:
+        return None
+    element_type, low, high = match.groups()
+    if low is None:
+        return element_type, None, None
+    return element_type, int(low), int(high)
+
+def is_set_type(type_name):
+    return parse_set_type(type_name) is not None
+
+def common_set_type(left, right):
+    """The type of an operation on sets of types `left` and `right`, None if they can't be mixed."""
+    left_parts, right_parts = parse_set_type(left), parse_set_type(right)
+    if left_parts is None or right_parts is None:
+        return None
+    if left_parts[0] is None: # [] fits any set
+        return right
+    if right_parts[0] is None:
+        return left
+    if left_parts[0] != right_parts[0]:
+        return None
+    if left_parts[1] is None:
+        return right
+    if right_parts[1] is None or left_parts[1:] == right_parts[1:]:
+        return left
+    return None # the masks of different ranges don't line up
+
+def set_mask(values, low):
+    """The packed value of a set of ordinal numbers, with `low` as bit 0."""
+    mask = 0
+    for value in values:
+        mask |= 1 << (value - low)
+    return mask
+
+def bit_runs(mask):
+    """(first bit, number of bits) of every run of consecutive bits set in `mask`, lowest first."""
+    runs = []
+    bit = 0
+    while mask:
+        if mask & 1:
+            length = 0
+            while mask & 1:
+                mask >>= 1
+                length += 1
+            runs.append((bit, length))
+            bit += length
+        else:
+            mask >>= 1
+            bit += 1
+    return runs
@@ -0,0 +1,42 @@
+"""
+BYTE, WORD, SHORTINT, LONGINT, SINGLE and DOUBLE, shared by the semantic check and the code generator.
+
+The VM has a single integer type and a single real type, so these types are
+INTEGER or REAL for every type check and every instruction. What is left of
+them is the range of values of the integer ones, kept as the value_range of
+Symbols and FieldLayouts (of the elements, for an array): the semantic check
+rejects constants out of it, and the code generator checks the values stored
+into them when compiling with range checks.
+"""
+
+INTEGER_RANGES = {
+    "BYTE": (0, 255),
+    "SHORTINT": (-128, 127),
+    "WORD": (0, 65535),
+    "LONGINT": (-2147483648, 2147483647),
+}
+REAL_TYPES = ("SINGLE", "DOUBLE")
+
+def base_type(type_name):
+    """INTEGER or REAL for a sized type, the type itself for any other type."""
+    if not isinstance(type_name, str):
+        return type_name
+    if type_name.upper() in INTEGER_RANGES:
+        return "INTEGER"
+    if type_name.upper() in REAL_TYPES:
+        return "REAL"
+    return type_name
+
+def value_range(type_name):
+    """(low, high) of the values of a sized integer type, None for any other type."""
+    if not isinstance(type_name, str):
+        return None
+    return INTEGER_RANGES.get(type_name.upper())
+
+def declared_range(type_node):
+    """The value_range of a variable or field of a type (of its elements, for an array type)."""
+    return value_range(getattr(type_node, 'element_type', type_node))
+
+def format_range(value_range):
+    low, high = value_range
+    return f"{low}..{high}"
@@ -0,0 +1,458 @@
+"""
+Where things are in a Pascal source text.
+
+Built from the token list alone, so it still works while the program does not
+parse: the editor support (lsp_server.py) uses it to find the identifier under
+the cursor, its declaration and the routine a line belongs to.
+"""
+import bisect
+import re
+
+NUMBER_TEXT = re.compile(r'\d+(\.\d+)?')
+
+class LineIndex:
+    def __init__(self, text):
+        """
+        Converts between character offsets and (line, column) pairs.
+
+        :param text: The source text. Lines and columns are counted from 0.
+        """
+        self.line_starts = [0] + [match.end() for match in re.finditer(r'\n', text)]
+        self.length = len(text)
+
+    def position(self, offset):
+        line = bisect.bisect_right(self.line_starts, offset) - 1
+        return line, offset - self.line_starts[line]
+
+    def offset(self, line, column):
+        if line >= len(self.line_starts):
+            return self.length
+        return min(self.line_starts[line] + column, self.length)
+
+    def line_of(self, offset):
+        return bisect.bisect_right(self.line_starts, offset) - 1
+
+    def replace(self, text, start, end, new_end):
+        """Follows an edit of the text: what was between `start` and `end` is now `text[start:new_end]`."""
+        first = bisect.bisect_right(self.line_starts, start)
+        last = bisect.bisect_right(self.line_starts, end)
+        delta = new_end - end
+        inserted = [match.end() for match in re.finditer(r'\n', text[start:new_end])]
+        self.line_starts[first:] = [start + line_start for line_start in inserted] + \
+                                   [line_start + delta for line_start in self.line_starts[last:]]
+        self.length = len(text)
+        return len(inserted) - (last - first) # lines added
+
+class Declaration:
+    def __init__(self, name, kind, offset, end, type_text=None, scope=None, detail=None):
+        """
+        A name introduced by the program.
+
+        :param name: The name as written in the declaration.
+        :param kind: 'program', 'constant', 'variable', 'parameter', 'function' or 'procedure'.
+        :param offset: Offset of the name in the source.
+        :param end: Offset just after the name.
+        :param type_text: The declared type as written ('array[1..5] of integer'), None for procedures and constants.
+        :param scope: The Scope the name is declared in.
+        :param detail: Text shown on hover, the whole header for routines.
+        """
+        self.name = name
+        self.kind = kind
+        self.offset = offset
+        self.end = end
+        self.type_text = type_text
+        self.scope = scope
+        self.detail = detail
+
+    def __repr__(self):
+        return f"Declaration(name={self.name}, kind={self.kind}, type={self.type_text})"
+
+class Scope:
+    def __init__(self, name, kind, start, parent=None):
+        """
+        The main program or one routine, from its FUNCTION/PROCEDURE keyword to the ';' after its END.
+
+        :param name: Routine name (the program name for the main scope).
+        :param kind: 'program', 'function' or 'procedure'.
+        :param start: Offset where the scope starts.
+        :param parent: The enclosing Scope, None for the main program.
+        """
+        self.name = name
+        self.kind = kind
+        self.start = start
+        self.end = None          # offset just after the scope, set when its END is reached
+        self.body_start = None   # offset of the BEGIN of its statements
+        self.parent = parent
+        self.declarations = {}   # lowercase name -> Declaration
+        self.children = []       # nested routines, in source order
+        self.begin_depth = 0     # open BEGIN ... END pairs while scanning
+        if parent is not None:
+            parent.children.append(self)
+
+    def declare(self, declaration):
+        declaration.scope = self
+        self.declarations.setdefault(declaration.name.lower(), declaration) # the first declaration wins, like in anasem
+
+    def contains(self, offset):
+        return self.start <= offset < self.end
+
+    def shift(self, characters):
+        """Moves the scope, its declarations and its nested routines by a number of characters."""
+        self.start += characters
+        self.end += characters
+        if self.body_start is not None:
+            self.body_start += characters
+        for declaration in self.declarations.values():
+            declaration.offset += characters
+            declaration.end += characters
+        for child in self.children:
+            child.shift(characters)
+
+    def __repr__(self):
+        return f"Scope(name={self.name}, kind={self.kind}, start={self.start}, end={self.end})"
+
+# offset just after a token in the source
+def token_end(text, token):
+    if token.type == 'STRING' and text.startswith("'", token.lexpos):
+        return token.lexpos + len(token.value) + 2 # the lexer drops the quotes
+    if token.type == 'NUMBER':
+        return NUMBER_TEXT.match(text, token.lexpos).end()
+    if token.type in ('TRUE', 'FALSE'):
+        return token.lexpos + (4 if token.value else 5)
+    return token.lexpos + len(str(token.value))
+
+class SourceIndex:
+    def __init__(self, text, token_list):
+        """
+        Scopes and declarations of a source text.
+
+        :param text: The source text.
+        :param token_list: Its tokens, as returned by anasin.tokenize.
+        """
+        self.text = text
+        self.tokens = token_list
+        self.token_starts = [token.lexpos for token in token_list]
+        self.lines = LineIndex(text)
+        self.main = Scope(None, 'program', 0)
+        self.main.end = len(text)
+        self.pending = None # (position, characters, lines) not yet added to the tokens from that position on, see splice
+        IndexBuilder(text, token_list, self.main).build()
+
+    @property
+    def routines(self):
+        """The routines declared directly in the main program, in source order."""
+        return self.main.children
+
+    def token_at(self, offset):
+        """The token covering `offset` (or ending right at it), None between tokens."""
+        self.settle()
+        position = bisect.bisect_right(self.token_starts, offset) - 1
+        if position < 0:
+            return None
+        token = self.tokens[position]
+        if offset <= token_end(self.text, token):
+            return token
+        return None
+
+    def scope_at(self, offset):
+        scope = self.main
+        while True:
+            inner = next((child for child in scope.children if child.contains(offset)), None)
+            if inner is None:
+                return scope
+            scope = inner
+
+    def resolve(self, name, offset):
+        """The Declaration `name` refers to when used at `offset`, None if it is not declared."""
+        scope = self.scope_at(offset)
+        while scope is not None:
+            declaration = scope.declarations.get(name.lower())
+            if declaration is not None:
+                return declaration
+            scope = scope.parent
+        return None
+
+    def source(self, start, end):
+        """Source text between two offsets with every run of whitespace turned into one space."""
+        return source_text(self.text, start, end)
+
+    # --- Edits ---
+    # An edit inside one routine, or inside the statements of the main program, only changes
+    # the tokens and scopes of that part: they are lexed and scanned again on their own and put
+    # in place of the old ones. The tokens after the part only move, which is done when they
+    # are next looked at (settle), so that a run of edits in the same place does not move them
+    # every time.
+
+    def splice(self, text, start, end, token_list, next_token, begin_depth=0):
+        """
+        Follows an edit that replaced the text between `start` and `end` with `text[start:new_end]`.
+
+        :param text: The whole new text.
+        :param start: Offset where the replaced part starts (the text before it did not change).
+        :param end: Offset where it ended in the old text (the text after it did not change).
+        :param token_list: Tokens of the new text of the part, see anasin.tokenize_range.
+        :param next_token: The first token the lexer found after the part, None at the end of the text.
+        :param begin_depth: Open BEGINs of the main program where the part starts.
+        :return: False, leaving the index as it was, when the part does not fit in: the tokens
+                 after it are not the old ones, or it does not declare the same names and
+                 routines in the main program as before.
+        """
+        delta = len(text) - len(self.text)
+        new_end = end + delta
+        added_lines = text.count('\n', start, new_end) - self.text.count('\n', start, end)
+
+        first, last = self.token_range(start, end)
+        if self.pending is not None and (last != self.pending[0] or self.token_start(last) < end):
+            self.settle() # the tokens after the part would move by different amounts
+            first, last = self.token_range(start, end)
+        if not self.same_tokens_after(last, next_token, delta, added_lines):
+            return False
+
+        probe = Scope(None, 'program', start)
+        probe.begin_depth = begin_depth
+        builder = IndexBuilder(text, token_list, probe, end=new_end)
+        builder.build()
+        main = self.main
+        old_children = [child for child in main.children if start <= child.start < end]
+        old_names = {name for name, declaration in main.declarations.items() if start <= declaration.offset < end}
+        body_inside = main.body_start is not None and start <= main.body_start < end
+        if [(child.name.lower(), child.kind) for child in probe.children] != [(child.name.lower(), child.kind) for child in old_children] \
+                or set(probe.declarations) != old_names \
+                or (probe.body_start if body_inside else None) != (main.body_start if body_inside else None):
+            return False
+
+        for child in main.children:
+            if child.start >= end:
+                child.shift(delta)
+        for declaration in main.declarations.values():
+            if declaration.offset >= end:
+                declaration.offset += delta
+                declaration.end += delta
+        if main.body_start is not None and main.body_start >= end:
+            main.body_start += delta
+        position = main.children.index(old_children[0]) if old_children else 0
+        main.children[position:position + len(old_children)] = probe.children
+        for child in probe.children:
+            child.parent = main
+        for name in old_names:
+            declaration = main.declarations[name] = probe.declarations[name]
+            declaration.scope = main
+        main.end = len(text)
+
+        self.tokens[first:last] = token_list
+        self.token_starts[first:last] = [token.lexpos for token in token_list]
+        moved = first + len(token_list)
+        if self.pending is not None:
+            _, characters, lines = self.pending
+            self.pending = (moved, characters + delta, lines + added_lines)
+        elif delta or added_lines:
+            self.pending = (moved, delta, added_lines)
+        self.lines.replace(text, start, end, new_end)
+        self.text = text
+        return True
+
+    def token_range(self, start, end):
+        """Positions of the first token at or after `start` and of the first one at or after `end`."""
+        limit = self.pending[0] if self.pending is not None else len(self.tokens) # token_starts is right up to there
+        return bisect.bisect_left(self.token_starts, start, 0, limit), bisect.bisect_left(self.token_starts, end, 0, limit)
+
+    def same_tokens_after(self, position, next_token, characters, lines):
+        """True if the token at `position` is `next_token` moved by `characters` and `lines`."""
+        if position == len(self.tokens) or next_token is None:
+            return position == len(self.tokens) and next_token is None
+        token = self.tokens[position]
+        token_line = token.lineno + (self.pending[2] if self.pending is not None and position >= self.pending[0] else 0)
+        return (next_token.type == token.type and next_token.lexpos == self.token_start(position) + characters
+                and next_token.lineno == token_line + lines)
+
+    def token_start(self, position):
+        """Where the token at `position` starts now, the end of the text past the last token."""
+        if position == len(self.tokens):
+            return len(self.text)
+        if self.pending is not None and position >= self.pending[0]:
+            return self.token_starts[position] + self.pending[1]
+        return self.token_starts[position]
+
+    def settle(self):
+        """Moves the tokens left behind by the last edits to where they are now."""
+        if self.pending is None:
+            return
+        position, characters, lines = self.pending
+        moved = self.tokens[position:]
+        for token in moved:
+            token.lexpos += characters
+        if lines:
+            for token in moved:
+                token.lineno += lines
+        self.token_starts[position:] = [start + characters for start in self.token_starts[position:]]
+        self.pending = None
+
+# source text between two offsets with every run of whitespace turned into one space
+def source_text(text, start, end):
+    return " ".join(text[start:end].split())
+
+class IndexBuilder:
+    def __init__(self, text, token_list, scope, end=None):
+        """
+        Scans tokens for the scopes and declarations they hold.
+
+        :param text: The source text.
+        :param token_list: The tokens to scan, all of the text's or those of one part of it.
+        :param scope: Scope the tokens are in (the main program for the whole text).
+        :param end: Offset where scopes left open by the tokens end, the end of the text by default.
+        """
+        self.text = text
+        self.tokens = token_list
+        self.position = 0
+        self.scopes = [scope]
+        self.end = len(text) if end is None else end
+
+    def peek(self, ahead=0):
+        position = self.position + ahead
+        return self.tokens[position] if position < len(self.tokens) else None
+
+    def peek_type(self, ahead=0):
+        token = self.peek(ahead)
+        return token.type if token is not None else None
+
+    def end_of(self, token):
+        return token_end(self.text, token)
+
+    def declare(self, token, kind, type_text=None, detail=None):
+        declaration = Declaration(token.value, kind, token.lexpos, self.end_of(token), type_text, detail=detail)
+        self.scopes[-1].declare(declaration)
+        return declaration
+
+    def build(self):
+        while self.position < len(self.tokens):
+            token = self.peek()
+            scope = self.scopes[-1]
+            if token.type == 'PROGRAM' and self.peek_type(1) == 'ID':
+                self.scopes[0].name = self.peek(1).value
+                self.declare(self.peek(1), 'program', detail=f"program {self.peek(1).value}")
+                self.position += 2
+            elif token.type in ('FUNCTION', 'PROCEDURE') and self.peek_type(1) == 'ID':
+                self.routine(token)
+            elif token.type == 'VAR':
+                self.position += 1
+                self.variable_section()
+            elif token.type == 'CONST':
+                self.position += 1
+                self.constant_section()
+            elif token.type == 'BEGIN':
+                if scope.begin_depth == 0 and scope.body_start is None:
+                    scope.body_start = token.lexpos
+                scope.begin_depth += 1
+                self.position += 1
+            elif token.type in ('CASE', 'RECORD'): # closed by an END too
+                scope.begin_depth += 1
+                self.position += 1
+            elif token.type == 'END':
+                scope.begin_depth -= 1
+                self.position += 1
+                if scope.begin_depth <= 0 and scope is not self.scopes[0]:
+                    scope.end = self.end_of(token)
+                    if self.peek_type() == 'SEMICOLON':
+                        scope.end = self.end_of(self.peek())
+                        self.position += 1
+                    self.scopes.pop()
+            else:
+                self.position += 1
+        for scope in self.scopes[1:]: # routines left open by an unfinished edit run to the end of the text
+            scope.end = self.end
+
+    # FUNCTION/PROCEDURE name [(parameters)] [: type] ;
+    def routine(self, keyword):
+        name_token = self.peek(1)
+        kind = keyword.type.lower()
+        declaration = self.declare(name_token, kind)
+        scope = Scope(name_token.value, kind, keyword.lexpos, parent=self.scopes[-1])
+        self.scopes.append(scope)
+        self.position += 2
+        if self.peek_type() == 'LPAREN':
+            self.position += 1
+            self.parameter_sections()
+        if kind == 'function' and self.peek_type() == 'COLON':
+            self.position += 1
+            declaration.type_text = self.type_text(('SEMICOLON',))
+        header_end = self.end_of(self.tokens[self.position - 1])
+        declaration.detail = source_text(self.text, keyword.lexpos, header_end)
+        if self.peek_type() == 'SEMICOLON':
+            self.position += 1
+
+    def parameter_sections(self):
+        while self.peek() is not None:
+            by_reference = self.peek_type() == 'VAR'
+            if by_reference:
+                self.position += 1
+            names = self.id_list()
+            if self.peek_type() != 'COLON':
+                break
+            self.position += 1
+            type_text = self.type_text(('SEMICOLON', 'RPAREN'))
+            for name_token in names:
+                prefix = "var " if by_reference else ""
+                self.declare(name_token, 'parameter', type_text, detail=f"{prefix}{name_token.value}: {type_text}")
+            if self.peek_type() != 'SEMICOLON':
+                break
+            self.position += 1
+        if self.peek_type() == 'RPAREN':
+            self.position += 1
+
+    # VAR a, b: type; c: type; ...
+    def variable_section(self):
+        while self.peek_type() == 'ID':
+            names = self.id_list()
+            if self.peek_type() != 'COLON':
+                return
+            self.position += 1
+            type_text = self.type_text(('SEMICOLON',))
+            for name_token in names:
+                self.declare(name_token, 'variable', type_text, detail=f"var {name_token.value}: {type_text}")
+            if self.peek_type() != 'SEMICOLON':
+                return
+            self.position += 1
+
+    # CONST a = expression; b = expression; ...
+    def constant_section(self):
+        while self.peek_type() == 'ID' and self.peek_type(1) == 'EQUALS':
+            name_token = self.peek()
+            self.position += 2
+            value_text = self.type_text(('SEMICOLON',))
+            self.declare(name_token, 'constant', detail=f"const {name_token.value} = {value_text}")
+            if self.peek_type() != 'SEMICOLON':
+                return
+            self.position += 1
+
+    def id_list(self):
+        names = []
+        while self.peek_type() == 'ID':
+            names.append(self.peek())
+            self.position += 1
+            if self.peek_type() != 'COMMA':
+                break
+            self.position += 1
+        return names
+
+    # the type written from here to the first stop token outside brackets and parentheses
+    def type_text(self, stop_types):
+        first = self.peek()
+        last = None
+        nesting = 0
+        while self.peek() is not None:
+            token_type = self.peek_type()
+            if nesting == 0 and token_type in stop_types:
+                break
+            if token_type in ('BEGIN', 'CONST', 'VAR', 'FUNCTION', 'PROCEDURE'): # unfinished declaration
+                break
+            if token_type == 'END' and nesting == 0: # unfinished declaration
+                break
+            if token_type in ('LBRACKET', 'LPAREN', 'RECORD'):
+                nesting += 1
+            elif token_type in ('RBRACKET', 'RPAREN', 'END'):
+                nesting -= 1
+            last = self.peek()
+            self.position += 1
+        if last is None:
+            return ""
+        return source_text(self.text, first.lexpos, self.end_of(last))
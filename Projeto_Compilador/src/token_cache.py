@@ -0,0 +1,254 @@
+"""
+Binary token files: the lexer's output stored so later runs can skip lexing.
+
+A file holds the kinds of tokens used, an interned table of token values and,
+per token, one varint with its kind and how far it starts from the end of the
+previous token. A kind is a token type with its spelling when the type fixes
+the value (keywords, operators, TRUE), so only identifiers, numbers and strings
+store a value id. Tokens on a new line, or further away than one character,
+add their line delta and distance. Replaying it builds tokens directly, without
+running any of the lexer's regexes. Tokens get their type, value, lineno and
+lexpos back.
+
+The header records a digest of the source and one of analex.py, so a file
+is never replayed for a different text or after the lexer changed.
+
+    python token_cache.py save program.pas [-o program.ptok]
+    python token_cache.py show program.ptok
+"""
+import argparse
+import hashlib
+import os
+import sys
+
+import analex
+from binary_format import BinaryWriter, BinaryReader, FormatError
+
+MAGIC = b"PTOK"
+VERSION = 2
+DIGEST_SIZE = 20 # sha1
+
+VALUE_TYPES = ("ID", "NUMBER", "STRING") # the only token types whose value is not fixed by the spelling
+SAME_LINE, NEW_LINE = 2, 3 # position codes, 0 and 1 are a token 0 or 1 characters after the previous one
+
+_lexer_signature = None
+
+def lexer_signature():
+    """Digest of analex.py: token files written by another version of the lexer are not replayed."""
+    global _lexer_signature
+    if _lexer_signature is None:
+        with open(analex.__file__, 'rb') as f:
+            _lexer_signature = hashlib.sha1(f.read()).digest()
+    return _lexer_signature
+
+def source_digest(source_text):
+    return hashlib.sha1(source_text.encode('utf-8')).digest()
+
+class ReplayedToken:
+    __slots__ = ("type", "value", "lineno", "lexpos")
+
+    def __init__(self, type, value, lineno, lexpos):
+        """A token read from a token file, with the attributes of a PLY LexToken that the parser uses."""
+        self.type = type
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+
+    def __repr__(self):
+        return f"LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})"
+
+def token_length(token_type, value):
+    """
+    Length of a token's text as far as its type and value tell.
+
+    Only an estimate for numbers (007 is 7), positions are stored as the distance
+    from the end it gives, so the estimate only has to be the same on both sides.
+    """
+    if token_type == 'STRING':
+        return len(value) + 2 # the quotes
+    return len(str(value))
+
+def encode_tokens(source_text, token_list):
+    """The binary form of `token_list`, the tokens of `source_text` (as returned by anasin.tokenize)."""
+    # a kind is a token type with its value when the type fixes it (keywords keep their spelling), or alone
+    kind_keys = []
+    for token in token_list:
+        if token.type in VALUE_TYPES:
+            kind_keys.append((token.type,))
+        else:
+            kind_keys.append((token.type, type(token.value), token.value)) # keeps 1, 1.0 and True apart
+    kind_counts = {}
+    for key in kind_keys:
+        kind_counts[key] = kind_counts.get(key, 0) + 1
+    kind_ids = {key: i for i, key in enumerate(sorted(kind_counts, key=kind_counts.get, reverse=True))} # short ids for frequent kinds
+    value_ids = {key: {} for key in kind_ids if len(key) == 1} # per kind with values, value -> id
+    body = BinaryWriter()
+    body.varint(len(token_list))
+    previous_line = 1
+    previous_start = 0
+    previous_end = 0
+    for token, key in zip(token_list, kind_keys):
+        gap = token.lexpos - previous_end
+        line_delta = token.lineno - previous_line
+        if line_delta < 0 or token.lexpos < previous_start:
+            raise ValueError(f"Token {token.type} at line {token.lineno} is out of order")
+        header = kind_ids[key] << 2
+        if line_delta:
+            body.varint(header | NEW_LINE)
+            body.varint(line_delta)
+            body.signed(gap)
+        elif gap == 0 or gap == 1:
+            body.varint(header | gap)
+        else:
+            body.varint(header | SAME_LINE)
+            body.signed(gap)
+        if len(key) == 1:
+            ids = value_ids[key]
+            body.varint(ids.setdefault((type(token.value), token.value), len(ids)))
+        previous_line = token.lineno
+        previous_start = token.lexpos
+        previous_end = token.lexpos + token_length(token.type, token.value)
+
+    out = BinaryWriter()
+    out.bytes(MAGIC)
+    out.varint(VERSION)
+    out.bytes(source_digest(source_text))
+    out.bytes(lexer_signature())
+    out.varint(len(kind_ids))
+    for key in kind_ids:
+        out.string(key[0])
+        if len(key) > 1:
+            out.varint(0)
+            out.value(key[2])
+        else:
+            out.varint(1)
+            out.varint(len(value_ids[key]))
+            for _, value in value_ids[key]:
+                out.value(value)
+    out.bytes(body.getvalue())
+    return out.getvalue()
+
+def iter_tokens(data, source_text=None):
+    """
+    Replays the tokens stored in `data`, one at a time.
+    With `source_text`, raises FormatError if they were not lexed from that text.
+    """
+    reader = BinaryReader(data)
+    if reader.bytes(len(MAGIC)) != MAGIC:
+        raise FormatError("Not a token file")
+    version = reader.varint()
+    if version != VERSION:
+        raise FormatError(f"Token file version {version}, expected {VERSION}")
+    digest = reader.bytes(DIGEST_SIZE)
+    if source_text is not None and digest != source_digest(source_text):
+        raise FormatError("The token file was written for another source text")
+    if reader.bytes(DIGEST_SIZE) != lexer_signature():
+        raise FormatError("The token file was written by another version of the lexer")
+    kinds = [] # (type, has value ids, value or values, length or lengths)
+    for _ in range(reader.varint()):
+        token_type = reader.string()
+        if reader.varint():
+            values = [reader.value() for _ in range(reader.varint())]
+            kinds.append((token_type, True, values, [token_length(token_type, value) for value in values]))
+        else:
+            value = reader.value()
+            kinds.append((token_type, False, value, token_length(token_type, value)))
+
+    varint = reader.varint
+    signed = reader.signed
+    lineno = 1
+    end = 0
+    for _ in range(varint()):
+        header = varint()
+        token_type, has_value_id, value, length = kinds[header >> 2]
+        position = header & 3
+        if position == NEW_LINE:
+            lineno += varint()
+            lexpos = end + signed()
+        elif position == SAME_LINE:
+            lexpos = end + signed()
+        else:
+            lexpos = end + position
+        if has_value_id:
+            value_id = varint()
+            value = value[value_id]
+            length = length[value_id]
+        end = lexpos + length
+        yield ReplayedToken(token_type, value, lineno, lexpos)
+
+def decode_tokens(data, source_text=None):
+    return list(iter_tokens(data, source_text))
+
+def save_tokens(path, source_text, token_list):
+    with open(path, 'wb') as f:
+        f.write(encode_tokens(source_text, token_list))
+
+def load_tokens(path, source_text=None):
+    with open(path, 'rb') as f:
+        return decode_tokens(f.read(), source_text)
+
+class TokenCache:
+    def __init__(self, directory):
+        """
+        Token files of the sources compiled so far, one per distinct source text.
+
+        :param directory: Where the .ptok files are kept, created when needed.
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, source_text):
+        return os.path.join(self.directory, source_digest(source_text).hex() + ".ptok")
+
+    def tokenize(self, source_text):
+        """The tokens of `source_text`, replayed from the cache or lexed and then stored."""
+        from anasin import tokenize
+
+        path = self.path_for(source_text)
+        try:
+            token_list = load_tokens(path, source_text)
+            self.hits += 1
+            return token_list
+        except (OSError, FormatError): # not cached yet, or written by an older lexer
+            pass
+        self.misses += 1
+        token_list = tokenize(source_text)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            save_tokens(path, source_text, token_list)
+        except OSError as e:
+            print(f"Warning: could not write the token cache {path}: {e}", file=sys.stderr)
+        return token_list
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Writes or inspects binary token files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    save = commands.add_parser("save", help="lex a Pascal file and store its tokens")
+    save.add_argument("source", help="Pascal file")
+    save.add_argument("-o", "--output", help="token file (default: the source path with .ptok)")
+    show = commands.add_parser("show", help="print the tokens of a token file")
+    show.add_argument("tokens", help="token file")
+    args = parser.parse_args(argv)
+
+    if args.command == "save":
+        from anasin import tokenize
+        with open(args.source, 'r') as f:
+            source_text = f.read()
+        output = args.output or os.path.splitext(args.source)[0] + ".ptok"
+        token_list = tokenize(source_text)
+        save_tokens(output, source_text, token_list)
+        print(f"{len(token_list)} tokens, {len(source_text.encode('utf-8'))} source bytes -> {os.path.getsize(output)} bytes in {output}")
+        return 0
+
+    try:
+        token_list = load_tokens(args.tokens)
+    except (OSError, FormatError) as e:
+        print(f"Can't read {args.tokens}: {e}", file=sys.stderr)
+        return 1
+    for token in token_list:
+        print(f"{token.lineno:>6}:{token.lexpos:<8} {token.type:<10} {token.value!r}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
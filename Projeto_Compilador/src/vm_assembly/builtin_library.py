@@ -0,0 +1,123 @@
+"""
+The predefined routines registered by anasem.register_builtin_functions.
+
+Each Builtin knows how to evaluate a call at compile time when its arguments are
+constants, which instructions compute it at runtime and whether it is pure.
+"""
+import math
+from . import generation_context as ctx
+
+class Builtin:
+    def __init__(self, name, evaluate, lower, result_type, pure=True):
+        """
+        A predefined Pascal function.
+
+        :param name: Lowercase Pascal name.
+        :param evaluate: Computes the result from constant argument values, returns None if it can't.
+        :param lower: Emits the VM code, called with the argument types once the arguments are on the stack.
+        :param result_type: Gives the result type from the argument types.
+        :param pure: True if a call has no side effects and can never fail at runtime.
+        """
+        self.name = name
+        self.evaluate = evaluate
+        self.lower = lower
+        self.result_type = result_type
+        self.pure = pure
+
+BUILTINS = {}
+
+def register(builtin):
+    BUILTINS[builtin.name] = builtin
+    return builtin
+
+def lookup(name):
+    """The Builtin called `name` (any case), or None."""
+    return BUILTINS.get(name.lower())
+
+def is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def is_real(value):
+    return isinstance(value, float)
+
+# ABS and SQR keep the type of their argument
+def numeric_result(arg_types):
+    return 'REAL' if arg_types and arg_types[0] == 'REAL' else 'INTEGER'
+
+# Pascal UpCase/LowerCase only touch ASCII letters
+def ascii_upper(value):
+    return "".join(chr(ord(c) - 32) if 'a' <= c <= 'z' else c for c in value)
+
+def ascii_lower(value):
+    return "".join(chr(ord(c) + 32) if 'A' <= c <= 'Z' else c for c in value)
+
+# --- Lowerings (arguments are already on the stack) ---
+
+def lower_length(arg_types):
+    ctx.emit("STRLEN", "Length of string")
+
+def lower_case_conversion(arg_types):
+    raise ValueError("UpperCase/LowerCase need a constant argument: the VM can't build a string character by character.")
+
+def lower_abs(arg_types):
+    abs_end_label = ctx.new_label("absEnd")
+    if arg_types[0] == "INTEGER":
+        ctx.emit("DUP 1", "ABS - Check if is negative"); ctx.emit("PUSHI 0"); ctx.emit("INF") # val, (val < 0)
+        ctx.emit(f"JZ {abs_end_label}", "If not (val < 0), jump to end")
+        ctx.emit("PUSHI 0", "Making negative"); ctx.emit("SWAP"); ctx.emit("SUB") # Negate
+    elif arg_types[0] == "REAL":
+        ctx.emit("DUP 1", "ABS - Check if is negative"); ctx.emit("PUSHF 0.0"); ctx.emit("FINF")
+        ctx.emit(f"JZ {abs_end_label}", "If not (val < 0), jump to end")
+        ctx.emit("PUSHF 0.0", "Making negative"); ctx.emit("SWAP"); ctx.emit("FSUB")
+    else:
+        raise TypeError(f"Unsupported type {arg_types[0]} for ABS.")
+    ctx.emit_label(abs_end_label)
+
+def lower_sqr(arg_types):
+    ctx.emit("DUP 1")
+    if arg_types[0] == "INTEGER": ctx.emit("MUL")
+    elif arg_types[0] == "REAL": ctx.emit("FMUL")
+    else: raise TypeError(f"Unsupported type {arg_types[0]} for SQR.")
+
+def lower_sqrt(arg_types):
+    # The VM has no square root instruction: Newton's method, starting at (x+1)/2 >= sqrt(x)
+    # the estimates only decrease, so the loop stops as soon as one does not.
+    if arg_types[0] == "INTEGER":
+        ctx.emit("ITOF", "SQRT works on reals")
+    x_offset = ctx.current_scope.get_local_var_offset()
+    y_offset = ctx.current_scope.get_local_var_offset()
+    loop_label = ctx.new_label("sqrtLoop")
+    exit_label = ctx.new_label("sqrtExit")
+    end_label = ctx.new_label("sqrtEnd")
+    ctx.emit(f"STOREL {x_offset}", "SQRT argument")
+    ctx.emit("PUSHF 0.0"); ctx.emit(f"STOREL {y_offset}", "SQRT of x <= 0 is 0")
+    ctx.emit(f"PUSHL {x_offset}"); ctx.emit("PUSHF 0.0"); ctx.emit("FSUP")
+    ctx.emit(f"JZ {end_label}")
+    ctx.emit(f"PUSHL {x_offset}"); ctx.emit("PUSHF 1.0"); ctx.emit("FADD"); ctx.emit("PUSHF 2.0"); ctx.emit("FDIV")
+    ctx.emit(f"STOREL {y_offset}", "First estimate (x+1)/2")
+    ctx.emit_label(loop_label)
+    ctx.emit(f"PUSHL {y_offset}"); ctx.emit(f"PUSHL {x_offset}"); ctx.emit(f"PUSHL {y_offset}"); ctx.emit("FDIV")
+    ctx.emit("FADD"); ctx.emit("PUSHF 2.0"); ctx.emit("FDIV", "Next estimate (y + x/y)/2")
+    ctx.emit("DUP 1"); ctx.emit(f"PUSHL {y_offset}"); ctx.emit("FINF")
+    ctx.emit(f"JZ {exit_label}", "Stop when the estimate no longer decreases")
+    ctx.emit(f"STOREL {y_offset}")
+    ctx.emit(f"JUMP {loop_label}")
+    ctx.emit_label(exit_label)
+    ctx.emit("POP 1", "Drop the last estimate")
+    ctx.emit_label(end_label)
+    ctx.emit(f"PUSHL {y_offset}", "SQRT result")
+
+def lower_pred(arg_types):
+    ctx.emit("PUSHI 1"); ctx.emit("SUB", "Pred")
+
+def lower_succ(arg_types):
+    ctx.emit("PUSHI 1"); ctx.emit("ADD", "Succ")
+
+register(Builtin("length", lambda s: len(s) if isinstance(s, str) else None, lower_length, lambda types: 'INTEGER'))
+register(Builtin("uppercase", lambda s: ascii_upper(s) if isinstance(s, str) else None, lower_case_conversion, lambda types: 'STRING'))
+register(Builtin("lowercase", lambda s: ascii_lower(s) if isinstance(s, str) else None, lower_case_conversion, lambda types: 'STRING'))
+register(Builtin("abs", lambda x: abs(x) if is_integer(x) or is_real(x) else None, lower_abs, numeric_result))
+register(Builtin("sqr", lambda x: x * x if is_integer(x) or is_real(x) else None, lower_sqr, numeric_result))
+register(Builtin("sqrt", lambda x: math.sqrt(x) if (is_integer(x) or is_real(x)) and x >= 0 else None, lower_sqrt, lambda types: 'REAL'))
+register(Builtin("pred", lambda x: x - 1 if is_integer(x) else None, lower_pred, lambda types: 'INTEGER'))
+register(Builtin("succ", lambda x: x + 1 if is_integer(x) else None, lower_succ, lambda types: 'INTEGER'))
@@ -0,0 +1,204 @@
+"""
+Reuse of the VM code of routines that did not change since an earlier compile.
+
+A routine's code only depends on its own subtree and on the global symbols it
+names (variables, and the signatures of the routines it calls). Both go into a
+fingerprint; when a FragmentCache already holds a fragment for it, the visitors'
+output is replayed instead of visiting the routine again. Labels are stored by
+prefix and taken again from new_label() on replay, so they get the numbers a
+full compile would give them and the output is identical.
+
+Fragments hold the visitors' output, before the optimization passes. Lexing,
+parsing, the semantic check and the optimization passes still run over the
+whole program, so only code generation gets faster, a small part of a compile.
+"""
+import copy
+import hashlib
+import os
+import pickle
+
+import ast_nodes
+from . import generation_context as ctx
+from .ir import Instruction, Label, Frame
+
+CACHE_FORMAT = 1 # stored with the cache file, bump when Fragment changes
+POSITION_FIELDS = ('lineno', 'start', 'end') # node attributes left out of fingerprints
+
+class Fragment:
+    def __init__(self, items, label_prefixes, first_label, external_labels, frames, symbols):
+        """
+        The visitors' output for one routine.
+
+        :param items: ('label', name) or ('instr', opcode, operand, comment) tuples.
+        :param label_prefixes: Prefix of every label the routine generated, in order.
+        :param first_label: Number of the first of those labels when the fragment was recorded.
+        :param external_labels: Label -> routine name, for labels of routines declared before this one.
+        :param frames: (name, index of the PUSHN in items or None, size, pinned slots) per stack frame.
+        :param symbols: Symbols the routine defined in the enclosing scope (its own).
+        """
+        self.items = items
+        self.label_prefixes = label_prefixes
+        self.first_label = first_label
+        self.external_labels = external_labels
+        self.frames = frames
+        self.symbols = symbols
+
+    def old_label(self, position):
+        return f"{self.label_prefixes[position]}{self.first_label + position}"
+
+    def replay(self):
+        """Appends the fragment to ctx.code with labels renumbered for the current compile."""
+        renamed = {self.old_label(position): ctx.new_label(prefix) for position, prefix in enumerate(self.label_prefixes)}
+        for label, routine_name in self.external_labels.items():
+            routine = ctx.current_scope.resolve(routine_name)
+            renamed[label] = routine.address_or_offset
+
+        for symbol in self.symbols:
+            symbol = copy.copy(symbol)
+            symbol.address_or_offset = renamed.get(symbol.address_or_offset, symbol.address_or_offset)
+            ctx.current_scope.define(symbol)
+
+        emitted = []
+        for item in self.items:
+            if item[0] == 'label':
+                emitted.append(Label(renamed.get(item[1], item[1])))
+            else:
+                _, opcode, operand, comment = item
+                instruction = Instruction(opcode, operand, comment)
+                if instruction.label_operand is not None:
+                    instruction.operand = renamed.get(operand, operand)
+                emitted.append(instruction)
+        ctx.code.extend(emitted)
+
+        for name, reserve_index, size, pinned in self.frames:
+            if reserve_index is not None:
+                frame = Frame(name, emitted[reserve_index], parent=ctx.current_frame)
+            else: # the routine needed no frame, its PUSHN was dropped
+                frame = Frame(name, Instruction("PUSHN", "0", f"Reserve stack frame of {name}"), parent=ctx.current_frame)
+            frame.size = frame.original_size = size
+            frame.pinned = set(pinned)
+            ctx.frames.append(frame)
+
+class FragmentCache:
+    def __init__(self, limit=10000):
+        """
+        Fragments by fingerprint, kept across compiles (in memory, or in a file with load/save).
+
+        :param limit: Number of fragments kept, the least recently used ones are dropped first.
+        """
+        self.fragments = {} # in least recently used order
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+
+    def reset_counters(self):
+        self.hits = self.misses = 0
+
+    @classmethod
+    def load(cls, path, limit=10000):
+        """The cache stored at `path`, or an empty one if there is none or it is from another version."""
+        cache = cls(limit)
+        try:
+            with open(path, 'rb') as f:
+                stored = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return cache
+        if isinstance(stored, dict) and stored.get("format") == CACHE_FORMAT:
+            cache.fragments = stored["fragments"]
+        return cache
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump({"format": CACHE_FORMAT, "fragments": self.fragments}, f)
+
+    def emit_routine(self, node, visit):
+        """Generates a top-level routine with `visit`, or replays its fragment from an earlier compile."""
+        names = set()
+        key = routine_fingerprint(node, ctx.current_scope, names)
+        fragment = self.fragments.pop(key, None)
+        if fragment is not None:
+            self.hits += 1
+            self.fragments[key] = fragment # now the most recently used
+            fragment.replay()
+            return
+        self.misses += 1
+        code_start = len(ctx.code)
+        label_start = ctx.label_count
+        frame_start = len(ctx.frames)
+        symbols_before = len(ctx.current_scope.symbols)
+        visit(node)
+        self.fragments[key] = record_fragment(code_start, label_start, frame_start, symbols_before, names)
+        while len(self.fragments) > self.limit:
+            del self.fragments[next(iter(self.fragments))]
+
+# `names` are the names the routine uses, the routines among them may be called
+def record_fragment(code_start, label_start, frame_start, symbols_before, names):
+    code = ctx.code[code_start:]
+    own_labels = {f"{prefix}{label_start + position}" for position, prefix in enumerate(ctx.label_prefixes[label_start:])}
+    routine_names = {}
+    for name in names:
+        symbol = ctx.current_scope.resolve(name)
+        if symbol is not None and symbol.kind in ('function', 'procedure'):
+            routine_names[symbol.address_or_offset] = name
+    items = []
+    external_labels = {}
+    for item in code:
+        if isinstance(item, Label):
+            items.append(('label', item.name))
+            continue
+        items.append(('instr', item.opcode, item.operand, item.comment))
+        label = item.label_operand
+        if label is not None and label not in own_labels and label in routine_names:
+            external_labels[label] = routine_names[label]
+    frames = []
+    for frame in ctx.frames[frame_start:]:
+        reserve_index = next((i for i, item in enumerate(code) if item is frame.reserve_instruction), None)
+        frames.append((frame.name, reserve_index, frame.original_size, sorted(frame.pinned)))
+    symbols = [copy.copy(symbol) for symbol in list(ctx.current_scope.symbols.values())[symbols_before:]]
+    return Fragment(items, list(ctx.label_prefixes[label_start:]), label_start, external_labels, frames, symbols)
+
+# --- Fingerprints ---
+
+def routine_fingerprint(node, scope, names):
+    """Hash of a routine's subtree and of what the global names it uses mean in `scope`, adds those names to `names`."""
+    parts = []
+    flatten_tree(node, parts, names)
+    for name in sorted(names):
+        parts.append(f"{name}={symbol_signature(scope.resolve(name))}")
+    parts.append(f"set powers at {ctx.set_powers_offset}") # SET code reads the table of powers of two
+    parts.append(f"range checks {ctx.range_checks}")
+    return hashlib.sha1("\0".join(parts).encode()).hexdigest()
+
+# appends a text form of the subtree to `parts` (one pass, hashed at once) and the names it uses to `names`
+def flatten_tree(node, parts, names):
+    node_type = type(node)
+    parts.append(node_type.__name__)
+    if node_type is ast_nodes.Identifier or node_type is ast_nodes.FunctionCall:
+        names.add(node.name)
+    for field, child in node.__dict__.items(): # fields keep the order of __init__
+        if field in POSITION_FIELDS: # moving a routine does not change its code
+            continue
+        if isinstance(child, ast_nodes.ASTNode):
+            flatten_tree(child, parts, names)
+        elif isinstance(child, (list, tuple)):
+            parts.append("[")
+            for item in child:
+                if isinstance(item, ast_nodes.ASTNode):
+                    flatten_tree(item, parts, names)
+                else:
+                    parts.append(repr(item))
+            parts.append("]")
+        else:
+            parts.append(repr(child))
+    parts.append(")")
+
+# what generated code can depend on, without the label of routines (renumbered on replay)
+def symbol_signature(symbol):
+    if symbol is None:
+        return None
+    parameters = [(parameter.sym_type, parameter.is_var_param) for parameter in symbol.params_info]
+    address = None if symbol.kind in ('function', 'procedure') else symbol.address_or_offset
+    return (symbol.kind, symbol.sym_type, address, symbol.scope_level, symbol.is_array, symbol.array_lower_bound,
+            symbol.array_element_count, symbol.element_type, repr(symbol.record_layout), repr(symbol.element_layout),
+            symbol.value_range, symbol.return_type, symbol.is_var_param, parameters)
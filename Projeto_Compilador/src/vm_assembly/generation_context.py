@@ -1,16 +1,42 @@
 from anasem import SymbolTable
+from .ir import Instruction, Label, Frame
 
 # --- Global-like state for code generation ---
-code = []  # List to hold generated VM code
+code = []  # List of generated Instruction / Label objects (see ir.py)
 label_count = 0  # Counter for unique label generation
+label_prefixes = []  # Prefix of every label generated so far, in order (label i is f"{label_prefixes[i]}{i}")
 current_scope = None # Initialized by the main generator
 globals_handled_pre_start = set()  # To track globals processed before START
 temp_var_count = 0 # Counter for temporary variable offsets (though new_temp_var_offset uses scope)
+hoisted_expressions = {}  # id(expression node) -> temp offset holding its value (loop invariants)
+hoisted_array_bases = {}  # array Symbol -> temp offset holding base address minus lower bound
+expression_types = {}  # id(expression node) -> (node, type) of the expressions typed so far (see type_helpers.determine_expression_type)
+frames = []  # Stack frames of every routine generated so far (see ir.Frame)
+current_frame = None # Frame of the routine being generated
+fragment_cache = None # FragmentCache reused for unchanged routines, None to generate everything
+set_powers_offset = None # gp offset of the table of powers of two used by SET operations, None if the program has no sets
+write_instructions_saved = 0 # PUSHS/WRITES pairs not emitted because constant output was written in one piece, times 2
+range_checks = False # emit CHECK instructions for array indexes and values stored into BYTE, WORD, ... variables
+known_ranges = {}  # FOR control variable Symbol -> (low, high) of its values while the body of its loop is generated
+range_checks_emitted = 0 # CHECK instructions emitted for range checks
+range_checks_eliminated = 0 # range checks left out because the value was proved to be in range
 
 def reset_context():
     """Resets all shared generation state."""
-    global code, label_count, current_scope, globals_handled_pre_start, temp_var_count
+    global code, label_count, current_scope, globals_handled_pre_start, temp_var_count, current_frame, set_powers_offset, write_instructions_saved
+    global range_checks_emitted, range_checks_eliminated
     code.clear()
+    frames.clear()
+    label_prefixes.clear()
+    current_frame = None
+    set_powers_offset = None
+    write_instructions_saved = 0
+    range_checks_emitted = 0
+    range_checks_eliminated = 0
+    known_ranges.clear()
+    hoisted_expressions.clear()
+    hoisted_array_bases.clear()
+    expression_types.clear()
     label_count = 0
     current_scope = None # Will be re-initialized by the main generator
     globals_handled_pre_start.clear()
@@ -20,21 +46,38 @@ def reset_context():
 def emit(instruction, comment=None):
     """Emits a VM instruction with an optional comment."""
     global code
-    indent = "    "
-    if comment:
-        code.append(f"{indent}{instruction} // {comment}")
-    else:
-        code.append(f"{indent}{instruction}")
+    code.append(Instruction.from_text(instruction, comment))
 
 def emit_label(label):
     """Emits a label for jumps."""
     global code
-    code.append(f"{label}:")
+    code.append(Label(label))
+
+def open_frame(name):
+    """Emits the prologue PUSHN of a new stack frame, its size is patched by close_frame()."""
+    global current_frame
+    frame = Frame(name, Instruction("PUSHN", "0", f"Reserve stack frame of {name}"), parent=current_frame)
+    code.append(frame.reserve_instruction)
+    frames.append(frame)
+    current_frame = frame
+    return frame
+
+def close_frame():
+    """Sizes the current frame from the slots the current scope handed out (locals and temps)."""
+    global current_frame
+    frame = current_frame
+    frame.size = frame.original_size = current_scope.current_local_offset
+    frame.reserve_instruction.operand = str(frame.size)
+    if frame.size == 0: # nothing to reserve
+        code.remove(frame.reserve_instruction)
+    current_frame = frame.parent
+    return frame
 
 def new_label(prefix="L"):
     """Generates a new unique label."""
     global label_count
     label_count += 1
+    label_prefixes.append(prefix)
     return f"{prefix}{label_count - 1}"
 
 def push_scope(scope_name="local"):
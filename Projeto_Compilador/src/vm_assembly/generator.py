@@ -21,13 +21,49 @@ def reset_and_initialize_generator_state():
     
     ctx.current_scope = main_global_scope # Set the active scope in the context
 
-def generate(node: ast_nodes.ASTNode):
+from .ir import build_cfg
+from .passes import default_pass_manager
+
+last_pass_manager = None # Pass manager of the last generate() call, holds the per-pass timings
+last_frames = [] # Stack frames of the last generate() call, with their sizes before/after slot sharing
+last_write_instructions_saved = 0 # Instructions the last generate() call saved by writing constant output in one piece
+last_range_checks = (0, 0) # Range checks the last generate() call emitted and left out as redundant
+
+def generate(node: ast_nodes.ASTNode, optimize=True, fragment_cache=None, range_checks=False):
     """
     Generates VM code for the given AST node.
+    The visitors' output is split into basic blocks, optimized and only then turned into text lines.
+    With a FragmentCache, routines that did not change since an earlier compile are not visited again.
+    With range_checks, array indexes and values stored into BYTE, WORD, ... variables are checked at run time.
     """
+    global last_pass_manager
+    cfg = generate_cfg(node, fragment_cache, range_checks)
+    if optimize:
+        optimize_cfg(cfg)
+    else:
+        last_pass_manager = None
+    return cfg.to_lines()
+
+def generate_cfg(node: ast_nodes.ASTNode, fragment_cache=None, range_checks=False):
+    """Runs the AST visitors and splits their output into basic blocks (no optimization)."""
+    global last_frames, last_write_instructions_saved, last_range_checks
     reset_and_initialize_generator_state()
+    ctx.fragment_cache = fragment_cache
+    if fragment_cache is not None:
+        fragment_cache.reset_counters() # hits and misses are per compile, the fragments stay
+    ctx.range_checks = range_checks
     
     # Start visiting from the root node
     node_visitors.visit(node)
-    
-    return list(ctx.code) # Return a copy of the generated code
\ No newline at end of file
+
+    last_frames = list(ctx.frames)
+    last_write_instructions_saved = ctx.write_instructions_saved
+    last_range_checks = (ctx.range_checks_emitted, ctx.range_checks_eliminated)
+    return build_cfg(ctx.code, last_frames)
+
+def optimize_cfg(cfg):
+    """Runs the default optimization passes over a graph built by generate_cfg()."""
+    global last_pass_manager
+    last_pass_manager = default_pass_manager()
+    last_pass_manager.run(cfg)
+    return cfg
\ No newline at end of file
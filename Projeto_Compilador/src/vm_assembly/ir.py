@@ -0,0 +1,214 @@
+"""
+Intermediate representation between the AST visitors and the .vm text.
+
+The visitors emit Instruction and Label objects into generation_context.code.
+build_cfg() splits that stream into basic blocks with explicit successor edges,
+optimization passes work on the blocks, and to_lines() serializes the result.
+"""
+
+JUMP_OPCODES = {"JUMP", "JZ"}               # instructions whose operand is a jump target
+LABEL_OPERAND_OPCODES = {"JUMP", "JZ", "PUSHA"} # instructions whose operand is a label
+TERMINATOR_OPCODES = {"JUMP", "STOP", "RETURN"} # instructions after which control never falls through
+
+class Instruction:
+    def __init__(self, opcode, operand=None, comment=None):
+        """
+        A single VM instruction.
+
+        :param opcode: The VM opcode (e.g. 'PUSHI'), or None for a comment-only line.
+        :param operand: The operand text (integer, string literal or label), if any.
+        :param comment: Optional comment written after the instruction.
+        """
+        self.opcode = opcode
+        self.operand = operand
+        self.comment = comment
+
+    @classmethod
+    def from_text(cls, text, comment=None):
+        """Builds an instruction from the text form used by emit ('PUSHI 0', '// note', ...)."""
+        text = text.strip()
+        if text.startswith("//"): # comment-only line
+            return cls(None, None, text[2:].strip() + (f" {comment}" if comment else ""))
+        opcode, _, operand = text.partition(" ")
+        return cls(opcode.upper(), operand.strip() or None, comment or None)
+
+    @property
+    def is_note(self):
+        return self.opcode is None
+
+    @property
+    def is_jump(self):
+        return self.opcode in JUMP_OPCODES
+
+    @property
+    def is_terminator(self):
+        return self.opcode in TERMINATOR_OPCODES
+
+    @property
+    def label_operand(self):
+        return self.operand if self.opcode in LABEL_OPERAND_OPCODES else None
+
+    def to_text(self):
+        indent = "    "
+        if self.is_note:
+            return f"{indent}// {self.comment}"
+        text = self.opcode if self.operand is None else f"{self.opcode} {self.operand}"
+        if self.comment:
+            return f"{indent}{text} // {self.comment}"
+        return f"{indent}{text}"
+
+    def __repr__(self):
+        return f"Instruction({self.opcode!r}, {self.operand!r})"
+
+class Label:
+    def __init__(self, name):
+        """A jump target in the emitted instruction stream."""
+        self.name = name
+
+    def to_text(self):
+        return f"{self.name}:"
+
+    def __repr__(self):
+        return f"Label({self.name!r})"
+
+class Frame:
+    def __init__(self, name, reserve_instruction, parent=None):
+        """
+        The stack frame of a routine (or of the main program body).
+
+        :param name: Display name used in reports.
+        :param reserve_instruction: The PUSHN in the prologue that allocates the frame,
+                                    patched once the size is known.
+        :param parent: The frame that was open when this one started.
+        """
+        self.name = name
+        self.reserve_instruction = reserve_instruction
+        self.parent = parent
+        self.size = 0               # slots reserved at FP+0 .. FP+size-1
+        self.original_size = 0      # size before slot sharing
+        self.pinned = set()         # slots whose address is taken (arrays, VAR arguments), never moved
+
+    def pin(self, offset, count=1):
+        self.pinned.update(range(offset, offset + count))
+
+    def __repr__(self):
+        return f"Frame({self.name!r}, size={self.size})"
+
+class BasicBlock:
+    def __init__(self, labels=None, instructions=None):
+        """A straight-line sequence of instructions with a single entry and explicit successors."""
+        self.labels = labels or []
+        self.instructions = instructions or []
+        self.successors = []        # blocks control can flow to, jump target first
+        self.fallthrough = None     # the block that must follow this one in the layout, if any
+
+    @property
+    def real_instructions(self):
+        return [instr for instr in self.instructions if not instr.is_note]
+
+    @property
+    def last_instruction(self):
+        real = self.real_instructions
+        return real[-1] if real else None
+
+    @property
+    def first_instruction(self):
+        real = self.real_instructions
+        return real[0] if real else None
+
+    def __repr__(self):
+        return f"BasicBlock(labels={self.labels}, size={len(self.instructions)})"
+
+class ControlFlowGraph:
+    def __init__(self, blocks, frames=None, frame_entries=None):
+        """
+        The basic blocks of a program, in layout order (blocks[0] is the entry).
+
+        :param frames: Stack frames of the routines, see Frame.
+        :param frame_entries: Frame -> the block holding its reserve instruction, see build_cfg.
+        """
+        self.blocks = blocks
+        self.frames = frames or []
+        self.frame_entries = frame_entries or {}
+        self.link()
+
+    def block_for_label(self, label):
+        return self.block_by_label.get(label)
+
+    def link(self):
+        """Recomputes the label index and the successor / fallthrough edges of every block."""
+        self.block_by_label = {}
+        self.block_set = set(self.blocks)
+        for block in self.blocks:
+            for label in block.labels:
+                self.block_by_label[label] = block
+        for i, block in enumerate(self.blocks):
+            next_block = self.blocks[i + 1] if i + 1 < len(self.blocks) else None
+            last = block.last_instruction
+            block.successors = []
+            block.fallthrough = None
+            if last is not None and last.is_jump:
+                target = self.block_by_label.get(last.operand)
+                if target is not None:
+                    block.successors.append(target)
+            if last is None or not last.is_terminator:
+                block.fallthrough = next_block
+                if next_block is not None and next_block not in block.successors:
+                    block.successors.append(next_block)
+
+    def address_taken_blocks(self):
+        """Blocks whose label is pushed with PUSHA (routine entry points)."""
+        taken = []
+        for block in self.blocks:
+            for instr in block.instructions:
+                if instr.opcode == "PUSHA":
+                    target = self.block_by_label.get(instr.operand)
+                    if target is not None and target not in taken:
+                        taken.append(target)
+        return taken
+
+    def frame_entry(self, frame):
+        """The block holding the reserve instruction of a frame, None if it was dropped."""
+        block = self.frame_entries.get(frame)
+        return block if block in self.block_set else None
+
+    def referenced_labels(self):
+        return {instr.label_operand for block in self.blocks for instr in block.instructions if instr.label_operand}
+
+    def instruction_count(self):
+        return sum(len(block.real_instructions) for block in self.blocks)
+
+    def to_lines(self):
+        """Serializes the graph to .vm text lines, dropping labels nothing refers to."""
+        referenced = self.referenced_labels()
+        lines = []
+        for block in self.blocks:
+            for label in block.labels:
+                if label in referenced:
+                    lines.append(f"{label}:")
+            for instr in block.instructions:
+                lines.append(instr.to_text())
+        return lines
+
+def build_cfg(code, frames=None):
+    """Splits a list of Instruction/Label objects into basic blocks."""
+    frame_of = {id(frame.reserve_instruction): frame for frame in frames or []}
+    frame_entries = {}
+    blocks = []
+    current = BasicBlock()
+    for item in code:
+        if isinstance(item, Label):
+            if current.real_instructions: # a label starts a new block
+                blocks.append(current)
+                current = BasicBlock()
+            current.labels.append(item.name)
+            continue
+        current.instructions.append(item)
+        if id(item) in frame_of:
+            frame_entries[frame_of[id(item)]] = current
+        if item.is_jump or item.is_terminator: # a jump ends the block
+            blocks.append(current)
+            current = BasicBlock()
+    if current.labels or current.instructions:
+        blocks.append(current)
+    return ControlFlowGraph(blocks, frames, frame_entries)
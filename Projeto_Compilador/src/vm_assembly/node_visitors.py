@@ -1,8 +1,14 @@
 import ast_nodes
-from anasem import Symbol # SymbolTable is not directly used here, but Symbol is
+from anasem import Symbol, designator_text # SymbolTable is not directly used here, but Symbol is
 # MODIFIED: Use relative import for generation_context
 from . import generation_context as ctx # Alias for brevity
 from . import type_helpers as th
+from . import builtin_library
+from optimizer import loop_invariants as li
+from optimizer import range_analysis as ra
+from optimizer.constant_eval import evaluate_constant, value_type, ordinal_value
+from set_types import MAX_SET_SIZE, parse_set_type, is_set_type, set_mask, bit_runs
+from sized_types import declared_range
 
 # Visitor dispatcher
 _visitors = {}
@@ -10,6 +16,10 @@ _visitors = {}
 def visit(node):
     if node is None:
         return
+    hoisted_offset = ctx.hoisted_expressions.get(id(node))
+    if hoisted_offset is not None: # loop invariant already computed before the loop
+        ctx.emit(f"PUSHL {hoisted_offset}", "Load hoisted loop invariant")
+        return
     method_name = f'visit_{type(node).__name__}'
     visitor = _visitors.get(method_name, generic_visit)
     return visitor(node)
@@ -32,22 +42,152 @@ def register_visitor(node_type_name):
         return func
     return decorator
 
-# Generates a new temporary variable offset
+def is_global_scope():
+    return ctx.current_scope.parent is None or ctx.current_scope.parent.scope_name == "global_init_phase"
+
+# Generates a new temporary variable offset (the slot is reserved by the frame prologue)
 def new_temp_var_offset():
-    offset = ctx.current_scope.get_local_var_offset()
-    ctx.emit(f"PUSHI 0", f"Allocate temp var at FP+{offset}")
-    return offset
+    return ctx.current_scope.get_local_var_offset()
+
+# Emits the base address of an array variable minus its lower bound, so that
+# LOADN/STOREN can take the user index directly
+def emit_biased_array_base(sym_array, array_name):
+    biased_offset = sym_array.address_or_offset - (sym_array.array_lower_bound or 0)
+    if sym_array.scope_level == 0:
+        ctx.emit("PUSHGP", f"Push GP for global array '{array_name}' base")
+    else:
+        ctx.emit("PUSHFP", f"Push FP for local array '{array_name}' base")
+    ctx.emit(f"PUSHI {biased_offset}", f"Offset of '{array_name}' minus lower bound {sym_array.array_lower_bound}")
+    ctx.emit("PADD", f"Biased base address of '{array_name}'")
+
+# Record fields and elements of arrays of records or of arrays are found from the variable holding
+# them at an offset worked out at compile time (field offsets, constant indexes and lower bounds
+# times the element size, see th.designator_layout). With no variable index left, r.f, a[2].f or
+# m[1, 2] is a plain PUSHG/PUSHL of one slot; otherwise a[i].f or m[i, j] is one LOADN/STOREN at the
+# offset plus each index times its stride (the size of a row, record or element), whatever the
+# nesting of fields and arrays.
+def emit_designator_load(node):
+    sym, offset, indexes, info = th.designator_layout(node)
+    if not indexes:
+        opcode = "PUSHG" if sym.scope_level == 0 else "PUSHL"
+        ctx.emit(f"{opcode} {offset}", f"Push '{designator_text(node)}'")
+        return
+    emit_indexed_address(sym, offset, indexes)
+    ctx.emit("LOADN", f"Load '{designator_text(node)}'")
+
+# stores the value pushed by emit_value(description of the target) into a field or element
+def emit_designator_store(node, emit_value):
+    sym, offset, indexes, info = th.designator_layout(node)
+    if not indexes:
+        emit_value(info)
+        opcode = "STOREG" if sym.scope_level == 0 else "STOREL"
+        ctx.emit(f"{opcode} {offset}", f"Store to '{designator_text(node)}'")
+        return
+    emit_indexed_address(sym, offset, indexes)
+    emit_value(info)
+    ctx.emit("STOREN", f"Store to '{designator_text(node)}'")
+
+# pushes the address LOADN/STOREN add the index to (GP or FP plus the constant offset) and the index
+def emit_indexed_address(sym, offset, indexes):
+    ctx.emit("PUSHGP" if sym.scope_level == 0 else "PUSHFP")
+    ctx.emit(f"PUSHI {offset}", f"Offset of '{sym.name}' storage, lower bounds and fields folded in")
+    ctx.emit("PADD")
+    for position, (index, stride, bounds) in enumerate(indexes):
+        visit(index)
+        emit_range_check(index, bounds, f"an index of '{sym.name}'")
+        if stride != 1:
+            ctx.emit(f"PUSHI {stride}"); ctx.emit("MUL", "Index times its stride")
+        if position:
+            ctx.emit("ADD")
+
+# Range checks (--range-checks). CHECK low, high stops the VM when the value on top of the stack
+# is out of low..high and leaves the value there otherwise. Array indexes are checked against the
+# bounds of the array, values stored into BYTE, WORD, ... variables against their range. A check
+# is left out when the range analysis proves the value is always in range: a constant, or an
+# expression of FOR control variables whose loop bounds keep it in range, as in
+# FOR i := 1 TO 10 DO a[i] := a[i - 1] with a: ARRAY [0..10] OF INTEGER.
+
+# checks the value of `expression` just pushed (None for a value nothing is known of) against bounds
+def emit_range_check(expression, bounds, what):
+    if not ctx.range_checks or bounds is None:
+        return
+    value_range = None if expression is None else ra.expression_range(expression, ctx.current_scope, ctx.known_ranges)
+    if ra.within(value_range, bounds):
+        ctx.range_checks_eliminated += 1
+        return
+    if value_range is not None and value_range[0] == value_range[1]: # a constant that can never pass
+        raise ValueError(f"The value {value_range[0]} of {what} is out of the range {bounds[0]}..{bounds[1]}.")
+    ctx.range_checks_emitted += 1
+    ctx.emit(f"CHECK {bounds[0]}, {bounds[1]}", f"Range check of {what}")
+
+# the bounds of the indexes of a one-dimensional array, None if they are not known (VAR parameters)
+def array_index_bounds(sym_array):
+    if sym_array is None or not sym_array.is_array or sym_array.array_element_count is None:
+        return None
+    low = sym_array.array_lower_bound or 0
+    return (low, low + sym_array.array_element_count - 1)
+
+# the values of a FOR control variable while the loop body runs, given its checked start and end values
+def for_loop_range(node, sym_control_var):
+    if not ctx.range_checks:
+        return None
+    bounds = [ra.expression_range(bound, ctx.current_scope, ctx.known_ranges) for bound in (node.start_expression, node.end_expression)]
+    if sym_control_var.value_range is not None: # both were checked against its range
+        bounds = [ra.intersect(bound, sym_control_var.value_range) for bound in bounds]
+    return ra.control_variable_range(node, ctx.current_scope, *bounds)
+
+# Computes loop invariant expressions and array base addresses once, before the loop starts.
+# Returns what was hoisted so it can be released when the loop has been generated.
+def hoist_loop_invariants(loop_node):
+    invariants, indexed_arrays = li.find_loop_invariants(loop_node, ctx.current_scope)
+    hoisted_nodes = []
+    hoisted_arrays = []
+    offsets_by_expression = {} # structurally equal expressions share one temp
+    for expr in invariants:
+        if id(expr) in ctx.hoisted_expressions: # already hoisted by an enclosing loop
+            continue
+        expr_key = repr(expr)
+        offset = offsets_by_expression.get(expr_key)
+        if offset is None:
+            offset = new_temp_var_offset()
+            visit(expr)
+            ctx.emit(f"STOREL {offset}", "Store hoisted loop invariant")
+            offsets_by_expression[expr_key] = offset
+        ctx.hoisted_expressions[id(expr)] = offset
+        hoisted_nodes.append(expr)
+    for sym_array in indexed_arrays:
+        if sym_array in ctx.hoisted_array_bases:
+            continue
+        offset = new_temp_var_offset()
+        emit_biased_array_base(sym_array, sym_array.name)
+        ctx.emit(f"STOREL {offset}", f"Store hoisted base of array '{sym_array.name}'")
+        ctx.hoisted_array_bases[sym_array] = offset
+        hoisted_arrays.append(sym_array)
+    return hoisted_nodes, hoisted_arrays
+
+def release_hoisted(hoisted):
+    hoisted_nodes, hoisted_arrays = hoisted
+    for expr in hoisted_nodes:
+        del ctx.hoisted_expressions[id(expr)]
+    for sym_array in hoisted_arrays:
+        del ctx.hoisted_array_bases[sym_array]
 
 @register_visitor("Program")
 def visit_Program(node):
+    globals_size = 0
     if node.block and node.block.declarations:
         for decl in node.block.declarations:
-            if isinstance(decl, ast_nodes.VariableDeclaration):
+            if isinstance(decl, ast_nodes.ConstantDeclaration): # before the arrays whose bounds use them
+                visit(decl)
+            elif isinstance(decl, ast_nodes.VariableDeclaration):
                 for var_info in decl.variable_list:
                     var_type_for_symbol_str = th.type_node_to_string(var_info.var_type)
                     is_array_type, array_size, lower_bound, actual_element_type_str = th.process_array_type(var_info.var_type)
+                    record_layout = th.process_record_type(var_info.var_type)
+                    element_layout = th.process_element_layout(var_info.var_type)
+                    slots = th.storage_slots(var_info.var_type) # records are stored field after field, arrays of arrays row after row
                     for var_id_str in var_info.id_list:
-                        offset = ctx.current_scope.get_local_var_offset(count=array_size)
+                        offset = ctx.current_scope.get_local_var_offset(count=slots)
                         sym = Symbol(var_id_str,
                                     var_type_for_symbol_str,
                                     'variable',
@@ -56,13 +196,26 @@ def visit_Program(node):
                                     is_array=is_array_type,
                                     array_lower_bound=lower_bound if is_array_type else None,
                                     array_element_count=array_size if is_array_type else None,
-                                    element_type=actual_element_type_str if is_array_type else None)
+                                    element_type=actual_element_type_str if is_array_type else None,
+                                    record_layout=record_layout,
+                                    element_layout=element_layout,
+                                    value_range=declared_range(var_info.var_type))
                         ctx.current_scope.define(sym)
                         ctx.globals_handled_pre_start.add(var_id_str)
+                        globals_size += slots
                         if is_array_type:
-                            ctx.emit(f"PUSHN {array_size}", f"Reserve space for global array '{var_id_str}' (gp[{offset}..])")
+                            ctx.emit(f"// Global array '{var_id_str}' at gp[{offset}..{offset + slots - 1}]")
+                        elif record_layout is not None:
+                            ctx.emit(f"// Global record '{var_id_str}' at gp[{offset}..{offset + slots - 1}]")
                         else:
-                            ctx.emit(f"PUSHI 0", f"Initial stack value for global '{var_id_str}' (gp[{offset}])")
+                            ctx.emit(f"// Global '{var_id_str}' at gp[{offset}]")
+    if globals_size:
+        ctx.emit(f"PUSHN {globals_size}", "Reserve and zero all globals at once")
+    if uses_sets(node):
+        ctx.set_powers_offset = globals_size
+        ctx.emit(f"// Powers of two for SET operations at gp[{globals_size}..{globals_size + MAX_SET_SIZE - 1}]")
+        for bit in range(MAX_SET_SIZE):
+            ctx.emit(f"PUSHI {1 << bit}")
     ctx.emit("START", "Initialize Frame Pointer = Stack Pointer")
     visit(node.block)
     ctx.emit("STOP", "End of program")
@@ -88,21 +241,31 @@ def visit_Block(node):
         main_code_label = ctx.new_label("mainLabel")
         ctx.emit(f"JUMP {main_code_label}", "Jump over nested function/proc definitions")
     for fp_node in function_procedure_nodes:
-        visit(fp_node)
+        if ctx.fragment_cache is not None and is_global_scope():
+            ctx.fragment_cache.emit_routine(fp_node, visit) # unchanged routines come from an earlier compile
+        else:
+            visit(fp_node)
     if main_code_label:
         ctx.emit_label(main_code_label)
     if node.compound_statement:
+        ctx.push_scope(scope_name="main") # temps of the main program live in its own frame (FP+0..)
+        ctx.open_frame("main program")
         visit(node.compound_statement)
+        ctx.close_frame()
+        ctx.pop_scope()
 
 @register_visitor("VariableDeclaration")
 def visit_VariableDeclaration(node):
     for var_info in node.variable_list:
         var_type_for_symbol_str = th.type_node_to_string(var_info.var_type)
         is_array_type, array_size, lower_bound, actual_element_type_str = th.process_array_type(var_info.var_type)
+        record_layout = th.process_record_type(var_info.var_type)
+        element_layout = th.process_element_layout(var_info.var_type)
+        slots = th.storage_slots(var_info.var_type) # records are stored field after field, arrays of arrays row after row
         for var_id_str in var_info.id_list:
-            if var_id_str in ctx.globals_handled_pre_start:
+            if is_global_scope() and var_id_str in ctx.globals_handled_pre_start:
                 continue
-            if ctx.current_scope.parent is None or ctx.current_scope.parent.scope_name == "global_init_phase":
+            if is_global_scope():
                 offset = ctx.current_scope.get_local_var_offset(count=array_size)
                 sym_check = ctx.current_scope.resolve(var_id_str)
                 if not sym_check: # Define only if not somehow already defined (e.g. forward decl)
@@ -122,8 +285,8 @@ def visit_VariableDeclaration(node):
                 else:
                     ctx.emit(f"PUSHI 0", f"Default value for global '{var_id_str}'")
                     ctx.emit(f"STOREG {offset}", f"Initialize global '{var_id_str}' to 0")
-            else: # Local variable
-                offset = ctx.current_scope.get_local_var_offset(count=array_size)
+            else: # Local variable, its slots are reserved by the frame prologue
+                offset = ctx.current_scope.get_local_var_offset(count=slots)
                 sym = Symbol(var_id_str,
                             var_type_for_symbol_str,
                             'variable',
@@ -132,12 +295,38 @@ def visit_VariableDeclaration(node):
                             is_array=is_array_type,
                             array_lower_bound=lower_bound if is_array_type else None,
                             array_element_count=array_size if is_array_type else None,
-                            element_type=actual_element_type_str if is_array_type else None)
+                            element_type=actual_element_type_str if is_array_type else None,
+                            record_layout=record_layout,
+                            element_layout=element_layout,
+                            value_range=declared_range(var_info.var_type))
                 ctx.current_scope.define(sym)
-                if is_array_type:
-                    ctx.emit(f"PUSHN {array_size}", f"Allocate {array_size} slots for local array '{var_id_str}' at FP+{offset}")
+                if is_array_type: # addressed through FP, slot sharing must not move it
+                    ctx.current_frame.pin(offset, slots)
+                    ctx.emit(f"// Local array '{var_id_str}' at FP+{offset}..FP+{offset + slots - 1}")
+                elif record_layout is not None: # fields may be addressed through FP too
+                    ctx.current_frame.pin(offset, slots)
+                    ctx.emit(f"// Local record '{var_id_str}' at FP+{offset}..FP+{offset + slots - 1}")
                 else:
-                    ctx.emit(f"PUSHI 0", f"Allocate space for local var '{var_id_str}' at FP+{offset}")
+                    ctx.emit(f"// Local var '{var_id_str}' at FP+{offset}")
+
+@register_visitor("ConstantDeclaration")
+def visit_ConstantDeclaration(node):
+    for const_info in node.constant_list:
+        const_name = const_info.name
+        if is_global_scope() and const_name in ctx.globals_handled_pre_start:
+            continue
+        value = evaluate_constant(const_info.expression, ctx.current_scope.resolve)
+        if value is None:
+            raise ValueError(f"Constant '{const_name}' has no compile-time value.")
+        sym = Symbol(const_name,
+                    value_type(value),
+                    'constant',
+                    value, # uses are replaced by this value, a constant takes no storage
+                    scope_level=0 if is_global_scope() else ctx.current_scope.scope_level)
+        ctx.current_scope.define(sym)
+        if is_global_scope():
+            ctx.globals_handled_pre_start.add(const_name)
+        ctx.emit(f"// Constant '{const_name}' = {value!r}")
 
 @register_visitor("FunctionDeclaration")
 def visit_FunctionDeclaration(node):
@@ -162,16 +351,19 @@ def visit_FunctionDeclaration(node):
             for param_id_str in reversed(param_group.id_list):
                 offset = ctx.current_scope.get_param_offset()
                 param_sym = Symbol(param_id_str, param_type_str, 'parameter', offset,
-                                    scope_level=ctx.current_scope.scope_level, is_var_param=param_group.is_var)
+                                    scope_level=ctx.current_scope.scope_level, is_var_param=param_group.is_var,
+                                    value_range=declared_range(param_group.param_type))
                 ctx.current_scope.define(param_sym)
                 ctx.emit(f"// Param '{param_id_str}' at FP{offset}", "")
-    # Allocate space for local variables by visiting their declarations
+    ctx.open_frame(f"function {node.name}") # one PUSHN for locals and temps
+    # Define local variables by visiting their declarations
     if node.block and node.block.declarations:
         for decl in node.block.declarations:
-            if isinstance(decl, ast_nodes.VariableDeclaration):
-                visit(decl) # This will emit PUSHN/PUSHI for locals
+            if isinstance(decl, (ast_nodes.ConstantDeclaration, ast_nodes.VariableDeclaration)):
+                visit(decl)
     if node.block:
         visit(node.block.compound_statement) # Visit the function body
+    ctx.close_frame()
 
     # Handle return value 
     ctx.emit("RETURN", f"Return from function {node.name}")
@@ -198,26 +390,32 @@ def visit_ProcedureDeclaration(node):
             for param_id_str in reversed(param_group.id_list):
                 offset = ctx.current_scope.get_param_offset()
                 param_sym = Symbol(param_id_str, param_type_str, 'parameter', offset,
-                                    scope_level=ctx.current_scope.scope_level, is_var_param=param_group.is_var)
+                                    scope_level=ctx.current_scope.scope_level, is_var_param=param_group.is_var,
+                                    value_range=declared_range(param_group.param_type))
                 ctx.current_scope.define(param_sym)
                 ctx.emit(f"// Param '{param_id_str}' at FP{offset}", "")
+    ctx.open_frame(f"procedure {node.name}")
     if node.block and node.block.declarations:
         for decl in node.block.declarations:
-            if isinstance(decl, ast_nodes.VariableDeclaration):
+            if isinstance(decl, (ast_nodes.ConstantDeclaration, ast_nodes.VariableDeclaration)):
                 visit(decl)
     if node.block:
         visit(node.block.compound_statement)
+    ctx.close_frame()
     ctx.emit("RETURN", f"Return from procedure {node.name}")
     ctx.pop_scope()
 
 @register_visitor("CompoundStatement")
 def visit_CompoundStatement(node):
-    for stmt in node.statement_list:
+    for stmt in batch_writes(node.statement_list):
         visit(stmt)
 
 @register_visitor("AssignmentStatement")
 def visit_AssignmentStatement(node):
-    if isinstance(node.variable, ast_nodes.ArrayAccess):
+    if th.uses_designator_layout(node.variable):
+        emit_designator_store(node.variable, lambda target: emit_value_for(node.expression, target.sym_type, target.value_range,
+                                                                           designator_text(node.variable)))
+    elif isinstance(node.variable, ast_nodes.ArrayAccess):
         # RHS first, store temporarily
         visit(node.expression)
         temp_rhs_offset = new_temp_var_offset()
@@ -229,7 +427,9 @@ def visit_AssignmentStatement(node):
             raise NotImplementedError("Assignment to non-identifier array base not implemented")
         array_name = array_node_for_addr.name
         sym_array = ctx.current_scope.resolve(array_name)
-        if not sym_array or not sym_array.is_array:
+        if sym_array in ctx.hoisted_array_bases:
+            ctx.emit(f"PUSHL {ctx.hoisted_array_bases[sym_array]}", f"Load hoisted base of array '{array_name}'")
+        elif not sym_array or not sym_array.is_array:
             # Check if it's a VAR parameter that's an array
             if sym_array and sym_array.is_var_param: # It's an address
                 ctx.emit(f"PUSHL {sym_array.address_or_offset}", f"Load address from VAR param array '{array_name}'")
@@ -246,20 +446,23 @@ def visit_AssignmentStatement(node):
         
         # Index
         visit(node.variable.index)
-        if sym_array and sym_array.is_array and sym_array.array_lower_bound is not None and sym_array.array_lower_bound != 0:
+        emit_range_check(node.variable.index, array_index_bounds(sym_array), f"the index of '{array_name}'")
+        if sym_array and sym_array.is_array and sym_array.array_lower_bound is not None and sym_array.array_lower_bound != 0 \
+            and sym_array not in ctx.hoisted_array_bases:
             ctx.emit(f"PUSHI {sym_array.array_lower_bound}", f"Push array lower bound {sym_array.array_lower_bound}")
             ctx.emit("SUB", "Adjust index to be 0-based for VM")
         
         # Reload RHS
         ctx.emit(f"PUSHL {temp_rhs_offset}", "Reload RHS for array assignment")
+        emit_range_check(node.expression, sym_array.value_range if sym_array else None, f"the value assigned to '{array_name}[]'")
         ctx.emit("STOREN", "Store to array element")
 
     elif isinstance(node.variable, ast_nodes.Identifier):
-        visit(node.expression) # Value to be assigned is on TOS
         var_name = node.variable.name
         sym = ctx.current_scope.resolve(var_name)
         if not sym:
             raise ValueError(f"Undefined variable '{var_name}' in assignment.")
+        emit_value_for(node.expression, sym.sym_type, sym.value_range, var_name) # Value to be assigned is on TOS
 
         is_function_return_assignment = False
         if sym.kind == 'function' and ctx.current_scope.scope_name == f"func_{sym.name}":
@@ -281,6 +484,14 @@ def visit_AssignmentStatement(node):
         ctx.emit(f"// Assignment to {type(node.variable).__name__} not implemented", "")
 
 
+# pushes the value of an expression assigned to a target of type `target_type` (of values in value_range)
+def emit_value_for(expression, target_type, value_range=None, target_text=None):
+    if is_set_type(target_type): # set constructors take the range of the target
+        emit_set(expression, target_type)
+    else:
+        visit(expression)
+        emit_range_check(expression, value_range, f"the value assigned to '{target_text}'")
+
 @register_visitor("IfStatement")
 def visit_IfStatement(node):
     visit(node.condition)
@@ -297,16 +508,66 @@ def visit_IfStatement(node):
         visit(node.else_statement)
     ctx.emit_label(endif_label)
 
+# WHILE loops are tested at the bottom when it is cheaper: the loop jumps once to its test,
+# placed after the body, and every iteration then runs the body, the test and one conditional
+# jump back instead of also jumping back to a test at the top. JZ is the only conditional jump,
+# so the jump back needs the negated condition, which is free for comparisons (the opposite
+# operator), NOT x (x) and ANDs/ORs of those (De Morgan). Other conditions would need a NOT,
+# costing what the inversion saves, and keep the test at the top.
 @register_visitor("WhileStatement")
 def visit_WhileStatement(node):
+    hoisted = hoist_loop_invariants(node)
     loop_start_label = ctx.new_label("whilestart")
-    loop_end_label = ctx.new_label("whileend")
+    negated = negated_condition(node.condition)
+    if negated is None:
+        loop_end_label = ctx.new_label("whileend")
+        ctx.emit_label(loop_start_label)
+        visit(node.condition)
+        ctx.emit(f"JZ {loop_end_label}", "If condition is false, exit while loop")
+        visit(node.statement)
+        ctx.emit(f"JUMP {loop_start_label}", "Repeat while loop")
+        ctx.emit_label(loop_end_label)
+    else:
+        loop_check_label = ctx.new_label("whilecheck")
+        ctx.emit(f"JUMP {loop_check_label}", "Enter while loop at its test")
+        ctx.emit_label(loop_start_label)
+        visit(node.statement)
+        ctx.emit_label(loop_check_label)
+        visit(negated)
+        ctx.emit(f"JZ {loop_start_label}", "If condition is still true, repeat while loop")
+    release_hoisted(hoisted)
+
+@register_visitor("RepeatStatement")
+def visit_RepeatStatement(node):
+    hoisted = hoist_loop_invariants(node)
+    loop_start_label = ctx.new_label("repeatstart")
     ctx.emit_label(loop_start_label)
-    visit(node.condition)
-    ctx.emit(f"JZ {loop_end_label}", "If condition is false, exit while loop")
     visit(node.statement)
-    ctx.emit(f"JUMP {loop_start_label}", "Repeat while loop")
-    ctx.emit_label(loop_end_label)
+    visit(node.condition)
+    ctx.emit(f"JZ {loop_start_label}", "If UNTIL condition is false, repeat loop")
+    release_hoisted(hoisted)
+
+NEGATED_COMPARISONS = {'<>': '=', '<': '>=', '>=': '<', '>': '<=', '<=': '>'} # '=' has no opposite without NOT
+DE_MORGAN = {'AND': 'OR', 'OR': 'AND'}
+
+# an expression computing NOT condition without a NOT of its own, None if there is none
+def negated_condition(condition):
+    if id(condition) in ctx.hoisted_expressions: # loaded from its temp as it is
+        return None
+    if isinstance(condition, ast_nodes.UnaryOperation) and condition.operator.upper() == 'NOT':
+        return condition.operand
+    if isinstance(condition, ast_nodes.BinaryOperation):
+        operator = condition.operator.upper()
+        if operator in NEGATED_COMPARISONS and th.set_operand_type(condition) is not None: # sets are ordered by inclusion only
+            return None
+        if operator in NEGATED_COMPARISONS:
+            return ast_nodes.BinaryOperation(condition.left, NEGATED_COMPARISONS[operator], condition.right, condition.lineno)
+        if operator in DE_MORGAN:
+            left = negated_condition(condition.left)
+            right = negated_condition(condition.right) if left is not None else None
+            if right is not None:
+                return ast_nodes.BinaryOperation(left, DE_MORGAN[operator], right, condition.lineno)
+    return None
 
 @register_visitor("ForStatement")
 def visit_ForStatement(node):
@@ -318,16 +579,23 @@ def visit_ForStatement(node):
         raise ValueError(f"FOR loop control variable '{control_var_name}' must be a non-VAR variable or value parameter.")
     is_global_control_var = (sym_control_var.scope_level == 0)
     control_var_offset = sym_control_var.address_or_offset
+    read_target = bulk_read_target(node, sym_control_var)
+    if read_target is not None:
+        emit_bulk_read_loop(node, read_target)
+        return
     loop_check_label = ctx.new_label("forcheck")
     loop_end_label = ctx.new_label("forend")
     temp_end_val_storage_offset = new_temp_var_offset()
     visit(node.end_expression)
+    emit_range_check(node.end_expression, sym_control_var.value_range, f"the end value of '{control_var_name}'")
     ctx.emit(f"STOREL {temp_end_val_storage_offset}", f"Store evaluated end value of FOR loop for '{control_var_name}'")
     visit(node.start_expression)
+    emit_range_check(node.start_expression, sym_control_var.value_range, f"the start value of '{control_var_name}'")
     if is_global_control_var:
         ctx.emit(f"STOREG {control_var_offset}", f"Initialize FOR global control var '{control_var_name}'")
     else:
         ctx.emit(f"STOREL {control_var_offset}", f"Initialize FOR local control var '{control_var_name}'")
+    hoisted = hoist_loop_invariants(node)
     ctx.emit_label(loop_check_label)
     if is_global_control_var:
         ctx.emit(f"PUSHG {control_var_offset}", f"Load global control var '{control_var_name}' for check")
@@ -340,7 +608,7 @@ def visit_ForStatement(node):
     else:
         ctx.emit("SUPEQ", f"Check {control_var_name} >= end_value")
         ctx.emit(f"JZ {loop_end_label}", f"If not ({control_var_name} >= end_value), exit loop")
-    visit(node.statement)
+    visit_for_body(node, sym_control_var)
     if is_global_control_var:
         ctx.emit(f"PUSHG {control_var_offset}", f"Load global control var '{control_var_name}' for update")
     else:
@@ -356,19 +624,199 @@ def visit_ForStatement(node):
         ctx.emit(f"STOREL {control_var_offset}", f"Store updated local control var '{control_var_name}'")
     ctx.emit(f"JUMP {loop_check_label}")
     ctx.emit_label(loop_end_label)
+    release_hoisted(hoisted)
+
+# generates the body of a FOR loop, its control variable known to stay between the start and end values if it does
+def visit_for_body(node, sym_control_var):
+    loop_range = for_loop_range(node, sym_control_var)
+    if loop_range is not None:
+        ctx.known_ranges[sym_control_var] = loop_range
+    visit(node.statement)
+    ctx.known_ranges.pop(sym_control_var, None)
+
+# Input loops. FOR i := lo TO hi DO Read(a[i]) only reads and stores, nothing in its body looks
+# at i, so i does not need to live in memory while it runs: the biased base of a and i stay on
+# the stack, DUP 2 gives STOREN both for each element, and i is stored once when the loop ends
+# (hi + 1, or lo if it never ran, as after any FOR loop). The test is done at the bottom, after
+# one guard at the top, so no JUMP is needed either. An INTEGER element takes 10 instructions
+# instead of the 14 of the plain loop.
+
+# the array element a[i] a FOR loop does nothing but read, None if the loop is not one of these
+def bulk_read_target(node, sym_control_var):
+    body = node.statement
+    while isinstance(body, ast_nodes.CompoundStatement) and len(body.statement_list) == 1:
+        body = body.statement_list[0]
+    if not isinstance(body, ast_nodes.IOCall) or body.operation.lower() not in ["read", "readln"] or len(body.arguments) != 1:
+        return None
+    target = body.arguments[0]
+    if not isinstance(target, ast_nodes.ArrayAccess) or th.uses_designator_layout(target):
+        return None
+    if not isinstance(target.array, ast_nodes.Identifier) or not isinstance(target.index, ast_nodes.Identifier):
+        return None
+    if ctx.current_scope.resolve(target.index.name) is not sym_control_var:
+        return None
+    sym_array = ctx.current_scope.resolve(target.array.name)
+    if sym_array is None or sym_array.kind != 'variable' or not sym_array.is_array:
+        return None
+    return target
+
+def emit_bulk_read_loop(node, target):
+    control_var_name = node.control_variable.name
+    sym_control_var = ctx.current_scope.resolve(control_var_name)
+    sym_array = ctx.current_scope.resolve(target.array.name)
+    loop_label = ctx.new_label("forread")
+    loop_end_label = ctx.new_label("forend")
+    end_offset = new_temp_var_offset()
+    visit(node.end_expression)
+    emit_range_check(node.end_expression, sym_control_var.value_range, f"the end value of '{control_var_name}'")
+    ctx.emit(f"STOREL {end_offset}", f"Store evaluated end value of FOR loop for '{control_var_name}'")
+    emit_biased_array_base(sym_array, target.array.name)
+    visit(node.start_expression) # Stack: [base, i]
+    emit_range_check(node.start_expression, sym_control_var.value_range, f"the start value of '{control_var_name}'")
+    loop_range = for_loop_range(node, sym_control_var)
+    start = evaluate_constant(node.start_expression, ctx.current_scope.resolve)
+    end = evaluate_constant(node.end_expression, ctx.current_scope.resolve)
+    runs = start is not None and end is not None and (start >= end if node.downto else start <= end)
+    if not runs: # constant bounds can tell without a test
+        ctx.emit("DUP 1")
+        ctx.emit(f"PUSHL {end_offset}", "Load stored end value for check")
+        ctx.emit("SUPEQ" if node.downto else "INFEQ", "Check if the loop runs at all")
+        ctx.emit(f"JZ {loop_end_label}")
+    ctx.emit_label(loop_label)
+    first_instruction = len(ctx.code)
+    ctx.emit("DUP 2", f"Base and {control_var_name} for the store")
+    if loop_range is not None:
+        ctx.known_ranges[sym_control_var] = loop_range
+    emit_range_check(target.index, array_index_bounds(sym_array), f"the index of '{target.array.name}'")
+    ctx.known_ranges.pop(sym_control_var, None)
+    emit_read_value(sym_array.element_type, "read", f"{target.array.name}[{control_var_name}]", sym_array.value_range)
+    ctx.emit("STOREN", f"Store read value into {target.array.name}[{control_var_name}]")
+    ctx.emit("PUSHI 1")
+    ctx.emit("SUB" if node.downto else "ADD", f"Next {control_var_name}, kept on the stack")
+    ctx.emit("DUP 1")
+    ctx.emit(f"PUSHL {end_offset}", "Load stored end value for check")
+    ctx.emit("INF" if node.downto else "SUP", f"Check if {control_var_name} is past the end value")
+    ctx.emit(f"JZ {loop_label}", "Read the next element")
+    per_element = len(ctx.code) - first_instruction
+    ctx.emit_label(loop_end_label)
+    opcode = "STOREG" if sym_control_var.scope_level == 0 else "STOREL"
+    ctx.emit(f"{opcode} {sym_control_var.address_or_offset}", f"Store final value of FOR control var '{control_var_name}'")
+    ctx.emit("POP 1", "Drop the base")
+    ctx.emit(f"// Read loop of '{target.array.name}': {per_element} instructions per element, {per_element + 4} as a plain FOR loop")
+
+# CASE statements. EWVM has no indirect jump (JUMP and JZ take a label, CALL opens a new
+# frame), so there is no real jump table: the branch is found by a binary search over the
+# sorted label ranges that only tests "selector < pivot". Dense label sets get their gaps
+# filled with the ELSE branch, so every leaf is reached knowing the exact range it covers
+# and needs no test of its own, like the slots of a table; sparse sets test at the leaf.
+@register_visitor("CaseStatement")
+def visit_CaseStatement(node):
+    selector_offset = new_temp_var_offset()
+    visit(node.selector)
+    ctx.emit(f"STOREL {selector_offset}", "Store CASE selector")
+    end_label = ctx.new_label("caseend")
+    else_label = ctx.new_label("caseelse") if node.else_statement else end_label
+    branch_labels = []
+    ranges = [] # (low, high, branch label) of every label
+    for element in node.elements:
+        branch_label = ctx.new_label("casebranch")
+        branch_labels.append(branch_label)
+        for label in element.labels:
+            if isinstance(label, ast_nodes.CaseRange):
+                ranges.append((case_label_value(label.low), case_label_value(label.high), branch_label))
+            else:
+                value = case_label_value(label)
+                ranges.append((value, value, branch_label))
+    ranges = merge_case_ranges(ranges)
+    if is_dense_case(ranges):
+        ranges = fill_case_gaps(ranges, else_label)
+    emit_case_search(ranges, selector_offset, None, None, else_label)
+    for element, branch_label in zip(node.elements, branch_labels):
+        ctx.emit_label(branch_label)
+        visit(element.statement)
+        ctx.emit(f"JUMP {end_label}", "End of CASE branch")
+    if node.else_statement:
+        ctx.emit_label(else_label)
+        visit(node.else_statement)
+    ctx.emit_label(end_label)
+
+def case_label_value(label):
+    value = ordinal_value(evaluate_constant(label, ctx.current_scope.resolve))
+    if value is None:
+        raise ValueError("CASE labels must be constant INTEGER, CHAR or BOOLEAN values.")
+    return value
+
+# sorts the ranges and joins the neighbouring ones that go to the same branch (1, 2, 3: -> 1..3:)
+def merge_case_ranges(ranges):
+    merged = []
+    for low, high, target in sorted(ranges):
+        if merged and merged[-1][2] == target and merged[-1][1] + 1 == low:
+            merged[-1] = (merged[-1][0], high, target)
+        else:
+            merged.append((low, high, target))
+    return merged
+
+# a filled gap is one more leaf: with at most one gap for every two ranges the search gets
+# at most half a level deeper, which costs less than the test every leaf no longer needs
+def is_dense_case(ranges):
+    gaps = sum(1 for (_, high, _), (low, _, _) in zip(ranges, ranges[1:]) if low > high + 1)
+    return 2 * gaps <= len(ranges)
+
+def fill_case_gaps(ranges, else_label):
+    filled = [ranges[0]]
+    for low, high, target in ranges[1:]:
+        if low > filled[-1][1] + 1:
+            filled.append((filled[-1][1] + 1, low - 1, else_label))
+        filled.append((low, high, target))
+    return filled
+
+# Emits the search over `ranges` (sorted, not overlapping) for a selector known to be within
+# known_low..known_high (None when unbounded); values outside every range go to else_label
+def emit_case_search(ranges, selector_offset, known_low, known_high, else_label):
+    if len(ranges) == 1:
+        low, high, target = ranges[0]
+        if target != else_label:
+            check_low = known_low is None or known_low < low
+            check_high = known_high is None or known_high > high
+            if check_low and check_high and low == high:
+                emit_case_test(selector_offset, low, "EQUAL", else_label)
+            else:
+                if check_low:
+                    emit_case_test(selector_offset, low, "SUPEQ", else_label)
+                if check_high:
+                    emit_case_test(selector_offset, high, "INFEQ", else_label)
+        ctx.emit(f"JUMP {target}", "CASE branch found")
+        return
+    middle = len(ranges) // 2
+    pivot = ranges[middle][0]
+    upper_label = ctx.new_label("caseupper")
+    emit_case_test(selector_offset, pivot, "INF", upper_label)
+    emit_case_search(ranges[:middle], selector_offset, known_low, pivot - 1, else_label)
+    ctx.emit_label(upper_label)
+    emit_case_search(ranges[middle:], selector_offset, pivot, known_high, else_label)
+
+# jumps to `false_label` unless "selector <comparison> value" holds
+def emit_case_test(selector_offset, value, comparison, false_label):
+    ctx.emit(f"PUSHL {selector_offset}", "Load CASE selector")
+    ctx.emit(f"PUSHI {value}")
+    ctx.emit(comparison)
+    ctx.emit(f"JZ {false_label}")
 
 @register_visitor("Literal")
 def visit_Literal(node):
-    value = node.value
+    emit_constant(node.value)
+
+# Pushes a compile-time value
+def emit_constant(value, comment=None):
     if isinstance(value, bool):
-        ctx.emit(f"PUSHI {1 if value else 0}")
+        ctx.emit(f"PUSHI {1 if value else 0}", comment)
     elif isinstance(value, int):
-        ctx.emit(f"PUSHI {value}")
+        ctx.emit(f"PUSHI {value}", comment)
     elif isinstance(value, float):
-        ctx.emit(f"PUSHF {value}")
+        ctx.emit(f"PUSHF {value}", comment)
     elif isinstance(value, str):
         escaped_value = value.replace('"', '\\"') # Basic escaping for quotes in string
-        ctx.emit(f'PUSHS "{escaped_value}"')
+        ctx.emit(f'PUSHS "{escaped_value}"', comment)
     else:
         raise TypeError(f"Unsupported literal type: {type(value)} for value {value}")
 
@@ -410,13 +858,22 @@ def visit_Identifier(node):
                 ctx.emit("PADD", f"Calculate base address of value param array '{var_name}'")
             else: # Scalar value parameter
                 ctx.emit(f"PUSHL {sym.address_or_offset}", f"Push value of param '{var_name}'")
+    elif sym.kind == 'constant': # Value known at compile time, pushed as an immediate
+        emit_constant(sym.address_or_offset, f"Constant '{var_name}'")
     elif sym.kind == 'function': # Pushing function address (e.g. for passing as param, not direct call)
         ctx.emit(f"PUSHA {sym.address_or_offset}", f"Push address of function '{var_name}'")
     else:
         raise ValueError(f"Cannot use identifier '{var_name}' of kind '{sym.kind}' as a value here.")
 
+@register_visitor("FieldAccess")
+def visit_FieldAccess(node):
+    emit_designator_load(node)
+
 @register_visitor("ArrayAccess")
 def visit_ArrayAccess(node):
+    if th.uses_designator_layout(node): # an element of an array of records or of arrays, or of an array field
+        emit_designator_load(node)
+        return
     # Check if accessing a string variable for CHARAT
     is_string_access = False
     string_sym = None
@@ -441,6 +898,11 @@ def visit_ArrayAccess(node):
         ctx.emit("PUSHI 1", "Adjust for 1-based string indexing")
         ctx.emit("SUB", "Convert to 0-based for VM")
         ctx.emit("CHARAT", "Get character at index from string")
+    elif string_sym in ctx.hoisted_array_bases: # Array access inside a loop (string_sym is the array symbol here)
+        ctx.emit(f"PUSHL {ctx.hoisted_array_bases[string_sym]}", f"Load hoisted base of array '{node.array.name}'")
+        visit(node.index) # Lower bound is already folded into the base
+        emit_range_check(node.index, array_index_bounds(string_sym), f"the index of '{node.array.name}'")
+        ctx.emit("LOADN", "Load value from array element")
     else: # Regular array access
         # 1. Push base address of the array
         # visit(node.array) will push the base address if node.array is an Identifier of an array type
@@ -454,6 +916,7 @@ def visit_ArrayAccess(node):
         sym_array = None
         if isinstance(node.array, ast_nodes.Identifier): # Get symbol to check lower_bound
             sym_array = ctx.current_scope.resolve(node.array.name)
+            emit_range_check(node.index, array_index_bounds(sym_array), f"the index of '{node.array.name}'")
         
         if sym_array and sym_array.is_array and sym_array.array_lower_bound is not None and sym_array.array_lower_bound != 0:
             ctx.emit(f"PUSHI {sym_array.array_lower_bound}", f"Push array lower bound {sym_array.array_lower_bound}")
@@ -463,8 +926,19 @@ def visit_ArrayAccess(node):
         ctx.emit("LOADN", "Load value from array element")
 
 
+# Pushes the value of an expression of literals and constants computed at compile time,
+# returns False (and emits nothing) if the expression is not constant
+def emit_folded(node):
+    value = evaluate_constant(node, ctx.current_scope.resolve)
+    if value is None:
+        return False
+    emit_constant(value, "Folded constant expression")
+    return True
+
 @register_visitor("UnaryOperation")
 def visit_UnaryOperation(node):
+    if emit_folded(node):
+        return
     visit(node.operand)
     op = node.operator.upper() # Standardize operator
     if op == 'NOT':
@@ -487,6 +961,18 @@ def visit_UnaryOperation(node):
 
 @register_visitor("BinaryOperation")
 def visit_BinaryOperation(node):
+    if emit_folded(node):
+        return
+    if node.operator.upper() == 'IN':
+        emit_set_membership(node)
+        return
+    set_type = th.set_operand_type(node)
+    if set_type is not None:
+        emit_set_operation(node, set_type)
+        return
+    if th.is_string_concatenation(node):
+        emit_concatenation(node)
+        return
     # Special handling for string char comparison: char_var = 'a'
     if node.operator == '=' and isinstance(node.right, ast_nodes.Literal) and \
         isinstance(node.right.value, str) and len(node.right.value) == 1:
@@ -573,6 +1059,357 @@ def visit_BinaryOperation(node):
     else:
         raise ValueError(f"Unsupported binary operator: {original_op}")
 
+# STRING concatenation. A chain a + b + c of strings is one concatenation of all its parts, the
+# parts that are literals or constants folded together ('(' + s + ', ' + 'x)' has three parts,
+# '(', s and ', x)'). EWVM's CONCAT joins two strings into a new one, so n parts take n - 1
+# CONCATs; writing a concatenation writes each part instead and builds no string at all.
+
+# the parts of a concatenation chain, in order, as expressions or folded constant strings
+def concatenation_parts(node):
+    if th.is_string_concatenation(node) and id(node) not in ctx.hoisted_expressions: # a hoisted chain is one part
+        parts = concatenation_parts(node.left)
+        for part in concatenation_parts(node.right):
+            if parts and isinstance(parts[-1], str) and isinstance(part, str):
+                parts[-1] += part
+            else:
+                parts.append(part)
+        return parts
+    value = evaluate_constant(node, ctx.current_scope.resolve)
+    if isinstance(value, str):
+        return [value] if value else [] # empty strings add nothing
+    return [node]
+
+def emit_string_part(part):
+    if isinstance(part, str):
+        emit_constant(part, "Constant part of the concatenation")
+    else:
+        visit(part)
+
+def emit_concatenation(node):
+    parts = concatenation_parts(node)
+    if not parts:
+        emit_constant("")
+        return
+    emit_string_part(parts[0])
+    for part in parts[1:]:
+        emit_string_part(part)
+        ctx.emit("CONCAT")
+
+# SET values. A set is an integer with bit v - low for its element v (see set_types.py). EWVM
+# has no bitwise or shift instructions, so bit k is read as (set DIV 2^k) MOD 2, 2^k coming
+# from a table of powers of two the program pushes after its globals. Union, difference and
+# the subset test follow from the intersection I = A*B: A + B is A + B - I, A - B is A - I and
+# A <= B is A = I. With a constant operand the intersection keeps whole runs of bits,
+# ((A DIV 2^k) MOD 2^n) * 2^k per run; two variable sets are intersected bit by bit, stopping
+# as soon as either runs out of bits.
+
+def uses_sets(node):
+    if isinstance(node, (ast_nodes.SetType, ast_nodes.SetLiteral)):
+        return True
+    return any(uses_sets(child) for child in ast_nodes.iter_child_nodes(node))
+
+@register_visitor("SetLiteral")
+def visit_SetLiteral(node):
+    raise ValueError("A set constructor needs a set variable, parameter or IN to give it a range.")
+
+def emit_set(node, set_type):
+    """Pushes the value of a set expression packed for `set_type`, whose range set constructors take."""
+    if id(node) in ctx.hoisted_expressions or not isinstance(node, (ast_nodes.SetLiteral, ast_nodes.BinaryOperation)):
+        visit(node) # variables, parameters and hoisted values are already packed
+        return
+    _, low, high = parse_set_type(set_type)
+    values = constant_set_values(node)
+    if values is not None and (low is not None or not values):
+        outside = [value for value in sorted(values) if not low <= value <= high]
+        if outside:
+            raise ValueError(f"Set element {outside[0]} is outside the range {low}..{high} of {set_type}.")
+        ctx.emit(f"PUSHI {set_mask(values, low)}", "Constant set")
+    elif low is None:
+        raise ValueError("A set constructor needs a set variable, parameter or IN to give it a range.")
+    elif isinstance(node, ast_nodes.SetLiteral):
+        emit_set_literal(node, low, high)
+    else:
+        emit_set_operation(node, set_type)
+
+# the ordinal numbers in a set expression made of constants, None if it is not constant
+def constant_set_values(node):
+    if isinstance(node, ast_nodes.SetLiteral):
+        values = set()
+        for element in node.elements:
+            if isinstance(element, ast_nodes.SetRange):
+                values.update(range(constant_ordinal(element.low), constant_ordinal(element.high) + 1))
+            else:
+                value = constant_ordinal(element)
+                if value is None:
+                    return None
+                values.add(value)
+        return values
+    if isinstance(node, ast_nodes.BinaryOperation) and node.operator in ['+', '-', '*']:
+        left = constant_set_values(node.left)
+        right = constant_set_values(node.right) if left is not None else None
+        if right is None:
+            return None
+        if node.operator == '+':
+            return left | right
+        return left - right if node.operator == '-' else left & right
+    return None
+
+def constant_ordinal(node):
+    return ordinal_value(evaluate_constant(node, ctx.current_scope.resolve))
+
+# pushes an ordinal value, CHAR constants as their code
+def emit_ordinal(node):
+    value = constant_ordinal(node)
+    if value is None:
+        visit(node)
+    else:
+        ctx.emit(f"PUSHI {value}")
+
+def emit_set_literal(node, low, high):
+    values = set()
+    variable_elements = []
+    for element in node.elements: # ranges have constant bounds
+        if isinstance(element, ast_nodes.SetRange):
+            values.update(range(constant_ordinal(element.low), constant_ordinal(element.high) + 1))
+        elif constant_ordinal(element) is not None:
+            values.add(constant_ordinal(element))
+        else:
+            variable_elements.append(element)
+    outside = [value for value in sorted(values) if not low <= value <= high]
+    if outside:
+        raise ValueError(f"Set element {outside[0]} is outside the range {low}..{high}.")
+    if not variable_elements:
+        ctx.emit(f"PUSHI {set_mask(values, low)}", "Constant set")
+        return
+    set_offset = new_temp_var_offset()
+    power_offset = new_temp_var_offset()
+    if values:
+        ctx.emit(f"PUSHI {set_mask(values, low)}", "Constant elements of the set")
+        ctx.emit(f"STOREL {set_offset}")
+    for position, element in enumerate(variable_elements):
+        visit(element)
+        if low:
+            ctx.emit(f"PUSHI {low}"); ctx.emit("SUB", "Bit of the set element")
+        ctx.emit(f"CHECK 0, {high - low}", "Set element must be in the range of the set")
+        emit_power_of_two()
+        if position == 0 and not values: # the first element can't already be in the set
+            ctx.emit(f"STOREL {set_offset}")
+            continue
+        # set + 2^k - (set DIV 2^k MOD 2) * 2^k adds the element unless it is already there
+        ctx.emit(f"STOREL {power_offset}")
+        ctx.emit(f"PUSHL {set_offset}"); ctx.emit(f"PUSHL {power_offset}"); ctx.emit("ADD")
+        ctx.emit(f"PUSHL {set_offset}"); ctx.emit(f"PUSHL {power_offset}"); ctx.emit("DIV")
+        ctx.emit("PUSHI 2"); ctx.emit("MOD"); ctx.emit(f"PUSHL {power_offset}"); ctx.emit("MUL")
+        ctx.emit("SUB", "Add the element to the set")
+        ctx.emit(f"STOREL {set_offset}")
+    ctx.emit(f"PUSHL {set_offset}")
+
+# replaces the bit number on top of the stack by 2^bit, read from the table of powers of two
+def emit_power_of_two():
+    ctx.emit("PUSHGP")
+    ctx.emit("SWAP")
+    if ctx.set_powers_offset:
+        ctx.emit(f"PUSHI {ctx.set_powers_offset}"); ctx.emit("ADD")
+    ctx.emit("LOADN", "Power of two of the bit")
+
+def emit_set_operation(node, set_type):
+    op = node.operator.upper()
+    if op == '>=': # A >= B is B <= A
+        node = ast_nodes.BinaryOperation(node.right, '<=', node.left, node.lineno)
+        op = '<='
+    left_values, right_values = constant_set_values(node.left), constant_set_values(node.right)
+    if left_values is not None and right_values is not None:
+        if op in ['+', '-', '*']:
+            emit_set(node, set_type)
+        else:
+            folded = {'=': left_values == right_values, '<>': left_values != right_values, '<=': left_values <= right_values}[op]
+            emit_constant(folded, "Folded set comparison")
+        return
+    _, low, high = parse_set_type(set_type)
+    if low is None:
+        raise ValueError("A set constructor needs a set variable, parameter or IN to give it a range.")
+    if op in ['=', '<>']:
+        emit_set(node.left, set_type)
+        emit_set(node.right, set_type)
+        ctx.emit("EQUAL", "Compare sets")
+        if op == '<>':
+            ctx.emit("NOT")
+        return
+
+    width = high - low + 1
+    if op == '*' and (left_values is not None or right_values is not None): # no temps needed
+        variable_node, constant_values = (node.left, right_values) if right_values is not None else (node.right, left_values)
+        emit_set(variable_node, set_type)
+        emit_intersection_with_mask(set_mask(constant_values, low), width)
+        return
+
+    operands = [] # how to push A and B again: a constant mask or the temp holding the set
+    for operand, values in ((node.left, left_values), (node.right, right_values)):
+        if values is not None:
+            operands.append(("PUSHI", set_mask(values, low)))
+        else:
+            offset = new_temp_var_offset()
+            emit_set(operand, set_type)
+            ctx.emit(f"STOREL {offset}")
+            operands.append(("PUSHL", offset))
+    (left_push, left_operand), (right_push, right_operand) = operands
+    if left_push == "PUSHI" or right_push == "PUSHI": # A*B with a constant mask
+        mask, held_in = (left_operand, right_operand) if left_push == "PUSHI" else (right_operand, left_operand)
+        emit_intersection_with_mask(mask, width, held_in)
+    else:
+        emit_intersection_loop(left_operand, right_operand, keep_operands=op != '*')
+    if op == '+':
+        ctx.emit(f"{left_push} {left_operand}"); ctx.emit(f"{right_push} {right_operand}"); ctx.emit("ADD")
+        ctx.emit("SWAP"); ctx.emit("SUB", "Set union A + B - A*B")
+    elif op == '-':
+        ctx.emit(f"{left_push} {left_operand}"); ctx.emit("SWAP"); ctx.emit("SUB", "Set difference A - A*B")
+    elif op == '<=':
+        ctx.emit(f"{left_push} {left_operand}"); ctx.emit("EQUAL", "Subset test A*B = A")
+
+# replaces the set on top of the stack (or pushes the set held in temp `set_offset`) by its
+# intersection with a constant mask
+def emit_intersection_with_mask(mask, width, set_offset=None):
+    runs = bit_runs(mask)
+    if not runs:
+        if set_offset is None:
+            ctx.emit("POP 1")
+        ctx.emit("PUSHI 0", "Intersection with the empty set")
+        return
+    if len(runs) > 1 and set_offset is None:
+        set_offset = new_temp_var_offset()
+        ctx.emit(f"STOREL {set_offset}")
+    for position, (first, length) in enumerate(runs):
+        if set_offset is not None:
+            ctx.emit(f"PUSHL {set_offset}")
+        if first:
+            ctx.emit(f"PUSHI {1 << first}"); ctx.emit("DIV")
+        if first + length < width: # the bits above the set are always clear
+            ctx.emit(f"PUSHI {1 << length}"); ctx.emit("MOD")
+        if first:
+            ctx.emit(f"PUSHI {1 << first}"); ctx.emit("MUL")
+        if position:
+            ctx.emit("ADD")
+    ctx.emit("// Intersection with a constant set")
+
+# pushes the intersection of the sets held in two temps, which it halves in place unless `keep_operands`
+def emit_intersection_loop(left_offset, right_offset, keep_operands):
+    left, right = left_offset, right_offset
+    if keep_operands:
+        left, right = new_temp_var_offset(), new_temp_var_offset()
+        ctx.emit(f"PUSHL {left_offset}"); ctx.emit(f"STOREL {left}")
+        ctx.emit(f"PUSHL {right_offset}"); ctx.emit(f"STOREL {right}")
+    result, power = new_temp_var_offset(), new_temp_var_offset()
+    loop_label = ctx.new_label("setAndLoop")
+    end_label = ctx.new_label("setAndEnd")
+    ctx.emit("PUSHI 0"); ctx.emit(f"STOREL {result}", "Set intersection")
+    ctx.emit("PUSHI 1"); ctx.emit(f"STOREL {power}")
+    ctx.emit_label(loop_label)
+    ctx.emit(f"PUSHL {left}"); ctx.emit(f"JZ {end_label}", "Stop when either set has no bits left")
+    ctx.emit(f"PUSHL {right}"); ctx.emit(f"JZ {end_label}")
+    ctx.emit(f"PUSHL {left}"); ctx.emit("PUSHI 2"); ctx.emit("MOD")
+    ctx.emit(f"PUSHL {right}"); ctx.emit("PUSHI 2"); ctx.emit("MOD"); ctx.emit("MUL", "Lowest bit in both sets")
+    ctx.emit(f"PUSHL {power}"); ctx.emit("MUL"); ctx.emit(f"PUSHL {result}"); ctx.emit("ADD"); ctx.emit(f"STOREL {result}")
+    for offset in (left, right):
+        ctx.emit(f"PUSHL {offset}"); ctx.emit("PUSHI 2"); ctx.emit("DIV"); ctx.emit(f"STOREL {offset}")
+    ctx.emit(f"PUSHL {power}"); ctx.emit("PUSHI 2"); ctx.emit("MUL"); ctx.emit(f"STOREL {power}")
+    ctx.emit(f"JUMP {loop_label}")
+    ctx.emit_label(end_label)
+    ctx.emit(f"PUSHL {result}")
+
+def emit_set_membership(node):
+    element, set_node = node.left, node.right
+    values = constant_set_values(set_node)
+    if values is not None:
+        emit_membership_in_constant(element, values)
+    elif isinstance(set_node, ast_nodes.SetLiteral) and id(set_node) not in ctx.hoisted_expressions:
+        emit_membership_by_comparison(element, set_node) # variable elements, no range to pack them in
+    else:
+        set_type = th.determine_expression_type(set_node)
+        _, low, high = parse_set_type(set_type) or (None, None, None)
+        if low is None:
+            raise ValueError("A set constructor needs a set variable, parameter or IN to give it a range.")
+        element_value = constant_ordinal(element)
+        if element_value is None:
+            emit_bit_test(element, lambda: emit_set(set_node, set_type), low, high)
+        elif low <= element_value <= high:
+            emit_set(set_node, set_type)
+            ctx.emit(f"PUSHI {1 << (element_value - low)}"); ctx.emit("DIV")
+            ctx.emit("PUSHI 2"); ctx.emit("MOD", f"Bit of {element_value}")
+        else:
+            ctx.emit("PUSHI 0", "Element outside the range of the set")
+
+def emit_membership_in_constant(element, values):
+    element_value = constant_ordinal(element)
+    if element_value is not None:
+        emit_constant(element_value in values, "Folded set membership")
+        return
+    if not values:
+        visit(element); ctx.emit("POP 1"); ctx.emit("PUSHI 0", "Nothing is in the empty set")
+        return
+    low, high = min(values), max(values)
+    if len(values) == high - low + 1: # one range, two comparisons
+        load_element = emit_reloadable(element)
+        if low == high:
+            ctx.emit(f"PUSHI {low}"); ctx.emit("EQUAL", "Membership in a one-element set")
+            return
+        ctx.emit(f"PUSHI {low}"); ctx.emit("SUPEQ")
+        load_element()
+        ctx.emit(f"PUSHI {high}"); ctx.emit("INFEQ"); ctx.emit("AND", "Membership in a range")
+        return
+    emit_bit_test(element, lambda: ctx.emit(f"PUSHI {set_mask(values, low)}", "Constant set"), low, high)
+
+def emit_membership_by_comparison(element, set_node):
+    load_element = emit_reloadable(element)
+    for position, member in enumerate(set_node.elements):
+        if position:
+            load_element()
+        if isinstance(member, ast_nodes.SetRange):
+            ctx.emit(f"PUSHI {constant_ordinal(member.low)}"); ctx.emit("SUPEQ")
+            load_element()
+            ctx.emit(f"PUSHI {constant_ordinal(member.high)}"); ctx.emit("INFEQ"); ctx.emit("AND")
+        else:
+            emit_ordinal(member); ctx.emit("EQUAL")
+        if position:
+            ctx.emit("OR")
+    if not set_node.elements:
+        ctx.emit("POP 1"); ctx.emit("PUSHI 0", "Nothing is in the empty set")
+
+# pushes an expression and returns a function that pushes it again (from a temp unless it is a plain variable)
+def emit_reloadable(node):
+    if isinstance(node, ast_nodes.Identifier) or constant_ordinal(node) is not None:
+        emit_ordinal(node)
+        return lambda: emit_ordinal(node)
+    offset = new_temp_var_offset()
+    visit(node)
+    ctx.emit(f"STOREL {offset}"); ctx.emit(f"PUSHL {offset}")
+    return lambda: ctx.emit(f"PUSHL {offset}")
+
+# pushes element IN set for a set packed from `low`, `emit_set_value` pushing the set
+def emit_bit_test(element, emit_set_value, low, high):
+    load_element = emit_reloadable(element)
+    outside_label = ctx.new_label("setOutside")
+    end_label = ctx.new_label("setInEnd")
+    needs_range_check = not (th.determine_expression_type(element) == 'BOOLEAN' and low <= 0 and high >= 1)
+    if needs_range_check: # bits outside the set are not in the table
+        ctx.emit(f"PUSHI {low}"); ctx.emit("SUPEQ")
+        load_element()
+        ctx.emit(f"PUSHI {high}"); ctx.emit("INFEQ"); ctx.emit("AND")
+        ctx.emit(f"JZ {outside_label}", "Elements outside the range of the set are not in it")
+    else:
+        ctx.emit("POP 1")
+    emit_set_value()
+    ctx.emit("PUSHGP")
+    load_element()
+    if ctx.set_powers_offset != low:
+        ctx.emit(f"PUSHI {ctx.set_powers_offset - low}"); ctx.emit("ADD")
+    ctx.emit("LOADN", "Power of two of the element's bit")
+    ctx.emit("DIV"); ctx.emit("PUSHI 2"); ctx.emit("MOD", "Bit of the element")
+    if needs_range_check:
+        ctx.emit(f"JUMP {end_label}")
+        ctx.emit_label(outside_label)
+        ctx.emit("PUSHI 0")
+        ctx.emit_label(end_label)
+
 @register_visitor("FunctionCall")
 def visit_FunctionCall(node):
     func_name_original = node.name
@@ -608,45 +1445,18 @@ def visit_FunctionCall(node):
                     else: ctx.emit("WRITEI", f"Defaulting to WRITEI for unknown type {arg_type}")
                 ctx.emit("WRITELN")
             return
-        elif builtin_name == "BUILTIN_LENGTH":
-            arg = check_args(1, func_name_original)
-            if isinstance(arg, ast_nodes.Literal) and isinstance(arg.value, str): # Constant folding
-                ctx.emit(f"PUSHI {len(arg.value)}", f"Folded Length('{arg.value}')")
-            else:
-                visit(arg); ctx.emit("STRLEN", f"VM STRLEN for {func_name_original}")
-            return
-        # ABS
-        elif builtin_name == "BUILTIN_ABS":
-            arg_node = check_args(1, func_name_original)
-            visit(arg_node) # Value on stack
-            arg_type = th.determine_expression_type(arg_node)
-            abs_end_label = ctx.new_label("absEnd")
-            if arg_type == "INTEGER":
-                ctx.emit("DUP 1","ABS - Check if is negative"); ctx.emit("PUSHI 0"); ctx.emit("INF") # val, (val < 0)
-                ctx.emit(f"JZ {abs_end_label}" , "If not (val < 0), jump to end") # If not (val < 0), jump to end
-                ctx.emit("PUSHI 0","Making negative"); ctx.emit("SWAP"); ctx.emit("SUB") # Negate
-            elif arg_type == "REAL":
-                ctx.emit("DUP 1","ABS - Check if is negative"); ctx.emit("PUSHF 0.0"); ctx.emit("FINF")
-                ctx.emit(f"JZ {abs_end_label}" , "If not (val < 0), jump to end")
-                ctx.emit("PUSHF 0.0","Making negative"); ctx.emit("SWAP"); ctx.emit("FSUB")
-            else: raise TypeError(f"Unsupported type {arg_type} for ABS.")
-            ctx.emit_label(abs_end_label)
-            return
-        # SQR
-        elif builtin_name == "BUILTIN_SQR":
-            arg_node = check_args(1, func_name_original)
-            visit(arg_node)
-            arg_type = th.determine_expression_type(arg_node)
-            ctx.emit("DUP 1")
-            if arg_type == "INTEGER": ctx.emit("MUL")
-            elif arg_type == "REAL": ctx.emit("FMUL")
-            else: raise TypeError(f"Unsupported type {arg_type} for SQR.")
-            return
-        else:
-            ctx.emit(f"// Builtin {builtin_name} call not fully implemented in generator", "")
-            if node.arguments:
-                for arg_expr in node.arguments: visit(arg_expr)
+        builtin = builtin_library.lookup(func_sym.name)
+        if builtin is None:
+            raise ValueError(f"Builtin '{func_name_original}' has no code generator.")
+        check_args(len(func_sym.params_info), func_name_original)
+        constant_value = evaluate_constant(node, ctx.current_scope.resolve)
+        if constant_value is not None: # every argument is constant, compute the call now
+            emit_constant(constant_value, f"Folded {func_name_original}")
             return
+        for arg_expr in node.arguments:
+            visit(arg_expr)
+        builtin.lower([th.determine_expression_type(arg_expr) for arg_expr in node.arguments])
+        return
 
     # User-defined function/procedure
     num_expected_params = len(func_sym.params_info)
@@ -662,6 +1472,8 @@ def visit_FunctionCall(node):
                 arg_sym = ctx.current_scope.resolve(arg_expr.name)
                 if not arg_sym:
                     raise ValueError(f"Undefined variable '{arg_expr.name}' for VAR param.")
+                if arg_sym.kind not in ['variable', 'parameter']: # constants have a value, not an address
+                    raise ValueError(f"'{arg_expr.name}' is a {arg_sym.kind}, not a variable, and can't be passed to VAR param '{param_info.name}'.")
                 if arg_sym.scope_level == 0: # Global var
                     ctx.emit("PUSHGP", "Push global base for VAR param")
                     ctx.emit(f"PUSHI {arg_sym.address_or_offset}", f"Offset of global var '{arg_expr.name}'")
@@ -669,26 +1481,101 @@ def visit_FunctionCall(node):
                 else: # Local variable or another VAR param
                     if arg_sym.is_var_param: # Passing a VAR param to another VAR param
                         ctx.emit(f"PUSHL {arg_sym.address_or_offset}", f"Pass address from VAR param '{arg_expr.name}'")
-                    else: # Regular local variable
+                    else: # Regular local variable, its address escapes so its slot is pinned
+                        ctx.current_frame.pin(arg_sym.address_or_offset)
                         ctx.emit("PUSHFP", "Push FP for VAR param")
                         ctx.emit(f"PUSHI {arg_sym.address_or_offset}", f"Offset of local var '{arg_expr.name}'")
                         ctx.emit("PADD", f"Compute address of local var '{arg_expr.name}'")
+            elif is_set_type(param_info.sym_type): # Value parameter of a set type
+                emit_set(arg_expr, param_info.sym_type)
             else: # Value parameter
                 visit(arg_expr)
     ctx.emit(f"PUSHA {func_sym.address_or_offset}", f"Push address of {func_name_original}")
     ctx.emit("CALL")
 
 
+# reads a line of input and converts it to a value of `target_type`
+def emit_read_value(target_type, op, target_name, value_range=None):
+    ctx.emit("READ", f"Read string input for '{target_name}'")
+    target_type = target_type.upper() if target_type else 'UNKNOWN'
+    if target_type == 'INTEGER': ctx.emit("ATOI")
+    elif target_type == 'REAL': ctx.emit("ATOF")
+    elif target_type == 'STRING': pass # Already a string address
+    elif target_type == 'CHAR': ctx.emit("PUSHI 0"); ctx.emit("CHARAT") # ASCII of the first character
+    else: raise TypeError(f"Unsupported type {target_type} for {op} into '{target_name}'.")
+    emit_range_check(None, value_range, f"the value read into '{target_name}'")
+
+# Output. Whatever is known at compile time (string, CHAR, INTEGER and BOOLEAN literals and
+# constants, the constant parts of a concatenation) is written as text, and text next to text
+# is joined, so Write('x = ', 1, ' '); Writeln(x) is one PUSHS "x = 1 " / WRITES before the
+# WRITEI of x. Consecutive Write statements are written as one (a Writeln may end the run), so
+# their constant text joins across statements too. REAL constants keep their WRITEF, the VM
+# decides how they look.
+
+# the statements of a statement list with each run of Write statements, and the Write or
+# Writeln after them, replaced by a single one
+def batch_writes(statements):
+    batched = []
+    for stmt in statements:
+        previous = batched[-1] if batched else None
+        if is_write(stmt) and is_write(previous) and previous.operation == "write":
+            merged = ast_nodes.IOCall(operation=stmt.operation, arguments=previous.arguments + stmt.arguments,
+                                      lineno=previous.lineno)
+            merged.start, merged.end = previous.start, stmt.end
+            batched[-1] = merged
+        else:
+            batched.append(stmt)
+    return batched
+
+def is_write(stmt):
+    return isinstance(stmt, ast_nodes.IOCall) and stmt.operation.lower() in ["write", "writeln"]
+
+# the text of a value written the way WRITES/WRITEI would write it, None if it is not known at compile time
+def output_text(expr):
+    value = evaluate_constant(expr, ctx.current_scope.resolve)
+    if isinstance(value, bool):
+        return "1" if value else "0" # booleans are written with WRITEI
+    if isinstance(value, (int, str)):
+        return str(value)
+    return None
+
+# what the arguments of a Write write, in order: expressions, and texts (str) where constant
+# output next to constant output was joined
+def output_items(arguments):
+    items = []
+    for arg_expr in arguments:
+        parts = [arg_expr]
+        if output_text(arg_expr) is None and th.is_string_concatenation(arg_expr) and id(arg_expr) not in ctx.hoisted_expressions:
+            parts = concatenation_parts(arg_expr) # write the parts, no need to join them
+        for part in parts:
+            if items and is_output_text(items[-1]) and is_output_text(part):
+                items[-1] = text_of(items[-1]) + text_of(part)
+                ctx.write_instructions_saved += 2
+            else:
+                items.append(part)
+    written = [item for item in items if not (is_output_text(item) and text_of(item) == "")] # '' writes nothing
+    if written:
+        ctx.write_instructions_saved += 2 * (len(items) - len(written))
+        items = written
+    return items
+
+def is_output_text(item):
+    return isinstance(item, str) or output_text(item) is not None
+
+def text_of(item):
+    return item if isinstance(item, str) else output_text(item)
+
 @register_visitor("IOCall") # Handles read, readln, write, writeln if they are distinct AST nodes
 def visit_IOCall(node):
     op = node.operation.lower()
     if op in ["write", "writeln"]:
-        if op == "writeln" and not node.arguments:
-            ctx.emit("WRITELN")
-            return
-        for arg_expr in node.arguments:
-            visit(arg_expr)
-            arg_type = th.determine_expression_type(arg_expr)
+        for item in output_items(node.arguments):
+            if isinstance(item, str):
+                emit_constant(item, "Constant output")
+                ctx.emit("WRITES")
+                continue
+            visit(item)
+            arg_type = th.determine_expression_type(item)
             if arg_type == 'STRING': ctx.emit("WRITES")
             elif arg_type == 'REAL': ctx.emit("WRITEF")
             elif arg_type == 'INTEGER': ctx.emit("WRITEI")
@@ -704,7 +1591,11 @@ def visit_IOCall(node):
             # The VM's READ instruction likely pushes the string address read from input.
             # Then, conversion (ATOI, ATOF) happens, then STORE.
 
-            if isinstance(arg_var_node, ast_nodes.Identifier):
+            if th.uses_designator_layout(arg_var_node):
+                emit_designator_store(arg_var_node, lambda target: emit_read_value(target.sym_type, op, designator_text(arg_var_node),
+                                                                                    target.value_range))
+
+            elif isinstance(arg_var_node, ast_nodes.Identifier):
                 var_name = arg_var_node.name
                 sym = ctx.current_scope.resolve(var_name)
                 if not sym: raise ValueError(f"Undefined var '{var_name}' in {op}.")
@@ -718,6 +1609,7 @@ def visit_IOCall(node):
                 elif target_type == 'CHAR': # Read a string, take first char, get ASCII
                     ctx.emit("PUSHI 0"); ctx.emit("CHARAT") # Get ASCII of first char
                 else: raise TypeError(f"Unsupported type {target_type} for {op} into '{var_name}'.")
+                emit_range_check(None, sym.value_range, f"the value read into '{var_name}'")
 
                 # Value to store is now on TOS. Store it.
                 if sym.is_var_param:
@@ -739,7 +1631,9 @@ def visit_IOCall(node):
                 if not sym_array or not (sym_array.is_array or sym_array.is_var_param): # VAR param could be array
                     raise ValueError(f"'{array_name}' not a defined array/VAR param for {op}.")
 
-                if sym_array.is_var_param: # VAR param that is an array
+                if sym_array in ctx.hoisted_array_bases: # Inside a loop, base hoisted with the lower bound folded in
+                    ctx.emit(f"PUSHL {ctx.hoisted_array_bases[sym_array]}", f"Load hoisted base of array '{array_name}'")
+                elif sym_array.is_var_param: # VAR param that is an array
                     ctx.emit(f"PUSHL {sym_array.address_or_offset}", f"Load address from VAR param array '{array_name}'")
                 elif sym_array.scope_level == 0:
                     ctx.emit("PUSHGP"); ctx.emit(f"PUSHI {sym_array.address_or_offset}"); ctx.emit("PADD")
@@ -749,7 +1643,9 @@ def visit_IOCall(node):
                 
                 # Index
                 visit(arg_var_node.index) # Stack: [..., base_address, user_index]
-                if sym_array.is_array and sym_array.array_lower_bound is not None and sym_array.array_lower_bound != 0:
+                emit_range_check(arg_var_node.index, array_index_bounds(sym_array), f"the index of '{array_name}'")
+                if sym_array.is_array and sym_array.array_lower_bound is not None and sym_array.array_lower_bound != 0 \
+                    and sym_array not in ctx.hoisted_array_bases:
                     ctx.emit(f"PUSHI {sym_array.array_lower_bound}"); ctx.emit("SUB")
                 # Stack: [..., base_address, adjusted_index]
 
@@ -765,6 +1661,7 @@ def visit_IOCall(node):
                 elif element_type == 'STRING': pass
                 elif element_type == 'CHAR': ctx.emit("PUSHI 0"); ctx.emit("CHARAT")
                 else: raise TypeError(f"Unsupported element type {element_type} for {op} into {array_name}[].")
+                emit_range_check(None, sym_array.value_range, f"the value read into '{array_name}[]'")
                 # Stack: [..., base_addr, adj_idx, value_to_store]
 
                 # 3. STOREN
@@ -0,0 +1,266 @@
+import time
+from .ir import Instruction
+
+class PassManager:
+    def __init__(self):
+        """Runs optimization passes over a ControlFlowGraph and records how long each one took."""
+        self.passes = []    # (name, function) in execution order
+        self.timings = []   # (name, seconds, instructions before, instructions after) of the last run
+
+    def add(self, name, pass_function):
+        self.passes.append((name, pass_function))
+        return self
+
+    def run(self, cfg):
+        self.timings = []
+        for name, pass_function in self.passes:
+            instructions_before = cfg.instruction_count()
+            start = time.perf_counter()
+            pass_function(cfg)
+            cfg.link() # passes may move blocks or retarget jumps
+            elapsed = time.perf_counter() - start
+            self.timings.append((name, elapsed, instructions_before, cfg.instruction_count()))
+        return cfg
+
+    def format_timings(self):
+        lines = []
+        for name, elapsed, before, after in self.timings:
+            lines.append(f"  {name:<24} {elapsed * 1000:8.3f} ms  {before} -> {after} instructions")
+        return lines
+
+def default_pass_manager():
+    """The passes run by generate() when optimizations are enabled."""
+    return (PassManager()
+            .add("jump_threading", jump_threading)
+            .add("block_layout", block_layout)
+            .add("remove_redundant_jumps", remove_redundant_jumps)
+            .add("share_frame_slots", share_frame_slots))
+
+# --- Jump threading ---
+
+def jump_threading(cfg):
+    """Retargets jumps whose target block only jumps somewhere else (JUMP to JUMP)."""
+    for block in cfg.blocks:
+        for instr in block.instructions:
+            if instr.is_jump:
+                instr.operand = final_jump_target(cfg, instr.operand)
+
+# follows chains of blocks that contain nothing but an unconditional JUMP
+def final_jump_target(cfg, label):
+    seen = set()
+    while label not in seen:
+        seen.add(label)
+        target_block = cfg.block_for_label(label)
+        if target_block is None:
+            break
+        real = target_block.real_instructions
+        if not real: # empty block, control falls into the next one
+            next_block = target_block.fallthrough
+            if next_block is None or not next_block.labels:
+                break
+            label = next_block.labels[0]
+            continue
+        if len(real) != 1 or real[0].opcode != "JUMP":
+            break
+        label = real[0].operand
+    return label
+
+# --- Block layout ---
+
+def block_layout(cfg):
+    """
+    Reorders blocks so that the target of an unconditional JUMP follows the jump
+    whenever possible (the JUMP then becomes redundant), and drops unreachable blocks.
+    Blocks that fall through to the next one always stay together.
+    """
+    reachable = reachable_blocks(cfg)
+    chains = []          # groups of blocks linked by fallthrough edges, in original order
+    chain_of = {}
+    for block in cfg.blocks:
+        if block not in reachable:
+            continue
+        previous = chains[-1][-1] if chains else None
+        if previous is not None and previous.fallthrough is block:
+            chains[-1].append(block)
+        else:
+            chains.append([block])
+        chain_of[block] = chains[-1]
+
+    tail_chain = None
+    if chains and not is_terminated(chains[-1][-1]): # the program end falls off the last block, keep it last
+        tail_chain = chains.pop()
+
+    placed = set()
+    layout = []
+    pending = iter(chains) # chains it has gone past are all placed, so each is looked at once
+    next_chain = next(pending, None)
+    while next_chain is not None:
+        placed.add(id(next_chain))
+        layout.extend(next_chain)
+        last = next_chain[-1].last_instruction
+        next_chain = None
+        if last is not None and last.opcode == "JUMP": # try to place the jump target right after
+            target = cfg.block_for_label(last.operand)
+            candidate = chain_of.get(target)
+            if candidate is not None and candidate[0] is target and id(candidate) not in placed:
+                next_chain = candidate
+        if next_chain is None:
+            next_chain = next((chain for chain in pending if id(chain) not in placed), None)
+    if tail_chain is not None:
+        layout.extend(tail_chain)
+    cfg.blocks = layout
+
+def is_terminated(block):
+    last = block.last_instruction
+    return last is not None and last.is_terminator
+
+def reachable_blocks(cfg):
+    if not cfg.blocks:
+        return set()
+    reachable = set()
+    pending = [cfg.blocks[0]] + cfg.address_taken_blocks()
+    while pending:
+        block = pending.pop()
+        if block in reachable:
+            continue
+        reachable.add(block)
+        pending.extend(block.successors)
+    return reachable
+
+def remove_redundant_jumps(cfg):
+    """Removes JUMPs to the block that immediately follows, and JZs to it (replaced by a POP)."""
+    for i, block in enumerate(cfg.blocks):
+        next_block = cfg.blocks[i + 1] if i + 1 < len(cfg.blocks) else None
+        last = block.last_instruction
+        if last is None or not last.is_jump or next_block is None:
+            continue
+        if not falls_into(cfg, next_block, last.operand):
+            continue
+        position = block.instructions.index(last)
+        if last.opcode == "JUMP":
+            del block.instructions[position]
+        else: # both outcomes of the JZ continue in the next block, only the condition has to go
+            block.instructions[position] = Instruction("POP", "1", "Condition not needed, both branches continue here")
+
+# true if jumping to `label` from the end of the previous block is the same as falling into `block`
+def falls_into(cfg, block, label):
+    while block is not None:
+        if label in block.labels:
+            return True
+        if block.real_instructions: # only empty blocks can be skipped
+            return False
+        block = block.fallthrough
+    return False
+
+# --- Stack slot sharing ---
+
+SLOT_OPCODES = {"PUSHL", "STOREL"}
+
+def share_frame_slots(cfg):
+    """
+    Gives locals and temps whose live ranges never overlap the same frame slot and
+    shrinks the prologue PUSHN of every frame. Pinned slots (address taken) keep their offset.
+    """
+    for frame in cfg.frames:
+        entry = cfg.frame_entry(frame)
+        if entry is None: # empty frame or routine dropped as unreachable
+            continue
+        region = frame_blocks(entry)
+        assignment = color_slots(slot_interference(region, frame.pinned), frame.pinned)
+        for block in region:
+            for instr in block.instructions:
+                slot = frame_slot(instr)
+                if slot in assignment:
+                    instr.operand = str(assignment[slot])
+        used_slots = set(assignment.values()) | frame.pinned
+        frame.size = max(used_slots) + 1 if used_slots else 0
+        frame.reserve_instruction.operand = str(frame.size)
+        if frame.size == 0:
+            entry.instructions.remove(frame.reserve_instruction)
+
+def format_frame_sizes(frames):
+    return [f"  {frame.name:<24} {frame.original_size} -> {frame.size} slots" for frame in frames]
+
+# blocks of the routine that starts at `entry` (calls are not edges, so other routines are not included)
+def frame_blocks(entry):
+    region = []
+    seen = set()
+    pending = [entry]
+    while pending:
+        block = pending.pop()
+        if block in seen:
+            continue
+        seen.add(block)
+        region.append(block)
+        pending.extend(reversed(block.successors))
+    return region
+
+# the FP-relative local slot an instruction reads or writes (parameters have negative offsets)
+def frame_slot(instr):
+    if instr.opcode not in SLOT_OPCODES:
+        return None
+    try:
+        slot = int(instr.operand)
+    except (TypeError, ValueError):
+        return None
+    return slot if slot >= 0 else None
+
+# slot -> slots live at one of its definitions (two interfering slots can not share)
+def slot_interference(region, pinned):
+    region_set = set(region)
+    uses, defs = {}, {}
+    for block in region: # upward exposed reads and writes of every block
+        used, defined = set(), set()
+        for instr in block.instructions:
+            slot = frame_slot(instr)
+            if slot is None or slot in pinned:
+                continue
+            if instr.opcode == "PUSHL":
+                if slot not in defined:
+                    used.add(slot)
+            else:
+                defined.add(slot)
+        uses[block], defs[block] = used, defined
+
+    live_in = {block: set() for block in region}
+    live_out = {block: set() for block in region}
+    changed = True
+    while changed: # backward dataflow until nothing changes
+        changed = False
+        for block in reversed(region):
+            out = set()
+            for successor in block.successors:
+                if successor in region_set:
+                    out |= live_in[successor]
+            new_in = uses[block] | (out - defs[block])
+            if out != live_out[block] or new_in != live_in[block]:
+                live_out[block], live_in[block] = out, new_in
+                changed = True
+
+    interference = {}
+    for block in region:
+        live = set(live_out[block])
+        for instr in reversed(block.instructions):
+            slot = frame_slot(instr)
+            if slot is None or slot in pinned:
+                continue
+            interference.setdefault(slot, set())
+            if instr.opcode == "STOREL":
+                for other in live - {slot}:
+                    interference[slot].add(other)
+                    interference.setdefault(other, set()).add(slot)
+                live.discard(slot)
+            else:
+                live.add(slot)
+    return interference
+
+# greedy coloring in slot order, colors are the new offsets
+def color_slots(interference, pinned):
+    assignment = {}
+    for slot in sorted(interference):
+        taken = {assignment[other] for other in interference[slot] if other in assignment}
+        color = 0
+        while color in taken or color in pinned:
+            color += 1
+        assignment[slot] = color
+    return assignment
@@ -1,5 +1,10 @@
 import ast_nodes
 from . import generation_context as generation_context # For current_scope in determine_expression_type
+from . import builtin_library
+from optimizer.constant_eval import evaluate_constant, ordinal_type, ordinal_value
+from set_types import set_type_name, is_set_type, common_set_type
+from record_types import RECORD_TYPE, RecordLayout, FieldLayout, is_record, element_size, storage_size, array_element
+from sized_types import base_type, declared_range
 
 def process_array_type(var_type_node):
     """Processes an AST node representing an array type."""
@@ -12,11 +17,9 @@ def process_array_type(var_type_node):
         start_node = var_type_node.index_range[0]
         end_node = var_type_node.index_range[1]
 
-        if isinstance(start_node, ast_nodes.Literal) and isinstance(start_node.value, int) and \
-            isinstance(end_node, ast_nodes.Literal) and isinstance(end_node.value, int):
-
-            low = start_node.value
-            high = end_node.value
+        low = constant_bound(start_node)
+        high = constant_bound(end_node)
+        if low is not None and high is not None:
             if high < low:
                 raise ValueError(f"Array upper bound {high} less than lower bound {low}")
             array_size = high - low + 1
@@ -24,16 +27,146 @@ def process_array_type(var_type_node):
             is_array_type = True
 
             if isinstance(var_type_node.element_type, str):
-                element_type_str = var_type_node.element_type.upper()
+                element_type_str = base_type(var_type_node.element_type).upper()
             elif hasattr(var_type_node.element_type, '__class__'): # If element_type is another AST node
                 element_type_str = type_node_to_string(var_type_node.element_type)
 
         else:
-            raise TypeError("Array bounds in ast_nodes.ArrayType must be integer literals.")
+            raise TypeError("Array bounds in ast_nodes.ArrayType must be constant integer expressions.")
     return is_array_type, array_size, lower_bound, element_type_str
 
+def constant_bound(bound_node):
+    """The value of an array bound (literals and CONST names in scope), None if it is not an integer constant."""
+    value = evaluate_constant(bound_node, generation_context.current_scope.resolve)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return None
+
+def process_record_type(var_type_node):
+    """The RecordLayout of a record type, or of the elements of an array of records; None for other types."""
+    if isinstance(var_type_node, ast_nodes.ArrayType):
+        var_type_node = var_type_node.element_type
+    if not isinstance(var_type_node, ast_nodes.RecordType):
+        return None
+    layout = RecordLayout()
+    for field in var_type_node.field_list:
+        is_array, element_count, lower_bound, element_type = process_array_type(field.field_type)
+        field_type = type_node_to_string(field.field_type)
+        field_record_layout = process_record_type(field.field_type)
+        for field_name in field.id_list:
+            layout.add_field(field_name, field_type, is_array=is_array,
+                             array_lower_bound=lower_bound if is_array else None,
+                             array_element_count=element_count if is_array else None,
+                             element_type=element_type, record_layout=field_record_layout,
+                             element_layout=process_element_layout(field.field_type),
+                             value_range=declared_range(field.field_type))
+    return layout
+
+def process_element_layout(var_type_node):
+    """The FieldLayout of the rows of an array of arrays (ARRAY [a..b, c..d] OF T is one); None for other types."""
+    if not isinstance(var_type_node, ast_nodes.ArrayType) or not isinstance(var_type_node.element_type, ast_nodes.ArrayType):
+        return None
+    row_type = var_type_node.element_type
+    _, element_count, lower_bound, element_type = process_array_type(row_type)
+    return FieldLayout(None, 0, type_node_to_string(row_type), is_array=True, array_lower_bound=lower_bound,
+                       array_element_count=element_count, element_type=element_type,
+                       record_layout=process_record_type(row_type), element_layout=process_element_layout(row_type),
+                       value_range=declared_range(row_type))
+
+def storage_slots(var_type_node):
+    """Slots taken by a variable of the type: one per scalar, array element, record field and row element."""
+    is_array, element_count, lower_bound, element_type = process_array_type(var_type_node)
+    return storage_size(FieldLayout(None, 0, type_node_to_string(var_type_node), is_array=is_array,
+                                    array_element_count=element_count, element_type=element_type,
+                                    record_layout=process_record_type(var_type_node),
+                                    element_layout=process_element_layout(var_type_node)))
+
+def designator_layout(node):
+    """
+    Where a variable, array element or record field is stored.
+
+    Returns (symbol of the variable, offset, indexes, description): the storage is at
+    offset + the sum of index * stride over indexes, (index expression, stride) pairs,
+    from the base of the variable's frame (GP or FP), lower bounds and constant terms
+    of the indexes folded into the offset. The description is the variable's Symbol
+    or the FieldLayout of the field or element. Each index comes with the bounds its
+    expression must be within, (index expression, stride, (low, high)).
+    """
+    if isinstance(node, ast_nodes.Identifier):
+        sym = generation_context.current_scope.resolve(node.name)
+        if sym is None or sym.kind != 'variable':
+            raise ValueError(f"'{node.name}' is not a variable whose fields or elements can be addressed.")
+        return sym, sym.address_or_offset, [], sym
+    if isinstance(node, ast_nodes.FieldAccess):
+        sym, offset, indexes, info = designator_layout(node.record)
+        field = info.record_layout.field(node.field) if is_record(info) else None
+        if field is None:
+            raise ValueError(f"No field '{node.field}' in the record of '{sym.name}'.")
+        return sym, offset + field.offset, indexes, field
+    if isinstance(node, ast_nodes.ArrayAccess):
+        sym, offset, indexes, info = designator_layout(node.array)
+        if not info.is_array:
+            raise ValueError(f"Indexing something that is not an array in '{sym.name}'.")
+        stride = element_size(info)
+        low = info.array_lower_bound or 0
+        index = constant_bound(node.index)
+        if index is not None: # a constant index is part of the offset
+            if not low <= index < low + info.array_element_count:
+                raise ValueError(f"Index {index} is out of the bounds {low}..{low + info.array_element_count - 1} of an array in '{sym.name}'.")
+            return sym, offset + (index - low) * stride, indexes, array_element(info)
+        index, displacement = split_index(node.index)
+        bounds = (low - displacement, low + info.array_element_count - 1 - displacement) # for the index without its constant
+        return sym, offset + (displacement - low) * stride, indexes + [(index, stride, bounds)], array_element(info)
+    raise ValueError(f"{type(node).__name__} is not a variable, array element or record field.")
+
+def split_index(index_node):
+    """(variable part, constant) of an index such as j + 1 or i - 1, so that the constant joins the offset."""
+    if isinstance(index_node, ast_nodes.BinaryOperation) and index_node.operator in ['+', '-']:
+        right = constant_bound(index_node.right)
+        if right is not None:
+            index, displacement = split_index(index_node.left)
+            return index, displacement + (right if index_node.operator == '+' else -right)
+        left = constant_bound(index_node.left)
+        if left is not None and index_node.operator == '+':
+            index, displacement = split_index(index_node.right)
+            return index, displacement + left
+    return index_node, 0
+
+def uses_designator_layout(node):
+    """True if an array element or field access goes through a record or an array of arrays (see designator_layout)."""
+    if isinstance(node, ast_nodes.FieldAccess):
+        return True
+    if not isinstance(node, ast_nodes.ArrayAccess):
+        return False
+    if not isinstance(node.array, ast_nodes.Identifier):
+        return uses_designator_layout(node.array)
+    sym = generation_context.current_scope.resolve(node.array.name)
+    return sym is not None and sym.kind == 'variable' and (sym.record_layout is not None or sym.element_layout is not None)
+
+def process_set_type(var_type_node):
+    """(element type, low, high) of an ast_nodes.SetType, the bounds as ordinal numbers."""
+    low, high = (evaluate_constant(bound, generation_context.current_scope.resolve) for bound in var_type_node.element_range)
+    return ordinal_type(low), ordinal_value(low), ordinal_value(high)
+
+def set_operand_type(expr_node):
+    """The set type a binary operation works on when one of its operands is a set, None otherwise."""
+    left_type = determine_expression_type(expr_node.left)
+    right_type = determine_expression_type(expr_node.right)
+    if is_set_type(left_type) or is_set_type(right_type):
+        return common_set_type(left_type, right_type)
+    return None
+
+def is_string_concatenation(expr_node):
+    """True if the expression is a + of two STRING operands."""
+    return isinstance(expr_node, ast_nodes.BinaryOperation) and expr_node.operator == '+' and \
+        determine_expression_type(expr_node.left) == 'STRING' and determine_expression_type(expr_node.right) == 'STRING'
+
 def type_node_to_string(var_type_node):
     """Converts a variable type AST node or string to a string representation."""
+    if isinstance(var_type_node, ast_nodes.SetType):
+        return set_type_name(*process_set_type(var_type_node))
+    if isinstance(var_type_node, ast_nodes.RecordType):
+        return RECORD_TYPE
     if isinstance(var_type_node, ast_nodes.ArrayType):
         is_array, _, _, elem_type = process_array_type(var_type_node)
         if is_array and elem_type:
@@ -41,7 +174,7 @@ def type_node_to_string(var_type_node):
         elif is_array:
             return "ARRAY OF UNKNOWN_ELEMENT_TYPE"
     elif isinstance(var_type_node, str):
-        return var_type_node.upper()
+        return base_type(var_type_node).upper() # BYTE, WORD, ... are INTEGER, SINGLE and DOUBLE are REAL
     
     if hasattr(var_type_node, '__class__'):
         # Fallback for other AST node types 
@@ -57,8 +190,19 @@ def type_node_to_string(var_type_node):
 def determine_expression_type(expr_node):
     """
     Tries to determine the type of an expression node.
-    Returns 'INTEGER', 'REAL', 'STRING', 'BOOLEAN', or 'UNKNOWN'.
+    Returns 'INTEGER', 'REAL', 'STRING', 'BOOLEAN', a set type name (set_types.py), or 'UNKNOWN'.
+    The type of every node is worked out once per generation and remembered, so asking
+    again for the operands of a node (set, concatenation and arithmetic code do) is free.
     """
+    cached = generation_context.expression_types.get(id(expr_node))
+    if cached is not None and cached[0] is expr_node:
+        return cached[1]
+    expr_type = infer_expression_type(expr_node)
+    generation_context.expression_types[id(expr_node)] = (expr_node, expr_type) # the node is kept so its id is not reused
+    return expr_type
+
+def infer_expression_type(expr_node):
+    """The type of an expression node from the types of its operands (see determine_expression_type)."""
     if isinstance(expr_node, ast_nodes.Literal):
         if isinstance(expr_node.value, str):
             return 'STRING'
@@ -80,6 +224,9 @@ def determine_expression_type(expr_node):
         if not func_sym:
             func_sym = generation_context.current_scope.resolve(func_name_original)
 
+        builtin = builtin_library.lookup(func_name_lower)
+        if builtin is not None and func_sym is not None and str(func_sym.address_or_offset).startswith("BUILTIN_"):
+            return builtin.result_type([determine_expression_type(arg) for arg in expr_node.arguments])
         if func_sym and hasattr(func_sym, 'return_type'):
             return func_sym.return_type.upper() if func_sym.return_type else 'UNKNOWN'
     elif isinstance(expr_node, ast_nodes.BinaryOperation):
@@ -91,6 +238,12 @@ def determine_expression_type(expr_node):
         right_type = determine_expression_type(expr_node.right)
         if left_type == 'REAL' or right_type == 'REAL':
             return 'REAL'
+        if expr_node.operator.upper() == 'IN':
+            return 'BOOLEAN'
+        if expr_node.operator == '+' and left_type == 'STRING' and right_type == 'STRING': # concatenation
+            return 'STRING'
+        if (is_set_type(left_type) or is_set_type(right_type)) and expr_node.operator in ['+', '-', '*']: # union, difference, intersection
+            return common_set_type(left_type, right_type) or 'UNKNOWN'
         if expr_node.operator in ['<', '>', '<=', '>=', '=', '<>', 'AND', 'OR', 'NOT']: # Relational/Logical ops return BOOLEAN
             return 'BOOLEAN'
         if left_type == 'INTEGER' and right_type == 'INTEGER':
@@ -98,10 +251,14 @@ def determine_expression_type(expr_node):
             if expr_node.operator.upper() in ['+', '-', '*', 'DIV', 'MOD']:
                 return 'INTEGER'
         return 'INTEGER' # Default for other binary ops, or 'UNKNOWN'
+    elif isinstance(expr_node, ast_nodes.SetLiteral):
+        return set_type_name() # takes the range of the set it is used with
     elif isinstance(expr_node, ast_nodes.UnaryOperation):
         if expr_node.operator.upper() == 'NOT':
             return 'BOOLEAN'
         return determine_expression_type(expr_node.operand) # Type is same as operand for unary +/-
+    elif isinstance(expr_node, (ast_nodes.ArrayAccess, ast_nodes.FieldAccess)) and uses_designator_layout(expr_node):
+        return str(designator_layout(expr_node)[3].sym_type).upper()
     elif isinstance(expr_node, ast_nodes.ArrayAccess):
         # Determine type from array's element type
         if isinstance(expr_node.array, ast_nodes.Identifier):